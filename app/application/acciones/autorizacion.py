@@ -7,6 +7,9 @@ from ..dtos import AutorizarDTO, ReautorizarDTO, IntentarCompletarDTO, OrdenDTO
 from ..mappers import orden_a_dto
 
 
+FACTOR_IVA = Decimal('1.16')
+
+
 class Autorizar(AccionBase):
     def ejecutar(self, dto: AutorizarDTO) -> OrdenDTO:
         o = self.repo.obtener(dto.order_id)
@@ -15,11 +18,11 @@ class Autorizar(AccionBase):
         
         idx_ant = self._obtener_indice_eventos_anterior(o)
         subtotal = sum(s.calcular_subtotal_estimado() for s in o.servicios)
-        monto = redondear_mitad_par(subtotal * Decimal('1.16'), 2)
+        monto = redondear_mitad_par(subtotal * FACTOR_IVA, 2)
         o.autorizar(monto)
         
-        self._registrar_eventos_nuevos(o, idx_ant)
         self.repo.guardar(o)
+        self._registrar_eventos_nuevos(o, idx_ant)
         return orden_a_dto(o)
 
 
@@ -32,8 +35,8 @@ class Reautorizar(AccionBase):
         idx_ant = self._obtener_indice_eventos_anterior(orden)
         orden.reautorizar(dto.nuevo_monto_autorizado)
         
-        self._registrar_eventos_nuevos(orden, idx_ant)
         self.repo.guardar(orden)
+        self._registrar_eventos_nuevos(orden, idx_ant)
         return orden_a_dto(orden)
 
 
@@ -48,11 +51,11 @@ class IntentarCompletar(AccionBase):
             orden.intentar_completar()
         except ErrorDominio as e:
             if e.codigo == CodigoError.REQUIRES_REAUTH:
-                self._registrar_eventos_nuevos(orden, idx_ant)
                 self.repo.guardar(orden)
+                self._registrar_eventos_nuevos(orden, idx_ant)
             raise
         
-        self._registrar_eventos_nuevos(orden, idx_ant)
         self.repo.guardar(orden)
+        self._registrar_eventos_nuevos(orden, idx_ant)
         return orden_a_dto(orden)
 
@@ -9,7 +9,7 @@ class AccionBase:
         self.auditoria = auditoria
     
     def _registrar_eventos_nuevos(self, orden: Orden, idx_anterior: int) -> None:
-        """Registra solo los eventos nuevos generados por la acción."""
+        """Registra los eventos nuevos de la acción. Se invoca siempre después de repo.guardar."""
         eventos_nuevos = orden.eventos[idx_anterior:]
         for evt in eventos_nuevos:
             self.auditoria.registrar(evt)
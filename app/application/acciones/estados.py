@@ -14,8 +14,8 @@ class EstablecerEstadoDiagnosticado(AccionBase):
         idx_ant = self._obtener_indice_eventos_anterior(orden)
         orden.establecer_estado_diagnosticado()
         
-        self._registrar_eventos_nuevos(orden, idx_ant)
         self.repo.guardar(orden)
+        self._registrar_eventos_nuevos(orden, idx_ant)
         return orden_a_dto(orden)
 
 
@@ -30,6 +30,5 @@ class EstablecerEstadoEnProceso(AccionBase):
         
         self.repo.guardar(o)
         self._registrar_eventos_nuevos(o, idx_ant)
-        
         return orden_a_dto(o)
 
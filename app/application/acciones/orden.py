@@ -1,10 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from ...domain.entidades import Orden, Evento
+from ...domain.entidades import Orden
 from ...domain.exceptions import ErrorDominio
 from ...domain.enums import CodigoError
-from ...domain.zona_horaria import ahora
 from .base import AccionBase
 from ..dtos import CrearOrdenDTO, CancelarDTO, EntregarDTO, OrdenDTO
 from ..mappers import orden_a_dto
@@ -80,7 +79,7 @@ class CrearOrden(AccionBase):
             vehiculo_placa = self._obtener_vehiculo_sin_repositorios(dto)
         
         orden = Orden(dto.order_id, cliente_nombre, vehiculo_placa, dto.timestamp)
-        orden.eventos.append(Evento("CREATED", ahora(), {}))
+        orden.registrar_creacion()
         
         idx_ant = self._obtener_indice_eventos_anterior(orden)
         self.repo.guardar(orden)
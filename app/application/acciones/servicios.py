@@ -21,8 +21,10 @@ class AgregarServicio(AccionBase):
             componentes=comps
         )
         
+        idx_ant = self._obtener_indice_eventos_anterior(orden)
         orden.agregar_servicio(srv)
         self.repo.guardar(orden)
+        self._registrar_eventos_nuevos(orden, idx_ant)
         return orden_a_dto(orden)
     
     def _crear_componentes(self, componentes_data):
@@ -49,26 +51,21 @@ class EstablecerCostoReal(AccionBase):
             raise ErrorDominio(CodigoError.ORDER_NOT_FOUND, f"Orden {dto.order_id} no existe")
         
         idx_ant = self._obtener_indice_eventos_anterior(orden)
-        servicio_id, servicio = self._obtener_servicio_id_y_objeto(orden, dto)
-        orden.establecer_costo_real(servicio_id, dto.costo_real, dto.componentes_reales)
-        
-        if dto.completed is not None and servicio:
-            servicio.completado = dto.completed
+        servicio_id = self._obtener_servicio_id(orden, dto)
+        orden.establecer_costo_real(servicio_id, dto.costo_real, dto.componentes_reales, dto.completed)
         
-        self._registrar_eventos_nuevos(orden, idx_ant)
         self.repo.guardar(orden)
+        self._registrar_eventos_nuevos(orden, idx_ant)
         return orden_a_dto(orden)
     
-    def _obtener_servicio_id_y_objeto(self, orden, dto):
+    def _obtener_servicio_id(self, orden, dto):
         if dto.service_index is not None:
             if dto.service_index < 1 or dto.service_index > len(orden.servicios):
                 raise ErrorDominio(CodigoError.ORDER_NOT_FOUND, f"Índice {dto.service_index} inválido")
-            servicio = orden.servicios[dto.service_index - 1]
-            return servicio.id_servicio, servicio
+            return orden.servicios[dto.service_index - 1].id_servicio
         
         if not dto.servicio_id:
             raise ErrorDominio(CodigoError.ORDER_NOT_FOUND, "Falta service_id o service_index")
         
-        servicio = next((s for s in orden.servicios if s.id_servicio == dto.servicio_id), None)
-        return dto.servicio_id, servicio
+        return dto.servicio_id
 
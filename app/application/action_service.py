@@ -1,8 +1,11 @@
-from typing import List, Dict, Any, Optional, Tuple
+import os
+import time
+import random
+from typing import Callable, List, Dict, Any, Optional, Tuple, TypeVar
 
 from ..domain.exceptions import ErrorDominio
 from ..domain.enums import CodigoError
-from .ports import RepositorioOrden, AlmacenEventos
+from .ports import RepositorioOrden, AlmacenEventos, AlmacenIdempotencia
 from .dtos import OrdenDTO, EventoDTO, ErrorDTO
 from .mappers import (
     crear_orden_dto, agregar_servicio_dto,
@@ -16,16 +19,70 @@ from .acciones import (
     Autorizar, EstablecerEstadoEnProceso, EstablecerCostoReal,
     IntentarCompletar, Reautorizar, EntregarOrden, CancelarOrden
 )
-from ..infrastructure.logging_config import obtener_logger, obtener_contexto_log
+from .idempotencia import calcular_huella, ejecutar_idempotente
+from ..infrastructure.logging_config import obtener_logger, obtener_contexto_log, operacion_var
+from ..infrastructure.metricas import duracion_comandos, errores_comandos, reintentos_conflicto
 
 
 logger = obtener_logger("app.application.action_service")
 
+OPERACIONES = frozenset({
+    "CREATE_ORDER", "ADD_SERVICE", "SET_STATE_DIAGNOSED", "AUTHORIZE",
+    "SET_STATE_IN_PROGRESS", "SET_REAL_COST", "TRY_COMPLETE", "REAUTHORIZE",
+    "DELIVER", "CANCEL"
+})
+
+# Un conflicto de versión revierte toda la transacción y el reintento relee la orden, así que no duplica efectos.
+# CREATE_ORDER no: la orden nueva no tiene versión que releer y, si otra operación la creó antes, solo fallaría como duplicada
+OPERACIONES_REINTENTABLES = frozenset({
+    "ADD_SERVICE", "SET_STATE_DIAGNOSED", "AUTHORIZE", "SET_STATE_IN_PROGRESS", "SET_REAL_COST",
+    "TRY_COMPLETE", "REAUTHORIZE", "DELIVER", "CANCEL"
+})
+
+MAX_REINTENTOS_CONFLICTO = int(os.getenv("CONFLICT_MAX_RETRIES", "3"))
+
+# Resultados que un reintento con la misma clave debe volver a ejecutar en lugar de repetir
+CODIGOS_TRANSITORIOS = frozenset({"INTERNAL_ERROR", CodigoError.CONCURRENT_MODIFICATION.value})
+
+T = TypeVar("T")
+
+ResultadoComando = Tuple[Optional[OrdenDTO], List[EventoDTO], Optional[ErrorDTO]]
+
+
+def _resultado_a_dict(resultado: ResultadoComando) -> dict:
+    orden_dto, eventos_dto, error_dto = resultado
+    return {
+        "order": orden_dto.model_dump() if orden_dto else None,
+        "events": [e.model_dump() for e in eventos_dto],
+        "error": error_dto.model_dump() if error_dto else None
+    }
+
+
+def _resultado_desde_dict(datos: dict) -> ResultadoComando:
+    return (
+        OrdenDTO.model_validate(datos["order"]) if datos.get("order") else None,
+        [EventoDTO.model_validate(e) for e in datos.get("events", [])],
+        ErrorDTO.model_validate(datos["error"]) if datos.get("error") else None
+    )
+
+
+def _resultado_definitivo(resultado: ResultadoComando) -> bool:
+    error = resultado[2]
+    return error is None or error.code not in CODIGOS_TRANSITORIOS
+
 
 class ActionService:
-    def __init__(self, repo: RepositorioOrden, auditoria: AlmacenEventos):
+    def __init__(
+        self,
+        repo: RepositorioOrden,
+        auditoria: AlmacenEventos,
+        max_reintentos: Optional[int] = None,
+        idempotencia: Optional[AlmacenIdempotencia] = None
+    ):
         self.repo = repo
         self.auditoria = auditoria
+        self.max_reintentos = MAX_REINTENTOS_CONFLICTO if max_reintentos is None else max_reintentos
+        self.idempotencia = idempotencia
     
     def _normalizar_order_id(self, data: dict) -> Optional[str]:
         """Normaliza order_id a string si es numérico."""
@@ -181,20 +238,88 @@ class ActionService:
         nuevos_evts = self._extraer_nuevos_eventos(orden_dto, evts_ant)
         return orden_dto, nuevos_evts
     
+    def _registrar_metricas(self, op: Optional[str], error: Optional[ErrorDTO], duracion: float) -> None:
+        """Registra latencia y errores por operación (las desconocidas se agrupan para acotar cardinalidad)."""
+        etiqueta_op = op if op in OPERACIONES else "UNKNOWN"
+        duracion_comandos.observar(duracion, etiqueta_op)
+        if error is not None:
+            errores_comandos.inc(etiqueta_op, error.code)
+    
     def procesar_comando(self, comando: Dict[str, Any]) -> Tuple[Optional[OrdenDTO], List[EventoDTO], Optional[ErrorDTO]]:
-        """Orquesta el procesamiento de un comando."""
-        op, data, ts, order_id, evts_ant = self._preparar_ejecucion_comando(comando)
-        
+        """Orquesta el procesamiento de un comando y mide su latencia."""
+        inicio = time.perf_counter()
+        token_op = operacion_var.set(comando.get("op"))
         try:
-            orden_dto, nuevos_evts = self._ejecutar_comando_exitoso(op, data, ts, evts_ant)
-            return orden_dto, nuevos_evts, None
-        
-        except ValueError as ve:
-            return self._manejar_error_validacion(ve, op, order_id)
+            resultado = self._procesar_comando_idempotente(comando)
+        finally:
+            operacion_var.reset(token_op)
+        self._registrar_metricas(comando.get("op"), resultado[2], time.perf_counter() - inicio)
+        return resultado
+    
+    def _debe_reintentar(self, e: ErrorDominio, op: Optional[str], intento: int) -> bool:
+        """Indica si un conflicto de versión se reintenta; antes espera un jitter creciente para desincronizar a los competidores."""
+        if e.codigo != CodigoError.CONCURRENT_MODIFICATION or op not in OPERACIONES_REINTENTABLES:
+            return False
+        if intento >= self.max_reintentos:
+            return False
+        reintentos_conflicto.inc(op)
+        logger.warning(
+            f"Conflicto de versión en {op}, reintento {intento + 1}/{self.max_reintentos}",
+            extra={**obtener_contexto_log(), "op": op, "operacion": op, **e.contexto}
+        )
+        time.sleep(random.uniform(0, 0.005 * (intento + 1)))
+        return True
+    
+    def ejecutar_con_reintentos(self, op: str, funcion: Callable[[], T]) -> T:
+        """Ejecuta funcion reintentándola ante conflictos de versión si la operación es reintentable."""
+        intento = 0
+        while True:
+            try:
+                return funcion()
+            except ErrorDominio as e:
+                if not self._debe_reintentar(e, op, intento):
+                    raise
+                intento += 1
+    
+    def _procesar_comando_idempotente(self, comando: Dict[str, Any]) -> ResultadoComando:
+        """Con idempotency_key en el comando, un reenvío recibe el resultado guardado sin volver a ejecutarse."""
+        clave = comando.get("idempotency_key")
+        if not clave or self.idempotencia is None:
+            return self._procesar_comando(comando)
         
+        op = comando.get("op")
+        data = comando.get("data", {})
+        huella = calcular_huella({"op": op, "data": data, "ts": comando.get("ts")})
+        try:
+            resultado, _ = ejecutar_idempotente(
+                self.idempotencia, f"comando:{clave}", huella, "command",
+                lambda: self._procesar_comando(comando),
+                _resultado_a_dict, _resultado_desde_dict, _resultado_definitivo
+            )
+            return resultado
         except ErrorDominio as e:
-            return self._manejar_error_dominio(e, op, order_id, evts_ant)
-        
+            return self._manejar_error_dominio(e, op, self._normalizar_order_id(data), 0)
         except Exception as e:
-            return self._manejar_error_inesperado(e, op, order_id, data)
+            return self._manejar_error_inesperado(e, op, self._normalizar_order_id(data), data)
+    
+    def _procesar_comando(self, comando: Dict[str, Any]) -> Tuple[Optional[OrdenDTO], List[EventoDTO], Optional[ErrorDTO]]:
+        intento = 0
+        while True:
+            op, data, ts, order_id, evts_ant = self._preparar_ejecucion_comando(comando)
+            
+            try:
+                orden_dto, nuevos_evts = self._ejecutar_comando_exitoso(op, data, ts, evts_ant)
+                return orden_dto, nuevos_evts, None
+            
+            except ValueError as ve:
+                return self._manejar_error_validacion(ve, op, order_id)
+            
+            except ErrorDominio as e:
+                if self._debe_reintentar(e, op, intento):
+                    intento += 1
+                    continue
+                return self._manejar_error_dominio(e, op, order_id, evts_ant)
+            
+            except Exception as e:
+                return self._manejar_error_inesperado(e, op, order_id, data)
 
@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+from typing import Any, Callable, Tuple, TypeVar
+
+from ..domain.enums import CodigoError
+from ..domain.exceptions import ErrorDominio
+from .ports import AlmacenIdempotencia
+from ..infrastructure.metricas import respuestas_repetidas
+
+
+T = TypeVar("T")
+
+
+def ttl_idempotencia() -> int:
+    return int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+
+def plazo_reserva_idempotencia() -> int:
+    return max(1, int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60")))
+
+
+def calcular_huella(contenido: Any) -> str:
+    """SHA-256 del contenido en JSON canónico: detecta una clave reutilizada con otro cuerpo."""
+    texto = json.dumps(contenido, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def ejecutar_idempotente(
+    almacen: AlmacenIdempotencia,
+    clave: str,
+    huella: str,
+    alcance: str,
+    ejecutar: Callable[[], T],
+    a_dict: Callable[[T], dict],
+    desde_dict: Callable[[dict], T],
+    conservar: Callable[[T], bool] = lambda _: True
+) -> Tuple[T, bool]:
+    """Ejecuta una sola vez por clave y devuelve (resultado, repetido).
+
+    Un envío repetido recibe el resultado guardado sin volver a ejecutar. Si la ejecución lanza una excepción
+    o conservar indica que el resultado es transitorio, la clave se libera para que un reintento sí ejecute.
+    Si el proceso muere sin completar ni liberar, la reserva vence a los IDEMPOTENCY_LEASE_SECONDS.
+    """
+    ttl = ttl_idempotencia()
+    registro = almacen.reservar(clave, huella, ttl, min(ttl, plazo_reserva_idempotencia()))
+    if registro is not None:
+        if registro.huella != huella:
+            raise ErrorDominio(
+                CodigoError.IDEMPOTENCY_KEY_REUSED,
+                "La clave de idempotencia ya se usó con un contenido distinto",
+                contexto={"idempotency_key": clave}
+            )
+        if registro.respuesta is None:
+            raise ErrorDominio(
+                CodigoError.IDEMPOTENCY_IN_PROGRESS,
+                "Hay una solicitud con la misma clave de idempotencia en curso",
+                contexto={"idempotency_key": clave}
+            )
+        respuestas_repetidas.inc(alcance)
+        return desde_dict(registro.respuesta), True
+
+    try:
+        resultado = ejecutar()
+    except BaseException:
+        almacen.liberar(clave)
+        raise
+    if conservar(resultado):
+        almacen.completar(clave, a_dict(resultado))
+    else:
+        almacen.liberar(clave)
+    return resultado, False
@@ -0,0 +1,156 @@
+import os
+import threading
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple, Union
+
+from .action_service import ActionService, ResultadoComando
+from .dtos import ErrorDTO
+
+
+# Cada worker pide su propio servicio (y con él su sesión) y lo libera al terminar la partición
+FabricaServicio = Callable[[], ContextManager[ActionService]]
+
+_ejecutor: Optional[ThreadPoolExecutor] = None
+_lock_ejecutor = threading.Lock()
+
+
+def workers_comandos() -> int:
+    return max(1, int(os.getenv("COMMANDS_WORKERS", "4")))
+
+
+def obtener_ejecutor() -> ThreadPoolExecutor:
+    """Pool compartido por todos los requests: acota las conexiones de BD que usan los lotes a la vez."""
+    global _ejecutor
+    if _ejecutor is None:
+        with _lock_ejecutor:
+            if _ejecutor is None:
+                _ejecutor = ThreadPoolExecutor(max_workers=workers_comandos(), thread_name_prefix="comandos")
+    return _ejecutor
+
+
+def _normalizar_clave(valor) -> str:
+    if isinstance(valor, dict):
+        return repr(sorted(valor.items()))
+    return str(valor).strip().lower()
+
+
+def _claves_comando(comando: dict) -> List[Tuple[str, str]]:
+    """Recursos que toca el comando: su orden y, al crearla, el cliente y el vehículo que se buscan o crean."""
+    data = comando.get("data")
+    if not isinstance(data, dict):
+        return []
+    claves = []
+    order_id = data.get("order_id")
+    if order_id not in (None, ""):
+        claves.append(("orden", str(order_id).strip()))
+    for campo in ("customer", "vehicle"):
+        if data.get(campo):
+            claves.append((campo, _normalizar_clave(data[campo])))
+    return claves
+
+
+def particionar_comandos(comandos: List[dict]) -> List[List[int]]:
+    """Agrupa los índices de los comandos que comparten orden, cliente o vehículo; cada grupo conserva el orden original."""
+    padres = list(range(len(comandos)))
+
+    def raiz(i: int) -> int:
+        while padres[i] != i:
+            padres[i] = padres[padres[i]]
+            i = padres[i]
+        return i
+
+    duenos: Dict[Tuple[str, str], int] = {}
+    for i, comando in enumerate(comandos):
+        for clave in _claves_comando(comando):
+            j = duenos.setdefault(clave, i)
+            if j != i:
+                padres[raiz(i)] = raiz(j)
+
+    particiones: Dict[int, List[int]] = {}
+    for i in range(len(comandos)):
+        particiones.setdefault(raiz(i), []).append(i)
+    return list(particiones.values())
+
+
+def acumular_resultado(resultado: ResultadoComando, orders_dict: dict, events: list, errors: list) -> None:
+    """Suma un resultado al cuerpo de respuesta del lote: último estado de cada orden, eventos y errores."""
+    orden_dto, eventos_dto, error_dto = resultado
+    
+    if orden_dto and orden_dto.order_id:
+        orders_dict[orden_dto.order_id] = {
+            "order_id": orden_dto.order_id,
+            "status": orden_dto.status,
+            "customer": orden_dto.customer,
+            "vehicle": orden_dto.vehicle,
+            "subtotal_estimated": orden_dto.subtotal_estimated,
+            "authorized_amount": orden_dto.authorized_amount or "0.00",
+            "real_total": orden_dto.real_total
+        }
+    
+    if error_dto:
+        errors.append(error_dto.model_dump())
+    
+    events.extend([e.model_dump() for e in eventos_dto])
+
+
+def resumir_lote(comandos: List[dict], resultados: List[Union[ResultadoComando, Exception, None]]) -> Dict[str, list]:
+    """Respuesta con la forma de CommandsResponse; las excepciones y los comandos no ejecutados quedan como errores."""
+    orders_dict: dict = {}
+    events: list = []
+    errors: list = []
+    for comando, resultado in zip(comandos, resultados):
+        if isinstance(resultado, Exception) or resultado is None:
+            data = comando.get("data") if isinstance(comando.get("data"), dict) else {}
+            mensaje = str(resultado) if resultado is not None else "No ejecutado: falló un comando anterior de la misma orden"
+            order_id = data.get("order_id")
+            resultado = (None, [], ErrorDTO(
+                op=comando.get("op"),
+                order_id=str(order_id) if order_id is not None else None,
+                code="INTERNAL_ERROR",
+                message=mensaje
+            ))
+        acumular_resultado(resultado, orders_dict, events, errors)
+    return {"orders": list(orders_dict.values()), "events": events, "errors": errors}
+
+
+def procesar_lote(
+    comandos: List[dict],
+    servicio: ActionService,
+    fabrica_servicio: Optional[FabricaServicio] = None
+) -> List[Union[ResultadoComando, Exception, None]]:
+    """Ejecuta el lote en orden dentro de cada partición y en paralelo entre particiones.
+
+    Devuelve un resultado por comando en el orden original. Si un comando lanza una excepción, esta ocupa
+    su lugar y el resto de su partición no se ejecuta (queda en None). Sin fabrica_servicio, o con una sola
+    partición, todo se ejecuta en el hilo actual con servicio.
+    """
+    particiones = particionar_comandos(comandos)
+    resultados: List[Union[ResultadoComando, Exception, None]] = [None] * len(comandos)
+
+    def ejecutar(servicio_particion: ActionService, indices: List[int]) -> None:
+        for i in indices:
+            try:
+                resultados[i] = servicio_particion.procesar_comando(comandos[i])
+            except Exception as e:
+                resultados[i] = e
+                return
+
+    def ejecutar_con_fabrica(indices: List[int]) -> None:
+        with fabrica_servicio() as servicio_particion:
+            ejecutar(servicio_particion, indices)
+
+    if fabrica_servicio is None or len(particiones) == 1:
+        for indices in particiones:
+            ejecutar(servicio, indices)
+        return resultados
+
+    ejecutor = obtener_ejecutor()
+    # Cada partición corre en una copia del contexto para conservar request_id, ruta y métricas de consultas
+    futuros = [ejecutor.submit(copy_context().run, ejecutar_con_fabrica, indices) for indices in particiones]
+    wait(futuros)
+    for futuro, indices in zip(futuros, particiones):
+        error = futuro.exception()
+        if error is not None and resultados[indices[0]] is None:
+            resultados[indices[0]] = error
+    return resultados
@@ -216,7 +216,7 @@ def evento_a_dto(evento: Evento, order_id: str) -> EventoDTO:
     )
 
 
-def orden_a_dto(orden: Orden) -> OrdenDTO:
+def orden_a_dto(orden: Orden, incluir_eventos: bool = True) -> OrdenDTO:
     if not orden.order_id:
         raise ValueError("Orden debe tener order_id asignado")
     
@@ -227,8 +227,9 @@ def orden_a_dto(orden: Orden) -> OrdenDTO:
         servicios_dto.append(servicio_a_dto(s))
     
     eventos_dto = []
-    for e in orden.eventos:
-        eventos_dto.append(evento_a_dto(e, orden.order_id))
+    if incluir_eventos:
+        for e in orden.eventos:
+            eventos_dto.append(evento_a_dto(e, orden.order_id))
     
     auth_amount = f"{orden.monto_autorizado:.2f}" if orden.monto_autorizado else None
     
@@ -1,15 +1,33 @@
 from abc import ABC, abstractmethod
-from typing import Optional, TYPE_CHECKING
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from ..infrastructure.repositories.repositorio_cliente import RepositorioClienteSQL
     from ..infrastructure.repositories.repositorio_vehiculo import RepositorioVehiculoSQL
     from ..infrastructure.repositories.repositorio_servicio import RepositorioServicioSQL
     from ..infrastructure.repositories.repositorio_evento import RepositorioEventoSQL
+    from ..infrastructure.repositories.repositorio_outbox import RepositorioOutboxSQL
+    from ..infrastructure.repositories.repositorio_idempotencia import RepositorioIdempotenciaSQL
+    from ..infrastructure.repositories.repositorio_instantanea import RepositorioInstantaneaSQL
+    from ..infrastructure.repositories.repositorio_estadisticas import RepositorioEstadisticasSQL
 
 from ..domain.entidades import Orden, Evento
 
 
+@dataclass
+class FilaEstadistica:
+    """Suma de órdenes de un grupo; las dimensiones por las que no se agrupó quedan en None."""
+    cantidad: int
+    monto_autorizado: Decimal
+    total_real: Decimal
+    dia: Optional[date] = None
+    estado: Optional[str] = None
+    cliente: Optional[str] = None
+
+
 class RepositorioOrden(ABC):
     @abstractmethod
     def obtener(self, order_id: str) -> Optional[Orden]:
@@ -18,6 +36,34 @@ class RepositorioOrden(ABC):
     @abstractmethod
     def guardar(self, orden: Orden) -> None:
         pass
+    
+    @abstractmethod
+    def obtener_historica(self, order_id: str, momento: Optional[datetime] = None, secuencia: Optional[int] = None) -> Optional[Orden]:
+        """Orden tal como quedó tras su evento número secuencia (1 = CREATED) o tras el último ocurrido hasta momento.
+
+        Retorna None si la orden no existe o aún no existía en ese punto.
+        """
+    
+    @abstractmethod
+    def listar_eventos(self, order_id: str, despues_de: int = 0, limite: int = 50,
+                       tipos: Optional[List[str]] = None) -> Optional[List[Tuple[int, Evento]]]:
+        """Página de la historia: (secuencia, evento) con secuencia > despues_de, opcionalmente de ciertos tipos.
+
+        Retorna None si la orden no existe.
+        """
+    
+    @abstractmethod
+    def listar_eventos_globales(self, despues_de: int = 0, limite: int = 100,
+                                tipos: Optional[List[str]] = None) -> List[Tuple[int, str, Evento]]:
+        """Eventos de todas las órdenes posteriores al cursor despues_de, como (cursor, order_id, evento).
+
+        El cursor crece con cada evento guardado, así que quien consume solo pide lo nuevo.
+        """
+    
+    @abstractmethod
+    def estadisticas(self, agrupar: Sequence[str], desde: Optional[date] = None, hasta: Optional[date] = None,
+                     cliente: Optional[str] = None) -> List[FilaEstadistica]:
+        """Cantidad y montos de las órdenes agrupados por alguna de "dia" (de creación), "estado" (actual) y "cliente"."""
 
 
 class AlmacenEventos(ABC):
@@ -26,6 +72,32 @@ class AlmacenEventos(ABC):
         pass
 
 
+@dataclass
+class RegistroIdempotencia:
+    huella: str
+    # None mientras la primera ejecución con la clave sigue en curso
+    respuesta: Optional[dict]
+
+
+class AlmacenIdempotencia(ABC):
+    @abstractmethod
+    def reservar(self, clave: str, huella: str, ttl_segundos: int,
+                 reserva_segundos: Optional[int] = None) -> Optional[RegistroIdempotencia]:
+        """Reserva la clave y devuelve None; si ya estaba reservada y no expiró, devuelve su registro.
+
+        Una reserva sin respuesta vence a los reserva_segundos (por defecto ttl_segundos) y entonces se puede retomar.
+        """
+        pass
+    
+    @abstractmethod
+    def completar(self, clave: str, respuesta: dict) -> None:
+        pass
+    
+    @abstractmethod
+    def liberar(self, clave: str) -> None:
+        pass
+
+
 class UnidadTrabajo(ABC):
     @abstractmethod
     def obtener_repositorio_orden(self) -> "RepositorioOrden":
@@ -46,4 +118,20 @@ class UnidadTrabajo(ABC):
     @abstractmethod
     def obtener_repositorio_evento(self) -> "RepositorioEventoSQL":
         pass
+    
+    @abstractmethod
+    def obtener_repositorio_outbox(self) -> "RepositorioOutboxSQL":
+        pass
+    
+    @abstractmethod
+    def obtener_repositorio_idempotencia(self) -> "RepositorioIdempotenciaSQL":
+        pass
+    
+    @abstractmethod
+    def obtener_repositorio_instantanea(self) -> "RepositorioInstantaneaSQL":
+        pass
+    
+    @abstractmethod
+    def obtener_repositorio_estadisticas(self) -> "RepositorioEstadisticasSQL":
+        pass
 
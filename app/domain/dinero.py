@@ -1,15 +1,41 @@
-from decimal import Decimal, ROUND_HALF_EVEN
+from decimal import Decimal, Context, ROUND_HALF_EVEN, InvalidOperation, DivisionByZero, Overflow
+from typing import Dict
+
+
+# Contexto propio: no depende del contexto global del hilo, que cualquier librería puede modificar
+CONTEXTO_DINERO = Context(prec=28, rounding=ROUND_HALF_EVEN, traps=[InvalidOperation, DivisionByZero, Overflow])
+
+_CUANTIZADORES = {decimales: Decimal(1).scaleb(-decimales) for decimales in range(9)}
+
+# Montos leídos como texto (BD, JSON) -> Decimal; se repiten mucho y Decimal es inmutable
+_MAX_TEXTOS = 4096
+_textos: Dict[str, Decimal] = {}
+
+
+def desde_texto(texto: str) -> Decimal:
+    valor = _textos.get(texto)
+    if valor is None:
+        valor = Decimal(texto)
+        if len(_textos) >= _MAX_TEXTOS:
+            _textos.clear()
+        _textos[texto] = valor
+    return valor
 
 
 def a_decimal(valor) -> Decimal:
+    tipo = type(valor)
+    if tipo is Decimal:
+        return valor
+    if tipo is str:
+        return desde_texto(valor)
+    if tipo is int:
+        return Decimal(valor)
+    # float y demás: vía str para obtener el valor que se escribió (10.5 -> 10.5, no su binario)
     return Decimal(str(valor))
 
 
 def redondear_mitad_par(valor: Decimal, decimales: int = 2) -> Decimal:
-    if decimales <= 0:
-        return valor.quantize(Decimal('1'), rounding=ROUND_HALF_EVEN)
-    
-    # Construir string de cuantización
-    cadena = '0.' + '0' * (decimales - 1) + '1'
-    return valor.quantize(Decimal(cadena), rounding=ROUND_HALF_EVEN)
-
+    cuantizador = _CUANTIZADORES.get(decimales)
+    if cuantizador is None:
+        cuantizador = _CUANTIZADORES[0] if decimales <= 0 else Decimal(1).scaleb(-decimales)
+    return valor.quantize(cuantizador, ROUND_HALF_EVEN, CONTEXTO_DINERO)
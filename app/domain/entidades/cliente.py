@@ -2,6 +2,8 @@ from typing import Optional
 
 
 class Cliente:
+    __slots__ = ("id_cliente", "nombre", "identificacion", "correo", "direccion", "celular")
+
     def __init__(self, nombre: str, id_cliente: Optional[int] = None, identificacion: Optional[str] = None, correo: Optional[str] = None, direccion: Optional[str] = None, celular: Optional[str] = None):
         self.id_cliente = id_cliente
         self.nombre = nombre
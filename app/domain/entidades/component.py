@@ -1,12 +1,13 @@
 from decimal import Decimal
 from typing import Optional
+from ..exceptions import ErrorDominio
+from ..enums import CodigoError
 
 
 class Componente:
+    __slots__ = ("id_componente", "descripcion", "costo_estimado", "costo_real")
+
     def __init__(self, descripcion: str, costo_estimado: Decimal, costo_real: Optional[Decimal] = None):
-        from ..exceptions import ErrorDominio
-        from ..enums import CodigoError
-        
         if costo_estimado < 0:
             raise ErrorDominio(CodigoError.INVALID_AMOUNT, f"Costo estimado debe ser positivo, se recibió: {costo_estimado}")
         
@@ -1,10 +1,14 @@
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, Any
 
 
+@dataclass(frozen=True, slots=True, eq=False)
 class Evento:
-    def __init__(self, tipo: str, timestamp: datetime, metadatos: Dict[str, Any] = None):
-        self.tipo = tipo
-        self.timestamp = timestamp
-        self.metadatos = metadatos or {}
+    tipo: str
+    timestamp: datetime
+    metadatos: Dict[str, Any] = field(default=None)
 
+    def __post_init__(self):
+        if self.metadatos is None:
+            object.__setattr__(self, "metadatos", {})
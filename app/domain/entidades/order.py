@@ -1,25 +1,45 @@
+import os
+import re
 from decimal import Decimal
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from ..enums import EstadoOrden, CodigoError
 from ..exceptions import ErrorDominio
-from ..dinero import redondear_mitad_par
+from ..dinero import redondear_mitad_par, a_decimal
 from ..zona_horaria import ahora
 from .service import Servicio
+from .component import Componente
 from .event import Evento
 
 
 MENSAJE_ORDEN_CANCELADA = "La orden está cancelada"
 
+# Compara el total_real incremental con el recálculo completo en cada cambio de costo
+VERIFICAR_TOTAL_REAL = os.getenv("DOMAIN_DEBUG_CHECKS", "false").lower() == "true"
+
+LIMITE_SOBRECOSTO = Decimal('1.10')
+
+PATRON_ORDER_ID = re.compile(r'^[A-Z0-9\-_]+$')
+
+
+def validar_order_id(order_id: str) -> None:
+    if not order_id or not order_id.strip():
+        raise ErrorDominio(CodigoError.INVALID_OPERATION, "order_id no puede estar vacío")
+    
+    if not PATRON_ORDER_ID.match(order_id):
+        raise ErrorDominio(CodigoError.INVALID_OPERATION, f"order_id '{order_id}' tiene formato inválido. Debe contener solo letras mayúsculas, números, guiones y guiones bajos")
+
 
 class Orden:
+    __slots__ = (
+        "id", "order_id", "cliente", "vehiculo", "estado", "servicios", "eventos", "monto_autorizado",
+        "version_autorizacion", "total_real", "fecha_creacion", "fecha_cancelacion", "version",
+        "_suma_real", "_servicios_sumados", "_cantidad_sumada",
+        "_indice_servicios", "_indice_componentes", "_servicios_indexados", "_cantidad_indexada", "_sin_id_indexados"
+    )
+
     def __init__(self, order_id: str, cliente: str, vehiculo: str, fecha_creacion: datetime, id: Optional[int] = None):
-        if not order_id or not order_id.strip():
-            raise ErrorDominio(CodigoError.INVALID_OPERATION, "order_id no puede estar vacío")
-        
-        import re
-        if not re.match(r'^[A-Z0-9\-_]+$', order_id):
-            raise ErrorDominio(CodigoError.INVALID_OPERATION, f"order_id '{order_id}' tiene formato inválido. Debe contener solo letras mayúsculas, números, guiones y guiones bajos")
+        validar_order_id(order_id)
         
         self.id = id
         self.order_id = order_id
@@ -33,15 +53,63 @@ class Orden:
         self.total_real = Decimal('0')
         self.fecha_creacion = fecha_creacion
         self.fecha_cancelacion: Optional[datetime] = None
+        # Versión persistida con la que se leyó la orden; None si aún no se guardó
+        self.version: Optional[int] = None
+        self._inicializar_caches()
+
+    @classmethod
+    def hidratar(cls, id: Optional[int], order_id: str, cliente: str, vehiculo: str, estado: EstadoOrden,
+                 servicios: List[Servicio], eventos: List[Evento], monto_autorizado: Optional[Decimal],
+                 version_autorizacion: int, total_real: Decimal, fecha_creacion: datetime,
+                 fecha_cancelacion: Optional[datetime] = None, version: Optional[int] = None) -> "Orden":
+        """Reconstruye una orden ya persistida sin validar order_id (los datos vienen de la BD)."""
+        orden = cls.__new__(cls)
+        orden.id = id
+        orden.order_id = order_id
+        orden.cliente = cliente
+        orden.vehiculo = vehiculo
+        orden.estado = estado
+        orden.servicios = servicios
+        orden.eventos = eventos
+        orden.monto_autorizado = monto_autorizado
+        orden.version_autorizacion = version_autorizacion
+        orden.total_real = total_real
+        orden.fecha_creacion = fecha_creacion
+        orden.fecha_cancelacion = fecha_cancelacion
+        orden.version = version
+        orden._inicializar_caches()
+        return orden
+
+    def _inicializar_caches(self):
+        # Suma de calcular_costo_real() de los servicios, mantenida con deltas
+        self._suma_real: Optional[Decimal] = None
+        self._servicios_sumados: Optional[List[Servicio]] = None
+        self._cantidad_sumada = 0
+        # Índices id -> Servicio e id -> (Servicio, Componente); se reconstruyen si cambió la lista o algún id
+        self._indice_servicios: Optional[Dict[int, Servicio]] = None
+        self._indice_componentes: Dict[int, Tuple[Servicio, Componente]] = {}
+        self._servicios_indexados: Optional[List[Servicio]] = None
+        self._cantidad_indexada = 0
+        # Servicios y componentes que no tenían id al indexarlos (el repositorio se lo asigna al guardar)
+        self._sin_id_indexados: List[object] = []
 
     def _validar_no_cancelada(self):
         if self.estado == EstadoOrden.CANCELLED:
             raise ErrorDominio(CodigoError.ORDER_CANCELLED, MENSAJE_ORDEN_CANCELADA)
 
-    def _agregar_evento(self, tipo: str, metadatos: dict = None):
-        evento = Evento(tipo, ahora(), metadatos or {})
+    def _agregar_evento(self, tipo: str, metadatos: dict = None, momento: Optional[datetime] = None):
+        evento = Evento(tipo, momento or ahora(), metadatos or {})
         self.eventos.append(evento)
 
+    def registrar_creacion(self):
+        """Emite CREATED con los datos necesarios para reconstruir la orden desde sus eventos."""
+        self._agregar_evento("CREATED", {
+            "order_id": self.order_id,
+            "cliente": self.cliente,
+            "vehiculo": self.vehiculo,
+            "fecha_creacion": self.fecha_creacion.isoformat()
+        })
+
     def agregar_servicio(self, servicio: Servicio):
         self._validar_no_cancelada()
         
@@ -51,7 +119,22 @@ class Orden:
                 "No se pueden agregar servicios después de autorizar"
             )
         
+        suma_vigente = self._suma_real_vigente()
+        indice_vigente = self._indice_vigente()
         self.servicios.append(servicio)
+        if suma_vigente:
+            self._suma_real += servicio.calcular_costo_real()
+            self._cantidad_sumada += 1
+        if indice_vigente:
+            self._indexar_servicio(servicio)
+            self._cantidad_indexada += 1
+        self._agregar_evento("SERVICE_ADDED", {
+            "descripcion": servicio.descripcion,
+            "costo_mano_obra": str(servicio.costo_mano_obra_estimado),
+            "componentes": [
+                {"descripcion": c.descripcion, "costo_estimado": str(c.costo_estimado)} for c in servicio.componentes
+            ]
+        })
 
     def establecer_estado_diagnosticado(self):
         if self.estado == EstadoOrden.CANCELLED:
@@ -101,10 +184,73 @@ class Orden:
         self.estado = EstadoOrden.IN_PROGRESS
         self._agregar_evento("IN_PROGRESS")
 
+    def _indice_vigente(self) -> bool:
+        return (
+            self._indice_servicios is not None
+            and self._servicios_indexados is self.servicios
+            and self._cantidad_indexada == len(self.servicios)
+        )
+
+    def _indexar_servicio(self, servicio: Servicio):
+        if servicio.id_servicio is not None:
+            self._indice_servicios[servicio.id_servicio] = servicio
+        else:
+            self._sin_id_indexados.append(servicio)
+        for c in servicio.componentes:
+            if c.id_componente is not None:
+                self._indice_componentes[c.id_componente] = (servicio, c)
+            else:
+                self._sin_id_indexados.append(c)
+
+    def _reconstruir_indices(self):
+        self._indice_servicios = {}
+        self._indice_componentes = {}
+        self._sin_id_indexados = []
+        for servicio in self.servicios:
+            self._indexar_servicio(servicio)
+        self._servicios_indexados = self.servicios
+        self._cantidad_indexada = len(self.servicios)
+
+    def _ids_asignados_tras_indexar(self) -> bool:
+        for elemento in self._sin_id_indexados:
+            if getattr(elemento, "id_servicio", None) is not None or getattr(elemento, "id_componente", None) is not None:
+                return True
+        return False
+
+    def obtener_servicio(self, servicio_id: int) -> Optional[Servicio]:
+        """Busca un servicio por id en O(1)."""
+        if servicio_id is None:
+            # Servicio aún sin guardar: no está indexado
+            return next((s for s in self.servicios if s.id_servicio is None), None)
+        if not self._indice_vigente():
+            self._reconstruir_indices()
+        servicio = self._indice_servicios.get(servicio_id)
+        if servicio is not None and servicio.id_servicio == servicio_id:
+            return servicio
+        if servicio is None and not self._ids_asignados_tras_indexar():
+            return None
+        # Ids asignados o cambiados (p. ej. por el repositorio) después de indexar
+        self._reconstruir_indices()
+        return self._indice_servicios.get(servicio_id)
+
+    def _obtener_componente(self, servicio: Servicio, componente_id: int) -> Optional[Componente]:
+        if componente_id is None:
+            return next((c for c in servicio.componentes if c.id_componente is None), None)
+        if not self._indice_vigente():
+            self._reconstruir_indices()
+        entrada = self._indice_componentes.get(componente_id)
+        desactualizada = entrada is not None and entrada[1].id_componente != componente_id
+        if desactualizada or (entrada is None and self._ids_asignados_tras_indexar()):
+            self._reconstruir_indices()
+            entrada = self._indice_componentes.get(componente_id)
+        if entrada is None or entrada[0] is not servicio:
+            return None
+        return entrada[1]
+
     def _buscar_servicio_por_id(self, servicio_id: int) -> Servicio:
-        for s in self.servicios:
-            if s.id_servicio == servicio_id:
-                return s
+        servicio = self.obtener_servicio(servicio_id)
+        if servicio is not None:
+            return servicio
         raise ErrorDominio(
             CodigoError.ORDER_NOT_FOUND,
             f"Servicio con id {servicio_id} no encontrado en la orden",
@@ -113,10 +259,9 @@ class Orden:
     
     def _aplicar_costos_componentes(self, servicio: Servicio, componentes_reales: dict):
         for comp_id, costo in componentes_reales.items():
-            for c in servicio.componentes:
-                if c.id_componente == comp_id:
-                    c.costo_real = costo
-                    break
+            componente = self._obtener_componente(servicio, comp_id)
+            if componente is not None:
+                componente.costo_real = costo
     
     def _limpiar_costos_componentes(self, servicio: Servicio):
         for c in servicio.componentes:
@@ -129,21 +274,59 @@ class Orden:
         else:
             self._limpiar_costos_componentes(servicio)
     
-    def establecer_costo_real(self, servicio_id: int, costo_real: Decimal, componentes_reales: dict = None):
+    def establecer_costo_real(self, servicio_id: int, costo_real: Decimal, componentes_reales: dict = None,
+                              completado: Optional[bool] = None):
         """Establece costo real de un servicio y sus componentes."""
         self._validar_no_cancelada()
         servicio = self._buscar_servicio_por_id(servicio_id)
+        self._obtener_suma_real()
+        anterior = servicio.calcular_costo_real()
         servicio.costo_real = costo_real
         self._actualizar_costos_componentes(servicio, componentes_reales)
-        self._recalcular_total_real()
-        self._agregar_evento("REAL_COST_SET", {
+        if completado is not None:
+            servicio.completado = completado
+        self._suma_real += servicio.calcular_costo_real() - anterior
+        self.total_real = self._suma_real
+        self._verificar_total_real()
+        metadatos = {
             "servicio_id": servicio_id,
             "costo_real": str(costo_real),
             "total_real": str(self.total_real)
-        })
+        }
+        if componentes_reales:
+            metadatos["componentes_reales"] = {str(k): str(v) for k, v in componentes_reales.items()}
+        if completado is not None:
+            metadatos["completado"] = completado
+        self._agregar_evento("REAL_COST_SET", metadatos)
 
     def _recalcular_total_real(self):
+        """Recalcula total_real sumando todos los servicios y reinicia la suma incremental."""
         self.total_real = sum(servicio.calcular_costo_real() for servicio in self.servicios)
+        self._suma_real = self.total_real
+        self._servicios_sumados = self.servicios
+        self._cantidad_sumada = len(self.servicios)
+
+    def _suma_real_vigente(self) -> bool:
+        # Si la lista se reemplazó o cambió por fuera de agregar_servicio (p. ej. al hidratar), hay que recalcular
+        return (
+            self._suma_real is not None
+            and self._servicios_sumados is self.servicios
+            and self._cantidad_sumada == len(self.servicios)
+        )
+
+    def _obtener_suma_real(self) -> Decimal:
+        if not self._suma_real_vigente():
+            self._recalcular_total_real()
+        return self._suma_real
+
+    def _verificar_total_real(self):
+        if not VERIFICAR_TOTAL_REAL:
+            return
+        esperado = sum(servicio.calcular_costo_real() for servicio in self.servicios)
+        if self.total_real != esperado:
+            raise AssertionError(
+                f"total_real incremental ({self.total_real}) difiere del recálculo ({esperado}) en la orden {self.order_id}"
+            )
 
     def _validar_precondiciones_completar(self):
         """Valida estado, autorización y existencia de servicios."""
@@ -179,8 +362,9 @@ class Orden:
 
     def _validar_limite_110_porciento(self) -> Decimal:
         """Valida límite 110% y retorna el límite calculado. Lanza error si se excede."""
-        self._recalcular_total_real()
-        limite = redondear_mitad_par(self.monto_autorizado * Decimal('1.10'), 2)
+        self.total_real = self._obtener_suma_real()
+        self._verificar_total_real()
+        limite = redondear_mitad_par(self.monto_autorizado * LIMITE_SOBRECOSTO, 2)
         
         if self.total_real > limite:
             self.estado = EstadoOrden.WAITING_FOR_APPROVAL
@@ -258,5 +442,118 @@ class Orden:
         
         self.estado = EstadoOrden.CANCELLED
         self.fecha_cancelacion = ahora()
-        self._agregar_evento("CANCELLED", {"motivo": motivo})
+        self._agregar_evento("CANCELLED", {"motivo": motivo}, self.fecha_cancelacion)
+
+    def asignar_ids_locales(self):
+        """Numera dentro de la orden los servicios y componentes sin id, en orden de alta.
+
+        Es la numeración de las órdenes reconstruidas desde eventos: al reaplicar SERVICE_ADDED
+        se asignan los mismos ids que cuando se guardó.
+        """
+        siguiente_servicio = max((s.id_servicio for s in self.servicios if s.id_servicio is not None), default=0) + 1
+        siguiente_componente = max(
+            (c.id_componente for s in self.servicios for c in s.componentes if c.id_componente is not None), default=0
+        ) + 1
+        for servicio in self.servicios:
+            if servicio.id_servicio is None:
+                servicio.id_servicio = siguiente_servicio
+                siguiente_servicio += 1
+            for componente in servicio.componentes:
+                if componente.id_componente is None:
+                    componente.id_componente = siguiente_componente
+                    siguiente_componente += 1
+
+    @staticmethod
+    def es_reconstruible(eventos: List[Evento]) -> bool:
+        """Indica si la historia empieza con un CREATED que trae los datos de la orden."""
+        return bool(eventos) and eventos[0].tipo == "CREATED" and "cliente" in eventos[0].metadatos
+
+    @classmethod
+    def desde_eventos(cls, eventos: List[Evento], id: Optional[int] = None, version: Optional[int] = None,
+                      ids_servicios: Optional[List[Tuple[int, List[int]]]] = None) -> "Orden":
+        """Reconstruye la orden reaplicando su historia desde CREATED (ver aplicar_eventos para ids_servicios)."""
+        if not cls.es_reconstruible(eventos):
+            raise ErrorDominio(CodigoError.INVALID_OPERATION, "La historia de la orden no empieza con un CREATED reconstruible")
+        datos = eventos[0].metadatos
+        orden = cls.hidratar(
+            id=id, order_id=datos["order_id"], cliente=datos["cliente"], vehiculo=datos["vehiculo"],
+            estado=EstadoOrden.CREATED, servicios=[], eventos=[eventos[0]], monto_autorizado=None,
+            version_autorizacion=0, total_real=Decimal('0'), fecha_creacion=datetime.fromisoformat(datos["fecha_creacion"]),
+            version=version
+        )
+        orden.aplicar_eventos(eventos[1:], ids_servicios)
+        return orden
+
+    def aplicar_eventos(self, eventos: List[Evento], ids_servicios: Optional[List[Tuple[int, List[int]]]] = None):
+        """Reaplica eventos ya ocurridos: cambia el estado sin validar reglas ni emitir eventos nuevos.
+
+        ids_servicios son los ids (servicio, componentes) en orden de alta cuando los asignó la BD;
+        sin ellos los servicios se numeran con asignar_ids_locales.
+        """
+        for evento in eventos:
+            aplicar = _APLICADORES.get(evento.tipo)
+            if aplicar is not None:
+                aplicar(self, evento.metadatos, evento.timestamp)
+            if evento.tipo == "SERVICE_ADDED":
+                self._numerar_servicio_agregado(ids_servicios)
+            self.eventos.append(evento)
+        self._inicializar_caches()
+
+    def _numerar_servicio_agregado(self, ids_servicios: Optional[List[Tuple[int, List[int]]]]):
+        posicion = len(self.servicios) - 1
+        if ids_servicios is None or posicion >= len(ids_servicios):
+            self.asignar_ids_locales()
+            return
+        servicio = self.servicios[posicion]
+        servicio.id_servicio, ids_componentes = ids_servicios[posicion]
+        for componente, id_componente in zip(servicio.componentes, ids_componentes):
+            componente.id_componente = id_componente
+
+    def _aplicar_servicio_agregado(self, datos: dict, momento: datetime):
+        componentes = [Componente(c["descripcion"], a_decimal(c["costo_estimado"])) for c in datos.get("componentes", [])]
+        self.servicios.append(Servicio(datos["descripcion"], a_decimal(datos["costo_mano_obra"]), componentes))
+
+    def _aplicar_autorizacion(self, datos: dict, momento: datetime):
+        self.monto_autorizado = a_decimal(datos["monto"])
+        self.version_autorizacion = datos["version"]
+        self.estado = EstadoOrden.AUTHORIZED
+
+    def _aplicar_costo_real(self, datos: dict, momento: datetime):
+        servicio = next(s for s in self.servicios if s.id_servicio == datos["servicio_id"])
+        servicio.costo_real = a_decimal(datos["costo_real"])
+        componentes_reales = datos.get("componentes_reales") or {}
+        for componente in servicio.componentes:
+            costo = componentes_reales.get(str(componente.id_componente))
+            componente.costo_real = a_decimal(costo) if costo is not None else None
+        if datos.get("completado") is not None:
+            servicio.completado = datos["completado"]
+        self.total_real = a_decimal(datos["total_real"])
+
+    def _aplicar_espera_aprobacion(self, datos: dict, momento: datetime):
+        self.estado = EstadoOrden.WAITING_FOR_APPROVAL
+        self.total_real = a_decimal(datos["total_real"])
+
+    def _aplicar_cancelacion(self, datos: dict, momento: datetime):
+        self.estado = EstadoOrden.CANCELLED
+        self.fecha_cancelacion = momento
+
+
+def _aplicar_estado(estado: EstadoOrden):
+    def aplicar(orden: Orden, datos: dict, momento: datetime):
+        orden.estado = estado
+    return aplicar
+
+
+_APLICADORES = {
+    "SERVICE_ADDED": Orden._aplicar_servicio_agregado,
+    "DIAGNOSED": _aplicar_estado(EstadoOrden.DIAGNOSED),
+    "AUTHORIZED": Orden._aplicar_autorizacion,
+    "REAUTHORIZED": Orden._aplicar_autorizacion,
+    "IN_PROGRESS": _aplicar_estado(EstadoOrden.IN_PROGRESS),
+    "REAL_COST_SET": Orden._aplicar_costo_real,
+    "WAITING_FOR_APPROVAL": Orden._aplicar_espera_aprobacion,
+    "COMPLETED": _aplicar_estado(EstadoOrden.COMPLETED),
+    "DELIVERED": _aplicar_estado(EstadoOrden.DELIVERED),
+    "CANCELLED": Orden._aplicar_cancelacion,
+}
 
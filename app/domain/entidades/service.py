@@ -1,13 +1,14 @@
 from decimal import Decimal
 from typing import List, Optional
 from .component import Componente
+from ..exceptions import ErrorDominio
+from ..enums import CodigoError
 
 
 class Servicio:
+    __slots__ = ("id_servicio", "descripcion", "costo_mano_obra_estimado", "componentes", "completado", "costo_real")
+
     def __init__(self, descripcion: str, costo_mano_obra_estimado: Decimal, componentes: List[Componente] = None):
-        from ..exceptions import ErrorDominio
-        from ..enums import CodigoError
-        
         if costo_mano_obra_estimado < 0:
             raise ErrorDominio(CodigoError.INVALID_AMOUNT, f"Costo de mano de obra estimado debe ser positivo, se recibió: {costo_mano_obra_estimado}")
         
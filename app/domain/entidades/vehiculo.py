@@ -2,6 +2,8 @@ from typing import Optional
 
 
 class Vehiculo:
+    __slots__ = ("id_vehiculo", "placa", "marca", "modelo", "anio", "kilometraje", "id_cliente")
+
     def __init__(self, placa: str, id_cliente: int, marca: Optional[str] = None, modelo: Optional[str] = None, anio: Optional[int] = None, kilometraje: Optional[int] = None, id_vehiculo: Optional[int] = None):
         self.id_vehiculo = id_vehiculo
         self.placa = placa
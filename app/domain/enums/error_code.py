@@ -12,4 +12,7 @@ class CodigoError(Enum):
     INVALID_STATE = "INVALID_STATE"
     INVALID_OPERATION = "INVALID_OPERATION"
     PLACA_ASOCIADA_OTRO_CLIENTE = "PLACA_ASOCIADA_OTRO_CLIENTE"
+    CONCURRENT_MODIFICATION = "CONCURRENT_MODIFICATION"
+    IDEMPOTENCY_KEY_REUSED = "IDEMPOTENCY_KEY_REUSED"
+    IDEMPOTENCY_IN_PROGRESS = "IDEMPOTENCY_IN_PROGRESS"
 
@@ -2,6 +2,8 @@ import os
 from zoneinfo import ZoneInfo
 from datetime import datetime
 
+_zona_horaria = None
+
 def obtener_zona_horaria():
     tz = os.getenv("TIMEZONE", "America/Bogota")
     try:
@@ -9,6 +11,16 @@ def obtener_zona_horaria():
     except Exception:
         return ZoneInfo("America/Bogota")
 
+def recargar_zona_horaria():
+    """Vuelve a leer TIMEZONE; ahora() usa la zona cacheada hasta que se llame a esta función."""
+    global _zona_horaria
+    _zona_horaria = obtener_zona_horaria()
+    return _zona_horaria
+
 def ahora():
-    return datetime.now(obtener_zona_horaria())
+    return datetime.now(_zona_horaria or recargar_zona_horaria())
 
+def a_zona_horaria(momento: datetime) -> datetime:
+    """Expresa momento en la zona de la app; si no trae zona se asume que ya está en ella."""
+    zona = _zona_horaria or recargar_zona_horaria()
+    return momento.astimezone(zona) if momento.tzinfo else momento.replace(tzinfo=zona)
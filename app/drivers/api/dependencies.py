@@ -1,17 +1,30 @@
+import os
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from ...infrastructure.db import obtener_sesion
-from ...infrastructure.repositories import RepositorioOrden, RepositorioClienteSQL, RepositorioVehiculoSQL, UnidadTrabajoSQL
+from ...infrastructure.repositories import (
+    RepositorioOrden, RepositorioClienteSQL, RepositorioVehiculoSQL, UnidadTrabajoSQL, RepositorioOrdenMemoria,
+    RepositorioIdempotenciaMemoria, RepositorioTrabajosSQL
+)
 from ...infrastructure.logger import AlmacenEventosLogger
+from ...infrastructure.relay_outbox import AlmacenEventosDiferido
+from ...infrastructure.almacen_eventos_memoria import AlmacenEventosMemoria
+from ...infrastructure.repositories.repositorio_outbox import outbox_habilitado
 from ...infrastructure.logging_config import obtener_logger
 
 from ...application.action_service import ActionService
+from ...application.ports import AlmacenEventos, AlmacenIdempotencia
 
 
 logger = obtener_logger("app.drivers.api.dependencies")
 
+_repositorio_memoria: Optional[RepositorioOrdenMemoria] = None
+_almacen_eventos_memoria: Optional[AlmacenEventosMemoria] = None
+_idempotencia_memoria: Optional[RepositorioIdempotenciaMemoria] = None
+
 
 def obtener_sesion_db() -> Session:
     """Proporciona una sesión de BD con manejo automático de transacciones."""
@@ -49,15 +62,54 @@ def obtener_repositorio(unidad_trabajo: UnidadTrabajoSQL = Depends(obtener_unida
     return unidad_trabajo.obtener_repositorio_orden()
 
 
-def obtener_auditoria() -> AlmacenEventosLogger:
+def obtener_auditoria() -> AlmacenEventos:
+    # Con outbox activo, el relay publica los eventos después del commit
+    if outbox_habilitado():
+        return AlmacenEventosDiferido()
     return AlmacenEventosLogger()
 
 
+def obtener_repositorio_memoria() -> RepositorioOrdenMemoria:
+    """Repositorio compartido por todo el proceso cuando REPOSITORY_BACKEND=memory."""
+    global _repositorio_memoria
+    if _repositorio_memoria is None:
+        _repositorio_memoria = RepositorioOrdenMemoria()
+    return _repositorio_memoria
+
+
+def obtener_auditoria_memoria() -> AlmacenEventosMemoria:
+    global _almacen_eventos_memoria
+    if _almacen_eventos_memoria is None:
+        _almacen_eventos_memoria = AlmacenEventosMemoria(int(os.getenv("MEMORY_EVENTS_MAX", "100000")))
+    return _almacen_eventos_memoria
+
+
+def obtener_idempotencia(unidad_trabajo: UnidadTrabajoSQL = Depends(obtener_unidad_trabajo)) -> AlmacenIdempotencia:
+    return unidad_trabajo.obtener_repositorio_idempotencia()
+
+
+def obtener_repositorio_trabajos(sesion: Session = Depends(obtener_sesion_db)) -> RepositorioTrabajosSQL:
+    return RepositorioTrabajosSQL(sesion)
+
+
+def obtener_idempotencia_memoria() -> RepositorioIdempotenciaMemoria:
+    global _idempotencia_memoria
+    if _idempotencia_memoria is None:
+        _idempotencia_memoria = RepositorioIdempotenciaMemoria()
+    return _idempotencia_memoria
+
+
+def sin_repositorio() -> None:
+    """Sustituye a los repositorios de clientes y vehículos en modo memoria: la orden guarda solo nombre y placa."""
+    return None
+
+
 def obtener_action_service(
     repo: RepositorioOrden = Depends(obtener_repositorio),
-    auditoria: AlmacenEventosLogger = Depends(obtener_auditoria)
+    auditoria: AlmacenEventos = Depends(obtener_auditoria),
+    idempotencia: AlmacenIdempotencia = Depends(obtener_idempotencia)
 ) -> ActionService:
-    return ActionService(repo, auditoria)
+    return ActionService(repo, auditoria, idempotencia=idempotencia)
 
 
 def obtener_repositorio_cliente(sesion: Session = Depends(obtener_sesion_db)) -> RepositorioClienteSQL:
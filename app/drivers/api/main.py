@@ -13,10 +13,22 @@ if not os.path.exists("/.dockerenv"):
     load_dotenv()
 
 from ...infrastructure.logging_config import configurar_logging, obtener_logger, request_id_var, obtener_contexto_log
-from ...infrastructure.db import crear_engine_bd
+from ...infrastructure.db import crear_engine_bd, obtener_sesion
+from ...infrastructure.logger import AlmacenEventosLogger
+from ...infrastructure.relay_outbox import RelayOutbox
+from ...infrastructure.trabajador_comandos import TrabajadorComandos
+from ...infrastructure.metricas import registrar_metricas_relay
+from ...infrastructure.repositories.repositorio_outbox import outbox_habilitado
+from ...infrastructure.repositories.repositorio_orden_memoria import repositorio_memoria_habilitado
 from ...domain.exceptions import ErrorDominio
+from ...domain.zona_horaria import recargar_zona_horaria
 from .routes import router
 from .middleware import LoggingMiddleware
+from .dependencies import (
+    obtener_repositorio, obtener_auditoria, obtener_repositorio_cliente, obtener_repositorio_vehiculo,
+    obtener_repositorio_memoria, obtener_auditoria_memoria, sin_repositorio,
+    obtener_idempotencia, obtener_idempotencia_memoria, obtener_repositorio_trabajos
+)
 
 
 logger = obtener_logger("app.drivers.api.main")
@@ -25,15 +37,40 @@ logger = obtener_logger("app.drivers.api.main")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     configurar_logging()
+    recargar_zona_horaria()
     logger.info("Iniciando aplicación")
     
-    try:
-        crear_engine_bd()
-    except Exception as e:
-        logger.error(f"Error BD: {str(e)}", exc_info=True)
+    bd_disponible = False
+    if repositorio_memoria_habilitado():
+        logger.info("Repositorio de órdenes en memoria (REPOSITORY_BACKEND=memory)")
+    else:
+        try:
+            crear_engine_bd()
+            bd_disponible = True
+        except Exception as e:
+            logger.error(f"Error BD: {str(e)}", exc_info=True)
+    
+    relay = None
+    if outbox_habilitado():
+        relay = RelayOutbox(obtener_sesion, AlmacenEventosLogger())
+        relay.iniciar()
+        registrar_metricas_relay(relay, obtener_sesion)
+        app.state.relay_outbox = relay
+    
+    trabajadores = []
+    if bd_disponible:
+        # La cola de POST /commands/async vive en la BD; también se puede drenar con python -m app.drivers.worker
+        for _ in range(int(os.getenv("JOBS_WORKERS", "1"))):
+            trabajador = TrabajadorComandos(obtener_sesion, obtener_auditoria())
+            trabajador.iniciar()
+            trabajadores.append(trabajador)
     
     yield
     
+    for trabajador in trabajadores:
+        trabajador.detener()
+    if relay is not None:
+        relay.detener()
     logger.info("Cerrando aplicación")
 
 
@@ -69,6 +106,15 @@ app.add_middleware(LoggingMiddleware)
 
 app.include_router(router)
 
+if repositorio_memoria_habilitado():
+    # Órdenes y eventos en memoria: los endpoints de órdenes no abren sesión de BD
+    app.dependency_overrides[obtener_repositorio] = obtener_repositorio_memoria
+    app.dependency_overrides[obtener_auditoria] = obtener_auditoria_memoria
+    app.dependency_overrides[obtener_idempotencia] = obtener_idempotencia_memoria
+    app.dependency_overrides[obtener_repositorio_cliente] = sin_repositorio
+    app.dependency_overrides[obtener_repositorio_vehiculo] = sin_repositorio
+    app.dependency_overrides[obtener_repositorio_trabajos] = sin_repositorio
+
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -1,14 +1,34 @@
+import os
 import time
 import uuid
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from ...infrastructure.logging_config import obtener_logger, request_id_var
+from ...infrastructure.logging_config import obtener_logger, request_id_var, ruta_var
+from ...infrastructure.metricas import duracion_requests, requests_total
+from ...infrastructure.consultas_sql import iniciar_medicion, finalizar_medicion, obtener_presupuesto_consultas
+from ...infrastructure.perfilador import SolicitudPerfil, perfil_var, solicita_perfil
 
 logger = obtener_logger("app.drivers.api.middleware")
 logger_errores = obtener_logger("app.drivers.api.errors")
 
 
+def _ruta_plantilla(request: Request) -> str:
+    """Usa la plantilla de la ruta (/orders/{order_id}) para no crear una serie por cada id."""
+    ruta = getattr(request.scope.get("route"), "path", None)
+    return ruta if isinstance(ruta, str) else "sin_ruta"
+
+
+def _registrar_metricas_request(request: Request, metodo: str, status_code: int, segundos: float) -> None:
+    ruta = _ruta_plantilla(request)
+    duracion_requests.observar(segundos, metodo, ruta)
+    requests_total.inc(metodo, ruta, str(status_code))
+
+
+def _server_timing(consultas: int, db_ms: float, total_ms: float) -> str:
+    return f'db;dur={db_ms:.2f};desc="{consultas} consultas", total;dur={total_ms:.2f}'
+
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         inicio = time.time()
@@ -17,7 +37,11 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         client_ip = request.client.host if request.client else "unknown"
         
         req_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())[:8]
-        request_id_var.set(req_id)
+        token_request_id = request_id_var.set(req_id)
+        token_ruta = ruta_var.set(f"{metodo} {path}")
+        token_consultas = iniciar_medicion(req_id)
+        solicitud_perfil = SolicitudPerfil(req_id) if solicita_perfil(request.headers.get("X-Profile")) else None
+        token_perfil = perfil_var.set(solicitud_perfil)
         
         logger.info(
             f"REQUEST {metodo} {path} desde {client_ip}",
@@ -32,25 +56,48 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         try:
             response = await call_next(request)
             tiempo_respuesta = (time.time() - inicio) * 1000
+            _registrar_metricas_request(request, metodo, response.status_code, tiempo_respuesta / 1000)
+            consultas = finalizar_medicion(token_consultas)
             
             response.headers["X-Request-ID"] = req_id
+            response.headers["Server-Timing"] = _server_timing(consultas.consultas, consultas.tiempo_ms, tiempo_respuesta)
+            if solicitud_perfil is not None and solicitud_perfil.archivo:
+                response.headers["X-Profile-File"] = os.path.basename(solicitud_perfil.archivo)
             
             logger.info(
-                f"RESPONSE {metodo} {path} - {response.status_code} - {tiempo_respuesta:.2f}ms",
+                f"RESPONSE {metodo} {path} - {response.status_code} - {tiempo_respuesta:.2f}ms - {consultas.consultas} consultas SQL ({consultas.tiempo_ms:.2f}ms)",
                 extra={
                     "request_id": req_id,
                     "method": metodo,
                     "path": path,
                     "status_code": response.status_code,
                     "response_time_ms": round(tiempo_respuesta, 2),
+                    "db_queries": consultas.consultas,
+                    "db_time_ms": round(consultas.tiempo_ms, 2),
                     "client_ip": client_ip
                 }
             )
             
+            presupuesto = obtener_presupuesto_consultas()
+            if presupuesto and consultas.consultas > presupuesto:
+                logger.warning(
+                    f"PRESUPUESTO DE CONSULTAS EXCEDIDO {metodo} {path}: {consultas.consultas} > {presupuesto}",
+                    extra={
+                        "request_id": req_id,
+                        "method": metodo,
+                        "path": path,
+                        "db_queries": consultas.consultas,
+                        "db_time_ms": round(consultas.tiempo_ms, 2),
+                        "query_budget": presupuesto
+                    }
+                )
+            
             return response
             
         except Exception as e:
             tiempo_respuesta = (time.time() - inicio) * 1000
+            _registrar_metricas_request(request, metodo, 500, tiempo_respuesta / 1000)
+            consultas = finalizar_medicion(token_consultas)
             logger_errores.error(
                 f"ERROR NO CONTROLADO {metodo} {path}: {type(e).__name__}: {str(e)}",
                 extra={
@@ -58,6 +105,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                     "method": metodo,
                     "path": path,
                     "response_time_ms": round(tiempo_respuesta, 2),
+                    "db_queries": consultas.consultas,
+                    "db_time_ms": round(consultas.tiempo_ms, 2),
                     "client_ip": client_ip,
                     "error": str(e),
                     "error_type": type(e).__name__
@@ -65,3 +114,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                 exc_info=True
             )
             raise
+        finally:
+            perfil_var.reset(token_perfil)
+            ruta_var.reset(token_ruta)
+            request_id_var.reset(token_request_id)
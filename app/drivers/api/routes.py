@@ -1,27 +1,64 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Path, Body, Query
-from typing import List, Dict, Any, Optional
+import json
+import time
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, status, Path, Body, Query, Header, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+from typing import Annotated, List, Dict, Any, Optional, Tuple
+from sqlalchemy.orm import Session
 
 from ...application.action_service import ActionService
+from ...application.lotes_comandos import FabricaServicio, ResultadoComando, procesar_lote, acumular_resultado, resumir_lote
+from ...application.idempotencia import calcular_huella, ejecutar_idempotente
 from ...application.dtos import OrdenDTO, EventoDTO, ErrorDTO, CrearOrdenDTO, AgregarServicioDTO, AutorizarDTO, ReautorizarDTO, EstablecerCostoRealDTO, IntentarCompletarDTO, EntregarDTO, CancelarDTO
 from ...application.mappers import orden_a_dto, cliente_a_dto, vehiculo_a_dto, crear_orden_dto, agregar_servicio_dto, autorizar_dto, reautorizar_dto, costo_real_dto, intentar_completar_dto, entregar_dto, cancelar_dto
-from ...infrastructure.repositories import RepositorioOrden, RepositorioClienteSQL, RepositorioVehiculoSQL
+from ...infrastructure.repositories import RepositorioOrden, RepositorioClienteSQL, RepositorioVehiculoSQL, UnidadTrabajoSQL
+from ...infrastructure.repositories.repositorio_orden_memoria import repositorio_memoria_habilitado
+from ...infrastructure.repositories.repositorio_trabajos import RepositorioTrabajosSQL, max_comandos_por_trabajo
+from ...infrastructure.models.trabajo_model import TrabajoModel
 from ...domain.exceptions import ErrorDominio
+from ...domain.enums import CodigoError
 from ...domain.entidades import Cliente, Vehiculo
 from ...domain.zona_horaria import ahora
-from .dependencies import obtener_action_service, obtener_repositorio, obtener_repositorio_cliente, obtener_repositorio_vehiculo
+from .dependencies import obtener_action_service, obtener_repositorio, obtener_repositorio_cliente, obtener_repositorio_vehiculo, obtener_repositorio_trabajos
 from .schemas import (
     HealthResponse, CommandsRequest, CommandsResponse, SetStateRequest,
     CreateOrderRequest, AddServiceRequest, SetRealCostRequest, AuthorizeRequest,
     ReauthorizeRequest, CancelRequest, ClienteResponse, CreateClienteRequest,
     UpdateClienteRequest, ListClientesResponse, VehiculoResponse, CreateVehiculoRequest,
-    UpdateVehiculoRequest, ListVehiculosResponse, CustomerIdentifier, VehicleIdentifier
+    UpdateVehiculoRequest, ListVehiculosResponse, CustomerIdentifier, VehicleIdentifier, JobResponse,
+    EventRecord, EventPageResponse, FeedEvent, EventFeedResponse, StatsRow, StatsResponse
 )
 from ...infrastructure.logging_config import obtener_logger
+from ...infrastructure.metricas import registro_metricas
+from ...infrastructure.perfilador import perfilable
+from ...infrastructure.feed_eventos import aviso_eventos, espera_maxima_feed, intervalo_feed
+from ...infrastructure.difusor_estados import difusor_estados, latido_stream
 
 
 logger = obtener_logger("app.drivers.api.routes")
 
-router = APIRouter()
+
+def _error_http(e: ErrorDominio) -> HTTPException:
+    """Conflictos de versión como 409 (el cliente puede reintentar); el resto de errores de dominio como 400."""
+    if e.codigo in (CodigoError.CONCURRENT_MODIFICATION, CodigoError.IDEMPOTENCY_IN_PROGRESS):
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.mensaje)
+    if e.codigo == CodigoError.IDEMPOTENCY_KEY_REUSED:
+        return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.mensaje)
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
+
+
+class RutaPerfilable(APIRoute):
+    """Ruta cuyo endpoint se puede perfilar cuando el request lo solicita (ver LoggingMiddleware)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, perfilable(endpoint), **kwargs)
+
+
+router = APIRouter(route_class=RutaPerfilable)
 
 
 def obtener_cliente_por_criterio(customer: CustomerIdentifier, repo: RepositorioClienteSQL) -> Cliente:
@@ -84,6 +121,10 @@ def health_check():
         "tablas_faltantes": []
     }
     
+    if repositorio_memoria_habilitado():
+        estado["database"] = "memoria"
+        return estado
+    
     try:
         from ...infrastructure.db import crear_engine_bd, obtener_url_bd
         from sqlalchemy import inspect, text
@@ -121,6 +162,14 @@ def health_check():
     return estado
 
 
+@router.get("/metrics", response_class=PlainTextResponse, tags=["Sistema"])
+def metricas():
+    return PlainTextResponse(
+        registro_metricas.exponer(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 def _normalizar_comando(comando_raw: dict, idx: int) -> dict:
     comando = comando_raw.copy()
     
@@ -139,6 +188,20 @@ def _normalizar_comando(comando_raw: dict, idx: int) -> dict:
     return comando
 
 
+def _acumular_resultado(
+    comando: dict,
+    idx: int,
+    resultado: ResultadoComando,
+    orders_dict: dict,
+    events: list,
+    errors: list
+) -> None:
+    acumular_resultado(resultado, orders_dict, events, errors)
+    error_dto = resultado[2]
+    if error_dto:
+        logger.warning(f"Comando {idx} ({comando.get('op')}): {error_dto.message}")
+
+
 def _procesar_comando_individual(
     comando: dict,
     idx: int,
@@ -147,37 +210,48 @@ def _procesar_comando_individual(
     events: list,
     errors: list
 ) -> None:
-    op = comando.get("op")
-    
     try:
-        orden_dto, eventos_dto, error_dto = action_service.procesar_comando(comando)
-        
-        if orden_dto and orden_dto.order_id:
-            orders_dict[orden_dto.order_id] = {
-                "order_id": orden_dto.order_id,
-                "status": orden_dto.status,
-                "customer": orden_dto.customer,
-                "vehicle": orden_dto.vehicle,
-                "subtotal_estimated": orden_dto.subtotal_estimated,
-                "authorized_amount": orden_dto.authorized_amount or "0.00",
-                "real_total": orden_dto.real_total
-            }
-        
-        if error_dto:
-            errors.append(error_dto.model_dump())
-            logger.warning(f"Comando {idx} ({op}): {error_dto.message}")
-        
-        events.extend([e.model_dump() for e in eventos_dto])
-        
+        resultado = action_service.procesar_comando(comando)
     except Exception:
-        logger.error(f"Error procesando comando {idx}: {op}", exc_info=True)
+        logger.error(f"Error procesando comando {idx}: {comando.get('op')}", exc_info=True)
         raise
+    _acumular_resultado(comando, idx, resultado, orders_dict, events, errors)
+
+
+def _fabrica_servicio_paralelo(action_service: ActionService) -> Optional[FabricaServicio]:
+    """Servicio para cada partición de /commands; None si el repositorio no admite ejecución en paralelo."""
+    sesion = getattr(action_service.repo, "sesion", None)
+    if sesion is None:
+        # El repositorio en memoria es seguro entre hilos: todas las particiones lo comparten
+        return lambda: nullcontext(action_service)
+    if not isinstance(sesion, Session):
+        return None
+    
+    @contextmanager
+    def servicio_con_sesion_propia():
+        # Misma BD que la sesión del request, pero una conexión propia por partición
+        sesion_particion = Session(bind=sesion.get_bind())
+        try:
+            unidad = UnidadTrabajoSQL(sesion_particion)
+            idempotencia = unidad.obtener_repositorio_idempotencia() if action_service.idempotencia is not None else None
+            yield ActionService(unidad.obtener_repositorio_orden(), action_service.auditoria, action_service.max_reintentos, idempotencia)
+            if sesion_particion.is_active:
+                sesion_particion.commit()
+        except Exception:
+            sesion_particion.rollback()
+            raise
+        finally:
+            sesion_particion.close()
+    
+    return servicio_con_sesion_propia
 
 
 @router.post("/commands", response_model=CommandsResponse, tags=["Comandos"])
 def procesar_comandos(
     request_body: CommandsRequest,
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    response: Response = None,
+    idempotency_key: Annotated[Optional[str], Header(alias="Idempotency-Key")] = None
 ):
     if not request_body.commands:
         raise HTTPException(
@@ -191,35 +265,204 @@ def procesar_comandos(
             detail="Máximo 100 comandos por request"
         )
     
-    orders_dict = {}
-    events = []
-    errors = []
+    comandos = [_normalizar_comando(comando_raw, idx) for idx, comando_raw in enumerate(request_body.commands, 1)]
+    
+    idempotencia = getattr(action_service, "idempotencia", None)
+    if not idempotency_key or idempotencia is None:
+        return _ejecutar_lote(comandos, action_service)
     
-    sesion = action_service.repo.sesion
+    try:
+        respuesta, repetida = ejecutar_idempotente(
+            idempotencia, f"lote:{idempotency_key}", calcular_huella(comandos), "batch",
+            lambda: _ejecutar_lote(comandos, action_service),
+            lambda r: r.model_dump(), CommandsResponse.model_validate
+        )
+    except ErrorDominio as e:
+        raise _error_http(e)
+    if repetida and response is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+    return respuesta
+
+
+def _ejecutar_lote(comandos: List[dict], action_service: ActionService) -> CommandsResponse:
+    # Los comandos de órdenes distintas se ejecutan en paralelo; los resultados se recombinan en el orden recibido
+    resultados = procesar_lote(comandos, action_service, _fabrica_servicio_paralelo(action_service))
+    
+    # El repositorio en memoria no tiene sesión
+    sesion = getattr(action_service.repo, "sesion", None)
+    
+    for idx, (comando, resultado) in enumerate(zip(comandos, resultados), 1):
+        if isinstance(resultado, Exception):
+            if sesion is not None:
+                sesion.rollback()
+            logger.error(f"Error inesperado en comando {idx}: {str(resultado)}", exc_info=resultado)
+        elif resultado is not None and resultado[2]:
+            logger.warning(f"Comando {idx} ({comando.get('op')}): {resultado[2].message}")
+    
+    # Las demás particiones ya confirmaron sus comandos: con un 500 el cliente reintentaría y los repetiría,
+    # así que la excepción queda como INTERNAL_ERROR de su comando junto a los resultados del resto
+    return CommandsResponse(**resumir_lote(comandos, resultados))
+
+
+def _trabajo_a_respuesta(trabajo: TrabajoModel) -> JobResponse:
+    return JobResponse(
+        job_id=trabajo.id_trabajo,
+        status=trabajo.estado,
+        total_commands=trabajo.total_comandos,
+        attempts=trabajo.intentos or 0,
+        created_at=trabajo.fecha_creacion,
+        started_at=trabajo.fecha_inicio,
+        finished_at=trabajo.fecha_fin,
+        result=json.loads(trabajo.resultado_json) if trabajo.resultado_json else None,
+        error=trabajo.error
+    )
+
+
+@router.post("/commands/async", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED, tags=["Comandos"])
+def encolar_comandos(
+    request_body: CommandsRequest,
+    response: Response,
+    trabajos: Optional[RepositorioTrabajosSQL] = Depends(obtener_repositorio_trabajos)
+):
+    if trabajos is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La cola de trabajos requiere base de datos (REPOSITORY_BACKEND=sql)"
+        )
+    
+    maximo = max_comandos_por_trabajo()
+    if len(request_body.commands) > maximo:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {maximo} comandos por trabajo"
+        )
+    
+    comandos = [_normalizar_comando(comando_raw, idx) for idx, comando_raw in enumerate(request_body.commands, 1)]
+    trabajo = trabajos.encolar(comandos)
+    response.headers["Location"] = f"/jobs/{trabajo.id_trabajo}"
+    return _trabajo_a_respuesta(trabajo)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse, tags=["Comandos"])
+def obtener_trabajo(
+    job_id: str = Path(...),
+    trabajos: Optional[RepositorioTrabajosSQL] = Depends(obtener_repositorio_trabajos)
+):
+    trabajo = trabajos.obtener(job_id) if trabajos is not None else None
+    if trabajo is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Trabajo {job_id} no encontrado")
+    return _trabajo_a_respuesta(trabajo)
+
+
+# Sin la historia, la respuesta de una orden no crece con cada evento; la historia se pagina en /orders/{order_id}/events
+IncluirEventos = Annotated[bool, Query(description="false omite la lista de eventos de la orden en la respuesta")]
+
+
+def _respuesta_orden(orden_dto: OrdenDTO, incluir_eventos: bool) -> OrdenDTO:
+    return orden_dto if incluir_eventos else orden_dto.model_copy(update={"events": []})
+
+
+@router.get("/events/feed", response_model=EventFeedResponse, tags=["Eventos"])
+async def feed_eventos(
+    repo: RepositorioOrden = Depends(obtener_repositorio),
+    cursor: Annotated[Optional[str], Query(description="next_cursor de la respuesta anterior; vacío para empezar desde el principio")] = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    tipos: Annotated[Optional[List[str]], Query(alias="type", description="Solo eventos de estos tipos (repetible)")] = None,
+    wait: Annotated[float, Query(ge=0, description="Segundos que espera eventos nuevos si no hay ninguno (long-poll)")] = 0
+):
+    """Eventos de todas las órdenes posteriores al cursor.
+
+    Es async para que el long-poll espere sin ocupar un hilo; las consultas corren en el threadpool.
+    """
+    despues_de = _parsear_cursor(cursor)
+    tipos = [t for t in (tipos or []) if t] or None
+    limite_espera = time.monotonic() + min(wait, espera_maxima_feed())
+    sesion = getattr(repo, "sesion", None)
     
-    for idx, comando_raw in enumerate(request_body.commands, 1):
-        comando = _normalizar_comando(comando_raw, idx)
+    while True:
+        version = aviso_eventos.version
+        pagina = await run_in_threadpool(repo.listar_eventos_globales, despues_de, limit + 1, tipos)
+        restante = limite_espera - time.monotonic()
+        if pagina or restante <= 0:
+            break
+        if sesion is not None:
+            # Devuelve la conexión al pool mientras espera
+            await run_in_threadpool(sesion.close)
+        await aviso_eventos.esperar(version, min(intervalo_feed(), restante))
+    
+    eventos = [
+        FeedEvent(cursor=str(c), order_id=order_id, type=evento.tipo, timestamp=evento.timestamp, metadata=evento.metadatos or {})
+        for c, order_id, evento in pagina[:limit]
+    ]
+    return EventFeedResponse(
+        events=eventos,
+        next_cursor=eventos[-1].cursor if eventos else str(despues_de),
+        has_more=len(pagina) > limit
+    )
+
+
+def _mensaje_sse(evento: str, datos: dict, id_mensaje: Optional[int] = None) -> str:
+    prefijo = f"id: {id_mensaje}\n" if id_mensaje is not None else ""
+    return f"{prefijo}event: {evento}\ndata: {json.dumps(datos)}\n\n"
+
+
+@router.get("/events/stream", tags=["Eventos"], response_class=StreamingResponse)
+async def stream_estados():
+    """Server-sent events con cada cambio de estado de una orden confirmado en este proceso."""
+    suscripcion = difusor_estados.suscribir()
+    if suscripcion is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Demasiados clientes conectados al stream; reintente más tarde")
+    latido = latido_stream()
+    
+    async def generar():
         try:
-            _procesar_comando_individual(
-                comando, idx, action_service,
-                orders_dict, events, errors
-            )
-            sesion.expire_all()
-        except HTTPException:
-            sesion.rollback()
-            raise
-        except Exception as e:
-            sesion.rollback()
-            logger.error(f"Error inesperado en comando {idx}: {str(e)}", exc_info=True)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error procesando comando {idx}: {str(e)}"
-            )
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    mensaje = await suscripcion.siguiente(latido)
+                except asyncio.TimeoutError:
+                    # El comentario mantiene viva la conexión y deja detectar clientes que se fueron
+                    yield ": keepalive\n\n"
+                    continue
+                if mensaje is None:
+                    yield _mensaje_sse("overflow", {"detail": "El cliente no leyó a tiempo; recargue las órdenes y vuelva a conectarse"})
+                    return
+                yield _mensaje_sse("status", {k: v for k, v in mensaje.items() if k != "id"}, mensaje["id"])
+        finally:
+            difusor_estados.cancelar(suscripcion)
+    
+    return StreamingResponse(generar(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# Nombre en la API -> dimensión de RepositorioOrden.estadisticas
+DIMENSIONES_ESTADISTICAS = {"day": "dia", "status": "estado", "customer": "cliente"}
+
+
+@router.get("/stats", response_model=StatsResponse, tags=["Órdenes"])
+def obtener_estadisticas(
+    repo: RepositorioOrden = Depends(obtener_repositorio),
+    group_by: Annotated[Optional[List[str]], Query(description="day, status y/o customer (repetible); por defecto los tres")] = None,
+    desde: Annotated[Optional[date], Query(alias="from", description="Primer día de creación incluido")] = None,
+    hasta: Annotated[Optional[date], Query(alias="to", description="Último día de creación incluido")] = None,
+    customer: Annotated[Optional[str], Query(description="Solo órdenes de este cliente")] = None
+):
+    """Cantidad de órdenes y sus montos por día de creación, estado actual y cliente, leídos de contadores mantenidos al guardar."""
+    agrupar = group_by or list(DIMENSIONES_ESTADISTICAS)
+    invalidas = [d for d in agrupar if d not in DIMENSIONES_ESTADISTICAS]
+    if invalidas:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"group_by no válido: {', '.join(invalidas)}; use day, status o customer")
+    agrupar = list(dict.fromkeys(agrupar))
     
-    return CommandsResponse(
-        orders=list(orders_dict.values()),
-        events=events,
-        errors=errors
+    filas = repo.estadisticas([DIMENSIONES_ESTADISTICAS[d] for d in agrupar], desde=desde, hasta=hasta, cliente=customer)
+    return StatsResponse(
+        group_by=agrupar,
+        rows=[
+            StatsRow(
+                day=f.dia, status=f.estado, customer=f.cliente, orders=f.cantidad,
+                authorized_amount=f"{f.monto_autorizado:.2f}", real_total=f"{f.total_real:.2f}"
+            )
+            for f in filas
+        ]
     )
 
 
@@ -228,7 +471,8 @@ def crear_orden(
     request: CreateOrderRequest,
     action_service: ActionService = Depends(obtener_action_service),
     repo_cliente: RepositorioClienteSQL = Depends(obtener_repositorio_cliente),
-    repo_vehiculo: RepositorioVehiculoSQL = Depends(obtener_repositorio_vehiculo)
+    repo_vehiculo: RepositorioVehiculoSQL = Depends(obtener_repositorio_vehiculo),
+    include_events: IncluirEventos = True
 ):
     try:
         data = {
@@ -240,22 +484,123 @@ def crear_orden(
         dto = crear_orden_dto(data)
         from ...application.acciones.orden import CrearOrden
         accion = CrearOrden(action_service.repo, action_service.auditoria, repo_cliente, repo_vehiculo)
-        return accion.ejecutar(dto)
-    except (ValueError, ErrorDominio) as e:
-        msg = e.mensaje if isinstance(e, ErrorDominio) else str(e)
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=msg)
+        return _respuesta_orden(accion.ejecutar(dto), include_events)
+    except ErrorDominio as e:
+        raise _error_http(e)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _parsear_as_of(as_of: str) -> Tuple[Optional[datetime], Optional[int]]:
+    """as_of es un número de evento (1 = CREATED) o una fecha ISO 8601; retorna (momento, secuencia)."""
+    valor = as_of.strip()
+    if valor.isdigit():
+        secuencia = int(valor)
+        if secuencia < 1:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="as_of debe ser un número de evento desde 1")
+        return None, secuencia
+    if "T" in valor:
+        # Un "+" sin codificar en la URL llega como espacio
+        valor = valor.replace(" ", "+")
+    try:
+        return datetime.fromisoformat(valor.replace("Z", "+00:00")), None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="as_of debe ser un número de evento o una fecha ISO 8601")
 
 
 @router.get("/orders/{order_id}", response_model=OrdenDTO, tags=["Órdenes"])
 def obtener_orden(
     order_id: str = Path(...),
-    repo: RepositorioOrden = Depends(obtener_repositorio)
+    repo: RepositorioOrden = Depends(obtener_repositorio),
+    as_of: Annotated[Optional[str], Query(description="Número de evento (1 = CREATED) o fecha ISO 8601: devuelve la orden como estaba en ese punto")] = None,
+    include_events: IncluirEventos = True
 ):
-    o = repo.obtener(order_id)
+    if as_of is None:
+        o = repo.obtener(order_id)
+        if o is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Orden {order_id} no encontrada")
+        return orden_a_dto(o, include_events)
+    
+    momento, secuencia = _parsear_as_of(as_of)
+    try:
+        o = repo.obtener_historica(order_id, momento=momento, secuencia=secuencia)
+    except ErrorDominio as e:
+        raise _error_http(e)
     if o is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Orden {order_id} no encontrada en {as_of}")
+    return orden_a_dto(o, include_events)
+
+
+# Tamaño de cada consulta al transmitir la historia completa como NDJSON
+TAMANO_PAGINA_STREAM = 500
+
+
+def _evento_a_registro(secuencia: int, evento) -> EventRecord:
+    return EventRecord(sequence=secuencia, type=evento.tipo, timestamp=evento.timestamp, metadata=evento.metadatos or {})
+
+
+def _parsear_cursor(cursor: Optional[str]) -> int:
+    if cursor is None or cursor == "":
+        return 0
+    if not cursor.strip().isdigit():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor inválido")
+    return int(cursor.strip())
+
+
+def _stream_eventos(repo: RepositorioOrden, order_id: str, primera_pagina: list, tipos: Optional[List[str]]):
+    """Líneas NDJSON de la historia; las páginas siguientes a la primera se leen con una sesión propia,
+    porque la del request puede cerrarse antes de que termine la transmisión."""
+    sesion = getattr(repo, "sesion", None)
+    
+    def generar():
+        pagina = primera_pagina
+        sesion_stream = None
+        repo_stream = repo
+        try:
+            while True:
+                for secuencia, evento in pagina:
+                    yield _evento_a_registro(secuencia, evento).model_dump_json() + "\n"
+                if len(pagina) < TAMANO_PAGINA_STREAM:
+                    return
+                if sesion is not None and sesion_stream is None:
+                    sesion_stream = Session(bind=sesion.get_bind())
+                    repo_stream = UnidadTrabajoSQL(sesion_stream).obtener_repositorio_orden()
+                pagina = repo_stream.listar_eventos(order_id, pagina[-1][0], TAMANO_PAGINA_STREAM, tipos) or []
+        finally:
+            if sesion_stream is not None:
+                sesion_stream.close()
+    
+    return StreamingResponse(generar(), media_type="application/x-ndjson")
+
+
+@router.get("/orders/{order_id}/events", response_model=EventPageResponse, tags=["Órdenes"])
+def listar_eventos_orden(
+    order_id: str = Path(...),
+    repo: RepositorioOrden = Depends(obtener_repositorio),
+    cursor: Annotated[Optional[str], Query(description="next_cursor de la página anterior")] = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    tipos: Annotated[Optional[List[str]], Query(alias="type", description="Solo eventos de estos tipos (repetible)")] = None,
+    accept: Annotated[Optional[str], Header()] = None
+):
+    """Historia de la orden paginada por cursor; con Accept: application/x-ndjson se transmite completa."""
+    despues_de = _parsear_cursor(cursor)
+    tipos = [t for t in (tipos or []) if t] or None
+    transmitir = accept is not None and "application/x-ndjson" in accept
+    
+    # Se pide un evento de más para saber si hay otra página sin una consulta extra
+    limite = TAMANO_PAGINA_STREAM if transmitir else limit + 1
+    pagina = repo.listar_eventos(order_id, despues_de, limite, tipos)
+    if pagina is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Orden {order_id} no encontrada")
+    if transmitir:
+        return _stream_eventos(repo, order_id, pagina, tipos)
     
-    return orden_a_dto(o)
+    siguiente = str(pagina[limit - 1][0]) if len(pagina) > limit else None
+    return EventPageResponse(
+        order_id=order_id,
+        events=[_evento_a_registro(secuencia, evento) for secuencia, evento in pagina[:limit]],
+        next_cursor=siguiente
+    )
 
 
 @router.patch("/orders/{order_id}", response_model=OrdenDTO, tags=["Órdenes"])
@@ -263,7 +608,8 @@ def actualizar_orden(
     order_id: str = Path(...),
     customer: Optional[str] = Body(None),
     vehicle: Optional[str] = Body(None),
-    repo: RepositorioOrden = Depends(obtener_repositorio)
+    repo: RepositorioOrden = Depends(obtener_repositorio),
+    include_events: IncluirEventos = True
 ):
     orden = repo.obtener(order_id)
     if orden is None:
@@ -274,8 +620,11 @@ def actualizar_orden(
     if vehicle is not None:
         orden.vehiculo = vehicle
     
-    repo.guardar(orden)
-    return orden_a_dto(orden)
+    try:
+        repo.guardar(orden)
+    except ErrorDominio as e:
+        raise _error_http(e)
+    return orden_a_dto(orden, include_events)
 
 
 @router.post("/orders/{order_id}/set_state", response_model=OrdenDTO, tags=["Órdenes"])
@@ -283,7 +632,8 @@ def establecer_estado(
     order_id: str = Path(...),
     request: SetStateRequest = ...,
     repo: RepositorioOrden = Depends(obtener_repositorio),
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    include_events: IncluirEventos = True
 ):
     o = repo.obtener(order_id)
     if o is None:
@@ -296,26 +646,25 @@ def establecer_estado(
         if request.state == "DIAGNOSED":
             dto = EstablecerEstadoDiagnosticadoDTO(order_id=order_id)
             action = EstablecerEstadoDiagnosticado(repo, action_service.auditoria)
-            orden_dto = action.ejecutar(dto)
+            orden_dto = action_service.ejecutar_con_reintentos("SET_STATE_DIAGNOSED", lambda: action.ejecutar(dto))
         elif request.state == "IN_PROGRESS":
             dto = EstablecerEstadoEnProcesoTDTO(order_id=order_id)
             action = EstablecerEstadoEnProceso(repo, action_service.auditoria)
-            orden_dto = action.ejecutar(dto)
+            orden_dto = action_service.ejecutar_con_reintentos("SET_STATE_IN_PROGRESS", lambda: action.ejecutar(dto))
         else:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Estado {request.state} no válido")
         
-        return orden_dto
+        return _respuesta_orden(orden_dto, include_events)
     except ErrorDominio as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
-
-
+        raise _error_http(e)
 
 
 @router.post("/orders/{order_id}/services", response_model=OrdenDTO, tags=["Órdenes"])
 def agregar_servicio(
     order_id: str = Path(...),
     request: AddServiceRequest = ...,
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    include_events: IncluirEventos = True
 ):
     data = {
         "order_id": order_id,
@@ -328,16 +677,17 @@ def agregar_servicio(
     from ...application.acciones.servicios import AgregarServicio
     accion = AgregarServicio(action_service.repo, action_service.auditoria)
     try:
-        return accion.ejecutar(dto)
+        return _respuesta_orden(action_service.ejecutar_con_reintentos("ADD_SERVICE", lambda: accion.ejecutar(dto)), include_events)
     except ErrorDominio as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
+        raise _error_http(e)
 
 
 @router.post("/orders/{order_id}/authorize", response_model=OrdenDTO, tags=["Órdenes"])
 def autorizar_orden(
     order_id: str = Path(...),
     request: AuthorizeRequest = ...,
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    include_events: IncluirEventos = True
 ):
     data = {
         "order_id": order_id,
@@ -347,16 +697,17 @@ def autorizar_orden(
     from ...application.acciones.autorizacion import Autorizar
     accion = Autorizar(action_service.repo, action_service.auditoria)
     try:
-        return accion.ejecutar(dto)
+        return _respuesta_orden(action_service.ejecutar_con_reintentos("AUTHORIZE", lambda: accion.ejecutar(dto)), include_events)
     except ErrorDominio as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
+        raise _error_http(e)
 
 
 @router.post("/orders/{order_id}/reauthorize", response_model=OrdenDTO, tags=["Órdenes"])
 def reautorizar_orden(
     order_id: str = Path(...),
     request: ReauthorizeRequest = ...,
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    include_events: IncluirEventos = True
 ):
     data = {
         "order_id": order_id,
@@ -367,16 +718,17 @@ def reautorizar_orden(
     from ...application.acciones.autorizacion import Reautorizar
     accion = Reautorizar(action_service.repo, action_service.auditoria)
     try:
-        return accion.ejecutar(dto)
+        return _respuesta_orden(action_service.ejecutar_con_reintentos("REAUTHORIZE", lambda: accion.ejecutar(dto)), include_events)
     except ErrorDominio as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
+        raise _error_http(e)
 
 
 @router.post("/orders/{order_id}/set_real_cost", response_model=OrdenDTO, tags=["Órdenes"])
 def establecer_costo_real(
     order_id: str = Path(...),
     request: SetRealCostRequest = ...,
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    include_events: IncluirEventos = True
 ):
     data = {
         "order_id": order_id,
@@ -390,46 +742,49 @@ def establecer_costo_real(
     from ...application.acciones.servicios import EstablecerCostoReal
     accion = EstablecerCostoReal(action_service.repo, action_service.auditoria)
     try:
-        return accion.ejecutar(dto)
+        return _respuesta_orden(action_service.ejecutar_con_reintentos("SET_REAL_COST", lambda: accion.ejecutar(dto)), include_events)
     except ErrorDominio as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
+        raise _error_http(e)
 
 
 @router.post("/orders/{order_id}/try_complete", response_model=OrdenDTO, tags=["Órdenes"])
 def intentar_completar_orden(
     order_id: str = Path(...),
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    include_events: IncluirEventos = True
 ):
     data = {"order_id": order_id}
     dto = intentar_completar_dto(data)
     from ...application.acciones.autorizacion import IntentarCompletar
     accion = IntentarCompletar(action_service.repo, action_service.auditoria)
     try:
-        return accion.ejecutar(dto)
+        return _respuesta_orden(action_service.ejecutar_con_reintentos("TRY_COMPLETE", lambda: accion.ejecutar(dto)), include_events)
     except ErrorDominio as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
+        raise _error_http(e)
 
 
 @router.post("/orders/{order_id}/deliver", response_model=OrdenDTO, tags=["Órdenes"])
 def entregar_orden(
     order_id: str = Path(...),
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    include_events: IncluirEventos = True
 ):
     data = {"order_id": order_id}
     dto = entregar_dto(data)
     from ...application.acciones.orden import EntregarOrden
     accion = EntregarOrden(action_service.repo, action_service.auditoria)
     try:
-        return accion.ejecutar(dto)
+        return _respuesta_orden(action_service.ejecutar_con_reintentos("DELIVER", lambda: accion.ejecutar(dto)), include_events)
     except ErrorDominio as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
+        raise _error_http(e)
 
 
 @router.post("/orders/{order_id}/cancel", response_model=OrdenDTO, tags=["Órdenes"])
 def cancelar_orden(
     order_id: str = Path(...),
     request: CancelRequest = ...,
-    action_service: ActionService = Depends(obtener_action_service)
+    action_service: ActionService = Depends(obtener_action_service),
+    include_events: IncluirEventos = True
 ):
     data = {
         "order_id": order_id,
@@ -439,9 +794,9 @@ def cancelar_orden(
     from ...application.acciones.orden import CancelarOrden
     accion = CancelarOrden(action_service.repo, action_service.auditoria)
     try:
-        return accion.ejecutar(dto)
+        return _respuesta_orden(action_service.ejecutar_con_reintentos("CANCEL", lambda: accion.ejecutar(dto)), include_events)
     except ErrorDominio as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.mensaje)
+        raise _error_http(e)
 
 
 @router.get("/customers", tags=["Clientes"])
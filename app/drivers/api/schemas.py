@@ -1,5 +1,5 @@
 from typing import List, Dict, Any, Optional, Union
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 
@@ -23,6 +23,59 @@ class CommandsResponse(BaseModel):
     errors: List[Dict[str, Any]] = Field(default_factory=list)
 
 
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    total_commands: int
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[CommandsResponse] = None
+    error: Optional[str] = None
+
+
+class EventRecord(BaseModel):
+    sequence: int
+    type: str
+    timestamp: datetime
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class EventPageResponse(BaseModel):
+    order_id: str
+    events: List[EventRecord]
+    next_cursor: Optional[str] = None
+
+
+class FeedEvent(BaseModel):
+    cursor: str
+    order_id: str
+    type: str
+    timestamp: datetime
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class EventFeedResponse(BaseModel):
+    events: List[FeedEvent]
+    next_cursor: str
+    has_more: bool = False
+
+
+class StatsRow(BaseModel):
+    day: Optional[date] = None
+    status: Optional[str] = None
+    customer: Optional[str] = None
+    orders: int
+    authorized_amount: str
+    real_total: str
+
+
+class StatsResponse(BaseModel):
+    group_by: List[str]
+    rows: List[StatsRow]
+
+
 class SetStateRequest(BaseModel):
     state: str
 
@@ -0,0 +1,49 @@
+"""Worker que drena la cola de POST /commands/async fuera del proceso de la API.
+
+Uso:
+    python -m app.drivers.worker --hilos 2
+"""
+
+import os
+import signal
+import argparse
+import threading
+from dotenv import load_dotenv
+
+if not os.path.exists("/.dockerenv"):
+    load_dotenv()
+
+from ..infrastructure.logging_config import configurar_logging, obtener_logger
+from ..infrastructure.db import crear_engine_bd, obtener_sesion
+from ..infrastructure.trabajador_comandos import TrabajadorComandos
+from ..domain.zona_horaria import recargar_zona_horaria
+from .api.dependencies import obtener_auditoria
+
+
+logger = obtener_logger("app.drivers.worker")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker de la cola de trabajos de comandos")
+    parser.add_argument("--hilos", type=int, default=1, help="Trabajos que este proceso ejecuta a la vez")
+    args = parser.parse_args(argv)
+
+    configurar_logging()
+    recargar_zona_horaria()
+    crear_engine_bd()
+
+    trabajadores = [TrabajadorComandos(obtener_sesion, obtener_auditoria()) for _ in range(max(1, args.hilos))]
+    detener = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: detener.set())
+    signal.signal(signal.SIGINT, lambda *_: detener.set())
+
+    for trabajador in trabajadores:
+        trabajador.iniciar()
+    detener.wait()
+    for trabajador in trabajadores:
+        trabajador.detener()
+    logger.info("Worker de trabajos detenido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import threading
+from collections import deque
+from typing import List, Optional
+
+from ..domain.entidades import Evento
+from ..application.ports import AlmacenEventos
+
+
+class AlmacenEventosMemoria(AlmacenEventos):
+    """Almacén de eventos en memoria, seguro entre hilos; con límite conserva solo los más recientes."""
+
+    def __init__(self, limite: Optional[int] = None):
+        self._eventos = deque(maxlen=limite)
+        self._lock = threading.Lock()
+
+    def registrar(self, evento: Evento) -> None:
+        with self._lock:
+            self._eventos.append(evento)
+
+    def listar(self) -> List[Evento]:
+        with self._lock:
+            return list(self._eventos)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._eventos.clear()
@@ -0,0 +1,52 @@
+import os
+import copy
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from ..domain.entidades import Orden
+from .metricas import cache_historico
+
+
+def capacidad_cache_historico() -> int:
+    return max(0, int(os.getenv("ORDER_AS_OF_CACHE_SIZE", "256")))
+
+
+class CacheOrdenesHistoricas:
+    """LRU en proceso de órdenes reconstruidas hasta un evento dado, seguro entre hilos.
+
+    La historia hasta un evento no cambia, así que las entradas no se invalidan; solo salen por LRU.
+    Guarda y entrega copias para que quien consulta no altere el estado cacheado.
+    """
+
+    def __init__(self, capacidad: Optional[int] = None):
+        self.capacidad = capacidad_cache_historico() if capacidad is None else capacidad
+        self._entradas: "OrderedDict[Hashable, Orden]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: Hashable) -> Optional[Orden]:
+        with self._lock:
+            orden = self._entradas.get(clave)
+            if orden is None:
+                cache_historico.inc("miss")
+                return None
+            self._entradas.move_to_end(clave)
+        cache_historico.inc("hit")
+        return copy.deepcopy(orden)
+
+    def guardar(self, clave: Hashable, orden: Orden) -> None:
+        if self.capacidad == 0:
+            return
+        copia = copy.deepcopy(orden)
+        with self._lock:
+            self._entradas[clave] = copia
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+
+cache_ordenes_historicas = CacheOrdenesHistoricas()
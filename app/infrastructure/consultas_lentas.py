@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import weakref
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .logging_config import obtener_logger, sanitizar_datos, request_id_var, ruta_var, operacion_var
+
+
+logger = obtener_logger("app.infrastructure.consultas_lentas")
+
+LARGO_MAXIMO_PARAMETRO = 200
+LARGO_MAXIMO_SENTENCIA = 2000
+MAXIMO_FILAS_EXECUTEMANY = 5
+
+_umbrales: "weakref.WeakKeyDictionary[Engine, float]" = weakref.WeakKeyDictionary()
+
+
+def obtener_umbral_consultas_lentas() -> float:
+    """Umbral en ms a partir del cual se registra una consulta (0 o vacío desactiva)."""
+    valor = os.getenv("SLOW_QUERY_MS", "").strip()
+    return float(valor) if valor else 0.0
+
+
+def _recortar(valor: Any) -> Any:
+    if isinstance(valor, (bytes, bytearray)):
+        return f"<{len(valor)} bytes>"
+    if isinstance(valor, str) and len(valor) > LARGO_MAXIMO_PARAMETRO:
+        return valor[:LARGO_MAXIMO_PARAMETRO] + "..."
+    return valor
+
+
+def sanitizar_parametros(parametros: Any, executemany: bool = False) -> Any:
+    """Oculta campos sensibles y recorta valores largos antes de escribirlos al log."""
+    if executemany and isinstance(parametros, (list, tuple)):
+        filas = [sanitizar_parametros(fila) for fila in parametros[:MAXIMO_FILAS_EXECUTEMANY]]
+        if len(parametros) > MAXIMO_FILAS_EXECUTEMANY:
+            filas.append(f"... {len(parametros) - MAXIMO_FILAS_EXECUTEMANY} filas más")
+        return filas
+    if isinstance(parametros, dict):
+        return {clave: _recortar(valor) for clave, valor in sanitizar_datos(parametros).items()}
+    if isinstance(parametros, (list, tuple)):
+        return [_recortar(valor) for valor in parametros]
+    return parametros
+
+
+def _origen_consulta() -> Optional[str]:
+    """Primer frame de un repositorio en la pila, para saber qué método lanzó la consulta."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        nombre_archivo = frame.f_code.co_filename
+        if "repositories" in nombre_archivo and "site-packages" not in nombre_archivo:
+            modulo = os.path.splitext(os.path.basename(nombre_archivo))[0]
+            return f"{modulo}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _parametros_con_nombre(parameters, context, executemany):
+    """Usa los parámetros compilados (con nombre) cuando el driver es posicional, para poder sanitizarlos."""
+    compilados = getattr(context, "compiled_parameters", None)
+    if not compilados:
+        return parameters
+    return compilados if executemany else compilados[0]
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._inicio_consulta_lenta = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_inicio_consulta_lenta", None)
+    if inicio is None:
+        return
+    duracion_ms = (time.perf_counter() - inicio) * 1000
+    umbral = _umbrales.get(conn.engine)
+    if umbral is None or duracion_ms < umbral:
+        return
+
+    sentencia = " ".join(statement.split())
+    if len(sentencia) > LARGO_MAXIMO_SENTENCIA:
+        sentencia = sentencia[:LARGO_MAXIMO_SENTENCIA] + "..."
+    req_id = request_id_var.get()
+    ruta = ruta_var.get()
+    op = operacion_var.get()
+    origen = _origen_consulta()
+
+    contexto = " ".join(parte for parte in (ruta or "sin_ruta", op, origen) if parte)
+    logger.warning(
+        f"CONSULTA LENTA {duracion_ms:.2f}ms (umbral {umbral:g}ms) - {contexto}: {sentencia}",
+        extra={
+            "request_id": req_id,
+            "ruta": ruta,
+            "operacion": op,
+            "origen": origen,
+            "duracion_ms": round(duracion_ms, 2),
+            "sentencia": sentencia,
+            "parametros": sanitizar_parametros(_parametros_con_nombre(parameters, context, executemany), executemany)
+        }
+    )
+
+
+def activar_log_consultas_lentas(engine: Engine, umbral_ms: Optional[float] = None) -> Engine:
+    """Registra en el engine los hooks que loguean consultas por encima del umbral."""
+    if not isinstance(engine, Engine):
+        return engine
+    if umbral_ms is None:
+        umbral_ms = obtener_umbral_consultas_lentas()
+    if umbral_ms <= 0:
+        return engine
+    _umbrales[engine] = umbral_ms
+    if not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar):
+        event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+    return engine
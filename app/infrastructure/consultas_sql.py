@@ -0,0 +1,73 @@
+import os
+import time
+import threading
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class EstadisticasConsultas:
+    """Acumula cuántas sentencias SQL se ejecutaron en un request y cuánto tardaron."""
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.request_id = request_id
+        self.consultas = 0
+        self.tiempo_ms = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, duracion_ms: float) -> None:
+        with self._lock:
+            self.consultas += 1
+            self.tiempo_ms += duracion_ms
+
+
+estadisticas_consultas_var: ContextVar[Optional[EstadisticasConsultas]] = ContextVar('estadisticas_consultas', default=None)
+
+
+def obtener_presupuesto_consultas() -> int:
+    """Máximo de sentencias por request antes de marcarlo como excedido (0 desactiva)."""
+    return int(os.getenv("SQL_QUERY_BUDGET", "50"))
+
+
+def iniciar_medicion(request_id: Optional[str] = None) -> Token:
+    return estadisticas_consultas_var.set(EstadisticasConsultas(request_id))
+
+
+def finalizar_medicion(token: Token) -> Optional[EstadisticasConsultas]:
+    estadisticas = estadisticas_consultas_var.get()
+    estadisticas_consultas_var.reset(token)
+    return estadisticas
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("inicio_consultas")
+    if not inicios:
+        return
+    duracion_ms = (time.perf_counter() - inicios.pop()) * 1000
+    estadisticas = estadisticas_consultas_var.get()
+    if estadisticas is not None:
+        estadisticas.registrar(duracion_ms)
+
+
+def _error_al_ejecutar(contexto_excepcion):
+    conn = contexto_excepcion.connection
+    inicios = conn.info.get("inicio_consultas") if conn is not None else None
+    if inicios:
+        inicios.pop()
+
+
+def instrumentar_engine(engine: Engine) -> Engine:
+    """Registra los hooks de conteo de consultas en el engine (idempotente)."""
+    if not isinstance(engine, Engine):
+        return engine
+    if not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar):
+        event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+        event.listen(engine, "handle_error", _error_al_ejecutar)
+    return engine
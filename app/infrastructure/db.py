@@ -1,8 +1,10 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 
 from .models import Base
+from .consultas_sql import instrumentar_engine
+from .consultas_lentas import activar_log_consultas_lentas
 
 
 _engine = None
@@ -10,6 +12,10 @@ SessionLocal = None
 
 
 def obtener_url_bd() -> str:
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return url
+    
     usuario = os.getenv("POSTGRES_USER", "talleres_user")
     contraseña = os.getenv("POSTGRES_PASSWORD", "talleres_pass")
     host = os.getenv("DB_HOST", "localhost")
@@ -19,12 +25,35 @@ def obtener_url_bd() -> str:
     return f"postgresql://{usuario}:{contraseña}@{host}:{puerto}/{nombre_bd}"
 
 
+def _aplicar_pragmas_sqlite(conexion, registro_conexion):
+    """WAL deja leer mientras otro escribe; con WAL, synchronous=NORMAL no pierde consistencia ante caídas."""
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute(f"PRAGMA mmap_size = {int(os.getenv('SQLITE_MMAP_SIZE', '268435456'))}")
+        cursor.execute("PRAGMA foreign_keys = ON")
+    finally:
+        cursor.close()
+
+
+def construir_engine(url: str):
+    """Crea el engine para la URL; en SQLite permite usarlo desde varios hilos y aplica los pragmas al conectar."""
+    if not url.startswith("sqlite"):
+        return create_engine(url)
+    
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _aplicar_pragmas_sqlite)
+    return engine
+
+
 def crear_engine_bd(url: str = None):
     global _engine
     if _engine is None:
         if url is None:
             url = obtener_url_bd()
-        _engine = create_engine(url)
+        _engine = activar_log_consultas_lentas(instrumentar_engine(construir_engine(url)))
     return _engine
 
 
@@ -0,0 +1,116 @@
+import os
+import asyncio
+import itertools
+import threading
+from typing import List, Optional
+
+from ..domain.entidades import Orden
+from .metricas import registro_metricas, suscripciones_estados
+
+
+def max_suscriptores_stream() -> int:
+    return max(0, int(os.getenv("SSE_MAX_SUBSCRIBERS", "100")))
+
+
+def capacidad_cola_stream() -> int:
+    return max(1, int(os.getenv("SSE_QUEUE_SIZE", "100")))
+
+
+def latido_stream() -> float:
+    return max(1.0, float(os.getenv("SSE_HEARTBEAT_SECONDS", "15")))
+
+
+class SuscripcionEstados:
+    """Cola acotada de un cliente del stream, atendida en el event loop de su conexión.
+
+    Si el cliente no lee a tiempo y la cola se llena, se descarta lo pendiente y se deja solo la marca
+    de desborde (None): la conexión se cierra y el cliente debe recargar el estado y volver a suscribirse.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, capacidad: int):
+        self.loop = loop
+        self.cola: "asyncio.Queue[Optional[dict]]" = asyncio.Queue(maxsize=capacidad)
+        self.desbordada = False
+
+    def _entregar(self, mensaje: dict) -> None:
+        # Corre en el loop de la conexión, así que no compite con el consumidor
+        if self.desbordada:
+            return
+        try:
+            self.cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            self.desbordada = True
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(None)
+            suscripciones_estados.inc("overflow")
+
+    async def siguiente(self, timeout: float) -> Optional[dict]:
+        """Próximo cambio de estado; None si la suscripción se desbordó. Lanza TimeoutError si no llega ninguno."""
+        return await asyncio.wait_for(self.cola.get(), timeout)
+
+
+class DifusorEstados:
+    """Reparte en el proceso los cambios de estado de órdenes ya confirmados a los clientes de GET /events/stream.
+
+    publicar se llama desde cualquier hilo (tras el commit de guardar) y nunca bloquea: cada suscripción
+    recibe el mensaje en su propio event loop.
+    """
+
+    def __init__(self, max_suscriptores: Optional[int] = None, capacidad_cola: Optional[int] = None):
+        self.max_suscriptores = max_suscriptores_stream() if max_suscriptores is None else max_suscriptores
+        self.capacidad_cola = capacidad_cola_stream() if capacidad_cola is None else capacidad_cola
+        self._suscripciones: List[SuscripcionEstados] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def cantidad(self) -> int:
+        return len(self._suscripciones)
+
+    def suscribir(self) -> Optional[SuscripcionEstados]:
+        """Nueva suscripción en el event loop actual; None si el proceso ya tiene el máximo de suscriptores."""
+        suscripcion = SuscripcionEstados(asyncio.get_running_loop(), self.capacidad_cola)
+        with self._lock:
+            if len(self._suscripciones) >= self.max_suscriptores:
+                suscripciones_estados.inc("rejected")
+                return None
+            self._suscripciones.append(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: SuscripcionEstados) -> None:
+        with self._lock:
+            if suscripcion in self._suscripciones:
+                self._suscripciones.remove(suscripcion)
+
+    def publicar_cambio(self, orden: Orden, estado_anterior: Optional[str]) -> None:
+        """Anuncia que la orden guardada pasó de estado_anterior (None al crearla) a su estado actual."""
+        timestamp = orden.eventos[-1].timestamp if orden.eventos else None
+        self.publicar(orden.order_id, estado_anterior, orden.estado.value, timestamp)
+
+    def publicar(self, order_id: str, estado_anterior: Optional[str], estado: str, timestamp) -> None:
+        with self._lock:
+            if not self._suscripciones:
+                return
+            suscripciones = list(self._suscripciones)
+            mensaje = {
+                "id": next(self._ids),
+                "order_id": order_id,
+                "from": estado_anterior,
+                "to": estado,
+                "timestamp": timestamp.isoformat() if timestamp else None
+            }
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion._entregar, mensaje)
+            except RuntimeError:
+                # El loop de la conexión ya terminó
+                self.cancelar(suscripcion)
+
+
+difusor_estados = DifusorEstados()
+
+registro_metricas.gauge(
+    "order_stream_subscribers", "Clientes conectados a GET /events/stream en este proceso",
+    lambda: {(): float(difusor_estados.cantidad)}
+)
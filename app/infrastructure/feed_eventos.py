@@ -0,0 +1,45 @@
+import os
+import time
+import asyncio
+import threading
+
+
+def espera_maxima_feed() -> float:
+    return max(0.0, float(os.getenv("EVENTS_FEED_MAX_WAIT", "30")))
+
+
+def intervalo_feed() -> float:
+    return max(0.05, float(os.getenv("EVENTS_FEED_POLL_INTERVAL", "1.0")))
+
+
+class AvisoEventos:
+    """Cuenta los commits con eventos nuevos hechos en este proceso.
+
+    El long-poll de GET /events/feed lo vigila para consultar la BD en cuanto hay algo nuevo; los eventos
+    escritos por otros procesos se ven en la consulta periódica (EVENTS_FEED_POLL_INTERVAL).
+    """
+
+    def __init__(self):
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def avisar(self) -> None:
+        with self._lock:
+            self._version += 1
+
+    async def esperar(self, version: int, timeout: float) -> bool:
+        """Espera sin ocupar un hilo a que haya un aviso posterior a version; retorna False si vence timeout."""
+        limite = time.monotonic() + timeout
+        while self._version == version:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return False
+            await asyncio.sleep(min(0.05, restante))
+        return True
+
+
+aviso_eventos = AvisoEventos()
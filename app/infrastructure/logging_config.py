@@ -6,10 +6,13 @@ from typing import Optional, Dict, Any
 from contextvars import ContextVar
 
 request_id_var: ContextVar[str] = ContextVar('request_id', default=None)
+ruta_var: ContextVar[str] = ContextVar('ruta', default=None)
+operacion_var: ContextVar[str] = ContextVar('operacion', default=None)
 
 ARCHIVO_LOG_APP = "app.log"
 ARCHIVO_LOG_ERRORES = "errors.log"
 ARCHIVO_LOG_REQUESTS = "requests.log"
+ARCHIVO_LOG_CONSULTAS_LENTAS = "slow_queries.log"
 
 
 class RotatingFileHandlerSeguro(logging.handlers.TimedRotatingFileHandler):
@@ -88,7 +91,8 @@ def _extraer_campos_adicionales(record):
         'request_id', 'request_body', 'response_body', 'body', 'comando', 'comando_completo',
         'operacion', 'order_id', 'error', 'error_code', 'error_message',
         'validation_errors', 'comando_index', 'eventos', 'status_orden',
-        'timestamp', 'codigo', 'mensaje', 'error_type'
+        'timestamp', 'codigo', 'mensaje', 'error_type',
+        'ruta', 'origen', 'duracion_ms', 'sentencia', 'parametros'
     ]
     
     sanitizar = os.getenv("LOG_SANITIZE", "true").lower() == "true"
@@ -129,62 +133,32 @@ def _crear_formato_log(formato: str) -> logging.Formatter:
     )
 
 
-def _crear_handlers(directorio_logs: str, rotacion: str, max_bytes: int, backup_count: int) -> tuple:
-    """Crea los handlers de logging según el tipo de rotación."""
+def _crear_handler_archivo(directorio_logs: str, archivo: str, rotacion: str, max_bytes: int, backup_count: int) -> logging.Handler:
+    """Crea un handler de archivo según el tipo de rotación."""
+    ruta = os.path.join(directorio_logs, archivo)
     if rotacion == "time":
-        handler_general = RotatingFileHandlerSeguro(
-            os.path.join(directorio_logs, ARCHIVO_LOG_APP),
+        return RotatingFileHandlerSeguro(
+            ruta,
             when="midnight",
             interval=1,
             backupCount=backup_count,
             encoding="utf-8"
         )
-        handler_errores = RotatingFileHandlerSeguro(
-            os.path.join(directorio_logs, ARCHIVO_LOG_ERRORES),
-            when="midnight",
-            interval=1,
-            backupCount=backup_count,
-            encoding="utf-8"
-        )
-        handler_requests = RotatingFileHandlerSeguro(
-            os.path.join(directorio_logs, ARCHIVO_LOG_REQUESTS),
-            when="midnight",
-            interval=1,
-            backupCount=backup_count,
-            encoding="utf-8"
-        )
-    elif rotacion == "size":
-        handler_general = RotatingFileHandlerSizeSeguro(
-            os.path.join(directorio_logs, ARCHIVO_LOG_APP),
-            maxBytes=max_bytes,
-            backupCount=backup_count,
-            encoding="utf-8"
-        )
-        handler_errores = RotatingFileHandlerSizeSeguro(
-            os.path.join(directorio_logs, ARCHIVO_LOG_ERRORES),
-            maxBytes=max_bytes,
-            backupCount=backup_count,
-            encoding="utf-8"
-        )
-        handler_requests = RotatingFileHandlerSizeSeguro(
-            os.path.join(directorio_logs, ARCHIVO_LOG_REQUESTS),
+    if rotacion == "size":
+        return RotatingFileHandlerSizeSeguro(
+            ruta,
             maxBytes=max_bytes,
             backupCount=backup_count,
             encoding="utf-8"
         )
-    else:
-        handler_general = logging.FileHandler(
-            os.path.join(directorio_logs, ARCHIVO_LOG_APP),
-            encoding="utf-8"
-        )
-        handler_errores = logging.FileHandler(
-            os.path.join(directorio_logs, ARCHIVO_LOG_ERRORES),
-            encoding="utf-8"
-        )
-        handler_requests = logging.FileHandler(
-            os.path.join(directorio_logs, ARCHIVO_LOG_REQUESTS),
-            encoding="utf-8"
-        )
+    return logging.FileHandler(ruta, encoding="utf-8")
+
+
+def _crear_handlers(directorio_logs: str, rotacion: str, max_bytes: int, backup_count: int) -> tuple:
+    """Crea los handlers de logging según el tipo de rotación."""
+    handler_general = _crear_handler_archivo(directorio_logs, ARCHIVO_LOG_APP, rotacion, max_bytes, backup_count)
+    handler_errores = _crear_handler_archivo(directorio_logs, ARCHIVO_LOG_ERRORES, rotacion, max_bytes, backup_count)
+    handler_requests = _crear_handler_archivo(directorio_logs, ARCHIVO_LOG_REQUESTS, rotacion, max_bytes, backup_count)
     
     handler_general.setLevel(logging.INFO)
     handler_errores.setLevel(logging.ERROR)
@@ -208,6 +182,20 @@ def _configurar_loggers_especializados(handler_general, handler_errores, handler
     logger_errores_no_controlados.propagate = False
 
 
+def _configurar_logger_consultas_lentas(directorio_logs: str, rotacion: str, max_bytes: int, backup_count: int, formato_log: logging.Formatter):
+    """Las consultas lentas van solo a su propio archivo para no inundar app.log."""
+    handler = _crear_handler_archivo(directorio_logs, ARCHIVO_LOG_CONSULTAS_LENTAS, rotacion, max_bytes, backup_count)
+    handler.setLevel(logging.WARNING)
+    handler.setFormatter(formato_log)
+    
+    logger_lentas = logging.getLogger("app.infrastructure.consultas_lentas")
+    for h in logger_lentas.handlers[:]:
+        logger_lentas.removeHandler(h)
+    logger_lentas.addHandler(handler)
+    logger_lentas.setLevel(logging.WARNING)
+    logger_lentas.propagate = False
+
+
 def configurar_logging():
     nivel = os.getenv("LOG_LEVEL", "INFO").upper()
     formato = os.getenv("LOG_FORMAT", "text").lower()
@@ -241,6 +229,9 @@ def configurar_logging():
     
     _configurar_loggers_especializados(handler_general, handler_errores, handler_requests)
     
+    if os.getenv("SLOW_QUERY_MS"):
+        _configurar_logger_consultas_lentas(directorio_logs, rotacion, max_bytes, backup_count, formato_log)
+    
     if log_to_console:
         handler_consola = logging.StreamHandler()
         handler_consola.setLevel(nivel_logging)
@@ -0,0 +1,215 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ValoresEtiquetas = Tuple[str, ...]
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_etiquetas(nombres: Iterable[str], valores: Iterable[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatear_numero(valor: float) -> str:
+    if valor == int(valor):
+        return str(int(valor))
+    return repr(valor)
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nombre: str, descripcion: str, etiquetas: Tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.etiquetas = etiquetas
+        self._valores: Dict[ValoresEtiquetas, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores_etiquetas: str, valor: float = 1.0) -> None:
+        with self._lock:
+            self._valores[valores_etiquetas] = self._valores.get(valores_etiquetas, 0.0) + valor
+
+    def valor(self, *valores_etiquetas: str) -> float:
+        with self._lock:
+            return self._valores.get(valores_etiquetas, 0.0)
+
+    def exponer(self) -> List[str]:
+        with self._lock:
+            valores = dict(self._valores)
+        return [
+            f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(v)}"
+            for clave, v in sorted(valores.items())
+        ]
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, descripcion: str, etiquetas: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.etiquetas = etiquetas
+        self.buckets = tuple(sorted(buckets))
+        # Por cada combinación de etiquetas: conteos por bucket (no acumulados, el último es +Inf) y suma
+        self._series: Dict[ValoresEtiquetas, list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *valores_etiquetas: str) -> None:
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores_etiquetas)
+            if serie is None:
+                serie = [[0] * (len(self.buckets) + 1), 0.0]
+                self._series[valores_etiquetas] = serie
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def conteo(self, *valores_etiquetas: str) -> int:
+        with self._lock:
+            serie = self._series.get(valores_etiquetas)
+            return sum(serie[0]) if serie else 0
+
+    def exponer(self) -> List[str]:
+        with self._lock:
+            series = {clave: (list(conteos), suma) for clave, (conteos, suma) in self._series.items()}
+        lineas = []
+        for clave, (conteos, suma) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, conteos):
+                acumulado += conteo
+                etiquetas = _formatear_etiquetas(self.etiquetas, clave, ("le", _formatear_numero(limite)))
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            acumulado += conteos[-1]
+            lineas.append(f"{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, clave, ('le', '+Inf'))} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_formatear_etiquetas(self.etiquetas, clave)} {acumulado}")
+        return lineas
+
+
+class GaugeFuncion:
+    """Gauge cuyo valor se calcula al momento de exponer las métricas."""
+
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, descripcion: str, funcion: Callable[[], Optional[Dict[ValoresEtiquetas, float]]], etiquetas: Tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.etiquetas = etiquetas
+        self.funcion = funcion
+
+    def exponer(self) -> List[str]:
+        try:
+            valores = self.funcion() or {}
+        except Exception:
+            return []
+        return [
+            f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(v)}"
+            for clave, v in sorted(valores.items())
+        ]
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._lock:
+            self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def contador(self, nombre: str, descripcion: str, etiquetas: Tuple[str, ...] = ()) -> Contador:
+        return self._registrar(Contador(nombre, descripcion, etiquetas))
+
+    def histograma(self, nombre: str, descripcion: str, etiquetas: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS_LATENCIA) -> Histograma:
+        return self._registrar(Histograma(nombre, descripcion, etiquetas, buckets))
+
+    def gauge(self, nombre: str, descripcion: str, funcion: Callable, etiquetas: Tuple[str, ...] = ()) -> GaugeFuncion:
+        return self._registrar(GaugeFuncion(nombre, descripcion, funcion, etiquetas))
+
+    def exponer(self) -> str:
+        """Serializa todas las métricas en el formato de texto de Prometheus."""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for m in metricas:
+            lineas.append(f"# HELP {m.nombre} {m.descripcion}")
+            lineas.append(f"# TYPE {m.nombre} {m.tipo}")
+            lineas.extend(m.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+registro_metricas = RegistroMetricas()
+
+duracion_requests = registro_metricas.histograma(
+    "http_request_duration_seconds", "Latencia de requests HTTP por ruta", ("method", "route")
+)
+requests_total = registro_metricas.contador(
+    "http_requests_total", "Requests HTTP por ruta y código de estado", ("method", "route", "status")
+)
+duracion_comandos = registro_metricas.histograma(
+    "command_duration_seconds", "Latencia de ActionService.procesar_comando por operación", ("op",)
+)
+errores_comandos = registro_metricas.contador(
+    "command_errors_total", "Comandos con error por operación y código", ("op", "code")
+)
+reintentos_conflicto = registro_metricas.contador(
+    "command_conflict_retries_total", "Reintentos por conflicto de versión de la orden", ("op",)
+)
+trabajos_procesados = registro_metricas.contador(
+    "command_jobs_total", "Trabajos de POST /commands/async terminados por estado final", ("status",)
+)
+respuestas_repetidas = registro_metricas.contador(
+    "idempotent_replays_total", "Envíos repetidos respondidos con el resultado guardado", ("scope",)
+)
+cache_historico = registro_metricas.contador(
+    "order_as_of_cache_total", "Consultas de GET /orders/{id}?as_of= por resultado en el cache de estados", ("result",)
+)
+suscripciones_estados = registro_metricas.contador(
+    "order_stream_dropped_total", "Clientes de GET /events/stream rechazados por el tope o cortados por no leer a tiempo", ("reason",)
+)
+
+
+def _metricas_pool() -> Dict[ValoresEtiquetas, float]:
+    from . import db
+    engine = db._engine
+    if engine is None:
+        return {}
+    pool = engine.pool
+    valores = {}
+    for estado in ("size", "checkedin", "checkedout", "overflow"):
+        funcion = getattr(pool, estado, None)
+        if callable(funcion):
+            valores[(estado,)] = float(funcion())
+    return valores
+
+
+registro_metricas.gauge("db_pool_connections", "Estado del pool de conexiones de la BD", _metricas_pool, ("state",))
+
+
+def registrar_metricas_relay(relay, fabrica_sesion: Callable) -> None:
+    """Expone la profundidad de la cola del outbox y las métricas del relay."""
+    from .repositories.repositorio_outbox import RepositorioOutboxSQL
+
+    def pendientes():
+        sesion = fabrica_sesion()
+        try:
+            return {(): float(RepositorioOutboxSQL(sesion).contar_pendientes())}
+        finally:
+            sesion.close()
+
+    def metricas_relay():
+        return {(clave,): float(valor) for clave, valor in relay.metricas.a_dict().items()}
+
+    registro_metricas.gauge("event_outbox_pending", "Eventos en el outbox pendientes de publicar", pendientes)
+    registro_metricas.gauge("event_outbox_relay", "Métricas del relay del outbox", metricas_relay, ("metric",))
@@ -5,6 +5,12 @@ from .vehiculo_model import VehiculoModel
 from .servicio_model import ServicioModel
 from .componente_model import ComponenteModel
 from .evento_model import EventoModel
+from .outbox_model import OutboxModel
+from .idempotencia_model import IdempotenciaModel
+from .trabajo_model import TrabajoModel
+from .instantanea_model import InstantaneaOrdenModel
+from .estadistica_model import EstadisticaOrdenModel
+from .contador_feed_model import ContadorFeedModel
 
-__all__ = ["Base", "OrdenModel", "ClienteModel", "VehiculoModel", "ServicioModel", "ComponenteModel", "EventoModel"]
+__all__ = ["Base", "OrdenModel", "ClienteModel", "VehiculoModel", "ServicioModel", "ComponenteModel", "EventoModel", "OutboxModel", "IdempotenciaModel", "TrabajoModel", "InstantaneaOrdenModel", "EstadisticaOrdenModel", "ContadorFeedModel"]
 
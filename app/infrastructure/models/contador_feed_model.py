@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, BigInteger, DDL, event
+from .base import Base
+
+
+class ContadorFeedModel(Base):
+    """Última posición asignada en el feed global de eventos; una sola fila (id=1)."""
+    __tablename__ = "contador_feed"
+    
+    id = Column(Integer, primary_key=True)
+    ultima_posicion = Column(BigInteger, nullable=False, default=0)
+
+
+event.listen(
+    ContadorFeedModel.__table__, "after_create",
+    DDL("INSERT INTO contador_feed (id, ultima_posicion) VALUES (1, 0)")
+)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer, BigInteger, Date, ForeignKey
+from .base import Base
+
+
+class EstadisticaOrdenModel(Base):
+    """Órdenes por día de creación, estado actual y cliente; el repositorio de órdenes la mantiene al guardar."""
+    __tablename__ = "estadisticas_ordenes"
+    
+    dia = Column(Date, primary_key=True)
+    estado = Column(String, primary_key=True)
+    id_cliente = Column(Integer, ForeignKey("clientes.id_cliente", ondelete="CASCADE"), primary_key=True)
+    cantidad = Column(Integer, nullable=False, default=0)
+    # Montos en centavos para poder sumarlos en SQL sin redondeos
+    monto_autorizado_centavos = Column(BigInteger, nullable=False, default=0)
+    total_real_centavos = Column(BigInteger, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -11,6 +11,10 @@ class EventoModel(Base):
     tipo = Column(String, nullable=False)
     timestamp = Column(DateTime, nullable=False)
     metadatos_json = Column(Text, nullable=True)
+    # Cursor de GET /events/feed: se numera al confirmar, así que crece en orden de commit (id_evento no)
+    posicion_feed = Column(Integer, nullable=True, unique=True, index=True)
     
     orden = relationship("OrdenModel", back_populates="eventos")
-
+    
+    # Historia de una orden en orden de inserción: carga, paginación y reconstrucción
+    __table_args__ = (Index("ix_eventos_orden_evento", "id_orden", "id_evento"),)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, Text
+from .base import Base, fecha_creacion_default
+
+
+class IdempotenciaModel(Base):
+    __tablename__ = "respuestas_idempotentes"
+    
+    clave = Column(String, primary_key=True)
+    huella = Column(String(64), nullable=False)
+    respuesta_json = Column(Text, nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False, default=fecha_creacion_default)
+    fecha_expiracion = Column(DateTime, nullable=False, index=True)
+    # Mientras no hay respuesta, la reserva solo bloquea la clave hasta aquí: si el proceso murió, otro la retoma
+    reservado_hasta = Column(DateTime, nullable=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, Text, ForeignKey, Index
+from .base import Base, fecha_creacion_default
+
+
+class InstantaneaOrdenModel(Base):
+    __tablename__ = "instantaneas_ordenes"
+    
+    id_instantanea = Column(Integer, primary_key=True, autoincrement=True)
+    id_orden = Column(Integer, ForeignKey("ordenes.id", ondelete="CASCADE"), nullable=False)
+    # Estado de la orden tras aplicar sus eventos hasta este id (inclusive)
+    id_ultimo_evento = Column(Integer, nullable=False)
+    numero_eventos = Column(Integer, nullable=False)
+    estado_json = Column(Text, nullable=False)
+    fecha_creacion = Column(DateTime, nullable=False, default=fecha_creacion_default)
+    
+    __table_args__ = (Index("ix_instantaneas_ordenes_orden_evento", "id_orden", "id_ultimo_evento"),)
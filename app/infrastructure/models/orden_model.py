@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, false
 from sqlalchemy.orm import relationship
 from .base import Base, fecha_creacion_default
 
@@ -16,9 +16,16 @@ class OrdenModel(Base):
     total_real = Column(String, default="0")
     fecha_creacion = Column(DateTime, default=fecha_creacion_default)
     fecha_cancelacion = Column(DateTime, nullable=True)
+    # Control optimista: el repositorio la incrementa en cada guardar y el UPDATE exige la versión leída
+    version = Column(Integer, nullable=False, server_default="1")
+    # Si es True, servicios y estado se reconstruyen desde eventos e instantáneas; las columnas de estado son solo de consulta
+    event_sourced = Column(Boolean, nullable=False, default=False, server_default=false())
     
     cliente = relationship("ClienteModel", backref="ordenes")
     vehiculo = relationship("VehiculoModel", backref="ordenes")
     servicios = relationship("ServicioModel", back_populates="orden", cascade="all, delete-orphan")
     eventos = relationship("EventoModel", back_populates="orden", cascade="all, delete-orphan")
+    instantaneas = relationship("InstantaneaOrdenModel", cascade="all, delete-orphan")
+    
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
 
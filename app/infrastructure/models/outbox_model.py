@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text
+from .base import Base, fecha_creacion_default
+
+
+class OutboxModel(Base):
+    __tablename__ = "outbox_eventos"
+    
+    id_outbox = Column(Integer, primary_key=True, autoincrement=True)
+    order_id = Column(String, nullable=False, index=True)
+    tipo = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    metadatos_json = Column(Text, nullable=True)
+    fecha_registro = Column(DateTime, nullable=False, default=fecha_creacion_default)
+    fecha_publicacion = Column(DateTime, nullable=True, index=True)
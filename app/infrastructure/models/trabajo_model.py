@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
+from .base import Base, fecha_creacion_default
+
+
+class TrabajoModel(Base):
+    __tablename__ = "trabajos_comandos"
+    
+    id_trabajo = Column(String(32), primary_key=True)
+    estado = Column(String, nullable=False, default="PENDING")
+    comandos_json = Column(Text, nullable=False)
+    total_comandos = Column(Integer, nullable=False)
+    resultado_json = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    intentos = Column(Integer, nullable=False, default=0)
+    trabajador = Column(String, nullable=True)
+    # Mientras no venza, ningún otro worker toma el trabajo; el worker la renueva mientras avanza
+    bloqueado_hasta = Column(DateTime, nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False, default=fecha_creacion_default)
+    fecha_inicio = Column(DateTime, nullable=True)
+    fecha_fin = Column(DateTime, nullable=True)
+    
+    __table_args__ = (Index("ix_trabajos_comandos_estado_fecha", "estado", "fecha_creacion"),)
@@ -0,0 +1,174 @@
+import os
+import re
+import sys
+import hmac
+import cProfile
+import threading
+import functools
+import inspect
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from .logging_config import obtener_logger
+
+
+logger = obtener_logger("app.infrastructure.perfilador")
+
+MODO_MUESTREO = "sampling"
+MODO_CPROFILE = "cprofile"
+
+# Un solo cProfile activo por proceso: desde Python 3.12 un segundo enable() lanza ValueError y el perfil
+# registra todos los hilos, así que los requests simultáneos se perfilan por muestreo
+_lock_cprofile = threading.Lock()
+
+
+class SolicitudPerfil:
+    """Marca un request para ser perfilado y guarda dónde quedó el resultado."""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.archivo: Optional[str] = None
+
+
+perfil_var: ContextVar[Optional[SolicitudPerfil]] = ContextVar('perfil', default=None)
+
+
+def perfilado_habilitado() -> bool:
+    return os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+
+def solicita_perfil(valor_header: Optional[str]) -> bool:
+    """Decide si el request se perfila; nunca lo hace si PROFILING_ENABLED no está activo."""
+    if not perfilado_habilitado():
+        return False
+    if os.getenv("PROFILE_ALL_REQUESTS", "false").lower() == "true":
+        return True
+    if not valor_header:
+        return False
+    token = os.getenv("PROFILING_TOKEN", "")
+    if token:
+        return hmac.compare_digest(valor_header.encode(), token.encode())
+    return valor_header.lower() in ("1", "true", "yes")
+
+
+def obtener_directorio_perfiles() -> str:
+    return os.getenv("PROFILE_DIR", os.path.join(os.getenv("LOG_DIR", "logs"), "profiles"))
+
+
+def _nombre_archivo(request_id: str, extension: str) -> str:
+    # El request_id puede venir del header X-Request-ID, no se usa tal cual como ruta
+    seguro = re.sub(r"[^A-Za-z0-9_.-]", "_", request_id or "sin_id")[:64]
+    return f"{seguro}.{extension}"
+
+
+def _describir_frame(frame) -> str:
+    codigo = frame.f_code
+    archivo = codigo.co_filename
+    raiz = os.getcwd() + os.sep
+    if archivo.startswith(raiz):
+        archivo = archivo[len(raiz):]
+    return f"{codigo.co_name} ({archivo}:{codigo.co_firstlineno})"
+
+
+class MuestreadorPila:
+    """Profiler de muestreo: toma la pila de un hilo cada cierto intervalo y acumula pilas colapsadas."""
+
+    def __init__(self, id_hilo: int, intervalo_segundos: float):
+        self.id_hilo = id_hilo
+        self.intervalo_segundos = intervalo_segundos
+        self.muestras: Counter = Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name="muestreador-perfil", daemon=True)
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo_segundos):
+            frame = sys._current_frames().get(self.id_hilo)
+            pila = []
+            while frame is not None:
+                pila.append(_describir_frame(frame))
+                frame = frame.f_back
+            if pila:
+                self.muestras[";".join(reversed(pila))] += 1
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self) -> Counter:
+        self._detener.set()
+        self._hilo.join()
+        return self.muestras
+
+    def a_texto_colapsado(self) -> str:
+        """Formato de pilas colapsadas (flamegraph.pl, speedscope)."""
+        return "".join(f"{pila} {n}\n" for pila, n in self.muestras.most_common())
+
+
+def _guardar(solicitud: SolicitudPerfil, extension: str, escribir: Callable[[str], None]) -> None:
+    directorio = obtener_directorio_perfiles()
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, _nombre_archivo(solicitud.request_id, extension))
+        escribir(ruta)
+        solicitud.archivo = ruta
+        logger.info(f"Perfil del request guardado en {ruta}", extra={"request_id": solicitud.request_id})
+    except OSError as e:
+        logger.error(f"No se pudo guardar el perfil: {e}", extra={"request_id": solicitud.request_id})
+
+
+def _ejecutar_con_muestreo(solicitud: SolicitudPerfil, funcion: Callable, args, kwargs):
+    intervalo = float(os.getenv("PROFILER_INTERVAL_MS", "2")) / 1000
+    muestreador = MuestreadorPila(threading.get_ident(), intervalo)
+    muestreador.iniciar()
+    try:
+        return funcion(*args, **kwargs)
+    finally:
+        muestreador.detener()
+
+        def escribir(ruta):
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(muestreador.a_texto_colapsado())
+        _guardar(solicitud, "folded", escribir)
+
+
+def _ejecutar_con_cprofile(solicitud: SolicitudPerfil, funcion: Callable, args, kwargs):
+    if not _lock_cprofile.acquire(blocking=False):
+        logger.info("cProfile ocupado por otro request; se perfila por muestreo", extra={"request_id": solicitud.request_id})
+        return _ejecutar_con_muestreo(solicitud, funcion, args, kwargs)
+    try:
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Otra herramienta (debugger, coverage) ya tiene el hook de perfilado
+            logger.info("cProfile no disponible; se perfila por muestreo", extra={"request_id": solicitud.request_id})
+            return _ejecutar_con_muestreo(solicitud, funcion, args, kwargs)
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            perfil.disable()
+            _guardar(solicitud, "prof", perfil.dump_stats)
+    finally:
+        _lock_cprofile.release()
+
+
+def ejecutar_perfilado(funcion: Callable, *args, **kwargs):
+    """Ejecuta la función perfilándola si el request actual lo pidió."""
+    solicitud = perfil_var.get()
+    if solicitud is None or solicitud.archivo is not None:
+        return funcion(*args, **kwargs)
+    if os.getenv("PROFILER_MODE", MODO_MUESTREO).lower() == MODO_CPROFILE:
+        return _ejecutar_con_cprofile(solicitud, funcion, args, kwargs)
+    return _ejecutar_con_muestreo(solicitud, funcion, args, kwargs)
+
+
+def perfilable(funcion: Callable) -> Callable:
+    """Envuelve un endpoint para que se perfile en el mismo hilo donde se ejecuta."""
+    if inspect.iscoroutinefunction(funcion):
+        # Los endpoints async comparten el hilo del event loop, su pila no se puede aislar
+        return funcion
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        return ejecutar_perfilado(funcion, *args, **kwargs)
+    return envoltura
@@ -0,0 +1,139 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+from sqlalchemy.orm import Session
+
+from ..domain.entidades import Evento
+from ..domain.zona_horaria import ahora
+from ..application.ports import AlmacenEventos
+from .repositories.repositorio_outbox import RepositorioOutboxSQL
+from .logging_config import obtener_logger
+
+
+logger = obtener_logger("app.infrastructure.relay_outbox")
+
+
+class AlmacenEventosDiferido(AlmacenEventos):
+    """No publica nada: con outbox activo los eventos los publica el relay tras el commit."""
+
+    def registrar(self, evento: Evento) -> None:
+        pass
+
+
+class MetricasRelay:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.eventos_publicados = 0
+        self.lotes_procesados = 0
+        self.errores = 0
+        self.segundos_publicando = 0.0
+        self.latencia_ultima_ms = 0.0
+        self.latencia_max_ms = 0.0
+        self._latencia_total_ms = 0.0
+
+    def registrar_lote(self, latencias_ms: List[float], duracion_s: float) -> None:
+        with self._lock:
+            self.lotes_procesados += 1
+            self.eventos_publicados += len(latencias_ms)
+            self.segundos_publicando += duracion_s
+            if latencias_ms:
+                self.latencia_ultima_ms = latencias_ms[-1]
+                self.latencia_max_ms = max(self.latencia_max_ms, max(latencias_ms))
+                self._latencia_total_ms += sum(latencias_ms)
+
+    def registrar_error(self) -> None:
+        with self._lock:
+            self.errores += 1
+
+    def a_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            promedio = self._latencia_total_ms / self.eventos_publicados if self.eventos_publicados else 0.0
+            throughput = self.eventos_publicados / self.segundos_publicando if self.segundos_publicando else 0.0
+            return {
+                "eventos_publicados": self.eventos_publicados,
+                "lotes_procesados": self.lotes_procesados,
+                "errores": self.errores,
+                "eventos_por_segundo": round(throughput, 2),
+                "latencia_promedio_ms": round(promedio, 2),
+                "latencia_ultima_ms": round(self.latencia_ultima_ms, 2),
+                "latencia_max_ms": round(self.latencia_max_ms, 2)
+            }
+
+
+def _latencia_ms(fecha_registro: Optional[datetime]) -> float:
+    """Tiempo entre el commit del evento en el outbox y su publicación."""
+    if fecha_registro is None:
+        return 0.0
+    referencia = ahora()
+    if fecha_registro.tzinfo is None:
+        referencia = referencia.replace(tzinfo=None)
+    return max((referencia - fecha_registro).total_seconds() * 1000, 0.0)
+
+
+class RelayOutbox:
+    """
+    Drena el outbox en lotes hacia el AlmacenEventos configurado.
+
+    La entrega es al-menos-una-vez: si la publicación falla a mitad de un lote
+    se hace rollback y el lote completo se reintenta en la siguiente pasada.
+    """
+
+    def __init__(self, fabrica_sesion: Callable[[], Session], almacen: AlmacenEventos, tamano_lote: Optional[int] = None, intervalo_segundos: Optional[float] = None):
+        self.fabrica_sesion = fabrica_sesion
+        self.almacen = almacen
+        self.tamano_lote = tamano_lote or int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+        self.intervalo_segundos = intervalo_segundos if intervalo_segundos is not None else float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+        self.metricas = MetricasRelay()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def procesar_lote(self) -> int:
+        """Publica un lote de eventos pendientes y retorna cuántos se publicaron."""
+        sesion = self.fabrica_sesion()
+        try:
+            repo = RepositorioOutboxSQL(sesion)
+            pendientes = repo.obtener_pendientes(self.tamano_lote)
+            if not pendientes:
+                sesion.commit()
+                return 0
+
+            inicio = time.perf_counter()
+            latencias = []
+            for registro in pendientes:
+                self.almacen.registrar(repo.a_evento(registro))
+                latencias.append(_latencia_ms(registro.fecha_registro))
+            repo.marcar_publicados(pendientes)
+            sesion.commit()
+
+            self.metricas.registrar_lote(latencias, time.perf_counter() - inicio)
+            return len(pendientes)
+        except Exception as e:
+            sesion.rollback()
+            self.metricas.registrar_error()
+            logger.error(f"Error publicando lote del outbox: {str(e)}", exc_info=True)
+            return 0
+        finally:
+            sesion.close()
+
+    def _ejecutar(self) -> None:
+        while not self._detener.is_set():
+            publicados = self.procesar_lote()
+            if publicados < self.tamano_lote:
+                self._detener.wait(self.intervalo_segundos)
+
+    def iniciar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name="relay-outbox", daemon=True)
+        self._hilo.start()
+        logger.info(f"Relay de outbox iniciado (lote={self.tamano_lote}, intervalo={self.intervalo_segundos}s)")
+
+    def detener(self, timeout: float = 5.0) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
+        logger.info("Relay de outbox detenido", extra={"metricas": self.metricas.a_dict()})
@@ -3,7 +3,14 @@ from .repositorio_servicio import RepositorioServicioSQL
 from .repositorio_evento import RepositorioEventoSQL
 from .repositorio_cliente import RepositorioClienteSQL
 from .repositorio_vehiculo import RepositorioVehiculoSQL
+from .repositorio_outbox import RepositorioOutboxSQL
 from .unidad_trabajo import UnidadTrabajoSQL
+from .repositorio_orden_memoria import RepositorioOrdenMemoria
+from .repositorio_idempotencia import RepositorioIdempotenciaSQL
+from .repositorio_idempotencia_memoria import RepositorioIdempotenciaMemoria
+from .repositorio_trabajos import RepositorioTrabajosSQL
+from .repositorio_instantanea import RepositorioInstantaneaSQL
+from .repositorio_estadisticas import RepositorioEstadisticasSQL
 
-__all__ = ["RepositorioOrden", "RepositorioServicioSQL", "RepositorioEventoSQL", "RepositorioClienteSQL", "RepositorioVehiculoSQL", "UnidadTrabajoSQL"]
+__all__ = ["RepositorioOrden", "RepositorioServicioSQL", "RepositorioEventoSQL", "RepositorioClienteSQL", "RepositorioVehiculoSQL", "RepositorioOutboxSQL", "UnidadTrabajoSQL", "RepositorioOrdenMemoria", "RepositorioIdempotenciaSQL", "RepositorioIdempotenciaMemoria", "RepositorioTrabajosSQL", "RepositorioInstantaneaSQL", "RepositorioEstadisticasSQL"]
 
@@ -1,4 +1,5 @@
-from typing import Optional, List
+from typing import Callable, Optional, List
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import load_only
 
@@ -6,6 +7,10 @@ from ...domain.entidades import Cliente
 from ..models.cliente_model import ClienteModel
 
 
+# Inserciones que se reintentan si la fila que causó el conflicto ya no está al releer
+INTENTOS_CREACION = 3
+
+
 class RepositorioClienteSQL:
     def __init__(self, sesion: Session):
         self.sesion = sesion
@@ -15,17 +20,35 @@ class RepositorioClienteSQL:
         if cliente_existente:
             return cliente_existente
         
-        cliente = Cliente(nombre=nombre)
-        try:
-            modelo = ClienteModel(nombre=cliente.nombre)
-            self.sesion.add(modelo)
-            self.sesion.flush()
-            cliente.id_cliente = modelo.id_cliente
-            self.sesion.commit()
-            return cliente
-        except Exception:
-            self.sesion.rollback()
-            raise
+        return self._crear_o_releer(Cliente(nombre=nombre), lambda: self.buscar_por_nombre(nombre))
+    
+    def _crear_o_releer(self, cliente: Cliente, buscar: Callable[[], Optional[Cliente]]) -> Cliente:
+        """Inserta el cliente; si otra transacción creó el mismo entre la búsqueda y el insert, usa el suyo."""
+        for intento in range(INTENTOS_CREACION):
+            try:
+                modelo = ClienteModel(
+                    nombre=cliente.nombre,
+                    identificacion=cliente.identificacion,
+                    correo=cliente.correo,
+                    direccion=cliente.direccion,
+                    celular=cliente.celular
+                )
+                self.sesion.add(modelo)
+                self.sesion.flush()
+                cliente.id_cliente = modelo.id_cliente
+                self.sesion.commit()
+                return cliente
+            except IntegrityError:
+                # La restricción unique detectó la carrera: se relee el que ganó
+                self.sesion.rollback()
+                existente = buscar()
+                if existente:
+                    return existente
+                if intento == INTENTOS_CREACION - 1:
+                    raise
+            except Exception:
+                self.sesion.rollback()
+                raise
     
     def buscar_por_identificacion(self, identificacion: str) -> Optional[Cliente]:
         if not identificacion:
@@ -87,22 +110,9 @@ class RepositorioClienteSQL:
             raise ValueError("nombre es requerido para crear un nuevo cliente")
         
         cliente = Cliente(nombre=nombre, identificacion=identificacion, correo=correo, direccion=direccion, celular=celular)
-        try:
-            modelo = ClienteModel(
-                nombre=cliente.nombre,
-                identificacion=cliente.identificacion,
-                correo=cliente.correo,
-                direccion=cliente.direccion,
-                celular=cliente.celular
-            )
-            self.sesion.add(modelo)
-            self.sesion.flush()
-            cliente.id_cliente = modelo.id_cliente
-            self.sesion.commit()
-            return cliente
-        except Exception:
-            self.sesion.rollback()
-            raise
+        return self._crear_o_releer(
+            cliente, lambda: self.buscar_por_criterio(identificacion=identificacion) or self.buscar_por_nombre(nombre)
+        )
     
     def obtener(self, id_cliente: int) -> Optional[Cliente]:
         try:
@@ -0,0 +1,149 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ...domain.dinero import a_decimal, redondear_mitad_par
+from ...domain.zona_horaria import a_zona_horaria, ahora
+from ...application.ports import FilaEstadistica
+from ..models.estadistica_model import EstadisticaOrdenModel
+from ..models.cliente_model import ClienteModel
+from ..models.orden_model import OrdenModel
+
+
+DIMENSIONES = ("dia", "estado", "cliente")
+
+
+class Contribucion(NamedTuple):
+    """Lo que una orden suma a los contadores: su grupo (día, estado, cliente) y sus montos en centavos."""
+    dia: date
+    estado: str
+    cliente: Hashable
+    monto_autorizado: int
+    total_real: int
+
+
+def _centavos(valor) -> int:
+    if valor is None or valor == "":
+        return 0
+    return int(redondear_mitad_par(a_decimal(valor)) * 100)
+
+
+def contribucion(fecha_creacion: Optional[datetime], estado: str, cliente: Hashable, monto_autorizado, total_real) -> Contribucion:
+    return Contribucion(
+        dia=a_zona_horaria(fecha_creacion or ahora()).date(),
+        estado=estado,
+        cliente=cliente,
+        monto_autorizado=_centavos(monto_autorizado),
+        total_real=_centavos(total_real)
+    )
+
+
+def diferencias(anterior: Optional[Contribucion], nueva: Optional[Contribucion]) -> List[Tuple[Tuple[date, str, Hashable], int, int, int]]:
+    """Cambios a aplicar a los contadores: (grupo, cantidad, monto autorizado, total real). Vacío si nada cambió."""
+    if anterior == nueva:
+        return []
+    cambios = []
+    if anterior is not None:
+        cambios.append((anterior[:3], -1, -anterior.monto_autorizado, -anterior.total_real))
+    if nueva is not None:
+        cambios.append((nueva[:3], 1, nueva.monto_autorizado, nueva.total_real))
+    return cambios
+
+
+def fila_estadistica(agrupar: Sequence[str], grupo: Sequence, cantidad: int, autorizado: int, real: int) -> FilaEstadistica:
+    return FilaEstadistica(
+        cantidad=int(cantidad),
+        monto_autorizado=Decimal(int(autorizado)).scaleb(-2),
+        total_real=Decimal(int(real)).scaleb(-2),
+        **dict(zip(agrupar, grupo))
+    )
+
+
+class RepositorioEstadisticasSQL:
+    def __init__(self, sesion: Session):
+        self.sesion = sesion
+
+    def aplicar(self, anterior: Optional[Contribucion], nueva: Optional[Contribucion]) -> None:
+        """Mueve la orden de su grupo anterior al nuevo dentro de la transacción actual, sin hacer commit."""
+        for (dia, estado, id_cliente), cantidad, autorizado, real in diferencias(anterior, nueva):
+            self._sumar(dia, estado, id_cliente, cantidad, autorizado, real)
+
+    def _sumar(self, dia: date, estado: str, id_cliente: int, cantidad: int, autorizado: int, real: int) -> None:
+        tabla = EstadisticaOrdenModel
+        valores = dict(dia=dia, estado=estado, id_cliente=id_cliente, cantidad=cantidad,
+                       monto_autorizado_centavos=autorizado, total_real_centavos=real)
+        dialecto = self.sesion.get_bind().dialect.name
+        if dialecto in ("postgresql", "sqlite"):
+            # Upsert atómico: dos transacciones que crean el mismo grupo a la vez no chocan en la clave primaria
+            insertar = postgresql.insert if dialecto == "postgresql" else sqlite.insert
+            sentencia = insertar(tabla).values(**valores)
+            sentencia = sentencia.on_conflict_do_update(
+                index_elements=[tabla.dia, tabla.estado, tabla.id_cliente],
+                set_={
+                    "cantidad": tabla.cantidad + sentencia.excluded.cantidad,
+                    "monto_autorizado_centavos": tabla.monto_autorizado_centavos + sentencia.excluded.monto_autorizado_centavos,
+                    "total_real_centavos": tabla.total_real_centavos + sentencia.excluded.total_real_centavos
+                }
+            )
+            self.sesion.execute(sentencia)
+            return
+        resultado = self.sesion.execute(
+            update(tabla)
+            .where(tabla.dia == dia, tabla.estado == estado, tabla.id_cliente == id_cliente)
+            .values(
+                cantidad=tabla.cantidad + cantidad,
+                monto_autorizado_centavos=tabla.monto_autorizado_centavos + autorizado,
+                total_real_centavos=tabla.total_real_centavos + real
+            )
+        )
+        if resultado.rowcount == 0:
+            self.sesion.add(tabla(**valores))
+            self.sesion.flush()
+
+    def consultar(self, agrupar: Sequence[str], desde: Optional[date] = None, hasta: Optional[date] = None,
+                  cliente: Optional[str] = None) -> List[FilaEstadistica]:
+        tabla = EstadisticaOrdenModel
+        columnas = {"dia": tabla.dia, "estado": tabla.estado, "cliente": ClienteModel.nombre}
+        seleccion = [columnas[d] for d in agrupar]
+        cantidad = func.sum(tabla.cantidad)
+        consulta = self.sesion.query(
+            *seleccion, cantidad, func.sum(tabla.monto_autorizado_centavos), func.sum(tabla.total_real_centavos)
+        ).select_from(tabla)
+        if "cliente" in agrupar or cliente is not None:
+            consulta = consulta.join(ClienteModel, ClienteModel.id_cliente == tabla.id_cliente)
+        if desde is not None:
+            consulta = consulta.filter(tabla.dia >= desde)
+        if hasta is not None:
+            consulta = consulta.filter(tabla.dia <= hasta)
+        if cliente is not None:
+            consulta = consulta.filter(ClienteModel.nombre == cliente)
+        if seleccion:
+            consulta = consulta.group_by(*seleccion).order_by(*seleccion)
+        filas = consulta.having(cantidad > 0).all()
+        return [fila_estadistica(agrupar, fila[:len(seleccion)], *fila[len(seleccion):]) for fila in filas]
+
+    def recalcular(self) -> int:
+        """Reconstruye los contadores desde la tabla ordenes (para bases previas a ellos); retorna cuántas órdenes contó."""
+        grupos: Dict[Tuple[date, str, int], List[int]] = {}
+        contadas = 0
+        consulta = self.sesion.query(
+            OrdenModel.fecha_creacion, OrdenModel.estado, OrdenModel.id_cliente, OrdenModel.monto_autorizado, OrdenModel.total_real
+        )
+        for fila in consulta.yield_per(1000):
+            for grupo, cantidad, autorizado, real in diferencias(None, contribucion(*fila)):
+                acumulado = grupos.setdefault(grupo, [0, 0, 0])
+                acumulado[0] += cantidad
+                acumulado[1] += autorizado
+                acumulado[2] += real
+            contadas += 1
+        self.sesion.query(EstadisticaOrdenModel).delete()
+        self.sesion.add_all(
+            EstadisticaOrdenModel(dia=dia, estado=estado, id_cliente=id_cliente, cantidad=cantidad,
+                                  monto_autorizado_centavos=autorizado, total_real_centavos=real)
+            for (dia, estado, id_cliente), (cantidad, autorizado, real) in grupos.items()
+        )
+        self.sesion.commit()
+        return contadas
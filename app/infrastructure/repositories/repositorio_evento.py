@@ -1,9 +1,13 @@
-from typing import List
+from typing import List, Optional, Tuple
+from datetime import datetime
 import json
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from ...domain.entidades import Evento
 from ..models.evento_model import EventoModel
+from ..models.contador_feed_model import ContadorFeedModel
+from ..models.orden_model import OrdenModel
 
 
 class RepositorioEventoSQL:
@@ -32,12 +36,114 @@ class RepositorioEventoSQL:
                 self.sesion.delete(em)
                 eventos_existentes.remove(em)
     
+    def agregar_eventos(self, id_orden: int, eventos: List[Evento]) -> List[EventoModel]:
+        """Inserta solo los eventos dados, sin tocar los ya guardados ni hacer commit."""
+        nuevos = [
+            EventoModel(
+                id_orden=id_orden,
+                tipo=evt.tipo,
+                timestamp=evt.timestamp,
+                metadatos_json=json.dumps(evt.metadatos) if evt.metadatos else None
+            )
+            for evt in eventos
+        ]
+        self.sesion.add_all(nuevos)
+        return nuevos
+    
+    def contar(self, id_orden: int) -> int:
+        return self.sesion.query(func.count(EventoModel.id_evento)).filter(EventoModel.id_orden == id_orden).scalar()
+    
+    def ultimo_id(self, id_orden: int, hasta: Optional[datetime] = None) -> int:
+        """Id del último evento de la orden (con hasta, del último ocurrido hasta ese momento); 0 si no hay."""
+        consulta = self.sesion.query(func.max(EventoModel.id_evento)).filter(EventoModel.id_orden == id_orden)
+        if hasta is not None:
+            # Se compara en SQL: SQLite devuelve fechas sin zona
+            consulta = consulta.filter(EventoModel.timestamp <= hasta)
+        return consulta.scalar() or 0
+    
+    def id_en_posicion(self, id_orden: int, posicion: int) -> Optional[int]:
+        """Id del evento número posicion (desde 1) de la orden, o None si tiene menos."""
+        return (
+            self.sesion.query(EventoModel.id_evento)
+            .filter(EventoModel.id_orden == id_orden)
+            .order_by(EventoModel.id_evento)
+            .offset(posicion - 1)
+            .limit(1)
+            .scalar()
+        )
+    
+    def listar_modelos(self, id_orden: int, hasta_evento: Optional[int] = None) -> List[EventoModel]:
+        """Eventos de la orden en orden de inserción, opcionalmente solo hasta un id de evento."""
+        consulta = self.sesion.query(EventoModel).filter(EventoModel.id_orden == id_orden)
+        if hasta_evento is not None:
+            consulta = consulta.filter(EventoModel.id_evento <= hasta_evento)
+        return consulta.order_by(EventoModel.id_evento).all()
+    
+    def pagina(self, id_orden: int, despues_de: int, limite: int, tipos: Optional[List[str]] = None) -> List[Tuple[int, Evento]]:
+        """Eventos de la orden con su número de secuencia (1 = el primero), a partir del siguiente a despues_de."""
+        secuencia = func.row_number().over(order_by=EventoModel.id_evento).label("secuencia")
+        numerados = (
+            select(EventoModel.tipo, EventoModel.timestamp, EventoModel.metadatos_json, secuencia)
+            .where(EventoModel.id_orden == id_orden)
+            .subquery()
+        )
+        consulta = select(numerados).where(numerados.c.secuencia > despues_de)
+        if tipos:
+            consulta = consulta.where(numerados.c.tipo.in_(tipos))
+        filas = self.sesion.execute(consulta.order_by(numerados.c.secuencia).limit(limite)).all()
+        return [
+            (fila.secuencia, Evento(tipo=fila.tipo, timestamp=fila.timestamp, metadatos=json.loads(fila.metadatos_json) if fila.metadatos_json else {}))
+            for fila in filas
+        ]
+    
+    def asignar_posiciones_feed(self, id_orden: int) -> None:
+        """Numera en el feed los eventos de la orden que aún no tienen posición; debe ser lo último antes del commit.
+
+        Con PostgreSQL, id_evento sale de una secuencia al insertar: una transacción puede tomar un id menor y
+        confirmar después que otra, y un consumidor que ya avanzó su cursor nunca vería ese evento. Las posiciones
+        salen de la fila de contador_feed, cuyo bloqueo se toma aquí y se suelta en el commit: solo este último
+        paso de cada guardado con eventos se serializa, y las posiciones quedan en orden de commit.
+        """
+        self.sesion.flush()
+        pendientes = (
+            self.sesion.query(EventoModel.id_evento)
+            .filter(EventoModel.id_orden == id_orden, EventoModel.posicion_feed.is_(None))
+            .order_by(EventoModel.id_evento)
+            .all()
+        )
+        if not pendientes:
+            return
+        self.sesion.execute(
+            update(ContadorFeedModel)
+            .where(ContadorFeedModel.id == 1)
+            .values(ultima_posicion=ContadorFeedModel.ultima_posicion + len(pendientes))
+        )
+        ultima = self.sesion.query(ContadorFeedModel.ultima_posicion).filter(ContadorFeedModel.id == 1).scalar()
+        primera = ultima - len(pendientes)
+        self.sesion.execute(update(EventoModel), [
+            {"id_evento": id_evento, "posicion_feed": primera + i}
+            for i, (id_evento,) in enumerate(pendientes, start=1)
+        ])
+    
+    def feed(self, despues_de: int, limite: int, tipos: Optional[List[str]] = None) -> List[Tuple[int, str, Evento]]:
+        """Eventos de todas las órdenes con posicion_feed > despues_de, en orden de commit: (posicion_feed, order_id, evento)."""
+        consulta = (
+            self.sesion.query(EventoModel.posicion_feed, OrdenModel.order_id, EventoModel.tipo, EventoModel.timestamp, EventoModel.metadatos_json)
+            .join(OrdenModel, OrdenModel.id == EventoModel.id_orden)
+            .filter(EventoModel.posicion_feed > despues_de)
+        )
+        if tipos:
+            consulta = consulta.filter(EventoModel.tipo.in_(tipos))
+        return [
+            (fila.posicion_feed, fila.order_id, Evento(tipo=fila.tipo, timestamp=fila.timestamp, metadatos=json.loads(fila.metadatos_json) if fila.metadatos_json else {}))
+            for fila in consulta.order_by(EventoModel.posicion_feed).limit(limite).all()
+        ]
+    
+    def evento_desde_modelo(self, em: EventoModel) -> Evento:
+        meta = json.loads(em.metadatos_json) if em.metadatos_json else {}
+        return Evento(tipo=em.tipo, timestamp=em.timestamp, metadatos=meta)
+    
     def deserializar_eventos(self, eventos_modelo: List[EventoModel]) -> List[Evento]:
-        resultado = []
         ordenados = sorted(eventos_modelo, key=lambda x: x.timestamp)
-        for em in ordenados:
-            meta = json.loads(em.metadatos_json) if em.metadatos_json else {}
-            evt = Evento(tipo=em.tipo, timestamp=em.timestamp, metadatos=meta)
-            resultado.append(evt)
-        return resultado
+        return [self.evento_desde_modelo(em) for em in ordenados]
 
@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ...domain.zona_horaria import ahora
+from ...application.ports import AlmacenIdempotencia, RegistroIdempotencia
+from ..models.idempotencia_model import IdempotenciaModel
+
+
+INTERVALO_PURGA_S = 60.0
+
+_ultima_purga = 0.0
+_lock_purga = threading.Lock()
+
+
+def _toca_purgar() -> bool:
+    """Como mucho una purga por proceso cada INTERVALO_PURGA_S."""
+    global _ultima_purga
+    with _lock_purga:
+        momento = time.monotonic()
+        if momento - _ultima_purga < INTERVALO_PURGA_S:
+            return False
+        _ultima_purga = momento
+        return True
+
+
+class RepositorioIdempotenciaSQL(AlmacenIdempotencia):
+    """Respuestas guardadas por clave de idempotencia.
+
+    Cada operación confirma su propia transacción: la reserva debe verse desde otras sesiones antes de
+    ejecutar el comando, y la clave primaria hace que de dos envíos simultáneos solo uno la obtenga.
+    """
+
+    def __init__(self, sesion: Session):
+        self.sesion = sesion
+
+    def _a_registro(self, modelo: IdempotenciaModel) -> RegistroIdempotencia:
+        respuesta = json.loads(modelo.respuesta_json) if modelo.respuesta_json else None
+        return RegistroIdempotencia(huella=modelo.huella, respuesta=respuesta)
+
+    def reservar(self, clave: str, huella: str, ttl_segundos: int,
+                 reserva_segundos: Optional[int] = None) -> Optional[RegistroIdempotencia]:
+        momento = ahora()
+        expiracion = momento + timedelta(seconds=ttl_segundos)
+        reservado_hasta = momento + timedelta(seconds=ttl_segundos if reserva_segundos is None else reserva_segundos)
+        if _toca_purgar():
+            self.purgar_expirados()
+        # Comparaciones de fechas en SQL: según el motor la columna vuelve sin zona horaria
+        vigente = (
+            self.sesion.query(IdempotenciaModel)
+            .populate_existing()
+            .filter(
+                IdempotenciaModel.clave == clave,
+                IdempotenciaModel.fecha_expiracion > momento,
+                or_(IdempotenciaModel.respuesta_json.isnot(None), IdempotenciaModel.reservado_hasta > momento)
+            )
+            .first()
+        )
+        if vigente is not None:
+            return self._a_registro(vigente)
+        # Reserva abandonada (el proceso murió antes de completar o liberar): se retoma en un solo UPDATE,
+        # así de dos sesiones que la encuentran vencida solo una la obtiene
+        retomada = self.sesion.query(IdempotenciaModel).filter(
+            IdempotenciaModel.clave == clave,
+            IdempotenciaModel.fecha_expiracion > momento,
+            IdempotenciaModel.respuesta_json.is_(None),
+            or_(IdempotenciaModel.reservado_hasta.is_(None), IdempotenciaModel.reservado_hasta <= momento)
+        ).update({
+            IdempotenciaModel.huella: huella,
+            IdempotenciaModel.fecha_creacion: momento,
+            IdempotenciaModel.fecha_expiracion: expiracion,
+            IdempotenciaModel.reservado_hasta: reservado_hasta
+        }, synchronize_session=False)
+        if retomada:
+            self.sesion.commit()
+            return None
+        self.sesion.query(IdempotenciaModel).filter(
+            IdempotenciaModel.clave == clave, IdempotenciaModel.fecha_expiracion <= momento
+        ).delete(synchronize_session="fetch")
+        self.sesion.add(IdempotenciaModel(
+            clave=clave,
+            huella=huella,
+            fecha_creacion=momento,
+            fecha_expiracion=expiracion,
+            reservado_hasta=reservado_hasta
+        ))
+        try:
+            self.sesion.commit()
+        except IntegrityError:
+            # Otra sesión la reservó entre la lectura y el insert
+            self.sesion.rollback()
+            otro = self.sesion.get(IdempotenciaModel, clave, populate_existing=True)
+            return self._a_registro(otro) if otro is not None else RegistroIdempotencia(huella=huella, respuesta=None)
+        return None
+
+    def completar(self, clave: str, respuesta: dict) -> None:
+        modelo = self.sesion.get(IdempotenciaModel, clave, populate_existing=True)
+        if modelo is None:
+            return
+        modelo.respuesta_json = json.dumps(respuesta, default=str)
+        modelo.reservado_hasta = None
+        self.sesion.commit()
+
+    def liberar(self, clave: str) -> None:
+        self.sesion.rollback()
+        self.sesion.query(IdempotenciaModel).filter(IdempotenciaModel.clave == clave).delete(synchronize_session=False)
+        self.sesion.commit()
+
+    def purgar_expirados(self) -> int:
+        eliminados = (
+            self.sesion.query(IdempotenciaModel)
+            .filter(IdempotenciaModel.fecha_expiracion <= ahora())
+            .delete(synchronize_session=False)
+        )
+        self.sesion.commit()
+        return eliminados
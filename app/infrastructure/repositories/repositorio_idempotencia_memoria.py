@@ -0,0 +1,54 @@
+import copy
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from ...application.ports import AlmacenIdempotencia, RegistroIdempotencia
+from .repositorio_idempotencia import INTERVALO_PURGA_S
+
+
+class RepositorioIdempotenciaMemoria(AlmacenIdempotencia):
+    """Respuestas por clave de idempotencia en memoria del proceso, para REPOSITORY_BACKEND=memory."""
+
+    def __init__(self):
+        # clave -> (registro, expiración, fin de la reserva mientras no hay respuesta), según time.monotonic
+        self._registros: Dict[str, Tuple[RegistroIdempotencia, float, float]] = {}
+        self._lock = threading.Lock()
+        self._proxima_purga = 0.0
+
+    def _purgar(self, momento: float) -> None:
+        for clave in [c for c, (_, expira, _) in self._registros.items() if expira <= momento]:
+            del self._registros[clave]
+
+    def reservar(self, clave: str, huella: str, ttl_segundos: int,
+                 reserva_segundos: Optional[int] = None) -> Optional[RegistroIdempotencia]:
+        with self._lock:
+            momento = time.monotonic()
+            if momento >= self._proxima_purga:
+                self._purgar(momento)
+                self._proxima_purga = momento + INTERVALO_PURGA_S
+            existente = self._registros.get(clave)
+            if existente is not None:
+                registro, expira, reservado_hasta = existente
+                # Una reserva sin respuesta vencida se retoma: el proceso que la tomó no la completó ni liberó
+                if expira > momento and (registro.respuesta is not None or reservado_hasta > momento):
+                    return copy.deepcopy(registro)
+            reserva = ttl_segundos if reserva_segundos is None else reserva_segundos
+            self._registros[clave] = (
+                RegistroIdempotencia(huella=huella, respuesta=None), momento + ttl_segundos, momento + reserva
+            )
+            return None
+
+    def completar(self, clave: str, respuesta: dict) -> None:
+        with self._lock:
+            existente = self._registros.get(clave)
+            if existente is not None:
+                existente[0].respuesta = copy.deepcopy(respuesta)
+
+    def liberar(self, clave: str) -> None:
+        with self._lock:
+            self._registros.pop(clave, None)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._registros.clear()
@@ -0,0 +1,114 @@
+import os
+import json
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+
+from ...domain.entidades import Orden, Servicio, Componente, Evento
+from ...domain.enums import EstadoOrden
+from ...domain.dinero import a_decimal
+from ..models.instantanea_model import InstantaneaOrdenModel
+
+
+def event_sourcing_habilitado() -> bool:
+    return os.getenv("ORDER_EVENT_SOURCING", "false").lower() == "true"
+
+
+def intervalo_instantaneas() -> int:
+    return max(1, int(os.getenv("ORDER_SNAPSHOT_EVERY", "50")))
+
+
+def _texto(valor) -> Optional[str]:
+    return str(valor) if valor is not None else None
+
+
+def _fecha(valor: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(valor) if valor else None
+
+
+def orden_a_instantanea(orden: Orden) -> dict:
+    """Estado completo de la orden (sin eventos) en forma serializable a JSON."""
+    return {
+        "order_id": orden.order_id,
+        "cliente": orden.cliente,
+        "vehiculo": orden.vehiculo,
+        "estado": orden.estado.value,
+        "monto_autorizado": _texto(orden.monto_autorizado),
+        "version_autorizacion": orden.version_autorizacion,
+        "total_real": str(orden.total_real),
+        "fecha_creacion": orden.fecha_creacion.isoformat() if orden.fecha_creacion else None,
+        "fecha_cancelacion": orden.fecha_cancelacion.isoformat() if orden.fecha_cancelacion else None,
+        "servicios": [
+            {
+                "id_servicio": s.id_servicio,
+                "descripcion": s.descripcion,
+                "costo_mano_obra_estimado": str(s.costo_mano_obra_estimado),
+                "costo_real": _texto(s.costo_real),
+                "completado": s.completado,
+                "componentes": [
+                    {
+                        "id_componente": c.id_componente,
+                        "descripcion": c.descripcion,
+                        "costo_estimado": str(c.costo_estimado),
+                        "costo_real": _texto(c.costo_real)
+                    }
+                    for c in s.componentes
+                ]
+            }
+            for s in orden.servicios
+        ]
+    }
+
+
+def _servicio_desde_instantanea(datos: dict) -> Servicio:
+    componentes = []
+    for c in datos["componentes"]:
+        componente = Componente(c["descripcion"], a_decimal(c["costo_estimado"]))
+        componente.id_componente = c["id_componente"]
+        componente.costo_real = a_decimal(c["costo_real"]) if c["costo_real"] is not None else None
+        componentes.append(componente)
+    servicio = Servicio(datos["descripcion"], a_decimal(datos["costo_mano_obra_estimado"]), componentes)
+    servicio.id_servicio = datos["id_servicio"]
+    servicio.costo_real = a_decimal(datos["costo_real"]) if datos["costo_real"] is not None else None
+    servicio.completado = datos["completado"]
+    return servicio
+
+
+def orden_desde_instantanea(datos: dict, eventos: List[Evento], id: Optional[int] = None, version: Optional[int] = None) -> Orden:
+    """Orden en el estado de la instantánea; eventos son los ya incluidos en ella."""
+    return Orden.hidratar(
+        id=id,
+        order_id=datos["order_id"],
+        cliente=datos["cliente"],
+        vehiculo=datos["vehiculo"],
+        estado=EstadoOrden(datos["estado"]),
+        servicios=[_servicio_desde_instantanea(s) for s in datos["servicios"]],
+        eventos=eventos,
+        monto_autorizado=a_decimal(datos["monto_autorizado"]) if datos["monto_autorizado"] is not None else None,
+        version_autorizacion=datos["version_autorizacion"],
+        total_real=a_decimal(datos["total_real"]),
+        fecha_creacion=_fecha(datos["fecha_creacion"]),
+        fecha_cancelacion=_fecha(datos["fecha_cancelacion"]),
+        version=version
+    )
+
+
+class RepositorioInstantaneaSQL:
+    def __init__(self, sesion: Session):
+        self.sesion = sesion
+
+    def ultima(self, id_orden: int, hasta_evento: Optional[int] = None) -> Optional[InstantaneaOrdenModel]:
+        """Instantánea más reciente de la orden; con hasta_evento, la más reciente que no lo supere."""
+        consulta = self.sesion.query(InstantaneaOrdenModel).filter(InstantaneaOrdenModel.id_orden == id_orden)
+        if hasta_evento is not None:
+            consulta = consulta.filter(InstantaneaOrdenModel.id_ultimo_evento <= hasta_evento)
+        return consulta.order_by(InstantaneaOrdenModel.id_ultimo_evento.desc()).first()
+
+    def guardar(self, id_orden: int, orden: Orden, id_ultimo_evento: int) -> None:
+        """Agrega la instantánea a la sesión actual sin hacer commit (se confirma con la orden)."""
+        self.sesion.add(InstantaneaOrdenModel(
+            id_orden=id_orden,
+            id_ultimo_evento=id_ultimo_evento,
+            numero_eventos=len(orden.eventos),
+            estado_json=json.dumps(orden_a_instantanea(orden))
+        ))
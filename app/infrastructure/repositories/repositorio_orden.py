@@ -1,16 +1,29 @@
-from typing import Optional
+import json
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from ...domain.entidades import Orden
-from ...domain.enums import EstadoOrden
+from ...domain.entidades import Orden, Evento
+from ...domain.enums import EstadoOrden, CodigoError
+from ...domain.exceptions import ErrorDominio
 from ...domain.dinero import a_decimal
-from ...application.ports import RepositorioOrden as IRepositorioOrden, UnidadTrabajo
+from ...domain.zona_horaria import a_zona_horaria
+from ...application.ports import RepositorioOrden as IRepositorioOrden, UnidadTrabajo, FilaEstadistica
 from ..models.orden_model import OrdenModel
 from .repositorio_servicio import RepositorioServicioSQL
 from .repositorio_evento import RepositorioEventoSQL
 from .repositorio_cliente import RepositorioClienteSQL
 from .repositorio_vehiculo import RepositorioVehiculoSQL
+from .repositorio_outbox import RepositorioOutboxSQL, outbox_habilitado
+from .repositorio_instantanea import (
+    RepositorioInstantaneaSQL, event_sourcing_habilitado, intervalo_instantaneas, orden_desde_instantanea
+)
+from .repositorio_estadisticas import RepositorioEstadisticasSQL, Contribucion, contribucion
 from .unidad_trabajo import UnidadTrabajoSQL
+from ..cache_historico import cache_ordenes_historicas
+from ..feed_eventos import aviso_eventos
+from ..difusor_estados import difusor_estados
 from ..logging_config import obtener_logger
 
 
@@ -18,11 +31,15 @@ logger = obtener_logger("app.infrastructure.repositories.repositorio_orden")
 
 
 class RepositorioOrden(IRepositorioOrden):
-    def __init__(self, sesion: Session, unidad_trabajo: Optional[UnidadTrabajo] = None):
+    def __init__(self, sesion: Session, unidad_trabajo: Optional[UnidadTrabajo] = None, usar_outbox: Optional[bool] = None,
+                 event_sourcing: Optional[bool] = None):
         self.sesion = sesion
         if unidad_trabajo is None:
             unidad_trabajo = UnidadTrabajoSQL(sesion)
         self.unidad_trabajo = unidad_trabajo
+        self.usar_outbox = outbox_habilitado() if usar_outbox is None else usar_outbox
+        # Órdenes nuevas (y las existentes al guardarse) pasan a reconstruirse desde eventos
+        self.event_sourcing = event_sourcing_habilitado() if event_sourcing is None else event_sourcing
     
     def _obtener_repo_cliente(self) -> RepositorioClienteSQL:
         return self.unidad_trabajo.obtener_repositorio_cliente()
@@ -36,14 +53,95 @@ class RepositorioOrden(IRepositorioOrden):
     def _obtener_repo_evento(self) -> RepositorioEventoSQL:
         return self.unidad_trabajo.obtener_repositorio_evento()
     
+    def _obtener_repo_outbox(self) -> RepositorioOutboxSQL:
+        return self.unidad_trabajo.obtener_repositorio_outbox()
+    
+    def _obtener_repo_instantanea(self) -> RepositorioInstantaneaSQL:
+        return self.unidad_trabajo.obtener_repositorio_instantanea()
+    
+    def _obtener_repo_estadisticas(self) -> RepositorioEstadisticasSQL:
+        return self.unidad_trabajo.obtener_repositorio_estadisticas()
+    
+    @staticmethod
+    def _contribucion_modelo(modelo: OrdenModel) -> Contribucion:
+        return contribucion(modelo.fecha_creacion, modelo.estado, modelo.id_cliente, modelo.monto_autorizado, modelo.total_real)
+    
     def obtener(self, order_id: str) -> Optional[Orden]:
         self.sesion.expire_all()
         modelo = self.sesion.query(OrdenModel).filter(OrdenModel.order_id == order_id).first()
         if modelo is None:
             return None
         
+        if modelo.event_sourced:
+            return self._reconstruir(modelo)
         return self._deserializar(modelo)
     
+    def _reconstruir(self, modelo: OrdenModel) -> Orden:
+        """Parte de la última instantánea y reaplica solo los eventos posteriores."""
+        orden = self._reconstruir_hasta(modelo, None)
+        orden.version = modelo.version
+        # Cliente y vehículo se corrigen con PATCH sin emitir eventos: manda la fila de ordenes
+        if modelo.cliente:
+            orden.cliente = modelo.cliente.nombre
+        if modelo.vehiculo:
+            orden.vehiculo = modelo.vehiculo.placa
+        return orden
+    
+    def _reconstruir_hasta(self, modelo: OrdenModel, hasta_evento: Optional[int]) -> Orden:
+        repo_evento = self._obtener_repo_evento()
+        modelos_evento = repo_evento.listar_modelos(modelo.id, hasta_evento)
+        eventos = [repo_evento.evento_desde_modelo(em) for em in modelos_evento]
+        if not modelo.event_sourced:
+            # Los ids de servicios y componentes los asignó la BD: se toman de las filas, en orden de alta
+            ids_servicios = sorted(
+                (sm.id_servicio, sorted(cm.id_componente for cm in sm.componentes)) for sm in modelo.servicios
+            )
+            return Orden.desde_eventos(eventos, id=modelo.id, ids_servicios=ids_servicios)
+        
+        instantanea = self._obtener_repo_instantanea().ultima(modelo.id, hasta_evento)
+        if instantanea is None:
+            return Orden.desde_eventos(eventos, id=modelo.id)
+        incluidos = sum(1 for em in modelos_evento if em.id_evento <= instantanea.id_ultimo_evento)
+        orden = orden_desde_instantanea(json.loads(instantanea.estado_json), eventos[:incluidos], modelo.id)
+        orden.aplicar_eventos(eventos[incluidos:])
+        return orden
+    
+    def obtener_historica(self, order_id: str, momento: Optional[datetime] = None, secuencia: Optional[int] = None) -> Optional[Orden]:
+        modelo = self.sesion.query(OrdenModel).filter(OrdenModel.order_id == order_id).first()
+        if modelo is None:
+            return None
+        
+        repo_evento = self._obtener_repo_evento()
+        if secuencia is not None:
+            hasta_evento = repo_evento.id_en_posicion(modelo.id, secuencia) or repo_evento.ultimo_id(modelo.id)
+        else:
+            hasta_evento = repo_evento.ultimo_id(modelo.id, a_zona_horaria(momento))
+        if not hasta_evento:
+            return None
+        
+        clave = (str(self.sesion.get_bind().url), modelo.id, modelo.order_id, modelo.fecha_creacion, hasta_evento)
+        orden = cache_ordenes_historicas.obtener(clave)
+        if orden is None:
+            orden = self._reconstruir_hasta(modelo, hasta_evento)
+            cache_ordenes_historicas.guardar(clave, orden)
+        return orden
+    
+    def listar_eventos(self, order_id: str, despues_de: int = 0, limite: int = 50,
+                       tipos: Optional[List[str]] = None) -> Optional[List[Tuple[int, Evento]]]:
+        id_orden = self.sesion.query(OrdenModel.id).filter(OrdenModel.order_id == order_id).scalar()
+        if id_orden is None:
+            return None
+        return self._obtener_repo_evento().pagina(id_orden, despues_de, limite, tipos)
+    
+    def listar_eventos_globales(self, despues_de: int = 0, limite: int = 100,
+                                tipos: Optional[List[str]] = None) -> List[Tuple[int, str, Evento]]:
+        # El cursor es posicion_feed, numerada en orden de commit al guardar
+        return self._obtener_repo_evento().feed(despues_de, limite, tipos)
+    
+    def estadisticas(self, agrupar: Sequence[str], desde: Optional[date] = None, hasta: Optional[date] = None,
+                     cliente: Optional[str] = None) -> List[FilaEstadistica]:
+        return self._obtener_repo_estadisticas().consultar(agrupar, desde, hasta, cliente)
+    
     def _obtener_o_crear_cliente_vehiculo(self, orden: Orden) -> tuple:
         """Obtiene o crea cliente y vehículo, retorna sus IDs."""
         repo_cliente = self._obtener_repo_cliente()
@@ -57,6 +155,17 @@ class RepositorioOrden(IRepositorioOrden):
         if orden.id is not None and modelo.id != orden.id:
             raise ValueError(f"order_id '{orden.order_id}' ya existe con un id diferente")
     
+    def _validar_version(self, orden: Orden, modelo: OrdenModel) -> None:
+        if orden.version is not None and modelo.version != orden.version:
+            raise self._error_conflicto(orden)
+    
+    def _error_conflicto(self, orden: Orden) -> ErrorDominio:
+        return ErrorDominio(
+            CodigoError.CONCURRENT_MODIFICATION,
+            f"La orden {orden.order_id} fue modificada por otra operación; vuelva a leerla",
+            contexto={"order_id": orden.order_id, "version_leida": orden.version}
+        )
+    
     def _validar_id_nuevo(self, orden: Orden) -> None:
         """Valida que el ID de una orden nueva no exista ya."""
         if orden.id is not None:
@@ -71,6 +180,34 @@ class RepositorioOrden(IRepositorioOrden):
         repo_servicio.guardar_servicios(modelo_id, orden.servicios, modelo.servicios)
         repo_evento.guardar_eventos(modelo_id, orden.eventos, modelo.eventos)
     
+    def _agregar_eventos_nuevos(self, modelo: OrdenModel, orden: Orden, eventos_previos: int, transicion: bool) -> None:
+        """Event sourcing: inserta solo los eventos nuevos (servicios y eventos previos no se reescriben)
+        y, cada ORDER_SNAPSHOT_EVERY eventos, una instantánea del estado."""
+        modelo.event_sourced = True
+        orden.asignar_ids_locales()
+        repo_evento = self._obtener_repo_evento()
+        nuevos = repo_evento.agregar_eventos(modelo.id, orden.eventos[eventos_previos:])
+        
+        repo_instantanea = self._obtener_repo_instantanea()
+        intervalo = intervalo_instantaneas()
+        if not transicion:
+            if len(orden.eventos) < intervalo:
+                return
+            ultima = repo_instantanea.ultima(modelo.id)
+            if len(orden.eventos) - (ultima.numero_eventos if ultima else 0) < intervalo:
+                return
+        self.sesion.flush()
+        id_ultimo_evento = nuevos[-1].id_evento if nuevos else repo_evento.ultimo_id(modelo.id)
+        repo_instantanea.guardar(modelo.id, orden, id_ultimo_evento)
+    
+    def _registrar_outbox(self, orden: Orden, eventos_previos: int) -> None:
+        """Encola en el outbox los eventos nuevos, dentro de la misma transacción."""
+        if not self.usar_outbox:
+            return
+        nuevos = orden.eventos[eventos_previos:]
+        if nuevos:
+            self._obtener_repo_outbox().agregar(orden.order_id, nuevos)
+    
     def guardar(self, orden: Orden) -> None:
         try:
             id_cliente, id_vehiculo = self._obtener_o_crear_cliente_vehiculo(orden)
@@ -79,18 +216,47 @@ class RepositorioOrden(IRepositorioOrden):
             
             if modelo:
                 self._validar_ids_orden(orden, modelo)
+                self._validar_version(orden, modelo)
+                desde_eventos = modelo.event_sourced or self.event_sourcing
+                # Una orden que pasa a event sourcing necesita una instantánea: su historia previa no la reconstruye
+                transicion = desde_eventos and not modelo.event_sourced
+                eventos_previos = self._obtener_repo_evento().contar(modelo.id) if desde_eventos else len(modelo.eventos)
+                estado_anterior = modelo.estado
+                contribucion_anterior = self._contribucion_modelo(modelo)
                 self._actualizar_modelo(modelo, orden, id_cliente, id_vehiculo)
                 orden.id = modelo.id
             else:
                 self._validar_id_nuevo(orden)
+                desde_eventos = self.event_sourcing
+                transicion = False
+                eventos_previos = 0
+                estado_anterior = None
+                contribucion_anterior = None
                 modelo = self._serializar(orden, id_cliente, id_vehiculo)
                 self.sesion.add(modelo)
                 self.sesion.flush()
                 orden.id = modelo.id
             
-            self._guardar_entidades_relacionadas(modelo.id, orden, modelo)
+            if desde_eventos:
+                self._agregar_eventos_nuevos(modelo, orden, eventos_previos, transicion)
+            else:
+                self._guardar_entidades_relacionadas(modelo.id, orden, modelo)
+            self._registrar_outbox(orden, eventos_previos)
+            self._obtener_repo_estadisticas().aplicar(contribucion_anterior, self._contribucion_modelo(modelo))
+            self.sesion.flush()
+            orden.version = modelo.version
+            if len(orden.eventos) > eventos_previos:
+                # Al final: el bloqueo del contador del feed dura solo hasta el commit
+                self._obtener_repo_evento().asignar_posiciones_feed(modelo.id)
             self.sesion.commit()
             self.sesion.expire_all()
+            if len(orden.eventos) > eventos_previos:
+                aviso_eventos.avisar()
+            if orden.estado.value != estado_anterior:
+                difusor_estados.publicar_cambio(orden, estado_anterior)
+        except StaleDataError:
+            self.sesion.rollback()
+            raise self._error_conflicto(orden)
         except Exception:
             self.sesion.rollback()
             raise
@@ -107,8 +273,11 @@ class RepositorioOrden(IRepositorioOrden):
             monto_autorizado=monto_str,
             version_autorizacion=orden.version_autorizacion,
             total_real=str(orden.total_real),
-            fecha_creacion=orden.fecha_creacion,
-            fecha_cancelacion=orden.fecha_cancelacion
+            # En la zona de la app: la columna no guarda la zona y al leerla se asume que ya está en ella
+            fecha_creacion=a_zona_horaria(orden.fecha_creacion) if orden.fecha_creacion else None,
+            fecha_cancelacion=orden.fecha_cancelacion,
+            version=1,
+            event_sourced=False
         )
     
     def _actualizar_modelo(self, modelo: OrdenModel, orden: Orden, id_cliente: int, id_vehiculo: int) -> None:
@@ -119,6 +288,8 @@ class RepositorioOrden(IRepositorioOrden):
         modelo.version_autorizacion = orden.version_autorizacion
         modelo.total_real = str(orden.total_real)
         modelo.fecha_cancelacion = orden.fecha_cancelacion
+        # Siempre hay UPDATE con la versión nueva, aunque solo cambien servicios o eventos
+        modelo.version = modelo.version + 1
     
     def _deserializar(self, modelo: OrdenModel) -> Orden:
         repo_servicio = self._obtener_repo_servicio()
@@ -129,19 +300,18 @@ class RepositorioOrden(IRepositorioOrden):
         cliente_nombre = modelo.cliente.nombre if modelo.cliente else ""
         vehiculo_placa = modelo.vehiculo.placa if modelo.vehiculo else ""
         
-        orden = Orden(
+        return Orden.hidratar(
+            id=modelo.id,
             order_id=modelo.order_id,
             cliente=cliente_nombre,
             vehiculo=vehiculo_placa,
+            estado=EstadoOrden(modelo.estado),
+            servicios=servicios,
+            eventos=eventos,
+            monto_autorizado=a_decimal(modelo.monto_autorizado) if modelo.monto_autorizado else None,
+            version_autorizacion=modelo.version_autorizacion,
+            total_real=a_decimal(modelo.total_real),
             fecha_creacion=modelo.fecha_creacion,
-            id=modelo.id
+            fecha_cancelacion=modelo.fecha_cancelacion,
+            version=modelo.version
         )
-        orden.estado = EstadoOrden(modelo.estado)
-        orden.servicios = servicios
-        orden.eventos = eventos
-        orden.monto_autorizado = a_decimal(modelo.monto_autorizado) if modelo.monto_autorizado else None
-        orden.version_autorizacion = modelo.version_autorizacion
-        orden.total_real = a_decimal(modelo.total_real)
-        orden.fecha_cancelacion = modelo.fecha_cancelacion
-        
-        return orden
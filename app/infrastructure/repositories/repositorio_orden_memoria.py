@@ -0,0 +1,188 @@
+import os
+import copy
+import itertools
+import threading
+from collections import deque
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ...domain.entidades import Orden, Evento
+from ...domain.enums import CodigoError
+from ...domain.exceptions import ErrorDominio
+from ...domain.zona_horaria import a_zona_horaria
+from ...application.ports import RepositorioOrden as IRepositorioOrden, FilaEstadistica
+from ..cache_historico import cache_ordenes_historicas
+from ..feed_eventos import aviso_eventos
+from ..difusor_estados import difusor_estados
+from .repositorio_estadisticas import DIMENSIONES, Contribucion, contribucion, diferencias, fila_estadistica
+
+
+def repositorio_memoria_habilitado() -> bool:
+    return os.getenv("REPOSITORY_BACKEND", "sql").lower() == "memory"
+
+
+def limite_feed_memoria() -> int:
+    return max(1, int(os.getenv("MEMORY_EVENTS_MAX", "100000")))
+
+
+class RepositorioOrdenMemoria(IRepositorioOrden):
+    """Repositorio de órdenes en memoria, seguro entre hilos y sin I/O.
+
+    Guarda y entrega copias profundas para que, como con la BD, los cambios sobre una orden
+    obtenida no se vean hasta llamar a guardar.
+    """
+
+    def __init__(self, limite_feed: Optional[int] = None):
+        self._ordenes: Dict[str, Orden] = {}
+        self._lock = threading.Lock()
+        self._ids_orden = itertools.count(1)
+        self._ids_servicio = itertools.count(1)
+        self._ids_componente = itertools.count(1)
+        # Distingue en el cache de estados históricos las órdenes de cada instancia
+        self._token_cache = object()
+        # Eventos recientes de todas las órdenes en orden de guardado; el cursor del feed es la posición + 1
+        # contando los ya descartados por el límite, para que no cambie al recortar
+        self._feed: "deque[Tuple[str, Evento]]" = deque(maxlen=limite_feed or limite_feed_memoria())
+        self._feed_descartados = 0
+        # Contadores por (día, estado, cliente): [órdenes, monto autorizado, total real] en centavos
+        self._estadisticas: Dict[Tuple[date, str, str], List[int]] = {}
+
+    def obtener(self, order_id: str) -> Optional[Orden]:
+        with self._lock:
+            orden = self._ordenes.get(order_id)
+            return copy.deepcopy(orden) if orden is not None else None
+
+    def _asignar_ids(self, orden: Orden, existente: Optional[Orden]) -> None:
+        if existente is not None:
+            if orden.id is not None and orden.id != existente.id:
+                raise ValueError(f"order_id '{orden.order_id}' ya existe con un id diferente")
+            if orden.version is not None and orden.version != existente.version:
+                raise ErrorDominio(
+                    CodigoError.CONCURRENT_MODIFICATION,
+                    f"La orden {orden.order_id} fue modificada por otra operación; vuelva a leerla",
+                    contexto={"order_id": orden.order_id, "version_leida": orden.version}
+                )
+            orden.id = existente.id
+        elif orden.id is None:
+            orden.id = next(self._ids_orden)
+        for servicio in orden.servicios:
+            if servicio.id_servicio is None:
+                servicio.id_servicio = next(self._ids_servicio)
+            for componente in servicio.componentes:
+                if componente.id_componente is None:
+                    componente.id_componente = next(self._ids_componente)
+
+    def guardar(self, orden: Orden) -> None:
+        with self._lock:
+            existente = self._ordenes.get(orden.order_id)
+            self._asignar_ids(orden, existente)
+            orden.version = (existente.version or 0) + 1 if existente is not None else 1
+            guardada = copy.deepcopy(orden)
+            self._ordenes[orden.order_id] = guardada
+            previos = len(existente.eventos) if existente is not None else 0
+            for evento in guardada.eventos[previos:]:
+                if len(self._feed) == self._feed.maxlen:
+                    self._feed_descartados += 1
+                self._feed.append((orden.order_id, evento))
+            self._actualizar_estadisticas(existente, guardada)
+            if len(orden.eventos) > previos:
+                aviso_eventos.avisar()
+            # Dentro del lock: dos guardados de la misma orden anuncian sus transiciones en el orden en que se aplicaron
+            estado_anterior = existente.estado.value if existente is not None else None
+            if orden.estado.value != estado_anterior:
+                difusor_estados.publicar_cambio(orden, estado_anterior)
+
+    @staticmethod
+    def _contribucion(orden: Optional[Orden]) -> Optional[Contribucion]:
+        if orden is None:
+            return None
+        return contribucion(orden.fecha_creacion, orden.estado.value, orden.cliente, orden.monto_autorizado, orden.total_real)
+
+    def _actualizar_estadisticas(self, anterior: Optional[Orden], nueva: Orden) -> None:
+        for grupo, cantidad, autorizado, real in diferencias(self._contribucion(anterior), self._contribucion(nueva)):
+            acumulado = self._estadisticas.setdefault(grupo, [0, 0, 0])
+            acumulado[0] += cantidad
+            acumulado[1] += autorizado
+            acumulado[2] += real
+
+    def estadisticas(self, agrupar: Sequence[str], desde: Optional[date] = None, hasta: Optional[date] = None,
+                     cliente: Optional[str] = None) -> List[FilaEstadistica]:
+        with self._lock:
+            contadores = [(grupo, list(valores)) for grupo, valores in self._estadisticas.items()]
+        indices = [DIMENSIONES.index(d) for d in agrupar]
+        sumas: Dict[tuple, List[int]] = {}
+        for grupo, valores in contadores:
+            dia, _, nombre = grupo
+            if (desde is not None and dia < desde) or (hasta is not None and dia > hasta) or (cliente is not None and nombre != cliente):
+                continue
+            acumulado = sumas.setdefault(tuple(grupo[i] for i in indices), [0, 0, 0])
+            for i, valor in enumerate(valores):
+                acumulado[i] += valor
+        return [
+            fila_estadistica(agrupar, clave, *valores)
+            for clave, valores in sorted(sumas.items())
+            if valores[0] > 0
+        ]
+
+    def obtener_historica(self, order_id: str, momento: Optional[datetime] = None, secuencia: Optional[int] = None) -> Optional[Orden]:
+        with self._lock:
+            orden = self._ordenes.get(order_id)
+        if orden is None:
+            return None
+        # Las órdenes guardadas no se mutan (guardar las reemplaza), así que se leen fuera del lock
+        if secuencia is not None:
+            cantidad = min(secuencia, len(orden.eventos))
+        else:
+            momento = a_zona_horaria(momento)
+            cantidad = sum(1 for e in orden.eventos if e.timestamp <= momento)
+        if cantidad == 0:
+            return None
+        
+        clave = (self._token_cache, orden.id, cantidad)
+        historica = cache_ordenes_historicas.obtener(clave)
+        if historica is None:
+            ids_servicios = [(s.id_servicio, [c.id_componente for c in s.componentes]) for s in orden.servicios]
+            historica = Orden.desde_eventos(orden.eventos[:cantidad], id=orden.id, ids_servicios=ids_servicios)
+            cache_ordenes_historicas.guardar(clave, historica)
+        return historica
+
+    def listar_eventos(self, order_id: str, despues_de: int = 0, limite: int = 50,
+                       tipos: Optional[List[str]] = None) -> Optional[List[Tuple[int, Evento]]]:
+        with self._lock:
+            orden = self._ordenes.get(order_id)
+        if orden is None:
+            return None
+        pagina = []
+        for secuencia, evento in enumerate(orden.eventos[despues_de:], start=despues_de + 1):
+            if tipos and evento.tipo not in tipos:
+                continue
+            pagina.append((secuencia, evento))
+            if len(pagina) == limite:
+                break
+        return pagina
+
+    def listar_eventos_globales(self, despues_de: int = 0, limite: int = 100,
+                                tipos: Optional[List[str]] = None) -> List[Tuple[int, str, Evento]]:
+        with self._lock:
+            # Un cursor anterior a lo descartado sigue desde el evento más antiguo que se conserva
+            desde = max(despues_de, self._feed_descartados)
+            pendientes = list(itertools.islice(self._feed, desde - self._feed_descartados, None))
+        pagina = []
+        for cursor, (order_id, evento) in enumerate(pendientes, start=desde + 1):
+            if tipos and evento.tipo not in tipos:
+                continue
+            pagina.append((cursor, order_id, evento))
+            if len(pagina) == limite:
+                break
+        return pagina
+
+    def listar(self) -> List[Orden]:
+        with self._lock:
+            return [copy.deepcopy(o) for o in self._ordenes.values()]
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._ordenes.clear()
+            self._feed.clear()
+            self._feed_descartados = 0
+            self._estadisticas.clear()
@@ -0,0 +1,50 @@
+import os
+import json
+from typing import List
+from sqlalchemy.orm import Session
+
+from ...domain.entidades import Evento
+from ...domain.zona_horaria import ahora
+from ..models.outbox_model import OutboxModel
+
+
+def outbox_habilitado() -> bool:
+    return os.getenv("EVENT_OUTBOX", "false").lower() == "true"
+
+
+class RepositorioOutboxSQL:
+    def __init__(self, sesion: Session):
+        self.sesion = sesion
+
+    def agregar(self, order_id: str, eventos: List[Evento]) -> None:
+        """Agrega eventos a la sesión actual sin hacer commit (se confirman con la orden)."""
+        for evt in eventos:
+            self.sesion.add(OutboxModel(
+                order_id=order_id,
+                tipo=evt.tipo,
+                timestamp=evt.timestamp,
+                metadatos_json=json.dumps(evt.metadatos) if evt.metadatos else None
+            ))
+
+    def obtener_pendientes(self, limite: int) -> List[OutboxModel]:
+        consulta = (
+            self.sesion.query(OutboxModel)
+            .filter(OutboxModel.fecha_publicacion.is_(None))
+            .order_by(OutboxModel.id_outbox)
+            .limit(limite)
+        )
+        if self.sesion.get_bind().dialect.name == "postgresql":
+            consulta = consulta.with_for_update(skip_locked=True)
+        return consulta.all()
+
+    def contar_pendientes(self) -> int:
+        return self.sesion.query(OutboxModel).filter(OutboxModel.fecha_publicacion.is_(None)).count()
+
+    def marcar_publicados(self, registros: List[OutboxModel]) -> None:
+        fecha = ahora()
+        for registro in registros:
+            registro.fecha_publicacion = fecha
+
+    def a_evento(self, registro: OutboxModel) -> Evento:
+        meta = json.loads(registro.metadatos_json) if registro.metadatos_json else {}
+        return Evento(tipo=registro.tipo, timestamp=registro.timestamp, metadatos=meta)
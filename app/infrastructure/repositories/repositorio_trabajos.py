@@ -0,0 +1,136 @@
+import os
+import json
+from datetime import timedelta
+from typing import List, Optional
+from uuid import uuid4
+from sqlalchemy import or_, and_, func
+from sqlalchemy.orm import Session
+
+from ...domain.zona_horaria import ahora
+from ..models.trabajo_model import TrabajoModel
+
+
+PENDIENTE = "PENDING"
+EN_CURSO = "RUNNING"
+TERMINADO = "DONE"
+FALLIDO = "FAILED"
+
+
+def max_comandos_por_trabajo() -> int:
+    return int(os.getenv("JOBS_MAX_COMMANDS", "10000"))
+
+
+class RepositorioTrabajosSQL:
+    """Cola de trabajos de comandos sobre una tabla; cada operación confirma su propia transacción."""
+
+    def __init__(self, sesion: Session):
+        self.sesion = sesion
+
+    def encolar(self, comandos: List[dict]) -> TrabajoModel:
+        trabajo = TrabajoModel(
+            id_trabajo=uuid4().hex,
+            estado=PENDIENTE,
+            comandos_json=json.dumps(comandos, default=str),
+            total_comandos=len(comandos),
+            intentos=0
+        )
+        self.sesion.add(trabajo)
+        self.sesion.commit()
+        return trabajo
+
+    def obtener(self, id_trabajo: str) -> Optional[TrabajoModel]:
+        return self.sesion.get(TrabajoModel, id_trabajo, populate_existing=True)
+
+    def _fallar_abandonados(self, momento, max_intentos: int) -> None:
+        """Trabajos cuyo worker dejó vencer el bloqueo tantas veces como se permite: no se reintentan más."""
+        self.sesion.query(TrabajoModel).filter(
+            TrabajoModel.estado == EN_CURSO,
+            TrabajoModel.bloqueado_hasta < momento,
+            TrabajoModel.intentos >= max_intentos
+        ).update({
+            TrabajoModel.estado: FALLIDO,
+            TrabajoModel.error: "El worker no terminó el trabajo antes de que venciera su bloqueo",
+            TrabajoModel.fecha_fin: momento,
+            TrabajoModel.bloqueado_hasta: None
+        }, synchronize_session=False)
+
+    def tomar_siguiente(self, trabajador: str, bloqueo_segundos: float, max_intentos: int) -> Optional[TrabajoModel]:
+        """Toma el trabajo pendiente más antiguo, o uno en curso cuyo bloqueo venció.
+
+        La toma es un UPDATE condicionado al estado leído: si otro worker lo tomó primero no afecta filas
+        y se prueba con el siguiente candidato, sin depender de SELECT ... FOR UPDATE.
+        """
+        momento = ahora()
+        self._fallar_abandonados(momento, max_intentos)
+        self.sesion.commit()
+        disponible = or_(
+            TrabajoModel.estado == PENDIENTE,
+            and_(TrabajoModel.estado == EN_CURSO, TrabajoModel.bloqueado_hasta < momento)
+        )
+        candidatos = (
+            self.sesion.query(TrabajoModel.id_trabajo)
+            .filter(disponible)
+            .order_by(TrabajoModel.fecha_creacion)
+            .limit(5)
+            .all()
+        )
+        for (id_trabajo,) in candidatos:
+            tomados = self.sesion.query(TrabajoModel).filter(TrabajoModel.id_trabajo == id_trabajo, disponible).update({
+                TrabajoModel.estado: EN_CURSO,
+                TrabajoModel.trabajador: trabajador,
+                TrabajoModel.intentos: TrabajoModel.intentos + 1,
+                TrabajoModel.bloqueado_hasta: momento + timedelta(seconds=bloqueo_segundos),
+                TrabajoModel.fecha_inicio: momento
+            }, synchronize_session=False)
+            self.sesion.commit()
+            if tomados == 1:
+                return self.obtener(id_trabajo)
+        return None
+
+    def renovar_bloqueo(self, id_trabajo: str, trabajador: str, bloqueo_segundos: float) -> bool:
+        """Extiende el bloqueo; False si otro worker ya tomó el trabajo."""
+        renovados = self.sesion.query(TrabajoModel).filter(
+            TrabajoModel.id_trabajo == id_trabajo,
+            TrabajoModel.trabajador == trabajador,
+            TrabajoModel.estado == EN_CURSO
+        ).update({TrabajoModel.bloqueado_hasta: ahora() + timedelta(seconds=bloqueo_segundos)}, synchronize_session=False)
+        self.sesion.commit()
+        return renovados == 1
+
+    def _finalizar(self, id_trabajo: str, trabajador: str, valores: dict) -> bool:
+        finalizados = self.sesion.query(TrabajoModel).filter(
+            TrabajoModel.id_trabajo == id_trabajo,
+            TrabajoModel.trabajador == trabajador,
+            TrabajoModel.estado == EN_CURSO
+        ).update({**valores, TrabajoModel.fecha_fin: ahora(), TrabajoModel.bloqueado_hasta: None}, synchronize_session=False)
+        self.sesion.commit()
+        return finalizados == 1
+
+    def completar(self, id_trabajo: str, trabajador: str, resultado: dict) -> bool:
+        return self._finalizar(id_trabajo, trabajador, {
+            TrabajoModel.estado: TERMINADO,
+            TrabajoModel.resultado_json: json.dumps(resultado, default=str),
+            TrabajoModel.error: None
+        })
+
+    def fallar(self, id_trabajo: str, trabajador: str, error: str) -> bool:
+        return self._finalizar(id_trabajo, trabajador, {TrabajoModel.estado: FALLIDO, TrabajoModel.error: error})
+
+    def devolver(self, id_trabajo: str, trabajador: str, error: str) -> bool:
+        """Vuelve a dejar pendiente un trabajo que falló y aún tiene intentos."""
+        devueltos = self.sesion.query(TrabajoModel).filter(
+            TrabajoModel.id_trabajo == id_trabajo,
+            TrabajoModel.trabajador == trabajador,
+            TrabajoModel.estado == EN_CURSO
+        ).update({
+            TrabajoModel.estado: PENDIENTE,
+            TrabajoModel.error: error,
+            TrabajoModel.trabajador: None,
+            TrabajoModel.bloqueado_hasta: None
+        }, synchronize_session=False)
+        self.sesion.commit()
+        return devueltos == 1
+
+    def contar_por_estado(self) -> dict:
+        filas = self.sesion.query(TrabajoModel.estado, func.count()).group_by(TrabajoModel.estado).all()
+        return {estado: cantidad for estado, cantidad in filas}
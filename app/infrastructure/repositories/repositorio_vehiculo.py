@@ -72,8 +72,11 @@ class RepositorioVehiculoSQL:
         except IntegrityError as e:
             self.sesion.rollback()
             if "placa" in str(e.orig).lower() or "unique" in str(e.orig).lower():
+                # Otra transacción creó la misma placa entre la búsqueda y el insert
                 vehiculo_existente = self.buscar_por_placa(placa)
-                if vehiculo_existente and vehiculo_existente.id_cliente != id_cliente:
+                if vehiculo_existente and vehiculo_existente.id_cliente == id_cliente:
+                    return vehiculo_existente
+                if vehiculo_existente:
                     modelo_existente = self.sesion.query(VehiculoModel).filter(VehiculoModel.placa == placa).first()
                     nombre_cliente_actual = modelo_existente.cliente.nombre if modelo_existente and modelo_existente.cliente else "desconocido"
                     raise ErrorDominio(
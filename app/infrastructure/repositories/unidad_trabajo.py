@@ -10,6 +10,10 @@ from .repositorio_cliente import RepositorioClienteSQL
 from .repositorio_vehiculo import RepositorioVehiculoSQL
 from .repositorio_servicio import RepositorioServicioSQL
 from .repositorio_evento import RepositorioEventoSQL
+from .repositorio_outbox import RepositorioOutboxSQL
+from .repositorio_idempotencia import RepositorioIdempotenciaSQL
+from .repositorio_instantanea import RepositorioInstantaneaSQL
+from .repositorio_estadisticas import RepositorioEstadisticasSQL
 
 
 class UnidadTrabajoSQL(UnidadTrabajo):
@@ -20,6 +24,10 @@ class UnidadTrabajoSQL(UnidadTrabajo):
         self._repo_vehiculo: Optional[RepositorioVehiculoSQL] = None
         self._repo_servicio: Optional[RepositorioServicioSQL] = None
         self._repo_evento: Optional[RepositorioEventoSQL] = None
+        self._repo_outbox: Optional[RepositorioOutboxSQL] = None
+        self._repo_idempotencia: Optional[RepositorioIdempotenciaSQL] = None
+        self._repo_instantanea: Optional[RepositorioInstantaneaSQL] = None
+        self._repo_estadisticas: Optional[RepositorioEstadisticasSQL] = None
     
     def obtener_repositorio_orden(self) -> "RepositorioOrden":
         if self._repo_orden is None:
@@ -46,4 +54,23 @@ class UnidadTrabajoSQL(UnidadTrabajo):
         if self._repo_evento is None:
             self._repo_evento = RepositorioEventoSQL(self.sesion)
         return self._repo_evento
-
+    
+    def obtener_repositorio_outbox(self) -> RepositorioOutboxSQL:
+        if self._repo_outbox is None:
+            self._repo_outbox = RepositorioOutboxSQL(self.sesion)
+        return self._repo_outbox
+    
+    def obtener_repositorio_idempotencia(self) -> RepositorioIdempotenciaSQL:
+        if self._repo_idempotencia is None:
+            self._repo_idempotencia = RepositorioIdempotenciaSQL(self.sesion)
+        return self._repo_idempotencia
+    
+    def obtener_repositorio_instantanea(self) -> RepositorioInstantaneaSQL:
+        if self._repo_instantanea is None:
+            self._repo_instantanea = RepositorioInstantaneaSQL(self.sesion)
+        return self._repo_instantanea
+    
+    def obtener_repositorio_estadisticas(self) -> RepositorioEstadisticasSQL:
+        if self._repo_estadisticas is None:
+            self._repo_estadisticas = RepositorioEstadisticasSQL(self.sesion)
+        return self._repo_estadisticas
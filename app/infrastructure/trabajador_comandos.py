@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import socket
+import threading
+from typing import Callable, List, Optional
+from uuid import uuid4
+from sqlalchemy.orm import Session
+
+from ..application.action_service import ActionService, ResultadoComando
+from ..application.idempotencia import plazo_reserva_idempotencia
+from ..application.lotes_comandos import procesar_lote, resumir_lote
+from ..application.ports import AlmacenEventos
+from ..domain.enums import CodigoError
+from .repositories.repositorio_trabajos import RepositorioTrabajosSQL
+from .repositories.unidad_trabajo import UnidadTrabajoSQL
+from .metricas import trabajos_procesados
+from .logging_config import obtener_logger
+
+
+logger = obtener_logger("app.infrastructure.trabajador_comandos")
+
+
+def claves_por_comando(id_trabajo: str, comandos: List[dict]) -> List[dict]:
+    """Asigna a cada comando sin clave una derivada del trabajo: si el trabajo se reintenta tras una caída,
+    los comandos que ya se ejecutaron devuelven su resultado guardado en lugar de repetirse."""
+    return [
+        comando if comando.get("idempotency_key") else {**comando, "idempotency_key": f"trabajo:{id_trabajo}:{i}"}
+        for i, comando in enumerate(comandos)
+    ]
+
+
+class ClaveEnCurso(Exception):
+    """La clave de un comando del trabajo sigue reservada por otra ejecución: el trabajo se reintenta más tarde."""
+
+
+class ServicioTrabajo:
+    """ActionService para los comandos de un trabajo: una clave en curso no es un resultado final.
+
+    Suele ser la reserva que dejó un worker caído a mitad del comando; se espera a que venza su plazo y se
+    reintenta, en lugar de dar el trabajo por terminado con el comando sin ejecutar.
+    """
+
+    def __init__(self, servicio: ActionService, intervalo_segundos: float, detener: threading.Event):
+        self.servicio = servicio
+        self.intervalo_segundos = intervalo_segundos
+        self.detener = detener
+
+    def procesar_comando(self, comando: dict) -> ResultadoComando:
+        limite = time.monotonic() + plazo_reserva_idempotencia() + self.intervalo_segundos
+        while True:
+            resultado = self.servicio.procesar_comando(comando)
+            error = resultado[2]
+            if error is None or error.code != CodigoError.IDEMPOTENCY_IN_PROGRESS.value:
+                return resultado
+            if time.monotonic() >= limite or self.detener.wait(self.intervalo_segundos):
+                raise ClaveEnCurso(f"La clave {comando.get('idempotency_key')} sigue reservada por otra ejecución")
+
+
+class TrabajadorComandos:
+    """
+    Drena la cola de trabajos de POST /commands/async ejecutando cada lote con ActionService.
+
+    Varios workers (hilos o procesos) pueden drenar la misma cola: cada trabajo lo toma uno solo y,
+    si ese worker muere, otro lo retoma cuando vence el bloqueo.
+    """
+
+    def __init__(
+        self,
+        fabrica_sesion: Callable[[], Session],
+        almacen: AlmacenEventos,
+        nombre: Optional[str] = None,
+        intervalo_segundos: Optional[float] = None,
+        bloqueo_segundos: Optional[float] = None,
+        max_intentos: Optional[int] = None,
+        tamano_tramo: Optional[int] = None
+    ):
+        self.fabrica_sesion = fabrica_sesion
+        self.almacen = almacen
+        self.nombre = nombre or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self.intervalo_segundos = intervalo_segundos if intervalo_segundos is not None else float(os.getenv("JOBS_POLL_INTERVAL", "1.0"))
+        self.bloqueo_segundos = bloqueo_segundos if bloqueo_segundos is not None else float(os.getenv("JOBS_LEASE_SECONDS", "300"))
+        self.max_intentos = max_intentos if max_intentos is not None else int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+        # Cada cuántos comandos se renueva el bloqueo del trabajo
+        self.tamano_tramo = tamano_tramo or 100
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def procesar_siguiente(self) -> bool:
+        """Toma y ejecuta un trabajo; retorna False si no había ninguno que tomar."""
+        try:
+            sesion = self.fabrica_sesion()
+        except Exception as e:
+            logger.error(f"No se pudo abrir sesión para la cola de trabajos: {str(e)}", exc_info=True)
+            return False
+        id_trabajo = None
+        intentos = 0
+        try:
+            trabajos = RepositorioTrabajosSQL(sesion)
+            trabajo = trabajos.tomar_siguiente(self.nombre, self.bloqueo_segundos, self.max_intentos)
+            if trabajo is None:
+                return False
+            id_trabajo, intentos = trabajo.id_trabajo, trabajo.intentos
+            comandos = claves_por_comando(id_trabajo, json.loads(trabajo.comandos_json))
+
+            unidad = UnidadTrabajoSQL(sesion)
+            servicio = ServicioTrabajo(
+                ActionService(unidad.obtener_repositorio_orden(), self.almacen, idempotencia=unidad.obtener_repositorio_idempotencia()),
+                self.intervalo_segundos, self._detener
+            )
+            resultados = []
+            for inicio in range(0, len(comandos), self.tamano_tramo):
+                resultados.extend(procesar_lote(comandos[inicio:inicio + self.tamano_tramo], servicio))
+                en_curso = next((r for r in resultados if isinstance(r, ClaveEnCurso)), None)
+                if en_curso is not None:
+                    # Los comandos ya ejecutados quedan guardados por su clave y no se repiten al reintentar
+                    raise en_curso
+                if not trabajos.renovar_bloqueo(id_trabajo, self.nombre, self.bloqueo_segundos):
+                    logger.warning(f"Trabajo {id_trabajo} retomado por otro worker; se abandona")
+                    return True
+
+            if trabajos.completar(id_trabajo, self.nombre, resumir_lote(comandos, resultados)):
+                trabajos_procesados.inc("DONE")
+                logger.info(f"Trabajo {id_trabajo} terminado ({len(comandos)} comandos)")
+            return True
+        except Exception as e:
+            sesion.rollback()
+            logger.error(f"Error ejecutando trabajo: {str(e)}", exc_info=True)
+            if id_trabajo is not None:
+                try:
+                    trabajos = RepositorioTrabajosSQL(sesion)
+                    if intentos < self.max_intentos:
+                        trabajos.devolver(id_trabajo, self.nombre, str(e))
+                    elif trabajos.fallar(id_trabajo, self.nombre, str(e)):
+                        trabajos_procesados.inc("FAILED")
+                except Exception:
+                    logger.error("No se pudo marcar el trabajo como fallido", exc_info=True)
+            # Si falló antes de tomar un trabajo (p. ej. BD caída) se espera el intervalo antes de reintentar
+            return id_trabajo is not None
+        finally:
+            sesion.close()
+
+    def _ejecutar(self) -> None:
+        while not self._detener.is_set():
+            if not self.procesar_siguiente():
+                self._detener.wait(self.intervalo_segundos)
+
+    def ejecutar_en_primer_plano(self) -> None:
+        logger.info(f"Worker de trabajos {self.nombre} iniciado")
+        self._ejecutar()
+
+    def iniciar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name=f"trabajos-{self.nombre}", daemon=True)
+        self._hilo.start()
+        logger.info(f"Worker de trabajos {self.nombre} iniciado (intervalo={self.intervalo_segundos}s)")
+
+    def detener(self, timeout: float = 5.0) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
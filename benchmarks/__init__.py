@@ -0,0 +1 @@
+"""Benchmarks del pipeline de comandos, la API HTTP y el dominio."""
@@ -0,0 +1,193 @@
+"""Microbenchmarks de los caminos calientes del dominio.
+
+Mide ops/s y memoria asignada por llamada (tracemalloc) sobre órdenes de 1, 10 y 200 servicios.
+
+Uso:
+    python -m benchmarks.bench_dominio --tamanos 1 10 200 --salida benchmarks/resultados/dominio.json
+"""
+
+import gc
+import time
+import argparse
+import tracemalloc
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from app.domain.entidades import Orden, Servicio, Componente
+from app.domain.enums import EstadoOrden
+from app.domain.dinero import redondear_mitad_par, a_decimal
+from app.domain.zona_horaria import ahora
+from app.application.mappers import orden_a_dto
+
+from .comun import metadatos_ejecucion, guardar_resultado
+
+
+COMPONENTES_POR_SERVICIO = 2
+
+
+def construir_orden(servicios: int) -> Orden:
+    """Orden en IN_PROGRESS con costos reales cargados, como queda justo antes de TRY_COMPLETE."""
+    orden = Orden(f"MICRO-{servicios}", "Cliente", "ABC-123", ahora(), id=1)
+    id_componente = 1
+    for i in range(1, servicios + 1):
+        componentes = []
+        for j in range(COMPONENTES_POR_SERVICIO):
+            componente = Componente(f"Repuesto {i}-{j}", Decimal("45.50") + j)
+            componente.id_componente = id_componente
+            id_componente += 1
+            componentes.append(componente)
+        servicio = Servicio(f"Servicio {i}", Decimal("120.25") + i, componentes)
+        servicio.id_servicio = i
+        orden.agregar_servicio(servicio)
+    orden.establecer_estado_diagnosticado()
+    subtotal = sum(s.calcular_subtotal_estimado() for s in orden.servicios)
+    orden.autorizar(redondear_mitad_par(subtotal * Decimal("1.16"), 2))
+    orden.establecer_estado_en_proceso()
+    for servicio in orden.servicios:
+        orden.establecer_costo_real(servicio.id_servicio, servicio.calcular_subtotal_estimado())
+        servicio.completado = True
+    return orden
+
+
+def casos(orden: Orden) -> Dict[str, Callable[[], object]]:
+    """Funciones a medir; las que mutan la orden la devuelven a su estado para que cada llamada sea comparable."""
+    eventos_base = len(orden.eventos)
+    ultimo = orden.servicios[-1]
+    costo = ultimo.calcular_subtotal_estimado()
+    componentes_reales = {c.id_componente: c.costo_estimado for c in ultimo.componentes}
+
+    def establecer_costo_real():
+        # El último servicio es el peor caso de la búsqueda por id
+        orden.establecer_costo_real(ultimo.id_servicio, costo, componentes_reales)
+        del orden.eventos[eventos_base:]
+
+    def intentar_completar():
+        orden.intentar_completar()
+        orden.estado = EstadoOrden.IN_PROGRESS
+        del orden.eventos[eventos_base:]
+
+    return {
+        "Orden.establecer_costo_real": establecer_costo_real,
+        "Orden._recalcular_total_real": orden._recalcular_total_real,
+        "Orden.intentar_completar": intentar_completar,
+        "Servicio.calcular_costo_real": ultimo.calcular_costo_real,
+        "orden_a_dto": lambda: orden_a_dto(orden),
+    }
+
+
+def casos_sin_orden() -> Dict[str, Callable[[], object]]:
+    valor = Decimal("1234.56789")
+    momento = ahora()
+    return {
+        "redondear_mitad_par": lambda: redondear_mitad_par(valor, 2),
+        "a_decimal[str]": lambda: a_decimal("1234.50"),
+        "a_decimal[float]": lambda: a_decimal(1234.5),
+        "ahora": ahora,
+        "Orden.__init__": lambda: Orden("ORD-2024-000123", "Cliente", "ABC-123", momento, id=1),
+        "Orden.hidratar": lambda: Orden.hidratar(
+            id=1, order_id="ORD-2024-000123", cliente="Cliente", vehiculo="ABC-123", estado=EstadoOrden.DELIVERED,
+            servicios=[], eventos=[], monto_autorizado=valor, version_autorizacion=1, total_real=valor,
+            fecha_creacion=momento
+        )
+    }
+
+
+def _medir_tiempo(funcion: Callable, tiempo_minimo: float, repeticiones: int) -> Dict[str, float]:
+    # Calibra iteraciones para que cada repetición dure al menos tiempo_minimo
+    iteraciones = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            funcion()
+        if time.perf_counter() - inicio >= tiempo_minimo / 4:
+            break
+        iteraciones *= 2
+    iteraciones = max(1, int(iteraciones * 4))
+
+    tiempos = []
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            for _ in range(iteraciones):
+                funcion()
+            tiempos.append((time.perf_counter() - inicio) / iteraciones)
+    finally:
+        if gc_activo:
+            gc.enable()
+    mejor = min(tiempos)
+    tiempos.sort()
+    mediana = tiempos[len(tiempos) // 2]
+    return {
+        "iteraciones": iteraciones,
+        "ops_s": round(1 / mejor, 1),
+        "ns_op": round(mejor * 1e9, 1),
+        "ns_op_mediana": round(mediana * 1e9, 1)
+    }
+
+
+def _medir_memoria(funcion: Callable, llamadas: int = 20) -> Dict[str, float]:
+    """Bytes asignados por llamada (pico) y retenidos tras ella, según tracemalloc."""
+    funcion()
+    tracemalloc.start()
+    try:
+        picos = []
+        base_retenida, _ = tracemalloc.get_traced_memory()
+        for _ in range(llamadas):
+            actual, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            funcion()
+            _, pico = tracemalloc.get_traced_memory()
+            picos.append(pico - actual)
+        retenida, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "pico_bytes": int(sorted(picos)[len(picos) // 2]),
+        "retenidos_bytes_por_llamada": round(max(0, retenida - base_retenida) / llamadas, 1)
+    }
+
+
+def ejecutar_benchmark(tamanos: List[int], tiempo_minimo: float = 0.2, repeticiones: int = 5) -> Dict:
+    resultados = {}
+    for nombre, funcion in casos_sin_orden().items():
+        resultados[nombre] = {**_medir_tiempo(funcion, tiempo_minimo, repeticiones), **_medir_memoria(funcion)}
+    for servicios in tamanos:
+        for nombre, funcion in casos(construir_orden(servicios)).items():
+            resultados[f"{nombre}[{servicios}]"] = {
+                **_medir_tiempo(funcion, tiempo_minimo, repeticiones),
+                **_medir_memoria(funcion)
+            }
+    return {
+        "benchmark": "dominio",
+        "metadatos": metadatos_ejecucion(),
+        "configuracion": {
+            "tamanos": tamanos,
+            "componentes_por_servicio": COMPONENTES_POR_SERVICIO,
+            "tiempo_minimo_s": tiempo_minimo,
+            "repeticiones": repeticiones
+        },
+        "resultados": resultados
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks del dominio")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1, 10, 200], help="Servicios por orden")
+    parser.add_argument("--tiempo-minimo", type=float, default=0.2, help="Segundos mínimos por repetición")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar_benchmark(args.tamanos, args.tiempo_minimo, args.repeticiones)
+    for nombre, datos in resultado["resultados"].items():
+        print(f"{nombre:40} {datos['ops_s']:>12} ops/s {datos['ns_op']:>12} ns/op {datos['pico_bytes']:>10} B pico")
+    if args.salida:
+        guardar_resultado(resultado, args.salida)
+        print(f"Resultados en {args.salida}")
+    return resultado
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Memoria por orden para cachés que mantienen decenas de miles de agregados.
+
+Construye N órdenes completas (servicios, componentes y los eventos de su flujo) y mide con
+tracemalloc los bytes retenidos por orden, además de lo que ocupa una instancia de cada entidad.
+
+Uso:
+    python -m benchmarks.bench_memoria --ordenes 20000 --servicios 3 --salida benchmarks/resultados/memoria.json
+"""
+
+import gc
+import sys
+import argparse
+import tracemalloc
+from decimal import Decimal
+from typing import Dict, List
+
+from app.domain.entidades import Orden, Servicio, Componente, Evento, Cliente, Vehiculo
+from app.domain.dinero import redondear_mitad_par
+from app.domain.zona_horaria import ahora
+
+from .comun import metadatos_ejecucion, guardar_resultado
+
+
+COMPONENTES_POR_SERVICIO = 2
+
+
+def construir_orden(indice: int, servicios: int) -> Orden:
+    """Orden entregada, con ids asignados y los eventos que deja el flujo completo."""
+    orden = Orden(f"MEM-{indice}", f"Cliente {indice}", f"PLACA-{indice}", ahora(), id=indice)
+    for i in range(servicios):
+        componentes = []
+        for j in range(COMPONENTES_POR_SERVICIO):
+            componente = Componente(f"Repuesto {j}", Decimal("45.50"))
+            componente.id_componente = indice * 1000 + i * 10 + j
+            componentes.append(componente)
+        servicio = Servicio(f"Servicio {i}", Decimal("120.25"), componentes)
+        servicio.id_servicio = indice * 100 + i
+        orden.agregar_servicio(servicio)
+    orden.establecer_estado_diagnosticado()
+    subtotal = sum(s.calcular_subtotal_estimado() for s in orden.servicios)
+    orden.autorizar(redondear_mitad_par(subtotal * Decimal("1.16"), 2))
+    orden.establecer_estado_en_proceso()
+    for servicio in orden.servicios:
+        orden.establecer_costo_real(servicio.id_servicio, servicio.calcular_subtotal_estimado())
+        servicio.completado = True
+    orden.intentar_completar()
+    orden.entregar()
+    return orden
+
+
+def _tamano_instancia(objeto) -> int:
+    tamano = sys.getsizeof(objeto)
+    if hasattr(objeto, "__dict__"):
+        tamano += sys.getsizeof(objeto.__dict__)
+    return tamano
+
+
+def tamanos_por_entidad() -> Dict[str, int]:
+    """Bytes de una instancia sin contar los objetos a los que apunta."""
+    momento = ahora()
+    return {
+        "Orden": _tamano_instancia(Orden("ORD-1", "Cliente", "ABC-123", momento)),
+        "Servicio": _tamano_instancia(Servicio("Servicio", Decimal("1"))),
+        "Componente": _tamano_instancia(Componente("Repuesto", Decimal("1"))),
+        "Evento": _tamano_instancia(Evento("CREATED", momento)),
+        "Cliente": _tamano_instancia(Cliente("Cliente")),
+        "Vehiculo": _tamano_instancia(Vehiculo("ABC-123", 1))
+    }
+
+
+def medir_ordenes(ordenes: int, servicios: int) -> Dict:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        antes, _ = tracemalloc.get_traced_memory()
+        cache: List[Orden] = [construir_orden(i, servicios) for i in range(1, ordenes + 1)]
+        gc.collect()
+        despues, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    eventos = sum(len(o.eventos) for o in cache)
+    retenidos = despues - antes
+    return {
+        "ordenes": len(cache),
+        "eventos_por_orden": round(eventos / len(cache), 1) if cache else 0,
+        "bytes_retenidos": retenidos,
+        "bytes_por_orden": round(retenidos / len(cache), 1) if cache else 0.0,
+        "pico_bytes": pico - antes
+    }
+
+
+def ejecutar_benchmark(ordenes: int, servicios: List[int]) -> Dict:
+    resultados = {"entidades": {"tamano_instancia_bytes": tamanos_por_entidad()}}
+    for cantidad in servicios:
+        resultados[f"ordenes[{cantidad} servicios]"] = medir_ordenes(ordenes, cantidad)
+    return {
+        "benchmark": "memoria",
+        "metadatos": metadatos_ejecucion(),
+        "configuracion": {
+            "ordenes": ordenes,
+            "servicios_por_orden": servicios,
+            "componentes_por_servicio": COMPONENTES_POR_SERVICIO
+        },
+        "resultados": resultados
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memoria por orden en caché")
+    parser.add_argument("--ordenes", type=int, default=20000)
+    parser.add_argument("--servicios", type=int, nargs="+", default=[3], help="Servicios por orden")
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar_benchmark(args.ordenes, args.servicios)
+    for entidad, tamano in resultado["resultados"]["entidades"]["tamano_instancia_bytes"].items():
+        print(f"{entidad:12} {tamano:>6} B/instancia")
+    for nombre, datos in resultado["resultados"].items():
+        if "bytes_por_orden" in datos:
+            print(f"{nombre}: {datos['ordenes']} órdenes, {datos['bytes_por_orden']} B/orden ({datos['bytes_retenidos'] / 1e6:.1f} MB)")
+    if args.salida:
+        guardar_resultado(resultado, args.salida)
+        print(f"Resultados en {args.salida}")
+    return resultado
+
+
+if __name__ == "__main__":
+    main()
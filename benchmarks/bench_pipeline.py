@@ -0,0 +1,163 @@
+"""Benchmark de ActionService.procesar_comando contra SQLite y PostgreSQL.
+
+Uso:
+    python -m benchmarks.bench_pipeline --db memory --db sqlite --db postgres --ordenes 200 --servicios 3 \
+        --tasa-reauth 0.1 --salida benchmarks/resultados/pipeline.json
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from app.application.action_service import ActionService
+from app.infrastructure.models import Base
+from app.infrastructure.db import obtener_url_bd, construir_engine
+from app.infrastructure.repositories import UnidadTrabajoSQL, RepositorioOrdenMemoria
+from app.infrastructure.relay_outbox import AlmacenEventosDiferido
+from app.infrastructure.consultas_sql import instrumentar_engine, iniciar_medicion, finalizar_medicion
+
+from .cargas import generar_carga
+from .comun import resumen_latencias, metadatos_ejecucion, guardar_resultado
+
+
+def _crear_engine(backend: str, url: Optional[str], directorio_temporal: str):
+    if backend == "sqlite":
+        # Misma configuración que la API con DATABASE_URL=sqlite:///... (WAL, synchronous=NORMAL, mmap)
+        url = url or f"sqlite:///{os.path.join(directorio_temporal, 'bench.db')}"
+    else:
+        url = url or obtener_url_bd()
+    engine = construir_engine(url)
+    instrumentar_engine(engine)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def ejecutar_pipeline(engine, comandos: List[dict]) -> Dict:
+    """Procesa cada comando en su propia sesión, como lo hace un request de la API.
+
+    Con engine=None usa el repositorio en memoria, para medir la capa de aplicación sin I/O.
+    """
+    fabrica_sesion = sessionmaker(bind=engine) if engine is not None else None
+    repo_memoria = RepositorioOrdenMemoria() if engine is None else None
+    latencias = []
+    latencias_por_op = defaultdict(list)
+    errores = Counter()
+    consultas_totales = 0
+
+    inicio_total = time.perf_counter()
+    for comando in comandos:
+        sesion = fabrica_sesion() if fabrica_sesion is not None else None
+        token = iniciar_medicion()
+        try:
+            repo = UnidadTrabajoSQL(sesion).obtener_repositorio_orden() if sesion is not None else repo_memoria
+            servicio = ActionService(repo, AlmacenEventosDiferido())
+            inicio = time.perf_counter()
+            _, _, error = servicio.procesar_comando(comando)
+            duracion = time.perf_counter() - inicio
+            if sesion is not None:
+                sesion.commit()
+        finally:
+            consultas_totales += finalizar_medicion(token).consultas
+            if sesion is not None:
+                sesion.close()
+        latencias.append(duracion)
+        latencias_por_op[comando["op"]].append(duracion)
+        if error is not None:
+            errores[error.code] += 1
+    duracion_total = time.perf_counter() - inicio_total
+
+    return {
+        "comandos": len(comandos),
+        "duracion_s": round(duracion_total, 3),
+        "throughput_cmd_s": round(len(comandos) / duracion_total, 2) if duracion_total else 0.0,
+        "latencia": resumen_latencias(latencias),
+        "por_operacion": {op: resumen_latencias(valores) for op, valores in sorted(latencias_por_op.items())},
+        "errores": dict(errores),
+        "consultas_sql_por_comando": round(consultas_totales / len(comandos), 2) if comandos else 0.0
+    }
+
+
+def ejecutar_benchmark(backends: List[str], ordenes: int, servicios: int, tasa_reauth: float, semilla: int,
+                       intercalar: bool = True, url_sqlite: Optional[str] = None, url_postgres: Optional[str] = None) -> Dict:
+    comandos = generar_carga(ordenes, servicios, tasa_reauth, semilla, intercalar)
+    resultado = {
+        "benchmark": "pipeline_comandos",
+        "metadatos": metadatos_ejecucion(),
+        "configuracion": {
+            "ordenes": ordenes,
+            "servicios_por_orden": servicios,
+            "tasa_reautorizacion": tasa_reauth,
+            "semilla": semilla,
+            "intercalar": intercalar
+        },
+        "resultados": {}
+    }
+    urls = {"sqlite": url_sqlite, "postgres": url_postgres}
+    with tempfile.TemporaryDirectory() as directorio:
+        for backend in backends:
+            if backend == "memory":
+                resultado["resultados"][backend] = ejecutar_pipeline(None, comandos)
+                continue
+            try:
+                engine = _crear_engine(backend, urls.get(backend), directorio)
+            except Exception as e:
+                resultado["resultados"][backend] = {"error": f"{type(e).__name__}: {e}"}
+                continue
+            try:
+                resultado["resultados"][backend] = ejecutar_pipeline(engine, comandos)
+            finally:
+                engine.dispose()
+    return resultado
+
+
+def _imprimir(resultado: Dict) -> None:
+    for backend, datos in resultado["resultados"].items():
+        if "error" in datos:
+            print(f"{backend}: no disponible ({datos['error']})")
+            continue
+        lat = datos["latencia"]
+        print(
+            f"{backend}: {datos['comandos']} comandos en {datos['duracion_s']}s "
+            f"({datos['throughput_cmd_s']} cmd/s) p50={lat['p50_ms']}ms p95={lat['p95_ms']}ms p99={lat['p99_ms']}ms "
+            f"sql/cmd={datos['consultas_sql_por_comando']} errores={datos['errores']}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de comandos")
+    parser.add_argument("--db", action="append", choices=["memory", "sqlite", "postgres"], help="Backend(s) a medir (default: sqlite)")
+    parser.add_argument("--ordenes", type=int, default=200)
+    parser.add_argument("--servicios", type=int, default=3, help="Servicios por orden")
+    parser.add_argument("--tasa-reauth", type=float, default=0.1, help="Fracción de órdenes que exceden el 110%% y requieren REAUTHORIZE")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--secuencial", action="store_true", help="No intercalar los comandos de distintas órdenes")
+    parser.add_argument("--url-sqlite", default=None)
+    parser.add_argument("--url-postgres", default=None, help="Por defecto usa las variables POSTGRES_* / DB_*")
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    # Los errores esperados (REQUIRES_REAUTH) se loguean con traceback y distorsionan la medición
+    logging.disable(logging.CRITICAL)
+    try:
+        resultado = ejecutar_benchmark(
+            args.db or ["sqlite"], args.ordenes, args.servicios, args.tasa_reauth, args.semilla,
+            not args.secuencial, args.url_sqlite, args.url_postgres
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+    _imprimir(resultado)
+    if args.salida:
+        guardar_resultado(resultado, args.salida)
+        print(f"Resultados en {args.salida}")
+    return resultado
+
+
+if __name__ == "__main__":
+    main()
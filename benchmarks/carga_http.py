@@ -0,0 +1,294 @@
+"""Generador de carga HTTP contra POST /commands y los endpoints REST de órdenes.
+
+Levanta la API con uvicorn en local (o usa --url de una ya levantada) y envía requests a una
+tasa objetivo con concurrencia limitada, reportando percentiles de latencia y códigos de error.
+
+Uso:
+    python -m benchmarks.carga_http --duracion 30 --tasa 50 --concurrencia 16 --tamano-lote 5 \
+        --ordenes-activas 20 --fraccion-rest 0.3 --workers 2 --salida benchmarks/resultados/http.json
+"""
+
+import os
+import sys
+import time
+import uuid
+import socket
+import random
+import asyncio
+import argparse
+import subprocess
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .cargas import generar_flujo_orden
+from .comun import resumen_latencias, metadatos_ejecucion, guardar_resultado
+
+
+ESTADOS_REST = {"SET_STATE_DIAGNOSED": "DIAGNOSED", "SET_STATE_IN_PROGRESS": "IN_PROGRESS"}
+
+
+def a_peticion_rest(comando: dict) -> Tuple[str, str, Optional[dict]]:
+    """Traduce un comando de /commands a su endpoint REST equivalente: (método, ruta, cuerpo)."""
+    op = comando["op"]
+    data = comando["data"]
+    order_id = data.get("order_id")
+    base = f"/orders/{order_id}"
+    match op:
+        case "CREATE_ORDER":
+            return "POST", "/orders", {"order_id": order_id, "customer": data["customer"], "vehicle": data["vehicle"], "ts": comando.get("ts")}
+        case "ADD_SERVICE":
+            return "POST", f"{base}/services", {"service": data["service"]}
+        case "SET_STATE_DIAGNOSED" | "SET_STATE_IN_PROGRESS":
+            return "POST", f"{base}/set_state", {"state": ESTADOS_REST[op]}
+        case "AUTHORIZE":
+            return "POST", f"{base}/authorize", {"ts": comando.get("ts")}
+        case "SET_REAL_COST":
+            cuerpo = {k: data[k] for k in ("service_id", "service_index", "real_cost", "completed") if k in data}
+            return "POST", f"{base}/set_real_cost", cuerpo
+        case "REAUTHORIZE":
+            return "POST", f"{base}/reauthorize", {"new_authorized_amount": data["new_authorized_amount"], "ts": comando.get("ts")}
+        case "TRY_COMPLETE":
+            return "POST", f"{base}/try_complete", None
+        case "DELIVER":
+            return "POST", f"{base}/deliver", None
+        case "CANCEL":
+            return "POST", f"{base}/cancel", {"reason": data.get("reason", "")}
+    raise ValueError(f"Operación sin endpoint REST: {op}")
+
+
+class ConjuntoOrdenes:
+    """Órdenes en curso de las que se toman comandos; menos órdenes activas implica más contención por order_id."""
+
+    def __init__(self, ordenes_activas: int, servicios: int, tasa_reauth: float, aleatorio: random.Random):
+        self.servicios = servicios
+        self.tasa_reauth = tasa_reauth
+        self.aleatorio = aleatorio
+        self.prefijo = f"LOAD-{uuid.uuid4().hex[:6].upper()}"
+        self._siguiente = 0
+        self._activas = [self._nueva_orden() for _ in range(max(1, ordenes_activas))]
+        self.ordenes_terminadas = 0
+
+    def _nueva_orden(self) -> list:
+        order_id = f"{self.prefijo}-{self._siguiente:06d}"
+        self._siguiente += 1
+        flujo = generar_flujo_orden(order_id, self.servicios, self.aleatorio.random() < self.tasa_reauth, self.aleatorio)
+        return [flujo, 0]
+
+    def tomar(self, cantidad: int) -> List[dict]:
+        """Siguientes comandos de una orden al azar; la orden se reemplaza cuando termina su flujo."""
+        indice = self.aleatorio.randrange(len(self._activas))
+        flujo, cursor = self._activas[indice]
+        comandos = flujo[cursor:cursor + cantidad]
+        cursor += len(comandos)
+        if cursor >= len(flujo):
+            self._activas[indice] = self._nueva_orden()
+            self.ordenes_terminadas += 1
+        else:
+            self._activas[indice][1] = cursor
+        return comandos
+
+    def order_id_al_azar(self) -> str:
+        flujo, _ = self.aleatorio.choice(self._activas)
+        return flujo[0]["data"]["order_id"]
+
+
+class Resultados:
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.estados_http: Dict[str, Counter] = defaultdict(Counter)
+        self.errores_comandos: Counter = Counter()
+        self.excepciones: Counter = Counter()
+        self.comandos_enviados = 0
+
+    def a_dict(self, duracion: float) -> Dict:
+        todas = [lat for valores in self.latencias.values() for lat in valores]
+        requests_totales = sum(sum(c.values()) for c in self.estados_http.values()) + sum(self.excepciones.values())
+        return {
+            "requests": requests_totales,
+            "comandos": self.comandos_enviados,
+            "duracion_s": round(duracion, 3),
+            "throughput_req_s": round(requests_totales / duracion, 2) if duracion else 0.0,
+            "throughput_cmd_s": round(self.comandos_enviados / duracion, 2) if duracion else 0.0,
+            "latencia": resumen_latencias(todas),
+            "por_endpoint": {clave: resumen_latencias(valores) for clave, valores in sorted(self.latencias.items())},
+            "estados_http": {clave: dict(c) for clave, c in sorted(self.estados_http.items())},
+            "errores_comandos": dict(self.errores_comandos),
+            "excepciones": dict(self.excepciones)
+        }
+
+
+async def _enviar(cliente: httpx.AsyncClient, resultados: Resultados, etiqueta: str, metodo: str, ruta: str,
+                  cuerpo: Optional[dict], inicio: float) -> None:
+    try:
+        respuesta = await cliente.request(metodo, ruta, json=cuerpo)
+    except httpx.HTTPError as e:
+        resultados.excepciones[type(e).__name__] += 1
+        return
+    resultados.latencias[etiqueta].append(time.perf_counter() - inicio)
+    resultados.estados_http[etiqueta][str(respuesta.status_code)] += 1
+    if etiqueta == "POST /commands" and respuesta.status_code == 200:
+        for error in respuesta.json().get("errors", []):
+            resultados.errores_comandos[error.get("code")] += 1
+
+
+def _plantilla(ruta: str, order_id: Optional[str]) -> str:
+    return ruta.replace(order_id, "{id}") if order_id else ruta
+
+
+async def ejecutar_carga(url: str, duracion: float, tasa: float, concurrencia: int, tamano_lote: int,
+                         ordenes_activas: int, fraccion_rest: float = 0.0, fraccion_lecturas: float = 0.0,
+                         servicios: int = 3, tasa_reauth: float = 0.1, semilla: int = 42,
+                         transport: Optional[httpx.AsyncBaseTransport] = None) -> Dict:
+    """Con tasa > 0 la carga es de lazo abierto: la latencia se mide desde el instante programado,
+    así una API saturada no reduce artificialmente la carga (omisión coordinada)."""
+    aleatorio = random.Random(semilla)
+    ordenes = ConjuntoOrdenes(ordenes_activas, servicios, tasa_reauth, aleatorio)
+    resultados = Resultados()
+    contador = iter(range(sys.maxsize))
+
+    async with httpx.AsyncClient(base_url=url, transport=transport, timeout=30.0) as cliente:
+        inicio_total = time.perf_counter()
+        fin = inicio_total + duracion
+
+        async def usuario():
+            while True:
+                if tasa > 0:
+                    programado = inicio_total + next(contador) / tasa
+                    if programado >= fin:
+                        return
+                    await asyncio.sleep(max(0.0, programado - time.perf_counter()))
+                else:
+                    programado = time.perf_counter()
+                    if programado >= fin:
+                        return
+
+                sorteo = aleatorio.random()
+                if sorteo < fraccion_lecturas:
+                    order_id = ordenes.order_id_al_azar()
+                    await _enviar(cliente, resultados, "GET /orders/{id}", "GET", f"/orders/{order_id}", None, programado)
+                elif sorteo < fraccion_lecturas + fraccion_rest:
+                    comando = ordenes.tomar(1)[0]
+                    metodo, ruta, cuerpo = a_peticion_rest(comando)
+                    resultados.comandos_enviados += 1
+                    etiqueta = f"{metodo} {_plantilla(ruta, comando['data'].get('order_id'))}"
+                    await _enviar(cliente, resultados, etiqueta, metodo, ruta, cuerpo, programado)
+                else:
+                    comandos = ordenes.tomar(tamano_lote)
+                    resultados.comandos_enviados += len(comandos)
+                    await _enviar(cliente, resultados, "POST /commands", "POST", "/commands", {"commands": comandos}, programado)
+
+        await asyncio.gather(*(usuario() for _ in range(max(1, concurrencia))))
+        duracion_real = time.perf_counter() - inicio_total
+
+    resultado = resultados.a_dict(duracion_real)
+    resultado["ordenes_terminadas"] = ordenes.ordenes_terminadas
+    return resultado
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServidorLocal:
+    """Levanta la API con uvicorn en un subproceso y espera a que /health responda."""
+
+    def __init__(self, workers: int = 1, puerto: Optional[int] = None, espera_segundos: float = 30.0):
+        self.workers = workers
+        self.puerto = puerto or _puerto_libre()
+        self.espera_segundos = espera_segundos
+        self.url = f"http://127.0.0.1:{self.puerto}"
+        self._proceso: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "ServidorLocal":
+        self._proceso = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.drivers.api.main:app", "--host", "127.0.0.1",
+             "--port", str(self.puerto), "--workers", str(self.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        limite = time.monotonic() + self.espera_segundos
+        while time.monotonic() < limite:
+            if self._proceso.poll() is not None:
+                raise RuntimeError(f"uvicorn terminó con código {self._proceso.returncode}")
+            try:
+                respuesta = httpx.get(f"{self.url}/health", timeout=1.0)
+            except httpx.HTTPError:
+                time.sleep(0.2)
+                continue
+            if respuesta.status_code == 200:
+                return self
+            self.__exit__(None, None, None)
+            raise RuntimeError(f"/health respondió {respuesta.status_code}: {respuesta.text[:300]}")
+        self.__exit__(None, None, None)
+        raise RuntimeError(f"La API no respondió en {self.espera_segundos}s")
+
+    def __exit__(self, *args):
+        if self._proceso and self._proceso.poll() is None:
+            self._proceso.terminate()
+            try:
+                self._proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._proceso.kill()
+
+
+def _imprimir(resultado: Dict) -> None:
+    lat = resultado["latencia"]
+    print(
+        f"{resultado['requests']} requests ({resultado['comandos']} comandos) en {resultado['duracion_s']}s: "
+        f"{resultado['throughput_req_s']} req/s, {resultado['throughput_cmd_s']} cmd/s, "
+        f"p50={lat['p50_ms']}ms p95={lat['p95_ms']}ms p99={lat['p99_ms']}ms"
+    )
+    for endpoint, datos in resultado["por_endpoint"].items():
+        print(f"  {endpoint}: n={datos['n']} p50={datos['p50_ms']}ms p99={datos['p99_ms']}ms estados={resultado['estados_http'].get(endpoint)}")
+    if resultado["errores_comandos"]:
+        print(f"  errores en /commands: {resultado['errores_comandos']}")
+    if resultado["excepciones"]:
+        print(f"  excepciones de red: {resultado['excepciones']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga HTTP de la API")
+    parser.add_argument("--url", default=None, help="API ya levantada; si se omite se inicia uvicorn en local")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn cuando se levanta en local")
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--tasa", type=float, default=0.0, help="Requests por segundo objetivo (0 = tan rápido como se pueda)")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Requests en vuelo como máximo")
+    parser.add_argument("--tamano-lote", type=int, default=5, help="Comandos por request a /commands (máx. 100)")
+    parser.add_argument("--ordenes-activas", type=int, default=50, help="Órdenes en curso simultáneas; menos = más contención por order_id")
+    parser.add_argument("--fraccion-rest", type=float, default=0.0, help="Fracción de requests por endpoints REST en vez de /commands")
+    parser.add_argument("--fraccion-lecturas", type=float, default=0.0, help="Fracción de requests GET /orders/{id}")
+    parser.add_argument("--servicios", type=int, default=3)
+    parser.add_argument("--tasa-reauth", type=float, default=0.1)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    parametros = dict(
+        duracion=args.duracion, tasa=args.tasa, concurrencia=args.concurrencia, tamano_lote=args.tamano_lote,
+        ordenes_activas=args.ordenes_activas, fraccion_rest=args.fraccion_rest, fraccion_lecturas=args.fraccion_lecturas,
+        servicios=args.servicios, tasa_reauth=args.tasa_reauth, semilla=args.semilla
+    )
+    if args.url:
+        datos = asyncio.run(ejecutar_carga(args.url, **parametros))
+    else:
+        with ServidorLocal(args.workers) as servidor:
+            datos = asyncio.run(ejecutar_carga(servidor.url, **parametros))
+
+    resultado = {
+        "benchmark": "carga_http",
+        "metadatos": metadatos_ejecucion(),
+        "configuracion": {**parametros, "workers": None if args.url else args.workers, "url": args.url},
+        "resultados": {"http": datos}
+    }
+    _imprimir(datos)
+    if args.salida:
+        guardar_resultado(resultado, args.salida)
+        print(f"Resultados en {args.salida}")
+    return resultado
+
+
+if __name__ == "__main__":
+    main()
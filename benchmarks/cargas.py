@@ -0,0 +1,107 @@
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Dict, Any, Optional
+
+
+def _ts(base: datetime, minutos: int) -> str:
+    return (base + timedelta(minutes=minutos)).isoformat().replace("+00:00", "Z")
+
+
+def generar_flujo_orden(
+    order_id: str,
+    servicios: int,
+    reautorizar: bool,
+    aleatorio: random.Random,
+    inicio: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Comandos de una orden completa de taller, de CREATE_ORDER a DELIVER.
+
+    Si `reautorizar` es True el costo real supera el 110% de lo autorizado, así que
+    TRY_COMPLETE falla con REQUIRES_REAUTH y el flujo sigue con REAUTHORIZE.
+    """
+    inicio = inicio or datetime(2025, 3, 1, 8, 0, tzinfo=timezone.utc)
+    placa = f"{aleatorio.choice('ABCDEFGH')}{aleatorio.choice('KLMNPRST')}{aleatorio.choice('UVWXYZ')}-{aleatorio.randint(100, 999)}"
+    comandos = [{
+        "op": "CREATE_ORDER",
+        "ts": _ts(inicio, 0),
+        "data": {"order_id": order_id, "customer": f"Cliente {order_id}", "vehicle": placa}
+    }]
+
+    estimados = []
+    for i in range(servicios):
+        mano_obra = Decimal(aleatorio.randint(50, 400))
+        componentes = [
+            {"description": f"Repuesto {i}-{j}", "estimated_cost": str(Decimal(aleatorio.randint(10, 300)))}
+            for j in range(aleatorio.randint(0, 3))
+        ]
+        estimados.append(mano_obra + sum((Decimal(c["estimated_cost"]) for c in componentes), Decimal("0")))
+        comandos.append({
+            "op": "ADD_SERVICE",
+            "data": {
+                "order_id": order_id,
+                "service": {"description": f"Servicio {i}", "labor_estimated_cost": str(mano_obra), "components": componentes}
+            }
+        })
+
+    comandos.append({"op": "SET_STATE_DIAGNOSED", "data": {"order_id": order_id}})
+    comandos.append({"op": "AUTHORIZE", "ts": _ts(inicio, 30), "data": {"order_id": order_id}})
+    comandos.append({"op": "SET_STATE_IN_PROGRESS", "data": {"order_id": order_id}})
+
+    # Autorizado = estimado * 1.16; con factor 1.5 el real supera el límite del 110%
+    factor = Decimal("1.5") if reautorizar else Decimal("1.0")
+    total_real = Decimal("0")
+    for i, estimado in enumerate(estimados, start=1):
+        real = (estimado * factor).quantize(Decimal("0.01"))
+        total_real += real
+        comandos.append({
+            "op": "SET_REAL_COST",
+            "data": {"order_id": order_id, "service_index": i, "real_cost": str(real), "completed": True}
+        })
+
+    comandos.append({"op": "TRY_COMPLETE", "data": {"order_id": order_id}})
+    if reautorizar:
+        comandos.append({
+            "op": "REAUTHORIZE",
+            "ts": _ts(inicio, 120),
+            "data": {"order_id": order_id, "new_authorized_amount": str(total_real)}
+        })
+        comandos.append({"op": "SET_STATE_IN_PROGRESS", "data": {"order_id": order_id}})
+        comandos.append({"op": "TRY_COMPLETE", "data": {"order_id": order_id}})
+    comandos.append({"op": "DELIVER", "data": {"order_id": order_id}})
+    return comandos
+
+
+def generar_carga(
+    ordenes: int,
+    servicios_por_orden: int = 3,
+    tasa_reautorizacion: float = 0.1,
+    semilla: int = 42,
+    intercalar: bool = True,
+    prefijo: str = "BENCH"
+) -> List[Dict[str, Any]]:
+    """Flujo de comandos para varias órdenes; intercalado simula varios mecánicos trabajando a la vez."""
+    aleatorio = random.Random(semilla)
+    flujos = [
+        generar_flujo_orden(
+            f"{prefijo}-{n:06d}",
+            servicios_por_orden,
+            aleatorio.random() < tasa_reautorizacion,
+            aleatorio
+        )
+        for n in range(ordenes)
+    ]
+    if not intercalar:
+        return [comando for flujo in flujos for comando in flujo]
+
+    comandos = []
+    pendientes = [iter(flujo) for flujo in flujos]
+    while pendientes:
+        siguiente_ronda = []
+        for flujo in pendientes:
+            comando = next(flujo, None)
+            if comando is not None:
+                comandos.append(comando)
+                siguiente_ronda.append(flujo)
+        pendientes = siguiente_ronda
+    return comandos
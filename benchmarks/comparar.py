@@ -0,0 +1,54 @@
+"""Compara dos archivos de resultados (p. ej. de dos commits).
+
+Uso:
+    python -m benchmarks.comparar base.json nuevo.json
+"""
+
+import sys
+import json
+from typing import Dict, List
+
+METRICAS = ("throughput_cmd_s", "p50_ms", "p95_ms", "p99_ms", "ops_s", "pico_bytes", "bytes_por_orden")
+
+
+def _valores(datos: Dict) -> Dict[str, float]:
+    latencia = datos.get("latencia", {})
+    valores = {clave: latencia[clave] for clave in ("p50_ms", "p95_ms", "p99_ms") if clave in latencia}
+    for clave in ("throughput_cmd_s", "ops_s", "pico_bytes", "bytes_por_orden"):
+        if clave in datos:
+            valores[clave] = datos[clave]
+    return valores
+
+
+def comparar(base: Dict, nuevo: Dict) -> List[str]:
+    lineas = [f"base={base.get('metadatos', {}).get('commit')} nuevo={nuevo.get('metadatos', {}).get('commit')}"]
+    for nombre, datos_nuevo in nuevo.get("resultados", {}).items():
+        datos_base = base.get("resultados", {}).get(nombre)
+        if not datos_base or "error" in datos_base or "error" in datos_nuevo:
+            lineas.append(f"{nombre}: sin datos comparables")
+            continue
+        antes, despues = _valores(datos_base), _valores(datos_nuevo)
+        partes = []
+        for metrica in METRICAS:
+            if metrica in antes and metrica in despues and antes[metrica]:
+                cambio = (despues[metrica] - antes[metrica]) / antes[metrica] * 100
+                partes.append(f"{metrica} {antes[metrica]} -> {despues[metrica]} ({cambio:+.1f}%)")
+        lineas.append(f"{nombre}: " + ", ".join(partes))
+    return lineas
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        print(__doc__)
+        return 1
+    with open(argv[0], encoding="utf-8") as f:
+        base = json.load(f)
+    with open(argv[1], encoding="utf-8") as f:
+        nuevo = json.load(f)
+    print("\n".join(comparar(base, nuevo)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence
+
+
+def percentil(valores_ordenados: Sequence[float], p: float) -> float:
+    """Percentil por interpolación lineal sobre una lista ya ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    posicion = (len(valores_ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fraccion = posicion - inferior
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * fraccion
+
+
+def resumen_latencias(latencias_segundos: List[float]) -> Dict[str, float]:
+    """p50/p95/p99, media y máximo en milisegundos."""
+    ordenadas = sorted(latencias_segundos)
+    if not ordenadas:
+        return {"n": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "media_ms": 0.0, "max_ms": 0.0}
+    return {
+        "n": len(ordenadas),
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 3),
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 3),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 3),
+        "media_ms": round(sum(ordenadas) / len(ordenadas) * 1000, 3),
+        "max_ms": round(ordenadas[-1] * 1000, 3)
+    }
+
+
+def _commit_actual() -> str:
+    try:
+        resultado = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        return resultado.stdout.strip() or "desconocido"
+    except (OSError, subprocess.SubprocessError):
+        return "desconocido"
+
+
+def metadatos_ejecucion() -> Dict[str, str]:
+    """Datos para comparar resultados entre commits y máquinas."""
+    return {
+        "commit": _commit_actual(),
+        "fecha": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine()
+    }
+
+
+def guardar_resultado(resultado: dict, ruta: str) -> None:
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
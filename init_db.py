@@ -1,10 +1,13 @@
 from dotenv import load_dotenv
 import sys
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
 
 load_dotenv()
 
 from app.infrastructure.db import crear_engine_bd, obtener_url_bd
-from app.infrastructure.models import Base
+from app.infrastructure.models import Base, EventoModel
+from app.infrastructure.repositories import RepositorioEstadisticasSQL
 from app.infrastructure.logging_config import configurar_logging, obtener_logger
 
 configurar_logging()
@@ -13,20 +16,65 @@ logger = obtener_logger("init_db")
 if __name__ == "__main__":
     try:
         url = obtener_url_bd()
-        url_mostrar = url.split('@')[1] if '@' in url else 'URL oculta'
-        logger.info(f"Conectando a base de datos PostgreSQL en {url_mostrar}")
+        if url.startswith("sqlite"):
+            url_mostrar = url
+        else:
+            url_mostrar = url.split('@')[1] if '@' in url else 'URL oculta'
+        logger.info(f"Conectando a base de datos en {url_mostrar}")
         
         engine = crear_engine_bd(url)
         
+        tablas_previas = inspect(engine).get_table_names()
+        
         logger.info("Creando tablas en base de datos")
         Base.metadata.create_all(engine)
         
         logger.info("Tablas creadas exitosamente")
         
-        from sqlalchemy import inspect
         inspector = inspect(engine)
+        # create_all no altera tablas existentes: bases previas al control optimista no tienen la columna version
+        columnas_ordenes = {c["name"] for c in inspector.get_columns("ordenes")}
+        if "version" not in columnas_ordenes:
+            with engine.begin() as conexion:
+                conexion.execute(text("ALTER TABLE ordenes ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+            logger.info("Columna ordenes.version agregada")
+            inspector = inspect(engine)
+        if "event_sourced" not in columnas_ordenes:
+            with engine.begin() as conexion:
+                conexion.execute(text("ALTER TABLE ordenes ADD COLUMN event_sourced BOOLEAN NOT NULL DEFAULT FALSE"))
+            logger.info("Columna ordenes.event_sourced agregada")
+            inspector = inspect(engine)
+        columnas_eventos = {c["name"] for c in inspector.get_columns("eventos")}
+        if "posicion_feed" not in columnas_eventos:
+            # Los eventos previos ya están confirmados: su id sirve como posición en el feed
+            with engine.begin() as conexion:
+                conexion.execute(text("ALTER TABLE eventos ADD COLUMN posicion_feed INTEGER"))
+                conexion.execute(text("UPDATE eventos SET posicion_feed = id_evento"))
+            logger.info("Columna eventos.posicion_feed agregada")
+            inspector = inspect(engine)
+        if "contador_feed" not in tablas_previas:
+            # create_all la creó en 0: las posiciones nuevas siguen a las ya asignadas
+            with engine.begin() as conexion:
+                conexion.execute(text("UPDATE contador_feed SET ultima_posicion = (SELECT COALESCE(MAX(posicion_feed), 0) FROM eventos) WHERE id = 1"))
+        columnas_idempotencia = {c["name"] for c in inspector.get_columns("respuestas_idempotentes")}
+        if "reservado_hasta" not in columnas_idempotencia:
+            with engine.begin() as conexion:
+                conexion.execute(text("ALTER TABLE respuestas_idempotentes ADD COLUMN reservado_hasta TIMESTAMP"))
+            logger.info("Columna respuestas_idempotentes.reservado_hasta agregada")
+            inspector = inspect(engine)
+        # Índices agregados a tablas que ya existían
+        for indice in EventoModel.__table__.indexes:
+            indice.create(engine, checkfirst=True)
+        # Los contadores de GET /stats se mantienen al guardar; en bases con órdenes previas se calculan una vez
+        if "ordenes" in tablas_previas and "estadisticas_ordenes" not in tablas_previas:
+            sesion = Session(bind=engine)
+            try:
+                contadas = RepositorioEstadisticasSQL(sesion).recalcular()
+            finally:
+                sesion.close()
+            logger.info(f"Estadísticas calculadas para {contadas} órdenes existentes")
         tablas = inspector.get_table_names()
-        tablas_esperadas = ["ordenes", "clientes", "vehiculos", "servicios", "componentes", "eventos"]
+        tablas_esperadas = ["ordenes", "clientes", "vehiculos", "servicios", "componentes", "eventos", "outbox_eventos", "respuestas_idempotentes", "trabajos_comandos", "instantaneas_ordenes", "estadisticas_ordenes", "contador_feed"]
         tablas_encontradas = [t for t in tablas_esperadas if t in tablas]
         
         logger.info(f"Tablas existentes: {', '.join(tablas) if tablas else 'Ninguna'}")
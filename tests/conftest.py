@@ -14,6 +14,8 @@ os.environ["POSTGRES_USER"] = "talleres_user"
 os.environ["POSTGRES_PASSWORD"] = "talleres_pass"
 os.environ["DB_INTERNAL_PORT"] = "5438"  # Puerto expuesto desde Docker
 os.environ["POSTGRES_DB"] = "talleres"  # Base de datos existente en Docker
+# Verifica el total_real incremental contra el recálculo completo en todos los tests
+os.environ.setdefault("DOMAIN_DEBUG_CHECKS", "true")
 
 from app.infrastructure.models import Base
 from app.infrastructure import db as db_module
@@ -72,3 +74,32 @@ def client():
     db_module.SessionLocal = None
 
 
+
+
+@pytest.fixture(scope="function")
+def client_memoria():
+    """Cliente de la API con órdenes y eventos en memoria; no requiere PostgreSQL."""
+    from app.drivers.api.dependencies import (
+        obtener_repositorio, obtener_auditoria, obtener_repositorio_cliente, obtener_repositorio_vehiculo, sin_repositorio,
+        obtener_idempotencia, obtener_repositorio_trabajos
+    )
+    from app.infrastructure.repositories import RepositorioOrdenMemoria, RepositorioIdempotenciaMemoria
+    from app.infrastructure.almacen_eventos_memoria import AlmacenEventosMemoria
+    
+    repo = RepositorioOrdenMemoria()
+    almacen = AlmacenEventosMemoria()
+    idempotencia = RepositorioIdempotenciaMemoria()
+    app.dependency_overrides[obtener_repositorio] = lambda: repo
+    app.dependency_overrides[obtener_idempotencia] = lambda: idempotencia
+    app.dependency_overrides[obtener_auditoria] = lambda: almacen
+    app.dependency_overrides[obtener_repositorio_cliente] = sin_repositorio
+    app.dependency_overrides[obtener_repositorio_vehiculo] = sin_repositorio
+    app.dependency_overrides[obtener_repositorio_trabajos] = sin_repositorio
+    
+    test_client = TestClient(app)
+    test_client.repo = repo
+    test_client.almacen = almacen
+    
+    yield test_client
+    
+    app.dependency_overrides.clear()
@@ -0,0 +1,214 @@
+"""Flujos de la API de punta a punta con el repositorio en memoria."""
+
+import json
+import time
+import threading
+
+
+def _comandos(order_id, costo_real):
+    return [
+        {"op": "CREATE_ORDER", "ts": "2025-03-01T09:00:00Z", "data": {"order_id": order_id, "customer": "Ana", "vehicle": "ABC-123"}},
+        {"op": "ADD_SERVICE", "data": {"order_id": order_id, "service": {"description": "Frenos", "labor_estimated_cost": "1000.00", "components": [{"description": "Pastillas", "estimated_cost": "500.00"}]}}},
+        {"op": "SET_STATE_DIAGNOSED", "data": {"order_id": order_id}},
+        {"op": "AUTHORIZE", "ts": "2025-03-01T10:00:00Z", "data": {"order_id": order_id}},
+        {"op": "SET_STATE_IN_PROGRESS", "data": {"order_id": order_id}},
+        {"op": "SET_REAL_COST", "data": {"order_id": order_id, "service_index": 1, "real_cost": costo_real, "completed": True}},
+        {"op": "TRY_COMPLETE", "data": {"order_id": order_id}},
+    ]
+
+
+def test_flujo_completo_por_commands(client_memoria):
+    respuesta = client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-1", "1700.00") + [
+        {"op": "DELIVER", "data": {"order_id": "ORD-MEM-1"}}
+    ]})
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert cuerpo["errors"] == []
+    assert cuerpo["orders"][0]["status"] == "DELIVERED"
+    assert [e.tipo for e in client_memoria.almacen.listar()][-1] == "DELIVERED"
+
+    orden = client_memoria.get("/orders/ORD-MEM-1").json()
+    assert orden["services"][0]["id_servicio"] > 0
+    assert orden["real_total"] == "1700.00"
+
+
+def test_exceso_del_110_requiere_reautorizacion(client_memoria):
+    respuesta = client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-2", "5000.00")})
+
+    assert [e["code"] for e in respuesta.json()["errors"]] == ["REQUIRES_REAUTH"]
+    assert client_memoria.get("/orders/ORD-MEM-2").json()["status"] == "WAITING_FOR_APPROVAL"
+
+    reautorizada = client_memoria.post("/orders/ORD-MEM-2/reauthorize", json={"new_authorized_amount": "5000.00"})
+    assert reautorizada.status_code == 200
+    assert reautorizada.json()["authorization_version"] == 2
+
+
+def test_crear_orden_rest_sin_bd(client_memoria):
+    respuesta = client_memoria.post("/orders", json={"order_id": "ORD-MEM-3", "customer": "Luis", "vehicle": "XYZ-987"})
+
+    assert respuesta.status_code == 201
+    assert client_memoria.repo.obtener("ORD-MEM-3").vehiculo == "XYZ-987"
+
+
+def test_lote_con_varias_ordenes_conserva_el_orden(client_memoria):
+    intercalados = [c for par in zip(_comandos("ORD-MEM-4", "1700.00"), _comandos("ORD-MEM-5", "1600.00")) for c in par]
+    for comando in intercalados:
+        if comando["op"] == "CREATE_ORDER" and comando["data"]["order_id"] == "ORD-MEM-5":
+            comando["data"] = {**comando["data"], "customer": "Luis", "vehicle": "XYZ-987"}
+
+    respuesta = client_memoria.post("/commands", json={"commands": intercalados})
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert cuerpo["errors"] == []
+    assert [o["order_id"] for o in cuerpo["orders"]] == ["ORD-MEM-4", "ORD-MEM-5"]
+    assert [o["status"] for o in cuerpo["orders"]] == ["COMPLETED", "COMPLETED"]
+    for order_id in ("ORD-MEM-4", "ORD-MEM-5"):
+        tipos = [e["type"] for e in cuerpo["events"] if e["order_id"] == order_id]
+        assert tipos[0] == "CREATED" and tipos[-1] == "COMPLETED"
+
+
+def test_idempotency_key_repite_la_respuesta_sin_reejecutar(client_memoria):
+    cuerpo = {"commands": _comandos("ORD-MEM-6", "1700.00")}
+    cabeceras = {"Idempotency-Key": "tablet-7-lote-1"}
+
+    primera = client_memoria.post("/commands", json=cuerpo, headers=cabeceras)
+    eventos = len(client_memoria.almacen.listar())
+    segunda = client_memoria.post("/commands", json=cuerpo, headers=cabeceras)
+
+    assert segunda.status_code == 200
+    assert segunda.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in primera.headers
+    assert segunda.json() == primera.json()
+    assert len(client_memoria.almacen.listar()) == eventos
+
+    otra = client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-7", "1700.00")}, headers=cabeceras)
+    assert otra.status_code == 422
+
+
+def test_idempotency_key_por_comando(client_memoria):
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-8", "1700.00")})
+    entregar = {"op": "DELIVER", "idempotency_key": "entrega-8", "data": {"order_id": "ORD-MEM-8"}}
+
+    primera = client_memoria.post("/commands", json={"commands": [entregar]}).json()
+    segunda = client_memoria.post("/commands", json={"commands": [entregar]}).json()
+
+    assert primera["errors"] == [] and segunda["errors"] == []
+    assert segunda["events"] == primera["events"] == [{"order_id": "ORD-MEM-8", "type": "DELIVERED"}]
+    assert [e.tipo for e in client_memoria.almacen.listar()].count("DELIVERED") == 1
+
+
+def test_cola_de_trabajos_no_disponible_sin_bd(client_memoria):
+    respuesta = client_memoria.post("/commands/async", json={"commands": _comandos("ORD-MEM-9", "1700.00")})
+
+    assert respuesta.status_code == 503
+    assert client_memoria.get("/jobs/abc").status_code == 404
+
+
+def test_orden_as_of_muestra_el_estado_en_la_autorizacion(client_memoria):
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-10", "1700.00")})
+    tipos = [e["type"] for e in client_memoria.get("/orders/ORD-MEM-10").json()["events"]]
+
+    autorizada = client_memoria.get("/orders/ORD-MEM-10", params={"as_of": tipos.index("AUTHORIZED") + 1})
+    assert autorizada.status_code == 200
+    cuerpo = autorizada.json()
+    assert cuerpo["status"] == "AUTHORIZED"
+    assert cuerpo["authorized_amount"] == "1740.00"
+    assert cuerpo["services"][0]["costo_real"] is None
+    assert cuerpo["events"][-1]["type"] == "AUTHORIZED"
+
+    assert client_memoria.get("/orders/ORD-MEM-10", params={"as_of": "2999-01-01T00:00:00Z"}).json()["status"] == "COMPLETED"
+    assert client_memoria.get("/orders/ORD-MEM-10", params={"as_of": "2000-01-01T00:00:00+00:00"}).status_code == 404
+    assert client_memoria.get("/orders/ORD-MEM-10", params={"as_of": "ayer"}).status_code == 400
+    assert client_memoria.get("/orders/ORD-NO-EXISTE", params={"as_of": 1}).status_code == 404
+
+
+def test_historia_de_eventos_paginada(client_memoria):
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-11", "1700.00")})
+    tipos = [e["type"] for e in client_memoria.get("/orders/ORD-MEM-11").json()["events"]]
+
+    primera = client_memoria.get("/orders/ORD-MEM-11/events", params={"limit": 3}).json()
+    assert [e["sequence"] for e in primera["events"]] == [1, 2, 3]
+    assert primera["events"][0]["metadata"]["cliente"] == "Ana"
+    resto = client_memoria.get("/orders/ORD-MEM-11/events", params={"cursor": primera["next_cursor"], "limit": 100}).json()
+    assert [e["type"] for e in primera["events"] + resto["events"]] == tipos
+    assert resto["next_cursor"] is None
+
+    filtrados = client_memoria.get("/orders/ORD-MEM-11/events", params=[("type", "AUTHORIZED"), ("type", "CREATED")]).json()
+    assert [e["type"] for e in filtrados["events"]] == ["CREATED", "AUTHORIZED"]
+
+    ndjson = client_memoria.get("/orders/ORD-MEM-11/events", headers={"Accept": "application/x-ndjson"})
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(l)["type"] for l in ndjson.text.splitlines()] == tipos
+
+    assert client_memoria.get("/orders/ORD-MEM-11/events", params={"cursor": "x"}).status_code == 400
+    assert client_memoria.get("/orders/ORD-NO-EXISTE/events").status_code == 404
+
+
+def test_include_events_false_omite_la_historia(client_memoria):
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-12", "1700.00")})
+
+    assert client_memoria.get("/orders/ORD-MEM-12", params={"include_events": "false"}).json()["events"] == []
+    entregada = client_memoria.post("/orders/ORD-MEM-12/deliver", params={"include_events": "false"})
+    assert entregada.json()["status"] == "DELIVERED"
+    assert entregada.json()["events"] == []
+    assert client_memoria.get("/orders/ORD-MEM-12").json()["events"][-1]["type"] == "DELIVERED"
+
+
+def test_feed_global_entrega_solo_lo_nuevo(client_memoria):
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-13", "1700.00")[:2]})
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-14", "1700.00")[:1]})
+
+    primera = client_memoria.get("/events/feed", params={"limit": 2}).json()
+    assert [(e["order_id"], e["type"]) for e in primera["events"]] == [("ORD-MEM-13", "CREATED"), ("ORD-MEM-13", "SERVICE_ADDED")]
+    assert primera["has_more"] is True
+    resto = client_memoria.get("/events/feed", params={"cursor": primera["next_cursor"]}).json()
+    assert [(e["order_id"], e["type"]) for e in resto["events"]] == [("ORD-MEM-14", "CREATED")]
+    assert resto["has_more"] is False
+
+    vacia = client_memoria.get("/events/feed", params={"cursor": resto["next_cursor"]}).json()
+    assert vacia == {"events": [], "next_cursor": resto["next_cursor"], "has_more": False}
+    creados = client_memoria.get("/events/feed", params={"type": "CREATED"}).json()
+    assert [e["order_id"] for e in creados["events"]] == ["ORD-MEM-13", "ORD-MEM-14"]
+
+
+def test_feed_long_poll_responde_al_llegar_un_evento(client_memoria):
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-15", "1700.00")[:1]})
+    cursor = client_memoria.get("/events/feed").json()["next_cursor"]
+
+    def cancelar_despues():
+        time.sleep(0.2)
+        orden = client_memoria.repo.obtener("ORD-MEM-15")
+        orden.cancelar("Cliente desiste")
+        client_memoria.repo.guardar(orden)
+    hilo = threading.Thread(target=cancelar_despues)
+    hilo.start()
+    inicio = time.monotonic()
+    respuesta = client_memoria.get("/events/feed", params={"cursor": cursor, "wait": 10}).json()
+    hilo.join()
+
+    assert [e["type"] for e in respuesta["events"]] == ["CANCELLED"]
+    assert time.monotonic() - inicio < 5
+
+
+def test_stats_por_estado_y_cliente(client_memoria):
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-16", "1700.00")})
+    client_memoria.post("/commands", json={"commands": _comandos("ORD-MEM-17", "1700.00")[:4]})
+    client_memoria.post("/orders/ORD-MEM-17/cancel", json={"reason": "Sin repuestos"})
+
+    por_estado = client_memoria.get("/stats", params={"group_by": "status"}).json()
+    assert por_estado["group_by"] == ["status"]
+    assert [(f["status"], f["orders"], f["authorized_amount"], f["real_total"]) for f in por_estado["rows"]] == [
+        ("CANCELLED", 1, "1740.00", "0.00"),
+        ("COMPLETED", 1, "1740.00", "1700.00"),
+    ]
+
+    completas = client_memoria.get("/stats").json()["rows"]
+    assert {(f["day"], f["status"], f["customer"]) for f in completas} == {
+        ("2025-03-01", "CANCELLED", "Ana"), ("2025-03-01", "COMPLETED", "Ana")
+    }
+    assert client_memoria.get("/stats", params={"customer": "Otro"}).json()["rows"] == []
+    assert client_memoria.get("/stats", params={"from": "2025-03-02"}).json()["rows"] == []
+    assert client_memoria.get("/stats", params={"group_by": "mes"}).status_code == 400
+
@@ -27,6 +27,18 @@ class RepositorioOrdenMock(RepositorioOrden):
     
     def guardar(self, orden: Orden) -> None:
         self._ordenes[orden.order_id] = orden
+    
+    def obtener_historica(self, order_id, momento=None, secuencia=None):
+        return None
+    
+    def listar_eventos(self, order_id, despues_de=0, limite=50, tipos=None):
+        return None
+    
+    def listar_eventos_globales(self, despues_de=0, limite=100, tipos=None):
+        return []
+    
+    def estadisticas(self, agrupar, desde=None, hasta=None, cliente=None):
+        return []
 
 
 class AlmacenEventosMock(AlmacenEventos):
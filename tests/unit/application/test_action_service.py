@@ -766,3 +766,63 @@ def test_procesar_comando_cancel():
         
         res = srv.procesar_comando(cmd)
         assert res is not None
+
+
+def _conflicto():
+    return ErrorDominio(CodigoError.CONCURRENT_MODIFICATION, "Orden modificada por otra operación")
+
+
+def test_procesar_comando_reintenta_conflicto_de_version():
+    repo = Mock()
+    repo.obtener.return_value = None
+    srv = ActionService(repo=repo, auditoria=Mock(), max_reintentos=3)
+    orden_dto = Mock(events=[])
+
+    with patch('app.application.action_service.EntregarOrden') as mock_action:
+        mock_action.return_value.ejecutar.side_effect = [_conflicto(), orden_dto]
+        resultado, _, err = srv.procesar_comando({"op": "DELIVER", "data": {"order_id": "ORD-001"}})
+
+    assert err is None
+    assert resultado is orden_dto
+    assert mock_action.return_value.ejecutar.call_count == 2
+
+
+def test_procesar_comando_agota_reintentos_de_conflicto():
+    repo = Mock()
+    repo.obtener.return_value = None
+    srv = ActionService(repo=repo, auditoria=Mock(), max_reintentos=2)
+
+    with patch('app.application.action_service.EntregarOrden') as mock_action:
+        mock_action.return_value.ejecutar.side_effect = _conflicto()
+        _, _, err = srv.procesar_comando({"op": "DELIVER", "data": {"order_id": "ORD-001"}})
+
+    assert err.code == CodigoError.CONCURRENT_MODIFICATION.value
+    assert mock_action.return_value.ejecutar.call_count == 3
+
+
+def test_procesar_comando_no_reintenta_operaciones_no_reintentables():
+    repo = Mock()
+    repo.obtener.return_value = None
+    srv = ActionService(repo=repo, auditoria=Mock(), max_reintentos=3)
+
+    with patch('app.application.action_service.CrearOrden') as mock_action:
+        mock_action.return_value.ejecutar.side_effect = _conflicto()
+        _, _, err = srv.procesar_comando({"op": "CREATE_ORDER", "data": {"order_id": "ORD-001", "customer": "Ana", "vehicle": "ABC-123"}})
+
+    assert err.code == CodigoError.CONCURRENT_MODIFICATION.value
+    assert mock_action.return_value.ejecutar.call_count == 1
+
+
+def test_procesar_comando_reintenta_agregar_servicio():
+    repo = Mock()
+    repo.obtener.return_value = None
+    srv = ActionService(repo=repo, auditoria=Mock(), max_reintentos=3)
+    orden_dto = Mock(events=[])
+
+    with patch('app.application.action_service.AgregarServicio') as mock_action:
+        mock_action.return_value.ejecutar.side_effect = [_conflicto(), orden_dto]
+        resultado, _, err = srv.procesar_comando({"op": "ADD_SERVICE", "data": {"order_id": "ORD-001"}})
+
+    assert err is None
+    assert resultado is orden_dto
+    assert mock_action.return_value.ejecutar.call_count == 2
@@ -39,6 +39,9 @@ def crear_orden_mock(order_id: str, estado: EstadoOrden = EstadoOrden.CREATED):
     orden.entregar = Mock()
     orden.cancelar = Mock()
     orden.reautorizar = Mock()
+    orden.obtener_servicio = Mock(side_effect=lambda servicio_id: next(
+        (s for s in orden.servicios if s.id_servicio == servicio_id), None
+    ))
     
     return orden
 
@@ -172,6 +175,7 @@ def test_mecanico_registra_costo_real_al_terminar_servicio():
     servicio_mock.costo_mano_obra_estimado = Decimal('1000.00')
     servicio_mock.componentes = []
     servicio_mock.calcular_subtotal_estimado = Mock(return_value=Decimal('1000.00'))
+    servicio_mock.completado = True
     orden_en_trabajo.servicios = [servicio_mock]
     repo.obtener.return_value = orden_en_trabajo
     repo.save.return_value = orden_en_trabajo
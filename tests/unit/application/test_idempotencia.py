@@ -0,0 +1,126 @@
+import pytest
+from unittest.mock import Mock, patch
+
+from app.application.action_service import ActionService
+from app.application.dtos import OrdenDTO
+from app.application.idempotencia import calcular_huella, ejecutar_idempotente
+from app.domain.enums import CodigoError
+from app.domain.exceptions import ErrorDominio
+from app.infrastructure.repositories import RepositorioIdempotenciaMemoria
+
+
+def _orden_dto(order_id="ORD-001"):
+    return OrdenDTO(
+        order_id=order_id, status="DELIVERED", customer="Ana", vehicle="ABC-123", services=[],
+        subtotal_estimated="0.00", authorization_version=1, real_total="0.00", events=[]
+    )
+
+
+def _identidad(valor):
+    return valor
+
+
+def test_huella_no_depende_del_orden_de_las_claves():
+    assert calcular_huella({"a": 1, "b": [1, 2]}) == calcular_huella({"b": [1, 2], "a": 1})
+    assert calcular_huella({"a": 1}) != calcular_huella({"a": 2})
+
+
+def test_segunda_ejecucion_devuelve_el_resultado_guardado():
+    almacen = RepositorioIdempotenciaMemoria()
+    funcion = Mock(return_value={"valor": 1})
+
+    primero = ejecutar_idempotente(almacen, "k", "h", "command", funcion, _identidad, _identidad)
+    segundo = ejecutar_idempotente(almacen, "k", "h", "command", funcion, _identidad, _identidad)
+
+    assert primero == ({"valor": 1}, False)
+    assert segundo == ({"valor": 1}, True)
+    assert funcion.call_count == 1
+
+
+def test_clave_reutilizada_con_otro_contenido():
+    almacen = RepositorioIdempotenciaMemoria()
+    ejecutar_idempotente(almacen, "k", "h1", "command", lambda: {}, _identidad, _identidad)
+
+    with pytest.raises(ErrorDominio) as exc:
+        ejecutar_idempotente(almacen, "k", "h2", "command", lambda: {}, _identidad, _identidad)
+    assert exc.value.codigo == CodigoError.IDEMPOTENCY_KEY_REUSED
+
+
+def test_clave_en_curso():
+    almacen = RepositorioIdempotenciaMemoria()
+    almacen.reservar("k", "h", 60)
+
+    with pytest.raises(ErrorDominio) as exc:
+        ejecutar_idempotente(almacen, "k", "h", "command", lambda: {}, _identidad, _identidad)
+    assert exc.value.codigo == CodigoError.IDEMPOTENCY_IN_PROGRESS
+
+
+def test_excepcion_o_resultado_transitorio_liberan_la_clave():
+    almacen = RepositorioIdempotenciaMemoria()
+    with pytest.raises(RuntimeError):
+        ejecutar_idempotente(almacen, "k", "h", "command", Mock(side_effect=RuntimeError()), _identidad, _identidad)
+    ejecutar_idempotente(almacen, "k", "h", "command", lambda: {}, _identidad, _identidad, conservar=lambda _: False)
+
+    assert almacen.reservar("k", "h", 60) is None
+
+
+def test_reserva_abandonada_se_retoma(monkeypatch):
+    monkeypatch.setenv("IDEMPOTENCY_LEASE_SECONDS", "60")
+    almacen = RepositorioIdempotenciaMemoria()
+    almacen.reservar("k", "h", 86400, 0)
+
+    resultado = ejecutar_idempotente(almacen, "k", "h", "command", lambda: {"valor": 1}, _identidad, _identidad)
+    assert resultado == ({"valor": 1}, False)
+    assert almacen.reservar("k", "h", 86400, 0).respuesta == {"valor": 1}
+
+
+def test_clave_expirada_se_puede_volver_a_usar():
+    almacen = RepositorioIdempotenciaMemoria()
+    almacen.reservar("k", "h", 0)
+
+    assert almacen.reservar("k", "otra", 60) is None
+
+
+def test_action_service_no_repite_comando_con_la_misma_clave():
+    repo = Mock()
+    repo.obtener.return_value = None
+    srv = ActionService(repo=repo, auditoria=Mock(), idempotencia=RepositorioIdempotenciaMemoria())
+    comando = {"op": "DELIVER", "idempotency_key": "tablet-1", "data": {"order_id": "ORD-001"}}
+
+    with patch('app.application.action_service.EntregarOrden') as mock_action:
+        mock_action.return_value.ejecutar.return_value = _orden_dto()
+        primero = srv.procesar_comando(comando)
+        segundo = srv.procesar_comando(dict(comando))
+
+    assert mock_action.return_value.ejecutar.call_count == 1
+    assert segundo[0] == primero[0]
+    assert segundo[2] is None
+
+
+def test_action_service_reintenta_si_el_primer_intento_fue_transitorio():
+    repo = Mock()
+    repo.obtener.return_value = None
+    srv = ActionService(repo=repo, auditoria=Mock(), idempotencia=RepositorioIdempotenciaMemoria())
+    comando = {"op": "DELIVER", "idempotency_key": "tablet-2", "data": {"order_id": "ORD-001"}}
+
+    with patch('app.application.action_service.EntregarOrden') as mock_action:
+        mock_action.return_value.ejecutar.side_effect = [RuntimeError("caída"), _orden_dto()]
+        primero = srv.procesar_comando(comando)
+        segundo = srv.procesar_comando(comando)
+
+    assert primero[2].code == "INTERNAL_ERROR"
+    assert segundo[2] is None
+    assert mock_action.return_value.ejecutar.call_count == 2
+
+
+def test_action_service_clave_reutilizada_devuelve_error():
+    repo = Mock()
+    repo.obtener.return_value = None
+    srv = ActionService(repo=repo, auditoria=Mock(), idempotencia=RepositorioIdempotenciaMemoria())
+
+    with patch('app.application.action_service.EntregarOrden') as mock_action:
+        mock_action.return_value.ejecutar.return_value = _orden_dto()
+        srv.procesar_comando({"op": "DELIVER", "idempotency_key": "k", "data": {"order_id": "ORD-001"}})
+        _, _, err = srv.procesar_comando({"op": "DELIVER", "idempotency_key": "k", "data": {"order_id": "ORD-002"}})
+
+    assert err.code == CodigoError.IDEMPOTENCY_KEY_REUSED.value
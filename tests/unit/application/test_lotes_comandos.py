@@ -0,0 +1,102 @@
+import threading
+from contextlib import contextmanager
+from unittest.mock import Mock
+
+from app.application.lotes_comandos import particionar_comandos, procesar_lote
+
+
+def _comando(op, order_id=None, **data):
+    if order_id is not None:
+        data["order_id"] = order_id
+    return {"op": op, "data": data}
+
+
+def test_particiona_por_orden_conservando_el_orden():
+    comandos = [
+        _comando("CREATE_ORDER", "A", customer="Ana", vehicle="AAA-111"),
+        _comando("CREATE_ORDER", "B", customer="Luis", vehicle="BBB-222"),
+        _comando("ADD_SERVICE", "A"),
+        _comando("ADD_SERVICE", "B"),
+        _comando("DELIVER", "A"),
+    ]
+
+    assert particionar_comandos(comandos) == [[0, 2, 4], [1, 3]]
+
+
+def test_ordenes_con_el_mismo_cliente_o_vehiculo_no_se_separan():
+    comandos = [
+        _comando("CREATE_ORDER", "A", customer="Ana", vehicle="AAA-111"),
+        _comando("CREATE_ORDER", "B", customer="ana ", vehicle="BBB-222"),
+        _comando("CREATE_ORDER", "C", customer="Luis", vehicle="BBB-222"),
+        _comando("CREATE_ORDER", "D", customer="Eva", vehicle="DDD-444"),
+        _comando("DELIVER", "C"),
+    ]
+
+    assert particionar_comandos(comandos) == [[0, 1, 2, 4], [3]]
+
+
+def test_order_id_numerico_y_comandos_sin_claves():
+    comandos = [_comando("DELIVER", 7), _comando("CANCEL", "7"), {"op": "DELIVER", "data": {}}, {"op": "X"}]
+
+    assert particionar_comandos(comandos) == [[0, 1], [2], [3]]
+
+
+def _servicio_registrando(ejecutados, hilos=None):
+    servicio = Mock()
+
+    def procesar(comando):
+        ejecutados.append(comando["data"]["order_id"] + ":" + comando["op"])
+        if hilos is not None:
+            hilos.add(threading.current_thread().name)
+        if comando["op"] == "FALLA":
+            raise RuntimeError("fallo")
+        return (comando["data"]["order_id"], [], None)
+
+    servicio.procesar_comando.side_effect = procesar
+    return servicio
+
+
+def test_resultados_en_orden_original_con_particiones_en_paralelo():
+    ejecutados, hilos = [], set()
+    servicio = _servicio_registrando(ejecutados, hilos)
+
+    @contextmanager
+    def fabrica():
+        yield servicio
+
+    comandos = [_comando(op, order_id) for order_id in ("A", "B", "C") for op in ("CREATE_ORDER", "DELIVER")]
+    comandos = [comandos[i] for i in (0, 2, 4, 1, 3, 5)]
+    resultados = procesar_lote(comandos, Mock(), fabrica)
+
+    assert [r[0] for r in resultados] == ["A", "B", "C", "A", "B", "C"]
+    assert all(h.startswith("comandos") for h in hilos)
+    for order_id in ("A", "B", "C"):
+        propios = [e for e in ejecutados if e.startswith(order_id)]
+        assert propios == [f"{order_id}:CREATE_ORDER", f"{order_id}:DELIVER"]
+
+
+def test_sin_fabrica_se_ejecuta_en_el_hilo_actual():
+    ejecutados = []
+    servicio = _servicio_registrando(ejecutados)
+
+    resultados = procesar_lote([_comando("CREATE_ORDER", "A"), _comando("CREATE_ORDER", "B")], servicio)
+
+    assert ejecutados == ["A:CREATE_ORDER", "B:CREATE_ORDER"]
+    assert [r[0] for r in resultados] == ["A", "B"]
+
+
+def test_excepcion_detiene_solo_su_particion():
+    ejecutados = []
+    servicio = _servicio_registrando(ejecutados)
+
+    @contextmanager
+    def fabrica():
+        yield servicio
+
+    comandos = [_comando("FALLA", "A"), _comando("CREATE_ORDER", "B"), _comando("DELIVER", "A")]
+    resultados = procesar_lote(comandos, Mock(), fabrica)
+
+    assert isinstance(resultados[0], RuntimeError)
+    assert resultados[1] == ("B", [], None)
+    assert resultados[2] is None
+    assert "A:DELIVER" not in ejecutados
@@ -0,0 +1 @@
+"""Tests de los benchmarks."""
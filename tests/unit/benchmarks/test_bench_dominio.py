@@ -0,0 +1,31 @@
+"""Tests de los microbenchmarks del dominio."""
+
+from app.domain.enums import EstadoOrden
+from benchmarks.bench_dominio import construir_orden, casos, ejecutar_benchmark
+
+
+def test_construir_orden_queda_lista_para_completar():
+    orden = construir_orden(10)
+    assert orden.estado == EstadoOrden.IN_PROGRESS
+    assert len(orden.servicios) == 10
+    assert all(s.completado for s in orden.servicios)
+
+
+def test_casos_no_acumulan_estado_entre_llamadas():
+    orden = construir_orden(3)
+    funciones = casos(orden)
+    eventos = len(orden.eventos)
+    for _ in range(5):
+        funciones["Orden.establecer_costo_real"]()
+        funciones["Orden.intentar_completar"]()
+    assert len(orden.eventos) == eventos
+    assert orden.estado == EstadoOrden.IN_PROGRESS
+
+
+def test_ejecutar_benchmark_reporta_ops_y_memoria():
+    resultado = ejecutar_benchmark([1], tiempo_minimo=0.001, repeticiones=1)
+
+    assert "redondear_mitad_par" in resultado["resultados"]
+    datos = resultado["resultados"]["orden_a_dto[1]"]
+    assert datos["ops_s"] > 0
+    assert datos["pico_bytes"] > 0
@@ -0,0 +1,21 @@
+"""Tests del benchmark de memoria por orden."""
+
+from app.domain.enums import EstadoOrden
+from benchmarks.bench_memoria import construir_orden, ejecutar_benchmark
+
+
+def test_construir_orden_entregada():
+    orden = construir_orden(1, 3)
+    assert orden.estado == EstadoOrden.DELIVERED
+    assert [e.tipo for e in orden.eventos][-1] == "DELIVERED"
+
+
+def test_reporta_bytes_por_orden():
+    resultado = ejecutar_benchmark(50, [1, 3])
+
+    una, tres = resultado["resultados"]["ordenes[1 servicios]"], resultado["resultados"]["ordenes[3 servicios]"]
+    assert una["ordenes"] == 50
+    assert 0 < una["bytes_por_orden"] < tres["bytes_por_orden"]
+    assert set(resultado["resultados"]["entidades"]["tamano_instancia_bytes"]) == {
+        "Orden", "Servicio", "Componente", "Evento", "Cliente", "Vehiculo"
+    }
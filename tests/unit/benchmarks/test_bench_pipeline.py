@@ -0,0 +1,57 @@
+"""Tests del generador de cargas y del benchmark del pipeline de comandos."""
+
+import json
+import random
+
+from benchmarks.cargas import generar_flujo_orden, generar_carga
+from benchmarks.comun import percentil, resumen_latencias
+from benchmarks.comparar import comparar
+from benchmarks import bench_pipeline
+
+
+def test_flujo_orden_sin_reautorizacion():
+    ops = [c["op"] for c in generar_flujo_orden("ORD-1", 2, False, random.Random(1))]
+    assert ops == [
+        "CREATE_ORDER", "ADD_SERVICE", "ADD_SERVICE", "SET_STATE_DIAGNOSED", "AUTHORIZE",
+        "SET_STATE_IN_PROGRESS", "SET_REAL_COST", "SET_REAL_COST", "TRY_COMPLETE", "DELIVER"
+    ]
+
+
+def test_flujo_orden_con_reautorizacion():
+    ops = [c["op"] for c in generar_flujo_orden("ORD-1", 1, True, random.Random(1))]
+    assert ops[-5:] == ["TRY_COMPLETE", "REAUTHORIZE", "SET_STATE_IN_PROGRESS", "TRY_COMPLETE", "DELIVER"]
+
+
+def test_carga_es_determinista_e_intercalada():
+    carga = generar_carga(3, 1, 0.5, semilla=7)
+    assert carga == generar_carga(3, 1, 0.5, semilla=7)
+    assert [c["data"]["order_id"] for c in carga[:3]] == ["BENCH-000000", "BENCH-000001", "BENCH-000002"]
+
+
+def test_percentiles():
+    assert percentil([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    resumen = resumen_latencias([0.001] * 99 + [0.1])
+    assert resumen["p50_ms"] == 1.0
+    assert resumen["max_ms"] == 100.0
+
+
+def test_benchmark_sqlite_completa_todas_las_ordenes(tmp_path):
+    salida = tmp_path / "resultado.json"
+    bench_pipeline.main(["--ordenes", "4", "--servicios", "2", "--tasa-reauth", "0.5", "--semilla", "3", "--salida", str(salida)])
+
+    resultado = json.loads(salida.read_text(encoding="utf-8"))
+    sqlite = resultado["resultados"]["sqlite"]
+    assert set(sqlite["errores"]) <= {"REQUIRES_REAUTH"}
+    assert sqlite["por_operacion"]["DELIVER"]["n"] == 4
+    assert sqlite["latencia"]["p99_ms"] >= sqlite["latencia"]["p50_ms"]
+    assert "commit" in resultado["metadatos"]
+    assert comparar(resultado, resultado)[1].startswith("sqlite: throughput_cmd_s")
+
+
+def test_benchmark_memoria_sin_sql():
+    resultado = bench_pipeline.ejecutar_benchmark(["memory"], ordenes=3, servicios=2, tasa_reauth=0.0, semilla=1)
+
+    memoria = resultado["resultados"]["memory"]
+    assert memoria["errores"] == {}
+    assert memoria["por_operacion"]["DELIVER"]["n"] == 3
+    assert memoria["consultas_sql_por_comando"] == 0
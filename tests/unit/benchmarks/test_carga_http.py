@@ -0,0 +1,55 @@
+"""Tests del generador de carga HTTP."""
+
+import asyncio
+import random
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+
+from app.infrastructure import db
+from app.infrastructure.models import Base
+from benchmarks.cargas import generar_flujo_orden
+from benchmarks.carga_http import a_peticion_rest, ConjuntoOrdenes, ejecutar_carga
+
+
+@pytest.fixture
+def app_sqlite(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'carga.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(db, "_engine", engine)
+    monkeypatch.setattr(db, "SessionLocal", None)
+    from app.drivers.api.main import app
+    yield app
+    engine.dispose()
+
+
+def test_todos_los_comandos_tienen_endpoint_rest():
+    flujo = generar_flujo_orden("ORD-1", 2, True, random.Random(1))
+    rutas = [a_peticion_rest(c)[1] for c in flujo]
+    assert rutas[0] == "/orders"
+    assert "/orders/ORD-1/reauthorize" in rutas
+    assert rutas[-1] == "/orders/ORD-1/deliver"
+    assert a_peticion_rest(flujo[3]) == ("POST", "/orders/ORD-1/set_state", {"state": "DIAGNOSED"})
+
+
+def test_conjunto_reemplaza_ordenes_terminadas():
+    ordenes = ConjuntoOrdenes(1, 1, 0.0, random.Random(1))
+    primera = ordenes.tomar(100)
+    assert primera[0]["op"] == "CREATE_ORDER" and primera[-1]["op"] == "DELIVER"
+    assert ordenes.ordenes_terminadas == 1
+    assert ordenes.tomar(1)[0]["data"]["order_id"] != primera[0]["data"]["order_id"]
+
+
+def test_carga_sin_contencion_no_produce_errores_de_secuencia(app_sqlite):
+    transporte = httpx.ASGITransport(app=app_sqlite, raise_app_exceptions=False)
+    resultado = asyncio.run(ejecutar_carga(
+        "http://test", duracion=0.5, tasa=0, concurrencia=1, tamano_lote=4,
+        ordenes_activas=2, fraccion_rest=0.5, servicios=1, tasa_reauth=0.0, transport=transporte
+    ))
+
+    assert resultado["requests"] > 0
+    assert resultado["excepciones"] == {}
+    assert "SEQUENCE_ERROR" not in resultado["errores_comandos"]
+    assert resultado["estados_http"]["POST /commands"].keys() == {"200"}
+    assert resultado["latencia"]["p99_ms"] >= resultado["latencia"]["p50_ms"]
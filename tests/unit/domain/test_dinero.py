@@ -38,3 +38,31 @@ def test_redondear_mitad_par_ejemplo_autorizacion():
     resultado = redondear_mitad_par(monto_con_iva, 2)
     assert resultado == Decimal("13340.00")
 
+
+
+def test_redondear_mitad_par_ignora_contexto_global():
+    from decimal import localcontext, ROUND_UP
+    
+    with localcontext() as ctx:
+        ctx.rounding = ROUND_UP
+        ctx.prec = 3
+        assert redondear_mitad_par(Decimal("12345.005"), 2) == Decimal("12345.00")
+
+
+def test_redondear_mitad_par_otros_decimales():
+    assert redondear_mitad_par(Decimal("2.5"), 0) == Decimal("2")
+    assert redondear_mitad_par(Decimal("3.5"), -1) == Decimal("4")
+    assert str(redondear_mitad_par(Decimal("1.23456789015"), 10)) == "1.2345678902"
+
+
+def test_a_decimal_reutiliza_textos_repetidos():
+    import pytest
+    from decimal import InvalidOperation
+    
+    assert a_decimal("1500.00") is a_decimal("1500.00")
+    assert str(a_decimal("1500.00")) == "1500.00"
+    valor = Decimal("7.10")
+    assert a_decimal(valor) is valor
+    assert a_decimal(0.1) == Decimal("0.1")
+    with pytest.raises(InvalidOperation):
+        a_decimal("no-es-numero")
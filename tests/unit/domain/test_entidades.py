@@ -317,3 +317,45 @@ def test_componente_costo_cero_valido():
         assert "no autorizada" in str(e.mensaje).lower()
 
 
+
+
+def test_entidades_sin_dict_por_instancia():
+    from dataclasses import FrozenInstanceError
+
+    momento = datetime.now()
+    entidades = [
+        Orden("ORD-001", "Juan", "ABC-123", momento),
+        Servicio("Frenos", Decimal("100.00")),
+        Componente("Pastillas", Decimal("50.00")),
+        Evento("CREATED", momento),
+        Cliente("Juan"),
+        Vehiculo("ABC-123", 1)
+    ]
+    for entidad in entidades:
+        assert not hasattr(entidad, "__dict__")
+
+    evento = entidades[3]
+    assert evento.metadatos == {}
+    with pytest.raises(FrozenInstanceError):
+        evento.tipo = "OTRO"
+
+
+def test_orden_hidratar_no_valida_order_id():
+    momento = datetime.now()
+    servicio = Servicio("Frenos", Decimal("100.00"))
+    servicio.id_servicio = 5
+    
+    orden = Orden.hidratar(
+        id=1, order_id="ord-legacy 1", cliente="Juan", vehiculo="ABC-123", estado=EstadoOrden.IN_PROGRESS,
+        servicios=[servicio], eventos=[], monto_autorizado=Decimal("500.00"), version_autorizacion=1,
+        total_real=Decimal("100.00"), fecha_creacion=momento
+    )
+    
+    assert orden.order_id == "ord-legacy 1"
+    assert orden.fecha_cancelacion is None
+    assert orden.obtener_servicio(5) is servicio
+    orden.establecer_costo_real(5, Decimal("120.00"))
+    assert orden.total_real == Decimal("120.00")
+    
+    with pytest.raises(ErrorDominio):
+        Orden("ord-legacy 1", "Juan", "ABC-123", momento)
@@ -0,0 +1,88 @@
+from decimal import Decimal
+from datetime import datetime
+
+import pytest
+
+from app.domain.entidades import Orden, Servicio, Componente
+from app.domain.enums import CodigoError
+from app.domain.exceptions import ErrorDominio
+
+
+def _servicio(id_servicio, ids_componentes):
+    componentes = []
+    for id_componente in ids_componentes:
+        componente = Componente(f"Repuesto {id_componente}", Decimal("10.00"))
+        componente.id_componente = id_componente
+        componentes.append(componente)
+    servicio = Servicio(f"Servicio {id_servicio}", Decimal("100.00"), componentes)
+    servicio.id_servicio = id_servicio
+    return servicio
+
+
+def test_ids_asignados_despues_de_agregar():
+    orden = Orden("ORD-IDX", "Juan", "ABC-123", datetime.utcnow())
+    orden.agregar_servicio(Servicio("Frenos", Decimal("100.00")))
+    assert orden.obtener_servicio(7) is None
+
+    # Como hace el repositorio al guardar
+    orden.servicios[0].id_servicio = 7
+    orden.agregar_servicio(_servicio(8, [80]))
+
+    assert orden.obtener_servicio(7) is orden.servicios[0]
+    assert orden.obtener_servicio(8) is orden.servicios[1]
+
+
+def test_hidratacion_reemplaza_la_lista():
+    orden = Orden("ORD-IDX", "Juan", "ABC-123", datetime.utcnow())
+    orden.agregar_servicio(_servicio(1, [10]))
+    assert orden.obtener_servicio(1) is not None
+
+    orden.servicios = [_servicio(2, [20, 21])]
+
+    assert orden.obtener_servicio(1) is None
+    assert orden.obtener_servicio(2) is orden.servicios[0]
+
+
+def test_componentes_solo_del_servicio_indicado():
+    orden = Orden("ORD-IDX", "Juan", "ABC-123", datetime.utcnow())
+    orden.agregar_servicio(_servicio(1, [10, 11]))
+    orden.agregar_servicio(_servicio(2, [20]))
+
+    orden.establecer_costo_real(1, None, {11: Decimal("30.00"), 20: Decimal("99.00"), 999: Decimal("1.00")})
+
+    assert orden.servicios[0].componentes[1].costo_real == Decimal("30.00")
+    assert orden.servicios[1].componentes[0].costo_real is None
+    assert orden.total_real == Decimal("140.00") + Decimal("110.00")
+
+
+def test_servicio_inexistente():
+    orden = Orden("ORD-IDX", "Juan", "ABC-123", datetime.utcnow())
+    for i in range(1, 301):
+        orden.agregar_servicio(_servicio(i, [i * 10]))
+
+    assert orden.obtener_servicio(300) is orden.servicios[-1]
+    with pytest.raises(ErrorDominio) as exc:
+        orden.establecer_costo_real(301, Decimal("1.00"))
+    assert exc.value.codigo == CodigoError.ORDER_NOT_FOUND
+
+
+def test_busqueda_fallida_no_reconstruye_el_indice(monkeypatch):
+    orden = Orden("ORD-IDX", "Juan", "ABC-123", datetime.utcnow())
+    orden.agregar_servicio(_servicio(1, [10, 11]))
+    orden.agregar_servicio(_servicio(2, [20]))
+    assert orden.obtener_servicio(1) is orden.servicios[0]
+
+    reconstrucciones = []
+    original = Orden._reconstruir_indices
+    monkeypatch.setattr(Orden, "_reconstruir_indices", lambda self: (reconstrucciones.append(1), original(self)))
+
+    assert orden.obtener_servicio(999) is None
+    assert orden._obtener_componente(orden.servicios[0], 20) is None
+    assert orden._obtener_componente(orden.servicios[0], 999) is None
+    assert reconstrucciones == []
+
+    # Un id indexado que cambió sí reconstruye, una sola vez
+    orden.servicios[1].componentes[0].id_componente = 21
+    assert orden._obtener_componente(orden.servicios[1], 20) is None
+    assert orden._obtener_componente(orden.servicios[1], 21) is orden.servicios[1].componentes[0]
+    assert reconstrucciones == [1]
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+
+from app.domain.entidades import Orden, Servicio, Componente, Evento
+from app.domain.enums import EstadoOrden
+from app.domain.exceptions import ErrorDominio
+from app.domain.zona_horaria import ahora
+
+
+def _estado(orden):
+    return (
+        orden.order_id, orden.cliente, orden.vehiculo, orden.estado, orden.monto_autorizado,
+        orden.version_autorizacion, orden.total_real, orden.fecha_creacion, orden.fecha_cancelacion,
+        [
+            (s.id_servicio, s.descripcion, s.costo_mano_obra_estimado, s.costo_real, s.completado,
+             [(c.id_componente, c.descripcion, c.costo_estimado, c.costo_real) for c in s.componentes])
+            for s in orden.servicios
+        ]
+    )
+
+
+def _orden_con_historia():
+    orden = Orden("ORD-ES-1", "Ana", "XYZ-123", ahora())
+    orden.registrar_creacion()
+    orden.agregar_servicio(Servicio("Frenos", Decimal("100"), [Componente("Pastillas", Decimal("50")), Componente("Disco", Decimal("80"))]))
+    orden.agregar_servicio(Servicio("Aceite", Decimal("40")))
+    orden.asignar_ids_locales()
+    orden.establecer_estado_diagnosticado()
+    orden.autorizar(Decimal("313.20"))
+    orden.establecer_estado_en_proceso()
+    orden.establecer_costo_real(1, Decimal("400"), {2: Decimal("90")}, completado=True)
+    orden.establecer_costo_real(2, Decimal("40"), completado=True)
+    with pytest.raises(ErrorDominio):
+        orden.intentar_completar()
+    orden.reautorizar(Decimal("450"))
+    orden.establecer_estado_en_proceso()
+    orden.intentar_completar()
+    return orden
+
+
+def test_desde_eventos_reproduce_la_orden():
+    orden = _orden_con_historia()
+
+    reconstruida = Orden.desde_eventos(list(orden.eventos), id=7, version=3)
+
+    assert _estado(reconstruida) == _estado(orden)
+    assert reconstruida.estado == EstadoOrden.COMPLETED
+    assert (reconstruida.id, reconstruida.version) == (7, 3)
+    assert reconstruida.eventos == orden.eventos
+
+
+def test_reconstruida_sigue_operando_con_reglas_y_totales():
+    orden = _orden_con_historia()
+    reconstruida = Orden.desde_eventos(list(orden.eventos))
+
+    reconstruida.entregar()
+
+    assert reconstruida.estado == EstadoOrden.DELIVERED
+    assert reconstruida._obtener_suma_real() == reconstruida.total_real == Decimal("440")
+
+
+def test_aplicar_eventos_desde_un_estado_intermedio():
+    orden = _orden_con_historia()
+    corte = 5
+    parcial = Orden.desde_eventos(list(orden.eventos[:corte]))
+
+    parcial.aplicar_eventos(orden.eventos[corte:])
+
+    assert _estado(parcial) == _estado(orden)
+
+
+def test_cancelacion_usa_la_fecha_del_evento():
+    orden = Orden("ORD-ES-2", "Ana", "XYZ-123", ahora())
+    orden.registrar_creacion()
+    orden.cancelar("Cliente desiste")
+
+    reconstruida = Orden.desde_eventos(list(orden.eventos))
+
+    assert reconstruida.estado == EstadoOrden.CANCELLED
+    assert reconstruida.fecha_cancelacion == orden.fecha_cancelacion == orden.eventos[-1].timestamp
+
+
+def test_historia_sin_datos_de_creacion_no_es_reconstruible():
+    eventos = [Evento("CREATED", ahora(), {}), Evento("DIAGNOSED", ahora(), {})]
+
+    assert not Orden.es_reconstruible(eventos)
+    with pytest.raises(ErrorDominio):
+        Orden.desde_eventos(eventos)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+from datetime import datetime
+
+import pytest
+
+from app.domain.entidades import Orden, Servicio, Componente
+from app.domain.entidades import order as modulo_orden
+
+
+def _orden_con_servicios(cantidad):
+    orden = Orden("ORD-INC", "Juan", "ABC-123", datetime.utcnow())
+    for i in range(1, cantidad + 1):
+        componente = Componente(f"Repuesto {i}", Decimal("50.00"))
+        componente.id_componente = i
+        servicio = Servicio(f"Servicio {i}", Decimal("100.00"), [componente])
+        servicio.id_servicio = i
+        orden.agregar_servicio(servicio)
+    return orden
+
+
+def _recalculo(orden):
+    return sum(s.calcular_costo_real() for s in orden.servicios)
+
+
+def test_deltas_coinciden_con_recalculo():
+    orden = _orden_con_servicios(5)
+
+    orden.establecer_costo_real(3, Decimal("200.00"))
+    assert orden.total_real == Decimal("800.00")
+
+    orden.establecer_costo_real(3, Decimal("120.00"))
+    orden.establecer_costo_real(5, None, {5: Decimal("80.00")})
+    assert orden.total_real == _recalculo(orden) == Decimal("750.00")
+
+
+def test_lista_reemplazada_o_modificada_fuera_de_la_orden():
+    orden = _orden_con_servicios(2)
+    orden.establecer_costo_real(1, Decimal("10.00"))
+
+    extra = Servicio("Extra", Decimal("40.00"))
+    extra.id_servicio = 3
+    orden.servicios.append(extra)
+    orden.establecer_costo_real(2, Decimal("10.00"))
+    assert orden.total_real == Decimal("60.00")
+
+    orden.servicios = orden.servicios[:1]
+    orden.establecer_costo_real(1, Decimal("15.00"))
+    assert orden.total_real == Decimal("15.00")
+
+
+def test_verificacion_detecta_desincronizacion(monkeypatch):
+    monkeypatch.setattr(modulo_orden, "VERIFICAR_TOTAL_REAL", True)
+    orden = _orden_con_servicios(2)
+    orden.establecer_costo_real(1, Decimal("10.00"))
+
+    # Cambio por fuera de establecer_costo_real que la suma incremental no ve
+    orden.servicios[1].costo_real = Decimal("999.00")
+
+    with pytest.raises(AssertionError):
+        orden.establecer_costo_real(1, Decimal("20.00"))
@@ -70,3 +70,19 @@ def test_ahora():
     assert fecha is not None
     assert hasattr(fecha, 'year')
 
+
+
+def test_ahora_usa_zona_cacheada_hasta_recargar():
+    from app.domain.zona_horaria import recargar_zona_horaria
+    
+    try:
+        with patch.dict(os.environ, {"TIMEZONE": "UTC"}):
+            recargar_zona_horaria()
+        assert str(ahora().tzinfo) == "UTC"
+        
+        with patch.dict(os.environ, {"TIMEZONE": "Europe/Madrid"}):
+            assert str(ahora().tzinfo) == "UTC"
+            recargar_zona_horaria()
+            assert str(ahora().tzinfo) == "Europe/Madrid"
+    finally:
+        recargar_zona_horaria()
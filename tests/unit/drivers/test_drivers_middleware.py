@@ -5,6 +5,16 @@ import pytest
 from app.drivers.api.middleware import LoggingMiddleware
 
 
+def _call_next_que_captura(response, capturados):
+    """call_next falso que guarda el request_id visible mientras se atiende la request."""
+    from app.infrastructure.logging_config import request_id_var
+
+    async def call_next(request):
+        capturados.append(request_id_var.get())
+        return response
+    return call_next
+
+
 def test_logging_middleware_init():
     app_mock = Mock()
     middleware = LoggingMiddleware(app_mock)
@@ -82,16 +92,16 @@ async def test_logging_middleware_genera_request_id():
     request.client.host = "127.0.0.1"
     request.headers = {}
     
-    response_mock = JSONResponse({"status": "ok"})
-    call_next = AsyncMock(return_value=response_mock)
+    capturados = []
+    call_next = _call_next_que_captura(JSONResponse({"status": "ok"}), capturados)
+    previo = request_id_var.get()
     
     response = await middleware.dispatch(request, call_next)
     
     assert "X-Request-ID" in response.headers
     assert len(response.headers["X-Request-ID"]) == 8
-    req_id = request_id_var.get(None)
-    assert req_id is not None
-    assert req_id == response.headers["X-Request-ID"]
+    assert capturados == [response.headers["X-Request-ID"]]
+    assert request_id_var.get() == previo
 
 
 @pytest.mark.asyncio
@@ -109,14 +119,13 @@ async def test_logging_middleware_usa_request_id_header_existente():
     request.client.host = "127.0.0.1"
     request.headers = {"X-Request-ID": "custom-id-123"}
     
-    response_mock = JSONResponse({"status": "ok"})
-    call_next = AsyncMock(return_value=response_mock)
+    capturados = []
+    call_next = _call_next_que_captura(JSONResponse({"status": "ok"}), capturados)
     
     response = await middleware.dispatch(request, call_next)
     
     assert response.headers["X-Request-ID"] == "custom-id-123"
-    req_id = request_id_var.get(None)
-    assert req_id == "custom-id-123"
+    assert capturados == ["custom-id-123"]
 
 
 @pytest.mark.asyncio
@@ -180,8 +189,9 @@ async def test_logging_middleware_request_id_en_error():
 
 @pytest.mark.asyncio
 async def test_logging_middleware_request_id_se_propaga():
-    """Test que el request_id se propaga correctamente en el contexto."""
-    from app.infrastructure.logging_config import request_id_var
+    """Test que el request_id se propaga en el contexto y se restaura al terminar."""
+    from app.infrastructure.logging_config import request_id_var, ruta_var
+    from app.infrastructure.perfilador import perfil_var
     
     app = FastAPI()
     middleware = LoggingMiddleware(app)
@@ -191,16 +201,39 @@ async def test_logging_middleware_request_id_se_propaga():
     request.url.path = "/orders"
     request.client = MagicMock()
     request.client.host = "192.168.1.1"
-    request.headers = {}
+    request.headers = {"X-Profile": "1"}
     
-    response_mock = JSONResponse({"status": "created"}, status_code=201)
-    call_next = AsyncMock(return_value=response_mock)
+    capturados = []
+    call_next = _call_next_que_captura(JSONResponse({"status": "created"}, status_code=201), capturados)
+    previos = (request_id_var.get(), ruta_var.get(), perfil_var.get())
     
     await middleware.dispatch(request, call_next)
     
-    req_id = request_id_var.get(None)
-    assert req_id is not None
-    assert len(req_id) == 8
+    assert len(capturados[0]) == 8
+    assert (request_id_var.get(), ruta_var.get(), perfil_var.get()) == previos
+
+
+@pytest.mark.asyncio
+async def test_logging_middleware_restaura_contexto_tras_error():
+    """Test que un error no deja el request_id de la request en el contexto."""
+    from app.infrastructure.logging_config import request_id_var, ruta_var
+    
+    app = FastAPI()
+    middleware = LoggingMiddleware(app)
+    
+    request = MagicMock()
+    request.method = "GET"
+    request.url.path = "/test"
+    request.client = None
+    request.headers = {"X-Request-ID": "req-error"}
+    
+    call_next = AsyncMock(side_effect=RuntimeError("Error de prueba"))
+    previos = (request_id_var.get(), ruta_var.get())
+    
+    with pytest.raises(RuntimeError):
+        await middleware.dispatch(request, call_next)
+    
+    assert (request_id_var.get(), ruta_var.get()) == previos
 
 
 @pytest.mark.asyncio
@@ -252,3 +285,52 @@ async def test_logging_middleware_diferentes_status_codes():
         assert response.status_code == status
         assert "X-Request-ID" in response.headers
 
+
+
+def _request_mock():
+    request = MagicMock()
+    request.method = "POST"
+    request.url.path = "/commands"
+    request.client = MagicMock()
+    request.client.host = "127.0.0.1"
+    request.headers = {}
+    return request
+
+
+@pytest.mark.asyncio
+async def test_logging_middleware_server_timing_con_consultas():
+    """Test que el middleware expone consultas y tiempo de BD del request en Server-Timing."""
+    from app.infrastructure.consultas_sql import estadisticas_consultas_var
+    
+    middleware = LoggingMiddleware(FastAPI())
+    
+    async def call_next(request):
+        estadisticas_consultas_var.get().registrar(4.5)
+        estadisticas_consultas_var.get().registrar(0.5)
+        return JSONResponse({"status": "ok"})
+    
+    response = await middleware.dispatch(_request_mock(), call_next)
+    
+    assert response.headers["Server-Timing"].startswith('db;dur=5.00;desc="2 consultas"')
+    assert estadisticas_consultas_var.get() is None
+
+
+@pytest.mark.asyncio
+async def test_logging_middleware_presupuesto_consultas_excedido(monkeypatch):
+    """Test que se marca el request cuando excede el presupuesto de consultas."""
+    from unittest.mock import patch
+    from app.infrastructure.consultas_sql import estadisticas_consultas_var
+    
+    monkeypatch.setenv("SQL_QUERY_BUDGET", "2")
+    middleware = LoggingMiddleware(FastAPI())
+    
+    async def call_next(request):
+        for _ in range(3):
+            estadisticas_consultas_var.get().registrar(1.0)
+        return JSONResponse({"status": "ok"})
+    
+    with patch('app.drivers.api.middleware.logger') as mock_logger:
+        await middleware.dispatch(_request_mock(), call_next)
+    
+    mock_logger.warning.assert_called_once()
+    assert mock_logger.warning.call_args.kwargs["extra"]["db_queries"] == 3
@@ -78,8 +78,6 @@ def test_procesar_comandos_exitoso():
 
 def test_procesar_comandos_error():
     from unittest.mock import Mock
-    import pytest
-    from fastapi import HTTPException, status
     from app.drivers.api.routes import procesar_comandos
     from app.drivers.api.schemas import CommandsRequest
     
@@ -88,6 +86,35 @@ def test_procesar_comandos_error():
     
     request = CommandsRequest(commands=[{"op": "CREATE_ORDER", "data": {}}])
     
-    with pytest.raises(HTTPException) as exc:
-        procesar_comandos(request, action_service)
-    assert exc.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
\ No newline at end of file
+    resultado = procesar_comandos(request, action_service)
+    assert [(e["op"], e["code"], e["message"]) for e in resultado.errors] == [("CREATE_ORDER", "INTERNAL_ERROR", "Error general")]
+
+
+def test_procesar_comandos_error_conserva_los_resultados_de_otras_ordenes():
+    from unittest.mock import Mock
+    from app.application.dtos import OrdenDTO
+    from app.drivers.api.routes import procesar_comandos
+    from app.drivers.api.schemas import CommandsRequest
+    
+    orden_b = OrdenDTO(
+        order_id="ORD-B", status="CREATED", customer="Ana", vehicle="XYZ", services=[],
+        subtotal_estimated="0.00", authorization_version=0, real_total="0.00", events=[]
+    )
+    
+    def procesar(comando):
+        if comando["data"]["order_id"] == "ORD-A":
+            raise RuntimeError("Fallo en ORD-A")
+        return orden_b, [], None
+    
+    action_service = Mock()
+    action_service.procesar_comando.side_effect = procesar
+    request = CommandsRequest(commands=[
+        {"op": "ADD_SERVICE", "data": {"order_id": "ORD-A"}},
+        {"op": "ADD_SERVICE", "data": {"order_id": "ORD-A"}},
+        {"op": "ADD_SERVICE", "data": {"order_id": "ORD-B"}}
+    ])
+    
+    resultado = procesar_comandos(request, action_service)
+    assert [o["order_id"] for o in resultado.orders] == ["ORD-B"]
+    assert [(e["order_id"], e["code"]) for e in resultado.errors] == [("ORD-A", "INTERNAL_ERROR"), ("ORD-A", "INTERNAL_ERROR")]
+    assert action_service.procesar_comando.call_count == 2
\ No newline at end of file
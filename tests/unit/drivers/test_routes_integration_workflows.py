@@ -67,6 +67,7 @@ class TestOrderManagementEndpoints:
         mock_service_instance = MagicMock()
         mock_service.return_value = mock_service_instance
         mock_service_instance.auditoria = MagicMock()
+        mock_service_instance.ejecutar_con_reintentos.side_effect = lambda op, funcion: funcion()
         
         # Expected result DTO with all required fields
         mock_result_dto = OrdenDTO(
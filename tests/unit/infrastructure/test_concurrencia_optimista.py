@@ -0,0 +1,136 @@
+"""Tests del control optimista de concurrencia sobre la columna version de ordenes."""
+
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entidades import Orden, Servicio
+from app.domain.enums import CodigoError
+from app.domain.exceptions import ErrorDominio
+from app.domain.zona_horaria import ahora
+from app.infrastructure.db import construir_engine
+from app.infrastructure.models import Base
+from app.infrastructure.repositories import UnidadTrabajoSQL, RepositorioOrdenMemoria
+from app.infrastructure.relay_outbox import AlmacenEventosDiferido
+from app.application.action_service import ActionService
+
+
+SERVICIOS = 4
+
+
+@pytest.fixture
+def fabrica_sesiones(tmp_path):
+    engine = construir_engine(f"sqlite:///{tmp_path / 'talleres.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _orden_en_proceso(order_id="ORD-001"):
+    orden = Orden(order_id, "Cliente", "ABC-123", ahora())
+    for i in range(SERVICIOS):
+        orden.agregar_servicio(Servicio(f"Servicio {i}", Decimal("100.00")))
+    orden.establecer_estado_diagnosticado()
+    orden.autorizar(Decimal("1000.00"))
+    orden.establecer_estado_en_proceso()
+    return orden
+
+
+def _repo(sesion):
+    return UnidadTrabajoSQL(sesion).obtener_repositorio_orden()
+
+
+def test_guardar_incrementa_version(fabrica_sesiones):
+    sesion = fabrica_sesiones()
+    repo = _repo(sesion)
+    orden = _orden_en_proceso()
+    repo.guardar(orden)
+    assert orden.version == 1
+
+    leida = repo.obtener("ORD-001")
+    assert leida.version == 1
+    leida.establecer_costo_real(leida.servicios[0].id_servicio, Decimal("90.00"))
+    repo.guardar(leida)
+    assert leida.version == 2
+    assert repo.obtener("ORD-001").version == 2
+    sesion.close()
+
+
+def test_escritura_con_version_vieja_es_conflicto(fabrica_sesiones):
+    sesion = fabrica_sesiones()
+    _repo(sesion).guardar(_orden_en_proceso())
+    sesion.close()
+
+    sesion_a, sesion_b = fabrica_sesiones(), fabrica_sesiones()
+    repo_a, repo_b = _repo(sesion_a), _repo(sesion_b)
+    orden_a, orden_b = repo_a.obtener("ORD-001"), repo_b.obtener("ORD-001")
+
+    orden_a.establecer_costo_real(orden_a.servicios[0].id_servicio, Decimal("90.00"))
+    repo_a.guardar(orden_a)
+
+    orden_b.establecer_costo_real(orden_b.servicios[1].id_servicio, Decimal("80.00"))
+    with pytest.raises(ErrorDominio) as exc:
+        repo_b.guardar(orden_b)
+    assert exc.value.codigo == CodigoError.CONCURRENT_MODIFICATION
+
+    # La escritura perdedora no pisó a la ganadora
+    guardada = repo_b.obtener("ORD-001")
+    assert guardada.version == 2
+    assert guardada.servicios[0].costo_real == Decimal("90.00")
+    assert guardada.servicios[1].costo_real is None
+    sesion_a.close()
+    sesion_b.close()
+
+
+def test_costos_reales_concurrentes_se_reintentan(fabrica_sesiones):
+    sesion = fabrica_sesiones()
+    orden = _orden_en_proceso()
+    _repo(sesion).guardar(orden)
+    ids = [s.id_servicio for s in orden.servicios]
+    sesion.close()
+
+    errores = []
+    barrera = threading.Barrier(SERVICIOS)
+
+    def establecer(id_servicio):
+        sesion = fabrica_sesiones()
+        try:
+            servicio = ActionService(_repo(sesion), AlmacenEventosDiferido(), max_reintentos=20)
+            barrera.wait()
+            _, _, error = servicio.procesar_comando({
+                "op": "SET_REAL_COST",
+                "data": {"order_id": "ORD-001", "service_id": id_servicio, "real_cost": "95.00"}
+            })
+            if error is not None:
+                errores.append(error)
+        finally:
+            sesion.close()
+
+    hilos = [threading.Thread(target=establecer, args=(i,)) for i in ids]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    sesion = fabrica_sesiones()
+    guardada = _repo(sesion).obtener("ORD-001")
+    assert all(s.costo_real == Decimal("95.00") for s in guardada.servicios)
+    assert guardada.total_real == Decimal("380.00")
+    assert guardada.version == 1 + SERVICIOS
+    sesion.close()
+
+
+def test_repositorio_memoria_detecta_conflicto():
+    repo = RepositorioOrdenMemoria()
+    repo.guardar(_orden_en_proceso())
+
+    orden_a, orden_b = repo.obtener("ORD-001"), repo.obtener("ORD-001")
+    repo.guardar(orden_a)
+    assert orden_a.version == 2
+
+    with pytest.raises(ErrorDominio) as exc:
+        repo.guardar(orden_b)
+    assert exc.value.codigo == CodigoError.CONCURRENT_MODIFICATION
@@ -0,0 +1,79 @@
+"""Tests del log de consultas lentas."""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.infrastructure import consultas_lentas
+from app.infrastructure.consultas_lentas import activar_log_consultas_lentas, sanitizar_parametros, obtener_umbral_consultas_lentas
+from app.infrastructure.logging_config import request_id_var, ruta_var, operacion_var
+
+
+@pytest.fixture
+def registros(monkeypatch):
+    capturados = []
+    monkeypatch.setattr(consultas_lentas.logger, "warning", lambda msg, extra=None: capturados.append((msg, extra)))
+    return capturados
+
+
+def test_registra_consultas_sobre_el_umbral_con_contexto(registros):
+    engine = activar_log_consultas_lentas(create_engine("sqlite://"), umbral_ms=0.000001)
+    request_id_var.set("req-lenta")
+    ruta_var.set("POST /commands")
+    token = operacion_var.set("CREATE_ORDER")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :password AS p, :placa AS q"), {"password": "secreto", "placa": "ABC-123"})
+    finally:
+        operacion_var.reset(token)
+        request_id_var.set(None)
+        ruta_var.set(None)
+
+    msg, extra = registros[-1]
+    assert "CONSULTA LENTA" in msg
+    assert extra["request_id"] == "req-lenta"
+    assert extra["ruta"] == "POST /commands"
+    assert extra["operacion"] == "CREATE_ORDER"
+    assert extra["sentencia"].startswith("SELECT")
+    assert "secreto" not in str(extra["parametros"])
+    assert "ABC-123" in str(extra["parametros"])
+
+
+def test_no_registra_consultas_rapidas(registros):
+    engine = activar_log_consultas_lentas(create_engine("sqlite://"), umbral_ms=60000)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert registros == []
+
+
+def test_desactivado_sin_umbral(monkeypatch):
+    monkeypatch.delenv("SLOW_QUERY_MS", raising=False)
+    engine = create_engine("sqlite://")
+    assert obtener_umbral_consultas_lentas() == 0
+    activar_log_consultas_lentas(engine)
+    from sqlalchemy import event
+    assert not event.contains(engine, "after_cursor_execute", consultas_lentas._despues_de_ejecutar)
+
+
+def test_sanitizar_parametros_recorta_valores_y_filas():
+    assert sanitizar_parametros(("x" * 500,))[0].endswith("...")
+    filas = sanitizar_parametros([{"a": i} for i in range(8)], executemany=True)
+    assert len(filas) == consultas_lentas.MAXIMO_FILAS_EXECUTEMANY + 1
+    assert "3 filas más" in filas[-1]
+    assert sanitizar_parametros({"token": "t", "n": 1}) == {"token": "***", "n": 1}
+
+
+def test_ignora_engines_que_no_son_sqlalchemy():
+    objeto = object()
+    assert activar_log_consultas_lentas(objeto, umbral_ms=1) is objeto
+
+
+def test_umbral_se_libera_con_el_engine():
+    import gc
+    import weakref
+    engine = activar_log_consultas_lentas(create_engine("sqlite://"), umbral_ms=50)
+    assert consultas_lentas._umbrales[engine] == 50
+    referencia = weakref.ref(engine)
+    engine.dispose()
+    del engine
+    gc.collect()
+    assert referencia() is None
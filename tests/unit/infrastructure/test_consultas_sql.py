@@ -0,0 +1,67 @@
+"""Tests del conteo y tiempo de consultas SQL por request."""
+
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.infrastructure.consultas_sql import (
+    instrumentar_engine, iniciar_medicion, finalizar_medicion,
+    obtener_presupuesto_consultas, estadisticas_consultas_var
+)
+
+
+@pytest.fixture
+def engine():
+    engine = instrumentar_engine(create_engine("sqlite://"))
+    yield engine
+    engine.dispose()
+
+
+def test_cuenta_consultas_dentro_de_la_medicion(engine):
+    token = iniciar_medicion("req-1")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+    estadisticas = finalizar_medicion(token)
+
+    assert estadisticas.request_id == "req-1"
+    assert estadisticas.consultas == 2
+    assert estadisticas.tiempo_ms >= 0
+    assert estadisticas_consultas_var.get() is None
+
+
+def test_fuera_de_request_no_acumula(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert estadisticas_consultas_var.get() is None
+
+
+def test_consulta_fallida_no_desbalancea_tiempos(engine):
+    token = iniciar_medicion()
+    with engine.connect() as conn:
+        with pytest.raises(Exception):
+            conn.execute(text("SELECT * FROM tabla_inexistente"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info.get("inicio_consultas") == []
+    estadisticas = finalizar_medicion(token)
+
+    assert estadisticas.consultas == 1
+
+
+def test_instrumentar_engine_es_idempotente(engine):
+    instrumentar_engine(engine)
+    token = iniciar_medicion()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert finalizar_medicion(token).consultas == 1
+
+
+def test_instrumentar_ignora_objetos_que_no_son_engine():
+    falso = Mock()
+    assert instrumentar_engine(falso) is falso
+
+
+def test_presupuesto_consultas_configurable(monkeypatch):
+    monkeypatch.setenv("SQL_QUERY_BUDGET", "7")
+    assert obtener_presupuesto_consultas() == 7
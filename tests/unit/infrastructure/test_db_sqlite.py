@@ -0,0 +1,146 @@
+"""Tests del backend SQLite (DATABASE_URL=sqlite:///...) con WAL."""
+
+import random
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.db import obtener_url_bd, construir_engine
+from app.infrastructure.models import Base
+from app.infrastructure.repositories import UnidadTrabajoSQL
+from app.infrastructure.relay_outbox import AlmacenEventosDiferido
+from app.application.action_service import ActionService
+from app.application.mappers import crear_orden_dto
+from app.application.acciones.orden import CrearOrden
+from benchmarks.cargas import generar_flujo_orden
+
+
+@pytest.fixture
+def engine_sqlite(tmp_path):
+    engine = construir_engine(f"sqlite:///{tmp_path / 'talleres.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_database_url_tiene_prioridad(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///talleres.db")
+    monkeypatch.setenv("DB_HOST", "otro")
+
+    assert obtener_url_bd() == "sqlite:///talleres.db"
+
+
+def test_pragmas_al_conectar(engine_sqlite):
+    with engine_sqlite.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert conn.execute(text("PRAGMA mmap_size")).scalar() > 0
+
+
+def test_busy_timeout_configurable(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "1234")
+    engine = construir_engine(f"sqlite:///{tmp_path / 'otra.db'}")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+    finally:
+        engine.dispose()
+
+
+def test_repositorios_sobre_sqlite(engine_sqlite):
+    fabrica = sessionmaker(bind=engine_sqlite)
+
+    sesion = fabrica()
+    unidad = UnidadTrabajoSQL(sesion)
+    accion = CrearOrden(unidad.obtener_repositorio_orden(), AlmacenEventosDiferido(),
+                        unidad.obtener_repositorio_cliente(), unidad.obtener_repositorio_vehiculo())
+    accion.ejecutar(crear_orden_dto({"order_id": "ORD-LITE", "customer": "Ana", "vehicle": "ABC-123"}))
+    sesion.commit()
+    sesion.close()
+
+    for comando in generar_flujo_orden("ORD-LITE", servicios=2, reautorizar=False, aleatorio=random.Random(1))[1:]:
+        sesion = fabrica()
+        _, _, error = ActionService(UnidadTrabajoSQL(sesion).obtener_repositorio_orden(), AlmacenEventosDiferido()).procesar_comando(comando)
+        sesion.commit()
+        sesion.close()
+        assert error is None
+
+    sesion = fabrica()
+    unidad = UnidadTrabajoSQL(sesion)
+    orden = unidad.obtener_repositorio_orden().obtener("ORD-LITE")
+    assert orden.estado.value == "DELIVERED"
+    assert len(orden.servicios) == 2
+    assert unidad.obtener_repositorio_cliente().buscar_por_nombre("Ana") is not None
+    assert unidad.obtener_repositorio_vehiculo().buscar_por_placa("ABC-123") is not None
+    sesion.close()
+
+
+def test_escrituras_concurrentes_esperan_el_bloqueo(engine_sqlite):
+    fabrica = sessionmaker(bind=engine_sqlite)
+    errores = []
+
+    def crear(n):
+        for i in range(10):
+            sesion = fabrica()
+            try:
+                servicio = ActionService(UnidadTrabajoSQL(sesion).obtener_repositorio_orden(), AlmacenEventosDiferido())
+                _, _, error = servicio.procesar_comando({
+                    "op": "CREATE_ORDER",
+                    "data": {"order_id": f"ORD-{n}-{i}", "customer": "Ana", "vehicle": "ABC-123"}
+                })
+                sesion.commit()
+                if error is not None:
+                    errores.append(error)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                sesion.close()
+
+    hilos = [threading.Thread(target=crear, args=(n,)) for n in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    with engine_sqlite.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM ordenes")).scalar() == 40
+
+
+def test_cliente_creado_por_otra_transaccion_se_relee(engine_sqlite, monkeypatch):
+    fabrica = sessionmaker(bind=engine_sqlite)
+    sesion_a, sesion_b = fabrica(), fabrica()
+    repo_a = UnidadTrabajoSQL(sesion_a).obtener_repositorio_cliente()
+    # La búsqueda de A no ve al cliente: B lo crea antes de que A inserte
+    buscar = repo_a.buscar_por_nombre
+    monkeypatch.setattr(repo_a, "buscar_por_nombre", lambda nombre: monkeypatch.setattr(repo_a, "buscar_por_nombre", buscar))
+    ganador = UnidadTrabajoSQL(sesion_b).obtener_repositorio_cliente().buscar_o_crear_por_nombre("Ana")
+
+    assert repo_a.buscar_o_crear_por_nombre("Ana").id_cliente == ganador.id_cliente
+    sesion_a.close()
+    sesion_b.close()
+
+
+def test_commands_en_paralelo_por_orden(engine_sqlite):
+    from app.drivers.api.routes import procesar_comandos
+    from app.drivers.api.schemas import CommandsRequest
+
+    flujos = [generar_flujo_orden(f"ORD-P{n}", servicios=2, reautorizar=False, aleatorio=random.Random(n)) for n in range(4)]
+    intercalados = [c for grupo in zip(*flujos) for c in grupo]
+
+    sesion = sessionmaker(bind=engine_sqlite)()
+    servicio = ActionService(UnidadTrabajoSQL(sesion).obtener_repositorio_orden(), AlmacenEventosDiferido())
+    respuesta = procesar_comandos(CommandsRequest(commands=intercalados), servicio)
+    sesion.close()
+
+    assert respuesta.errors == []
+    assert [o["order_id"] for o in respuesta.orders] == [f"ORD-P{n}" for n in range(4)]
+    for n in range(4):
+        tipos = [e["type"] for e in respuesta.events if e["order_id"] == f"ORD-P{n}"]
+        assert tipos[0] == "CREATED" and tipos[-1] == "DELIVERED"
+    with engine_sqlite.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM ordenes WHERE estado = 'DELIVERED'")).scalar() == 4
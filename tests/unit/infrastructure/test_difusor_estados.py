@@ -0,0 +1,107 @@
+"""Tests del difusor de cambios de estado que alimenta GET /events/stream."""
+
+import json
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.domain.entidades import Orden
+from app.infrastructure.difusor_estados import DifusorEstados, difusor_estados
+from app.infrastructure.repositories import RepositorioOrdenMemoria
+from app.drivers.api import routes
+
+
+def test_entrega_cambios_publicados_desde_otro_hilo():
+    async def escenario():
+        difusor = DifusorEstados(max_suscriptores=2, capacidad_cola=10)
+        suscripcion = difusor.suscribir()
+        hilo = threading.Thread(target=difusor.publicar, args=("ORD-1", "CREATED", "DIAGNOSED", datetime(2025, 3, 1, 9)))
+        hilo.start()
+        mensaje = await suscripcion.siguiente(2)
+        hilo.join()
+        return mensaje
+
+    mensaje = asyncio.run(escenario())
+    assert (mensaje["order_id"], mensaje["from"], mensaje["to"]) == ("ORD-1", "CREATED", "DIAGNOSED")
+    assert mensaje["timestamp"] == "2025-03-01T09:00:00"
+
+
+def test_tope_de_suscriptores_y_cancelacion():
+    async def escenario():
+        difusor = DifusorEstados(max_suscriptores=1, capacidad_cola=10)
+        primera = difusor.suscribir()
+        assert difusor.suscribir() is None
+        difusor.cancelar(primera)
+        assert difusor.suscribir() is not None
+        assert difusor.cantidad == 1
+
+    asyncio.run(escenario())
+
+
+def test_cliente_lento_se_desborda_sin_frenar_a_los_demas():
+    async def escenario():
+        difusor = DifusorEstados(max_suscriptores=2, capacidad_cola=3)
+        lenta = difusor.suscribir()
+        rapida = difusor.suscribir()
+        recibidos = []
+        for i in range(5):
+            difusor.publicar(f"ORD-{i}", None, "CREATED", None)
+            await asyncio.sleep(0)
+            recibidos.append(await rapida.siguiente(1))
+        return await lenta.siguiente(1), lenta.cola.qsize(), recibidos
+
+    marca, pendientes, recibidos = asyncio.run(escenario())
+    assert marca is None
+    assert pendientes == 0
+    assert [m["order_id"] for m in recibidos] == [f"ORD-{i}" for i in range(5)]
+
+
+def test_repositorio_publica_solo_transiciones_de_estado():
+    async def escenario():
+        suscripcion = difusor_estados.suscribir()
+        try:
+            repo = RepositorioOrdenMemoria()
+            orden = Orden("ORD-SSE-1", "Ana", "ABC-123", datetime(2025, 3, 1, 9))
+            orden.registrar_creacion()
+            await asyncio.to_thread(repo.guardar, orden)
+            orden = repo.obtener("ORD-SSE-1")
+            orden.cliente = "Ana María"
+            await asyncio.to_thread(repo.guardar, orden)
+            orden = repo.obtener("ORD-SSE-1")
+            orden.cancelar("Cliente desiste")
+            await asyncio.to_thread(repo.guardar, orden)
+            return [await suscripcion.siguiente(1), await suscripcion.siguiente(1), suscripcion.cola.qsize()]
+        finally:
+            difusor_estados.cancelar(suscripcion)
+
+    creada, cancelada, pendientes = asyncio.run(escenario())
+    assert (creada["from"], creada["to"]) == (None, "CREATED")
+    assert (cancelada["from"], cancelada["to"]) == ("CREATED", "CANCELLED")
+    assert pendientes == 0
+
+
+def test_endpoint_transmite_cambios_como_sse(monkeypatch):
+    async def escenario():
+        respuesta = await routes.stream_estados()
+        partes = respuesta.body_iterator
+        inicio = await partes.__anext__()
+        difusor_estados.publicar("ORD-SSE-2", "AUTHORIZED", "IN_PROGRESS", None)
+        mensaje = await partes.__anext__()
+        await partes.aclose()
+        return respuesta, inicio, mensaje
+
+    respuesta, inicio, mensaje = asyncio.run(escenario())
+    assert respuesta.media_type == "text/event-stream"
+    assert inicio.startswith("retry:")
+    lineas = mensaje.strip().split("\n")
+    assert lineas[1] == "event: status"
+    assert json.loads(lineas[2][len("data: "):])["to"] == "IN_PROGRESS"
+    assert difusor_estados.cantidad == 0
+
+    monkeypatch.setattr(difusor_estados, "max_suscriptores", 0)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(routes.stream_estados())
+    assert error.value.status_code == 503
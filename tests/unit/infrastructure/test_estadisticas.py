@@ -0,0 +1,129 @@
+"""Tests de los contadores de órdenes por día, estado y cliente (GET /stats)."""
+
+import random
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.zona_horaria import a_zona_horaria, recargar_zona_horaria
+from app.infrastructure.db import construir_engine
+from app.infrastructure.models import Base, EstadisticaOrdenModel
+from app.infrastructure.repositories import UnidadTrabajoSQL, RepositorioEstadisticasSQL
+from app.infrastructure.repositories.repositorio_estadisticas import contribucion, diferencias
+from app.infrastructure.relay_outbox import AlmacenEventosDiferido
+from app.application.action_service import ActionService
+from benchmarks.cargas import generar_flujo_orden
+
+
+TODAS = ["dia", "estado", "cliente"]
+
+
+@pytest.fixture
+def fabrica_sesiones(tmp_path):
+    engine = construir_engine(f"sqlite:///{tmp_path / 'talleres.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _cargar(fabrica_sesiones, ordenes=12):
+    """Órdenes de tres clientes en tres días, cada una cortada en un punto distinto de su flujo."""
+    aleatorio = random.Random(7)
+    sesion = fabrica_sesiones()
+    servicio = ActionService(UnidadTrabajoSQL(sesion).obtener_repositorio_orden(), AlmacenEventosDiferido())
+    for i in range(ordenes):
+        inicio = datetime(2025, 3, 1, 15, 0, tzinfo=timezone.utc) + timedelta(days=i % 3)
+        comandos = generar_flujo_orden(f"ORD-EST-{i}", servicios=2, reautorizar=i % 4 == 0, aleatorio=aleatorio, inicio=inicio)
+        comandos[0]["data"]["customer"] = f"Cliente {i % 3}"
+        for comando in comandos[:aleatorio.randint(1, len(comandos))]:
+            servicio.procesar_comando(comando)
+    sesion.close()
+
+
+def _esperadas(repo, ordenes=12):
+    """Lo que daría recorrer todas las órdenes."""
+    grupos = {}
+    for i in range(ordenes):
+        orden = repo.obtener(f"ORD-EST-{i}")
+        clave = (a_zona_horaria(orden.fecha_creacion).date(), orden.estado.value, orden.cliente)
+        cantidad, autorizado, real = grupos.get(clave, (0, Decimal("0"), Decimal("0")))
+        grupos[clave] = (cantidad + 1, autorizado + (orden.monto_autorizado or 0), real + orden.total_real)
+    return grupos
+
+
+def _como_dict(filas):
+    return {(f.dia, f.estado, f.cliente): (f.cantidad, f.monto_autorizado, f.total_real) for f in filas}
+
+
+@pytest.mark.parametrize("event_sourcing", ["false", "true"])
+def test_contadores_coinciden_con_recorrer_las_ordenes(fabrica_sesiones, monkeypatch, event_sourcing):
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", event_sourcing)
+    _cargar(fabrica_sesiones)
+    repo = UnidadTrabajoSQL(fabrica_sesiones()).obtener_repositorio_orden()
+
+    esperadas = _esperadas(repo)
+    assert _como_dict(repo.estadisticas(TODAS)) == esperadas
+    assert len({estado for _, estado, _ in esperadas}) > 1
+
+    por_estado = {f.estado: f.cantidad for f in repo.estadisticas(["estado"])}
+    assert sum(por_estado.values()) == 12
+    [total] = repo.estadisticas([])
+    assert total.cantidad == 12
+    assert total.total_real == sum(real for _, _, real in esperadas.values())
+
+
+def test_filtros_por_dia_y_cliente(fabrica_sesiones):
+    _cargar(fabrica_sesiones)
+    repo = UnidadTrabajoSQL(fabrica_sesiones()).obtener_repositorio_orden()
+    esperadas = _esperadas(repo)
+
+    dia = date(2025, 3, 2)
+    filas = repo.estadisticas(["dia", "cliente"], desde=dia, hasta=dia, cliente="Cliente 1")
+    assert [(f.dia, f.cliente) for f in filas] == [(dia, "Cliente 1")]
+    assert filas[0].estado is None
+    assert filas[0].cantidad == sum(c for (d, _, cl), (c, _, _) in esperadas.items() if d == dia and cl == "Cliente 1")
+
+
+def test_recalcular_reconstruye_los_mismos_contadores(fabrica_sesiones):
+    _cargar(fabrica_sesiones)
+    sesion = fabrica_sesiones()
+    repo = UnidadTrabajoSQL(sesion).obtener_repositorio_orden()
+    antes = _como_dict(repo.estadisticas(TODAS))
+
+    assert RepositorioEstadisticasSQL(sesion).recalcular() == 12
+    assert _como_dict(repo.estadisticas(TODAS)) == antes
+
+
+def test_guardar_sin_cambios_no_toca_los_contadores():
+    actual = contribucion(datetime(2025, 3, 1, 23, 30), "CREATED", 1, None, "0")
+    assert diferencias(actual, actual) == []
+    [(grupo, cantidad, _, _)] = diferencias(None, actual)
+    assert (grupo, cantidad) == ((date(2025, 3, 1), "CREATED", 1), 1)
+
+
+@pytest.mark.parametrize("event_sourcing", ["false", "true"])
+def test_creada_cerca_de_medianoche_utc_queda_en_un_solo_dia(fabrica_sesiones, monkeypatch, event_sourcing):
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", event_sourcing)
+    monkeypatch.setenv("TIMEZONE", "America/Bogota")
+    recargar_zona_horaria()
+    try:
+        sesion = fabrica_sesiones()
+        servicio = ActionService(UnidadTrabajoSQL(sesion).obtener_repositorio_orden(), AlmacenEventosDiferido())
+        # 03:00 UTC del 2 de enero es el 1 de enero en Bogotá
+        servicio.procesar_comando({"op": "CREATE_ORDER", "ts": "2025-01-02T03:00:00Z",
+                                   "data": {"order_id": "ORD-TZ", "customer": "Ana", "vehicle": "ABC-1"}})
+        servicio.procesar_comando({"op": "SET_STATE_DIAGNOSED", "data": {"order_id": "ORD-TZ"}})
+        sesion.close()
+
+        sesion = fabrica_sesiones()
+        repo = UnidadTrabajoSQL(sesion).obtener_repositorio_orden()
+        filas = [(f.dia, f.estado, f.cantidad) for f in repo.estadisticas(["dia", "estado"])]
+        assert filas == [(date(2025, 1, 1), "DIAGNOSED", 1)]
+        # Ningún grupo quedó con cantidades negativas ocultas por HAVING
+        assert [(fila.dia, fila.cantidad) for fila in sesion.query(EstadisticaOrdenModel).filter(EstadisticaOrdenModel.cantidad != 0)] == [(date(2025, 1, 1), 1)]
+        sesion.close()
+    finally:
+        monkeypatch.undo()
+        recargar_zona_horaria()
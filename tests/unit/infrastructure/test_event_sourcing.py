@@ -0,0 +1,167 @@
+"""Tests de órdenes reconstruidas desde eventos e instantáneas (ORDER_EVENT_SOURCING)."""
+
+import random
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entidades import Orden, Servicio
+from app.domain.enums import CodigoError
+from app.domain.exceptions import ErrorDominio
+from app.domain.zona_horaria import ahora
+from app.infrastructure.db import construir_engine
+from app.infrastructure.models import Base
+from app.infrastructure.repositories import UnidadTrabajoSQL
+from app.infrastructure.relay_outbox import AlmacenEventosDiferido
+from app.application.action_service import ActionService
+from app.application.mappers import orden_a_dto
+from benchmarks.cargas import generar_flujo_orden
+
+
+@pytest.fixture
+def crear_bd(tmp_path):
+    engines = []
+
+    def crear(nombre="talleres"):
+        engine = construir_engine(f"sqlite:///{tmp_path / (nombre + '.db')}")
+        Base.metadata.create_all(engine)
+        engines.append(engine)
+        return sessionmaker(bind=engine)
+
+    yield crear
+    for engine in engines:
+        engine.dispose()
+
+
+def _ejecutar(fabrica_sesiones, comandos):
+    sesion = fabrica_sesiones()
+    servicio = ActionService(UnidadTrabajoSQL(sesion).obtener_repositorio_orden(), AlmacenEventosDiferido())
+    for comando in comandos:
+        servicio.procesar_comando(comando)
+    sesion.close()
+
+
+def _obtener(fabrica_sesiones, order_id):
+    sesion = fabrica_sesiones()
+    orden = UnidadTrabajoSQL(sesion).obtener_repositorio_orden().obtener(order_id)
+    sesion.close()
+    return orden
+
+
+def _contar(fabrica_sesiones, tabla):
+    sesion = fabrica_sesiones()
+    try:
+        return sesion.execute(text(f"SELECT COUNT(*) FROM {tabla}")).scalar()
+    finally:
+        sesion.close()
+
+
+def _resumen(orden):
+    dto = orden_a_dto(orden)
+    return dto.model_dump(exclude={"events", "created_at", "updated_at"}), [e.type for e in dto.events]
+
+
+def test_reconstruye_la_misma_orden_que_el_modo_por_columnas(crear_bd, monkeypatch):
+    comandos = generar_flujo_orden("ORD-ES-1", servicios=3, reautorizar=True, aleatorio=random.Random(7))
+    columnas = crear_bd("columnas")
+    _ejecutar(columnas, comandos)
+
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", "true")
+    eventos = crear_bd("eventos")
+    _ejecutar(eventos, comandos)
+
+    assert _resumen(_obtener(eventos, "ORD-ES-1")) == _resumen(_obtener(columnas, "ORD-ES-1"))
+    assert _obtener(eventos, "ORD-ES-1").estado.value == "DELIVERED"
+
+
+def test_guardar_solo_agrega_eventos(crear_bd, monkeypatch):
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", "true")
+    fabrica = crear_bd()
+    _ejecutar(fabrica, generar_flujo_orden("ORD-ES-2", servicios=2, reautorizar=False, aleatorio=random.Random(1)))
+
+    orden = _obtener(fabrica, "ORD-ES-2")
+    assert _contar(fabrica, "servicios") == 0
+    assert _contar(fabrica, "eventos") == len(orden.eventos)
+    # Las columnas de estado se mantienen para consultas
+    sesion = fabrica()
+    assert sesion.execute(text("SELECT estado, event_sourced FROM ordenes")).one() == ("DELIVERED", 1)
+    sesion.close()
+
+
+def test_carga_desde_la_ultima_instantanea(crear_bd, monkeypatch):
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", "true")
+    monkeypatch.setenv("ORDER_SNAPSHOT_EVERY", "4")
+    fabrica = crear_bd()
+    _ejecutar(fabrica, generar_flujo_orden("ORD-ES-3", servicios=4, reautorizar=True, aleatorio=random.Random(3)))
+    completa = Orden.desde_eventos(_obtener(fabrica, "ORD-ES-3").eventos)
+
+    aplicados = []
+    original = Orden.aplicar_eventos
+    monkeypatch.setattr(Orden, "aplicar_eventos", lambda self, eventos: (aplicados.append(len(eventos)), original(self, eventos)))
+    orden = _obtener(fabrica, "ORD-ES-3")
+
+    assert _contar(fabrica, "instantaneas_ordenes") >= 2
+    assert aplicados and aplicados[0] < 4
+    assert _resumen(orden) == _resumen(completa)
+
+
+def test_orden_existente_pasa_a_eventos_con_una_instantanea(crear_bd, monkeypatch):
+    fabrica = crear_bd()
+    _ejecutar(fabrica, generar_flujo_orden("ORD-OTRA", servicios=2, reautorizar=False, aleatorio=random.Random(2))[:3])
+    sesion = fabrica()
+    repo = UnidadTrabajoSQL(sesion).obtener_repositorio_orden()
+    orden = Orden("ORD-ES-4", "Ana", "XYZ-123", ahora())
+    orden.agregar_servicio(Servicio("Frenos", Decimal("100")))
+    repo.guardar(orden)
+    id_previo = orden.servicios[0].id_servicio
+    sesion.close()
+
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", "true")
+    sesion = fabrica()
+    repo = UnidadTrabajoSQL(sesion).obtener_repositorio_orden()
+    orden = repo.obtener("ORD-ES-4")
+    orden.agregar_servicio(Servicio("Aceite", Decimal("40")))
+    repo.guardar(orden)
+    sesion.close()
+
+    orden = _obtener(fabrica, "ORD-ES-4")
+    assert _contar(fabrica, "instantaneas_ordenes") == 1
+    assert [s.id_servicio for s in orden.servicios] == [id_previo, id_previo + 1]
+    assert [e.tipo for e in orden.eventos] == ["SERVICE_ADDED", "SERVICE_ADDED"]
+
+
+def test_conflicto_de_version_en_modo_eventos(crear_bd, monkeypatch):
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", "true")
+    fabrica = crear_bd()
+    _ejecutar(fabrica, generar_flujo_orden("ORD-ES-5", servicios=1, reautorizar=False, aleatorio=random.Random(5))[:2])
+    sesion_a, sesion_b = fabrica(), fabrica()
+    repo_a = UnidadTrabajoSQL(sesion_a).obtener_repositorio_orden()
+    repo_b = UnidadTrabajoSQL(sesion_b).obtener_repositorio_orden()
+    orden_a, orden_b = repo_a.obtener("ORD-ES-5"), repo_b.obtener("ORD-ES-5")
+
+    orden_a.establecer_estado_diagnosticado()
+    repo_a.guardar(orden_a)
+    orden_b.cancelar("Duplicada")
+    with pytest.raises(ErrorDominio) as exc:
+        repo_b.guardar(orden_b)
+
+    assert exc.value.codigo == CodigoError.CONCURRENT_MODIFICATION
+    assert [e.tipo for e in _obtener(fabrica, "ORD-ES-5").eventos][-1] == "DIAGNOSED"
+    sesion_a.close()
+    sesion_b.close()
+
+
+def test_vehiculo_corregido_sin_evento_se_conserva(crear_bd, monkeypatch):
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", "true")
+    fabrica = crear_bd()
+    _ejecutar(fabrica, generar_flujo_orden("ORD-ES-6", servicios=1, reautorizar=False, aleatorio=random.Random(6))[:2])
+    sesion = fabrica()
+    repo = UnidadTrabajoSQL(sesion).obtener_repositorio_orden()
+    orden = repo.obtener("ORD-ES-6")
+    orden.vehiculo = "NEW-001"
+    repo.guardar(orden)
+    sesion.close()
+
+    assert _obtener(fabrica, "ORD-ES-6").vehiculo == "NEW-001"
@@ -0,0 +1,87 @@
+"""Tests del registro de métricas en proceso y su exposición en formato Prometheus."""
+
+from unittest.mock import Mock
+
+from app.infrastructure.metricas import RegistroMetricas, duracion_comandos, errores_comandos
+from app.application.action_service import ActionService
+from app.drivers.api.routes import metricas
+
+
+def test_contador_acumula_por_etiquetas():
+    registro = RegistroMetricas()
+    contador = registro.contador("pruebas_total", "Pruebas", ("op",))
+
+    contador.inc("A")
+    contador.inc("A")
+    contador.inc("B", valor=3)
+
+    assert contador.valor("A") == 2
+    texto = registro.exponer()
+    assert "# TYPE pruebas_total counter" in texto
+    assert 'pruebas_total{op="A"} 2' in texto
+    assert 'pruebas_total{op="B"} 3' in texto
+
+
+def test_histograma_expone_buckets_acumulados():
+    registro = RegistroMetricas()
+    histograma = registro.histograma("latencia_seconds", "Latencia", ("route",), buckets=(0.1, 1.0))
+
+    histograma.observar(0.05, "/x")
+    histograma.observar(0.1, "/x")
+    histograma.observar(5.0, "/x")
+
+    texto = registro.exponer()
+    assert 'latencia_seconds_bucket{route="/x",le="0.1"} 2' in texto
+    assert 'latencia_seconds_bucket{route="/x",le="1"} 2' in texto
+    assert 'latencia_seconds_bucket{route="/x",le="+Inf"} 3' in texto
+    assert 'latencia_seconds_count{route="/x"} 3' in texto
+    assert histograma.conteo("/x") == 3
+
+
+def test_gauge_funcion_ignora_errores():
+    registro = RegistroMetricas()
+    registro.gauge("cola", "Cola", lambda: {(): 7})
+    registro.gauge("rota", "Rota", Mock(side_effect=RuntimeError("sin bd")))
+
+    texto = registro.exponer()
+    assert "cola 7" in texto
+    assert "# TYPE rota gauge" in texto
+
+
+def test_etiquetas_se_escapan():
+    registro = RegistroMetricas()
+    registro.contador("c", "C", ("v",)).inc('a"b')
+    assert 'c{v="a\\"b"} 1' in registro.exponer()
+
+
+def test_procesar_comando_registra_latencia_y_errores():
+    servicio = ActionService(Mock(), Mock())
+    servicio.repo.obtener.return_value = None
+    antes_latencia = duracion_comandos.conteo("DELIVER")
+    antes_errores = errores_comandos.valor("DELIVER", "ORDER_NOT_FOUND")
+
+    _, _, error = servicio.procesar_comando({"op": "DELIVER", "data": {"order_id": "NO-EXISTE"}})
+
+    assert error.code == "ORDER_NOT_FOUND"
+    assert duracion_comandos.conteo("DELIVER") == antes_latencia + 1
+    assert errores_comandos.valor("DELIVER", "ORDER_NOT_FOUND") == antes_errores + 1
+
+
+def test_procesar_comando_agrupa_operaciones_desconocidas():
+    servicio = ActionService(Mock(), Mock())
+    servicio.repo.obtener.return_value = None
+    antes = duracion_comandos.conteo("UNKNOWN")
+
+    servicio.procesar_comando({"op": "OP_INVENTADA_123", "data": {}})
+
+    assert duracion_comandos.conteo("UNKNOWN") == antes + 1
+
+
+def test_endpoint_metrics_expone_formato_prometheus():
+    respuesta = metricas()
+
+    assert respuesta.media_type.startswith("text/plain")
+    cuerpo = respuesta.body.decode()
+    assert "# TYPE http_request_duration_seconds histogram" in cuerpo
+    assert "# TYPE command_duration_seconds histogram" in cuerpo
+    assert "# TYPE db_pool_connections gauge" in cuerpo
@@ -0,0 +1,196 @@
+"""Tests de la historia de una orden: vista en un punto (GET /orders/{id}?as_of=) y eventos paginados."""
+
+import json
+import random
+import asyncio
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entidades import Orden, Servicio, Evento
+from app.domain.exceptions import ErrorDominio
+from app.domain.zona_horaria import ahora
+from app.infrastructure.db import construir_engine
+from app.infrastructure.models import Base, EventoModel
+from app.infrastructure.repositories import UnidadTrabajoSQL
+from app.infrastructure.repositories.repositorio_evento import RepositorioEventoSQL
+from app.infrastructure.relay_outbox import AlmacenEventosDiferido
+from app.infrastructure.cache_historico import CacheOrdenesHistoricas, cache_ordenes_historicas
+from app.application.action_service import ActionService
+from app.application.mappers import orden_a_dto
+from app.drivers.api import routes
+from benchmarks.cargas import generar_flujo_orden
+
+
+@pytest.fixture
+def fabrica_sesiones(tmp_path):
+    engine = construir_engine(f"sqlite:///{tmp_path / 'talleres.db'}")
+    Base.metadata.create_all(engine)
+    cache_ordenes_historicas.limpiar()
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _preparar(fabrica_sesiones, order_id="ORD-HIST-1"):
+    sesion = fabrica_sesiones()
+    servicio = ActionService(UnidadTrabajoSQL(sesion).obtener_repositorio_orden(), AlmacenEventosDiferido())
+    # Otra orden antes para que los ids de servicio de la BD no coincidan con la numeración local
+    for comando in generar_flujo_orden("ORD-PREVIA", servicios=2, reautorizar=False, aleatorio=random.Random(0))[:3]:
+        servicio.procesar_comando(comando)
+    for comando in generar_flujo_orden(order_id, servicios=3, reautorizar=True, aleatorio=random.Random(4)):
+        servicio.procesar_comando(comando)
+    return UnidadTrabajoSQL(sesion).obtener_repositorio_orden()
+
+
+def _resumen(orden):
+    return orden_a_dto(orden).model_dump()
+
+
+@pytest.mark.parametrize("event_sourcing", ["false", "true"])
+def test_cada_prefijo_de_la_historia(fabrica_sesiones, monkeypatch, event_sourcing):
+    monkeypatch.setenv("ORDER_EVENT_SOURCING", event_sourcing)
+    monkeypatch.setenv("ORDER_SNAPSHOT_EVERY", "3")
+    repo = _preparar(fabrica_sesiones)
+    actual = repo.obtener("ORD-HIST-1")
+    ids_servicios = [(s.id_servicio, [c.id_componente for c in s.componentes]) for s in actual.servicios]
+
+    for n in range(1, len(actual.eventos) + 1):
+        esperada = Orden.desde_eventos(actual.eventos[:n], id=actual.id, ids_servicios=ids_servicios)
+        assert _resumen(repo.obtener_historica("ORD-HIST-1", secuencia=n)) == _resumen(esperada)
+
+    assert _resumen(repo.obtener_historica("ORD-HIST-1", secuencia=999)) == _resumen(actual)
+
+
+def test_as_of_por_fecha(fabrica_sesiones):
+    repo = _preparar(fabrica_sesiones)
+    eventos = repo.obtener("ORD-HIST-1").eventos
+    autorizacion = next(e for e in eventos if e.tipo == "AUTHORIZED")
+
+    orden = repo.obtener_historica("ORD-HIST-1", momento=autorizacion.timestamp)
+
+    assert orden.estado.value == "AUTHORIZED"
+    assert orden.eventos[-1].tipo == "AUTHORIZED"
+    assert repo.obtener_historica("ORD-HIST-1", momento=eventos[0].timestamp - timedelta(days=1)) is None
+    assert repo.obtener_historica("ORD-NO-EXISTE", secuencia=1) is None
+
+
+def test_estados_reconstruidos_se_sirven_del_cache(fabrica_sesiones, monkeypatch):
+    repo = _preparar(fabrica_sesiones)
+    primera = repo.obtener_historica("ORD-HIST-1", secuencia=5)
+
+    monkeypatch.setattr(Orden, "desde_eventos", classmethod(lambda cls, *a, **k: pytest.fail("no debe reconstruir")))
+    segunda = repo.obtener_historica("ORD-HIST-1", secuencia=5)
+
+    assert _resumen(segunda) == _resumen(primera)
+    assert segunda is not primera
+
+
+def test_historia_anterior_a_los_eventos_con_datos_no_se_reconstruye(fabrica_sesiones):
+    sesion = fabrica_sesiones()
+    repo = UnidadTrabajoSQL(sesion).obtener_repositorio_orden()
+    orden = Orden("ORD-LEGADO", "Ana", "XYZ-123", ahora())
+    orden.eventos.append(Evento("CREATED", ahora(), {}))
+    orden.agregar_servicio(Servicio("Frenos", Decimal("100")))
+    repo.guardar(orden)
+
+    with pytest.raises(ErrorDominio):
+        repo.obtener_historica("ORD-LEGADO", secuencia=1)
+
+
+def test_cache_lru_expulsa_la_entrada_menos_usada():
+    cache = CacheOrdenesHistoricas(capacidad=2)
+    for clave in ("a", "b"):
+        cache.guardar(clave, Orden(f"ORD-{clave.upper()}", "Ana", "XYZ-123", ahora()))
+    cache.obtener("a")
+    cache.guardar("c", Orden("ORD-C", "Ana", "XYZ-123", ahora()))
+
+    assert cache.obtener("b") is None
+    assert cache.obtener("a").order_id == "ORD-A"
+    assert cache.obtener("c").order_id == "ORD-C"
+
+
+def test_eventos_paginados_por_secuencia_y_tipo(fabrica_sesiones):
+    repo = _preparar(fabrica_sesiones)
+    eventos = repo.obtener("ORD-HIST-1").eventos
+
+    recorridos, cursor = [], 0
+    while True:
+        pagina = repo.listar_eventos("ORD-HIST-1", despues_de=cursor, limite=4)
+        if not pagina:
+            break
+        recorridos.extend(pagina)
+        cursor = pagina[-1][0]
+    assert [s for s, _ in recorridos] == list(range(1, len(eventos) + 1))
+    assert [e.tipo for _, e in recorridos] == [e.tipo for e in eventos]
+    assert recorridos[0][1].metadatos["order_id"] == "ORD-HIST-1"
+
+    servicios = repo.listar_eventos("ORD-HIST-1", limite=100, tipos=["SERVICE_ADDED"])
+    assert [e.tipo for _, e in servicios] == ["SERVICE_ADDED"] * 3
+    assert [s for s, _ in servicios] == [i + 1 for i, e in enumerate(eventos) if e.tipo == "SERVICE_ADDED"]
+    assert repo.listar_eventos("ORD-NO-EXISTE") is None
+
+
+def test_historia_ndjson_lee_todas_las_paginas(fabrica_sesiones, monkeypatch):
+    monkeypatch.setattr(routes, "TAMANO_PAGINA_STREAM", 4)
+    repo = _preparar(fabrica_sesiones)
+    total = len(repo.obtener("ORD-HIST-1").eventos)
+
+    respuesta = routes.listar_eventos_orden("ORD-HIST-1", repo, accept="application/x-ndjson")
+
+    async def leer():
+        return [parte async for parte in respuesta.body_iterator]
+    lineas = [json.loads(linea) for linea in "".join(asyncio.run(leer())).splitlines()]
+    assert [l["sequence"] for l in lineas] == list(range(1, total + 1))
+    assert lineas[0]["type"] == "CREATED"
+
+
+def test_feed_global_recorre_todas_las_ordenes_por_cursor(fabrica_sesiones):
+    repo = _preparar(fabrica_sesiones)
+    por_orden = {o: [e.tipo for e in repo.obtener(o).eventos] for o in ("ORD-PREVIA", "ORD-HIST-1")}
+
+    leidos, cursor = [], 0
+    while True:
+        pagina = repo.listar_eventos_globales(despues_de=cursor, limite=5)
+        if not pagina:
+            break
+        leidos.extend(pagina)
+        cursor = pagina[-1][0]
+    assert [c for c, _, _ in leidos] == sorted(c for c, _, _ in leidos)
+    for order_id, tipos in por_orden.items():
+        assert [e.tipo for _, o, e in leidos if o == order_id] == tipos
+    assert [o for _, o, _ in repo.listar_eventos_globales(tipos=["CREATED"])] == ["ORD-PREVIA", "ORD-HIST-1"]
+
+
+def test_feed_sigue_el_orden_de_commit_y_no_el_de_id(fabrica_sesiones):
+    repo = _preparar(fabrica_sesiones)
+    ids_orden = {o: repo.obtener(o).id for o in ("ORD-PREVIA", "ORD-HIST-1")}
+    repo.sesion.close()
+
+    def leer(cursor):
+        sesion = fabrica_sesiones()
+        try:
+            return UnidadTrabajoSQL(sesion).obtener_repositorio_orden().listar_eventos_globales(despues_de=cursor, limite=1000)
+        finally:
+            sesion.close()
+
+    def insertar(sesion, order_id, id_evento, tipo):
+        sesion.add(EventoModel(id_evento=id_evento, id_orden=ids_orden[order_id], tipo=tipo, timestamp=ahora()))
+        RepositorioEventoSQL(sesion).asignar_posiciones_feed(ids_orden[order_id])
+        sesion.commit()
+
+    cursor = leer(0)[-1][0]
+    # Con PostgreSQL, T1 toma el id 999 de la secuencia, T2 el 1000 y T2 confirma primero. SQLite serializa
+    # las escrituras, así que los ids de la secuencia se fijan a mano
+    t1, t2 = fabrica_sesiones(), fabrica_sesiones()
+    insertar(t2, "ORD-PREVIA", 1000, "T2")
+    leidos = leer(cursor)
+    assert [(o, e.tipo) for _, o, e in leidos] == [("ORD-PREVIA", "T2")]
+
+    insertar(t1, "ORD-HIST-1", 999, "T1")
+    # Con id_evento como cursor el consumidor ya estaría en 1000 y nunca vería el 999
+    assert [(o, e.tipo) for _, o, e in leer(leidos[-1][0])] == [("ORD-HIST-1", "T1")]
+    t1.close()
+    t2.close()
+
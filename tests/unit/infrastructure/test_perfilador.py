@@ -0,0 +1,121 @@
+"""Tests del perfilado de requests bajo demanda."""
+
+import os
+import time
+import pstats
+import threading
+from contextvars import copy_context
+
+import pytest
+
+from app.infrastructure.perfilador import (
+    SolicitudPerfil, perfil_var, solicita_perfil, perfilable, _nombre_archivo
+)
+
+
+@pytest.fixture
+def directorio_perfiles(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _trabajo_lento(n):
+    fin = time.perf_counter() + 0.03
+    while time.perf_counter() < fin:
+        pass
+    return n * 2
+
+
+def _con_solicitud(request_id, funcion, *args):
+    solicitud = SolicitudPerfil(request_id)
+    token = perfil_var.set(solicitud)
+    try:
+        return funcion(*args), solicitud
+    finally:
+        perfil_var.reset(token)
+
+
+def test_solicita_perfil_requiere_habilitarlo(monkeypatch):
+    monkeypatch.delenv("PROFILING_ENABLED", raising=False)
+    assert solicita_perfil("1") is False
+
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    assert solicita_perfil("1") is True
+    assert solicita_perfil(None) is False
+
+
+def test_solicita_perfil_con_token(monkeypatch):
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("PROFILING_TOKEN", "s3creto")
+    assert solicita_perfil("1") is False
+    assert solicita_perfil("s3creto") is True
+
+
+def test_perfilable_por_muestreo_guarda_pilas_colapsadas(directorio_perfiles, monkeypatch):
+    monkeypatch.setenv("PROFILER_INTERVAL_MS", "1")
+    resultado, solicitud = _con_solicitud("req-muestreo", perfilable(_trabajo_lento), 4)
+
+    assert resultado == 8
+    assert solicitud.archivo == os.path.join(str(directorio_perfiles), "req-muestreo.folded")
+    contenido = open(solicitud.archivo, encoding="utf-8").read()
+    assert "_trabajo_lento" in contenido
+    pila, muestras = contenido.splitlines()[0].rsplit(" ", 1)
+    assert int(muestras) >= 1
+
+
+def test_perfilable_con_cprofile_guarda_pstats(directorio_perfiles, monkeypatch):
+    monkeypatch.setenv("PROFILER_MODE", "cprofile")
+    _, solicitud = _con_solicitud("req-cprofile", perfilable(_trabajo_lento), 1)
+
+    assert solicitud.archivo.endswith("req-cprofile.prof")
+    estadisticas = pstats.Stats(solicitud.archivo)
+    assert any(funcion[2] == "_trabajo_lento" for funcion in estadisticas.stats)
+
+
+def test_cprofile_ocupado_perfila_por_muestreo(directorio_perfiles, monkeypatch):
+    monkeypatch.setenv("PROFILER_MODE", "cprofile")
+    dentro, soltar = threading.Event(), threading.Event()
+
+    def esperar():
+        dentro.set()
+        soltar.wait(5)
+        return 1
+
+    resultado = {}
+    primero = threading.Thread(target=lambda: resultado.update(
+        primero=copy_context().run(_con_solicitud, "req-primero", perfilable(esperar))
+    ))
+    primero.start()
+    assert dentro.wait(5)
+    try:
+        valor, segunda = _con_solicitud("req-segundo", perfilable(_trabajo_lento), 2)
+    finally:
+        soltar.set()
+        primero.join(5)
+
+    assert valor == 4
+    assert segunda.archivo.endswith("req-segundo.folded")
+    assert resultado["primero"][1].archivo.endswith("req-primero.prof")
+
+
+def test_cprofile_tomado_por_otra_herramienta_perfila_por_muestreo(directorio_perfiles, monkeypatch):
+    class ProfileOcupado:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setenv("PROFILER_MODE", "cprofile")
+    monkeypatch.setattr("app.infrastructure.perfilador.cProfile.Profile", ProfileOcupado)
+    valor, solicitud = _con_solicitud("req-ocupado", perfilable(_trabajo_lento), 3)
+
+    assert valor == 6
+    assert solicitud.archivo.endswith("req-ocupado.folded")
+
+
+def test_perfilable_sin_solicitud_no_perfila(directorio_perfiles):
+    assert perfilable(_trabajo_lento)(3) == 6
+    assert os.listdir(directorio_perfiles) == []
+
+
+def test_nombre_archivo_no_permite_rutas():
+    assert "/" not in _nombre_archivo("../../etc/passwd", "prof")
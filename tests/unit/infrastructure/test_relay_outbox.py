@@ -0,0 +1,122 @@
+"""Tests del outbox transaccional de eventos y su relay."""
+
+import time
+from decimal import Decimal
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.infrastructure.models import Base, OutboxModel
+from app.infrastructure.repositories.repositorio_orden import RepositorioOrden
+from app.infrastructure.relay_outbox import RelayOutbox, AlmacenEventosDiferido
+from app.application.ports import AlmacenEventos
+from app.domain.entidades import Orden, Evento, Servicio
+from app.domain.zona_horaria import ahora
+
+
+@pytest.fixture
+def fabrica_sesion():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _guardar_orden(fabrica_sesion, usar_outbox=True):
+    sesion = fabrica_sesion()
+    repo = RepositorioOrden(sesion, usar_outbox=usar_outbox)
+    orden = Orden("ORD-OUT-1", "Juan", "ABC-123", ahora())
+    orden.eventos.append(Evento("CREATED", ahora(), {}))
+    repo.guardar(orden)
+    return sesion, repo
+
+
+def test_guardar_escribe_outbox_en_la_misma_transaccion(fabrica_sesion):
+    sesion, repo = _guardar_orden(fabrica_sesion)
+
+    registros = sesion.query(OutboxModel).all()
+    assert [r.tipo for r in registros] == ["CREATED"]
+    assert registros[0].order_id == "ORD-OUT-1"
+    assert registros[0].fecha_publicacion is None
+
+
+def test_guardar_solo_encola_eventos_nuevos(fabrica_sesion):
+    sesion, repo = _guardar_orden(fabrica_sesion)
+
+    orden = repo.obtener("ORD-OUT-1")
+    orden.agregar_servicio(Servicio("Frenos", Decimal("100")))
+    orden.establecer_estado_diagnosticado()
+    repo.guardar(orden)
+
+    tipos = [r.tipo for r in sesion.query(OutboxModel).order_by(OutboxModel.id_outbox).all()]
+    assert tipos == ["CREATED", "SERVICE_ADDED", "DIAGNOSED"]
+
+
+def test_guardar_sin_outbox_no_escribe(fabrica_sesion):
+    sesion, _ = _guardar_orden(fabrica_sesion, usar_outbox=False)
+    assert sesion.query(OutboxModel).count() == 0
+
+
+def test_rollback_descarta_eventos_del_outbox(fabrica_sesion):
+    sesion = fabrica_sesion()
+    repo = RepositorioOrden(sesion, usar_outbox=True)
+    orden = Orden("ORD-OUT-2", "Ana", "XYZ-789", ahora())
+    orden.eventos.append(Evento("CREATED", ahora(), {}))
+    repo._guardar_entidades_relacionadas = Mock(side_effect=RuntimeError("fallo"))
+
+    with pytest.raises(RuntimeError):
+        repo.guardar(orden)
+
+    assert sesion.query(OutboxModel).count() == 0
+
+
+def test_relay_publica_lote_y_marca_publicados(fabrica_sesion):
+    _guardar_orden(fabrica_sesion)
+    almacen = Mock(spec=AlmacenEventos)
+    relay = RelayOutbox(fabrica_sesion, almacen, tamano_lote=10, intervalo_segundos=0)
+
+    assert relay.procesar_lote() == 1
+    assert relay.procesar_lote() == 0
+
+    evento = almacen.registrar.call_args[0][0]
+    assert evento.tipo == "CREATED"
+    sesion = fabrica_sesion()
+    assert sesion.query(OutboxModel).filter(OutboxModel.fecha_publicacion.is_(None)).count() == 0
+
+    metricas = relay.metricas.a_dict()
+    assert metricas["eventos_publicados"] == 1
+    assert metricas["lotes_procesados"] == 1
+    assert metricas["errores"] == 0
+
+
+def test_relay_error_reintenta_lote(fabrica_sesion):
+    _guardar_orden(fabrica_sesion)
+    almacen = Mock(spec=AlmacenEventos)
+    almacen.registrar.side_effect = [RuntimeError("caído"), None]
+    relay = RelayOutbox(fabrica_sesion, almacen, tamano_lote=10, intervalo_segundos=0)
+
+    assert relay.procesar_lote() == 0
+    assert relay.metricas.a_dict()["errores"] == 1
+    assert relay.procesar_lote() == 1
+
+
+def test_relay_iniciar_y_detener(fabrica_sesion):
+    _guardar_orden(fabrica_sesion)
+    almacen = Mock(spec=AlmacenEventos)
+    relay = RelayOutbox(fabrica_sesion, almacen, tamano_lote=10, intervalo_segundos=0.01)
+
+    relay.iniciar()
+    limite = time.monotonic() + 5
+    # El hilo puede no haber corrido aún: detener antes del primer lote lo dejaría sin publicar
+    while not almacen.registrar.called and time.monotonic() < limite:
+        time.sleep(0.01)
+    relay.detener()
+
+    almacen.registrar.assert_called_once()
+
+
+def test_almacen_diferido_no_publica():
+    AlmacenEventosDiferido().registrar(Evento("CREATED", ahora(), {}))
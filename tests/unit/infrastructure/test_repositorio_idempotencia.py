@@ -0,0 +1,102 @@
+import random
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.db import construir_engine
+from app.infrastructure.models import Base
+from app.infrastructure.repositories import RepositorioIdempotenciaSQL, UnidadTrabajoSQL
+from app.infrastructure.relay_outbox import AlmacenEventosDiferido
+from app.application.action_service import ActionService
+from benchmarks.cargas import generar_flujo_orden
+
+
+@pytest.fixture
+def fabrica_sesiones(tmp_path):
+    engine = construir_engine(f"sqlite:///{tmp_path / 'talleres.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_reservar_completar_y_leer(fabrica_sesiones):
+    sesion = fabrica_sesiones()
+    repo = RepositorioIdempotenciaSQL(sesion)
+
+    assert repo.reservar("k", "h", 60) is None
+    en_curso = repo.reservar("k", "h", 60)
+    assert en_curso.huella == "h" and en_curso.respuesta is None
+
+    repo.completar("k", {"orders": [1]})
+    assert repo.reservar("k", "h", 60).respuesta == {"orders": [1]}
+    sesion.close()
+
+
+def test_la_reserva_se_ve_desde_otra_sesion(fabrica_sesiones):
+    sesion_a, sesion_b = fabrica_sesiones(), fabrica_sesiones()
+
+    assert RepositorioIdempotenciaSQL(sesion_a).reservar("k", "h", 60) is None
+    assert RepositorioIdempotenciaSQL(sesion_b).reservar("k", "h", 60).respuesta is None
+    sesion_a.close()
+    sesion_b.close()
+
+
+def test_expiradas_se_reemplazan_y_purgan(fabrica_sesiones):
+    sesion = fabrica_sesiones()
+    repo = RepositorioIdempotenciaSQL(sesion)
+    repo.reservar("vieja", "h", 0)
+    repo.reservar("otra", "h", 0)
+
+    assert repo.reservar("vieja", "nueva", 60) is None
+    assert repo.purgar_expirados() == 1
+    assert sesion.execute(text("SELECT clave FROM respuestas_idempotentes")).scalars().all() == ["vieja"]
+    sesion.close()
+
+
+def test_reserva_abandonada_se_retoma_y_la_respuesta_dura_el_ttl(fabrica_sesiones):
+    sesion_a, sesion_b = fabrica_sesiones(), fabrica_sesiones()
+    muerto, otro = RepositorioIdempotenciaSQL(sesion_a), RepositorioIdempotenciaSQL(sesion_b)
+    # El proceso que reservó muere sin completar ni liberar
+    assert muerto.reservar("k", "h", 3600, 0) is None
+
+    assert otro.reservar("k", "h", 3600, 60) is None
+    assert muerto.reservar("k", "h", 3600, 60).respuesta is None
+    otro.completar("k", {"orders": [1]})
+    assert muerto.reservar("k", "h", 3600, 0).respuesta == {"orders": [1]}
+    sesion_a.close()
+    sesion_b.close()
+
+
+def test_liberar_permite_volver_a_reservar(fabrica_sesiones):
+    sesion = fabrica_sesiones()
+    repo = RepositorioIdempotenciaSQL(sesion)
+    repo.reservar("k", "h", 60)
+    repo.liberar("k")
+
+    assert repo.reservar("k", "h", 60) is None
+    sesion.close()
+
+
+def test_lote_repetido_en_paralelo_no_duplica_eventos(fabrica_sesiones):
+    from app.drivers.api.routes import procesar_comandos
+    from app.drivers.api.schemas import CommandsRequest
+
+    flujos = [generar_flujo_orden(f"ORD-I{n}", servicios=1, reautorizar=False, aleatorio=random.Random(n)) for n in range(3)]
+    request = CommandsRequest(commands=[c for grupo in zip(*flujos) for c in grupo])
+
+    respuestas = []
+    for _ in range(2):
+        sesion = fabrica_sesiones()
+        unidad = UnidadTrabajoSQL(sesion)
+        servicio = ActionService(unidad.obtener_repositorio_orden(), AlmacenEventosDiferido(),
+                                 idempotencia=unidad.obtener_repositorio_idempotencia())
+        respuestas.append(procesar_comandos(request, servicio, idempotency_key="lote-I"))
+        sesion.close()
+
+    assert respuestas[0].errors == []
+    assert respuestas[1] == respuestas[0]
+    sesion = fabrica_sesiones()
+    eventos = sesion.execute(text("SELECT COUNT(*) FROM eventos")).scalar()
+    assert eventos == len(respuestas[0].events)
+    sesion.close()
@@ -0,0 +1,130 @@
+import threading
+from decimal import Decimal
+
+import pytest
+
+from app.domain.entidades import Orden, Servicio, Componente, Evento
+from app.domain.zona_horaria import ahora
+from app.infrastructure.repositories import RepositorioOrdenMemoria
+from app.infrastructure.repositories.repositorio_orden_memoria import repositorio_memoria_habilitado
+from app.infrastructure.almacen_eventos_memoria import AlmacenEventosMemoria
+from app.application.action_service import ActionService
+
+
+def _orden(order_id="ORD-001"):
+    orden = Orden(order_id, "Cliente", "ABC-123", ahora())
+    orden.agregar_servicio(Servicio("Frenos", Decimal("100.00"), [Componente("Pastillas", Decimal("50.00"))]))
+    return orden
+
+
+def test_guardar_asigna_ids():
+    repo = RepositorioOrdenMemoria()
+    orden = _orden()
+    repo.guardar(orden)
+
+    assert orden.id == 1
+    assert orden.servicios[0].id_servicio == 1
+    assert orden.servicios[0].componentes[0].id_componente == 1
+
+    guardada = repo.obtener("ORD-001")
+    guardada.agregar_servicio(Servicio("Aceite", Decimal("30.00")))
+    repo.guardar(guardada)
+    assert repo.obtener("ORD-001").servicios[1].id_servicio == 2
+
+
+def test_cambios_sin_guardar_no_se_ven():
+    repo = RepositorioOrdenMemoria()
+    repo.guardar(_orden())
+
+    orden = repo.obtener("ORD-001")
+    orden.cliente = "Otro"
+
+    assert repo.obtener("ORD-001").cliente == "Cliente"
+    assert repo.obtener("NO-EXISTE") is None
+
+
+def test_id_distinto_para_mismo_order_id_falla():
+    repo = RepositorioOrdenMemoria()
+    repo.guardar(_orden())
+    otra = _orden()
+    otra.id = 99
+
+    with pytest.raises(ValueError):
+        repo.guardar(otra)
+
+
+def test_guardar_concurrente():
+    repo = RepositorioOrdenMemoria()
+
+    def trabajar(inicio):
+        for i in range(inicio, inicio + 50):
+            repo.guardar(_orden(f"ORD-{i}"))
+
+    hilos = [threading.Thread(target=trabajar, args=(n * 50,)) for n in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    ordenes = repo.listar()
+    assert len(ordenes) == 400
+    assert len({o.id for o in ordenes}) == 400
+    assert len({o.servicios[0].id_servicio for o in ordenes}) == 400
+
+
+def test_almacen_eventos_con_limite():
+    almacen = AlmacenEventosMemoria(limite=2)
+    for tipo in ("CREATED", "SERVICE_ADDED", "DIAGNOSED"):
+        almacen.registrar(Evento(tipo, ahora()))
+
+    assert [e.tipo for e in almacen.listar()] == ["SERVICE_ADDED", "DIAGNOSED"]
+    almacen.limpiar()
+    assert almacen.listar() == []
+
+
+def test_action_service_con_memoria():
+    repo = RepositorioOrdenMemoria()
+    almacen = AlmacenEventosMemoria()
+    servicio = ActionService(repo, almacen)
+
+    orden, eventos, error = servicio.procesar_comando({
+        "op": "CREATE_ORDER",
+        "data": {"order_id": "ORD-MEM", "customer": "Ana", "vehicle": "XYZ-1"}
+    })
+
+    assert error is None
+    assert orden.order_id == "ORD-MEM"
+
+    orden, eventos, error = servicio.procesar_comando({
+        "op": "ADD_SERVICE",
+        "data": {"order_id": "ORD-MEM", "service": {"description": "Frenos", "labor_estimated_cost": "100.00"}}
+    })
+
+    assert error is None
+    assert repo.obtener("ORD-MEM").servicios[0].id_servicio == 1
+
+    orden, eventos, error = servicio.procesar_comando({"op": "SET_STATE_DIAGNOSED", "data": {"order_id": "ORD-MEM"}})
+
+    assert orden.status == "DIAGNOSED"
+    assert eventos
+    assert [e.tipo for e in almacen.listar()] == ["SERVICE_ADDED"] + [e.type for e in eventos]
+
+
+def test_backend_por_configuracion(monkeypatch):
+    monkeypatch.delenv("REPOSITORY_BACKEND", raising=False)
+    assert repositorio_memoria_habilitado() is False
+    monkeypatch.setenv("REPOSITORY_BACKEND", "Memory")
+    assert repositorio_memoria_habilitado() is True
+
+
+def test_feed_acotado_conserva_los_cursores():
+    repo = RepositorioOrdenMemoria(limite_feed=3)
+    for i in range(3):
+        orden = _orden(f"ORD-{i}")
+        orden.registrar_creacion()
+        repo.guardar(orden)
+
+    feed = repo.listar_eventos_globales()
+    assert [(cursor, order_id) for cursor, order_id, _ in feed] == [(4, "ORD-1"), (5, "ORD-2"), (6, "ORD-2")]
+    assert [cursor for cursor, _, _ in repo.listar_eventos_globales(despues_de=4)] == [5, 6]
+    assert repo.listar_eventos_globales(despues_de=6) == []
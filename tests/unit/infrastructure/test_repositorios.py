@@ -212,6 +212,7 @@ def test_repositorio_orden_deserializar(unidad_trabajo_mock):
     modelo_mock.estado = EstadoOrden.CREATED.value
     modelo_mock.monto_autorizado = None
     modelo_mock.version_autorizacion = 0
+    modelo_mock.event_sourced = False
     modelo_mock.total_real = Decimal('0')
     modelo_mock.fecha_creacion = datetime.now(timezone.utc)
     modelo_mock.fecha_cancelacion = None
@@ -309,8 +310,15 @@ def test_repositorio_orden_guardar_existente():
     modelo_existente = Mock()
     modelo_existente.id = 1
     modelo_existente.order_id = "ORD-001"
+    modelo_existente.version = 1
+    modelo_existente.event_sourced = False
     modelo_existente.servicios = []
     modelo_existente.eventos = []
+    modelo_existente.estado = "CREATED"
+    modelo_existente.id_cliente = 1
+    modelo_existente.fecha_creacion = datetime.now(timezone.utc)
+    modelo_existente.monto_autorizado = None
+    modelo_existente.total_real = "0"
     
     repo_cliente = Mock()
     cliente = Cliente("Juan")
@@ -1243,11 +1251,10 @@ def test_repositorio_vehiculo_buscar_o_crear_integrity_error_sin_conflicto_clien
     
     repo = RepositorioVehiculoSQL(sesion_mock)
     
-    # En este caso, no debería lanzar ErrorDominio porque es el mismo cliente
-    # Debería relanzar IntegrityError
-    with pytest.raises(IntegrityError):
-        repo.buscar_o_crear_por_placa("XYZ-789", id_cliente=1, marca="Honda")
+    # Otra transacción creó la placa para el mismo cliente: se usa ese vehículo
+    vehiculo = repo.buscar_o_crear_por_placa("XYZ-789", id_cliente=1, marca="Honda")
     
+    assert (vehiculo.placa, vehiculo.id_cliente) == ("XYZ-789", 1)
     sesion_mock.rollback.assert_called_once()
 
 
@@ -0,0 +1,210 @@
+import json
+import random
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.zona_horaria import ahora
+from app.infrastructure.db import construir_engine
+from app.infrastructure.models import Base, TrabajoModel
+from app.application.idempotencia import calcular_huella
+from app.infrastructure.repositories import RepositorioTrabajosSQL, RepositorioIdempotenciaSQL
+from app.infrastructure.relay_outbox import AlmacenEventosDiferido
+from app.infrastructure.trabajador_comandos import TrabajadorComandos, claves_por_comando
+from benchmarks.cargas import generar_flujo_orden
+
+
+@pytest.fixture
+def fabrica_sesiones(tmp_path):
+    engine = construir_engine(f"sqlite:///{tmp_path / 'talleres.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _comandos(n=2):
+    return [c for n_orden in range(n) for c in generar_flujo_orden(f"ORD-J{n_orden}", servicios=1, reautorizar=False, aleatorio=random.Random(n_orden))]
+
+
+def _encolar(fabrica_sesiones, comandos):
+    sesion = fabrica_sesiones()
+    id_trabajo = RepositorioTrabajosSQL(sesion).encolar(comandos).id_trabajo
+    sesion.close()
+    return id_trabajo
+
+
+def _trabajo(fabrica_sesiones, id_trabajo):
+    sesion = fabrica_sesiones()
+    trabajo = RepositorioTrabajosSQL(sesion).obtener(id_trabajo)
+    sesion.expunge(trabajo)
+    sesion.close()
+    return trabajo
+
+
+def _contar(fabrica_sesiones, tabla):
+    sesion = fabrica_sesiones()
+    try:
+        return sesion.execute(text(f"SELECT COUNT(*) FROM {tabla}")).scalar()
+    finally:
+        sesion.close()
+
+
+def test_claves_por_comando_respeta_las_existentes():
+    comandos = claves_por_comando("abc", [{"op": "A"}, {"op": "B", "idempotency_key": "propia"}])
+
+    assert [c["idempotency_key"] for c in comandos] == ["trabajo:abc:0", "propia"]
+
+
+def test_worker_ejecuta_el_trabajo_y_guarda_el_resultado(fabrica_sesiones):
+    comandos = _comandos()
+    id_trabajo = _encolar(fabrica_sesiones, comandos)
+    trabajador = TrabajadorComandos(fabrica_sesiones, AlmacenEventosDiferido(), nombre="w1")
+
+    assert trabajador.procesar_siguiente() is True
+    assert trabajador.procesar_siguiente() is False
+
+    trabajo = _trabajo(fabrica_sesiones, id_trabajo)
+    resultado = json.loads(trabajo.resultado_json)
+    assert trabajo.estado == "DONE"
+    assert trabajo.intentos == 1
+    assert resultado["errors"] == []
+    assert [o["status"] for o in resultado["orders"]] == ["DELIVERED", "DELIVERED"]
+    assert _contar(fabrica_sesiones, "eventos") == len(resultado["events"])
+
+
+def test_un_trabajo_lo_toma_un_solo_worker(fabrica_sesiones):
+    _encolar(fabrica_sesiones, [{"op": "DELIVER", "data": {"order_id": "X"}}])
+    sesion_a, sesion_b = fabrica_sesiones(), fabrica_sesiones()
+
+    tomado = RepositorioTrabajosSQL(sesion_a).tomar_siguiente("a", 60, 3)
+    assert tomado is not None
+    assert RepositorioTrabajosSQL(sesion_b).tomar_siguiente("b", 60, 3) is None
+    sesion_a.close()
+    sesion_b.close()
+
+
+def test_bloqueo_vencido_se_retoma_sin_repetir_comandos(fabrica_sesiones):
+    comandos = _comandos(1)
+    id_trabajo = _encolar(fabrica_sesiones, comandos)
+
+    # Un worker ejecuta el trabajo pero muere antes de marcarlo terminado
+    primero = TrabajadorComandos(fabrica_sesiones, AlmacenEventosDiferido(), nombre="caido", bloqueo_segundos=60)
+    primero.procesar_siguiente()
+    sesion = fabrica_sesiones()
+    sesion.query(TrabajoModel).update({
+        TrabajoModel.estado: "RUNNING",
+        TrabajoModel.trabajador: "caido",
+        TrabajoModel.bloqueado_hasta: ahora() - timedelta(seconds=1)
+    })
+    sesion.commit()
+    sesion.close()
+    eventos = _contar(fabrica_sesiones, "eventos")
+
+    segundo = TrabajadorComandos(fabrica_sesiones, AlmacenEventosDiferido(), nombre="w2")
+    assert segundo.procesar_siguiente() is True
+
+    trabajo = _trabajo(fabrica_sesiones, id_trabajo)
+    assert trabajo.estado == "DONE"
+    assert trabajo.trabajador == "w2"
+    assert trabajo.intentos == 2
+    assert json.loads(trabajo.resultado_json)["errors"] == []
+    assert _contar(fabrica_sesiones, "eventos") == eventos
+    assert _contar(fabrica_sesiones, "servicios") == 1
+
+
+def test_reserva_de_un_worker_caido_no_da_el_comando_por_terminado(fabrica_sesiones, monkeypatch):
+    monkeypatch.setenv("IDEMPOTENCY_LEASE_SECONDS", "1")
+    comando = {"op": "CREATE_ORDER", "data": {"order_id": "ORD-R", "customer": "Ana", "vehicle": "ABC-1"}}
+    id_trabajo = _encolar(fabrica_sesiones, [comando])
+    # El worker anterior murió con la clave del comando reservada
+    sesion = fabrica_sesiones()
+    huella = calcular_huella({"op": comando["op"], "data": comando["data"], "ts": None})
+    RepositorioIdempotenciaSQL(sesion).reservar(f"comando:trabajo:{id_trabajo}:0", huella, 3600, 1)
+    sesion.close()
+
+    trabajador = TrabajadorComandos(fabrica_sesiones, AlmacenEventosDiferido(), nombre="w", intervalo_segundos=0.05)
+    assert trabajador.procesar_siguiente() is True
+
+    trabajo = _trabajo(fabrica_sesiones, id_trabajo)
+    assert trabajo.estado == "DONE"
+    assert json.loads(trabajo.resultado_json)["errors"] == []
+    assert _contar(fabrica_sesiones, "ordenes") == 1
+
+
+def test_clave_que_sigue_en_curso_devuelve_el_trabajo(fabrica_sesiones, monkeypatch):
+    monkeypatch.setenv("IDEMPOTENCY_LEASE_SECONDS", "1")
+    comandos = [
+        {"op": "CREATE_ORDER", "data": {"order_id": "ORD-R", "customer": "Ana", "vehicle": "ABC-1"}},
+        {"op": "SET_STATE_DIAGNOSED", "data": {"order_id": "ORD-R"}}
+    ]
+    id_trabajo = _encolar(fabrica_sesiones, comandos)
+    sesion = fabrica_sesiones()
+    huella = calcular_huella({"op": "CREATE_ORDER", "data": comandos[0]["data"], "ts": None})
+    RepositorioIdempotenciaSQL(sesion).reservar(f"comando:trabajo:{id_trabajo}:0", huella, 3600, 60)
+    sesion.close()
+
+    trabajador = TrabajadorComandos(fabrica_sesiones, AlmacenEventosDiferido(), nombre="w", intervalo_segundos=0.05)
+    trabajador.procesar_siguiente()
+
+    trabajo = _trabajo(fabrica_sesiones, id_trabajo)
+    assert trabajo.estado == "PENDING"
+    assert "sigue reservada" in trabajo.error
+    # El comando siguiente de la misma orden no llegó a ejecutarse ni a guardar un resultado
+    assert _contar(fabrica_sesiones, "respuestas_idempotentes") == 1
+
+
+def test_agotados_los_intentos_el_trabajo_falla(fabrica_sesiones):
+    id_trabajo = _encolar(fabrica_sesiones, [{"op": "DELIVER", "data": {"order_id": "X"}}])
+    sesion = fabrica_sesiones()
+    sesion.query(TrabajoModel).update({
+        TrabajoModel.estado: "RUNNING",
+        TrabajoModel.intentos: 3,
+        TrabajoModel.bloqueado_hasta: ahora() - timedelta(seconds=1)
+    })
+    sesion.commit()
+
+    assert RepositorioTrabajosSQL(sesion).tomar_siguiente("w", 60, 3) is None
+    sesion.close()
+    assert _trabajo(fabrica_sesiones, id_trabajo).estado == "FAILED"
+
+
+def test_error_de_infraestructura_devuelve_el_trabajo_a_la_cola(fabrica_sesiones, monkeypatch):
+    id_trabajo = _encolar(fabrica_sesiones, [{"op": "DELIVER", "data": {"order_id": "X"}}])
+    trabajador = TrabajadorComandos(fabrica_sesiones, AlmacenEventosDiferido(), nombre="w", max_intentos=2)
+
+    def falla(*args, **kwargs):
+        raise RuntimeError("BD caída")
+
+    monkeypatch.setattr("app.infrastructure.trabajador_comandos.procesar_lote", falla)
+    trabajador.procesar_siguiente()
+    trabajo = _trabajo(fabrica_sesiones, id_trabajo)
+    assert (trabajo.estado, trabajo.error) == ("PENDING", "BD caída")
+
+    trabajador.procesar_siguiente()
+    assert _trabajo(fabrica_sesiones, id_trabajo).estado == "FAILED"
+
+
+def test_endpoints_encolar_y_consultar(fabrica_sesiones):
+    from fastapi import HTTPException, Response
+    from app.drivers.api.routes import encolar_comandos, obtener_trabajo
+    from app.drivers.api.schemas import CommandsRequest
+
+    sesion = fabrica_sesiones()
+    trabajos = RepositorioTrabajosSQL(sesion)
+    respuesta = Response()
+    encolado = encolar_comandos(CommandsRequest(commands=_comandos(1)), respuesta, trabajos)
+
+    assert encolado.status == "PENDING"
+    assert respuesta.headers["Location"] == f"/jobs/{encolado.job_id}"
+
+    TrabajadorComandos(fabrica_sesiones, AlmacenEventosDiferido()).procesar_siguiente()
+    consultado = obtener_trabajo(encolado.job_id, trabajos)
+    assert consultado.status == "DONE"
+    assert consultado.result.orders[0]["status"] == "DELIVERED"
+
+    with pytest.raises(HTTPException) as exc:
+        obtener_trabajo("no-existe", trabajos)
+    assert exc.value.status_code == 404
+    sesion.close()